@@ -33,7 +33,8 @@ from recidiviz.calculator.pipeline.incarceration.metrics import \
 from recidiviz.calculator.pipeline.utils.calculator_utils import age_at_date, \
     age_bucket, for_characteristics_races_ethnicities, for_characteristics, \
     last_day_of_month, relevant_metric_periods, augmented_combo_list, get_calculation_month_lower_bound_date, \
-    include_in_monthly_metrics, first_day_of_month, characteristics_with_person_id_fields
+    include_in_monthly_metrics, first_day_of_month, characteristics_with_person_id_fields, \
+    get_calculation_window_lower_bound_date
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     MetricMethodologyType
 from recidiviz.common.constants.state.state_incarceration_period import is_revocation_admission
@@ -88,6 +89,10 @@ def map_incarceration_combinations(person: StatePerson,
     calculation_month_lower_bound = get_calculation_month_lower_bound_date(
         metric_period_end_date, calculation_month_limit)
 
+    # Drop the events that happened before any month that can be included in the output
+    incarceration_events = events_in_calculation_window(
+        incarceration_events, metric_period_end_date, calculation_month_limit)
+
     # Organize the events by the relevant metric periods
     for incarceration_event in incarceration_events:
         relevant_periods = relevant_metric_periods(
@@ -122,6 +127,22 @@ def map_incarceration_combinations(person: StatePerson,
     return metrics
 
 
+def events_in_calculation_window(
+        incarceration_events: List[IncarcerationEvent],
+        metric_period_end_date: date,
+        calculation_month_limit: int) -> List[IncarcerationEvent]:
+    """Returns the IncarcerationEvents that happened in a month that can contribute to either a monthly metric within
+    the calculation_month_limit or a metric period metric ending in the month of the metric_period_end_date. If the
+    calculation_month_limit is -1, returns all of the incarceration_events."""
+    calculation_window_lower_bound = get_calculation_window_lower_bound_date(
+        metric_period_end_date, calculation_month_limit)
+
+    if not calculation_window_lower_bound:
+        return incarceration_events
+
+    return [event for event in incarceration_events if event.event_date >= calculation_window_lower_bound]
+
+
 def characteristic_combinations(person: StatePerson,
                                 incarceration_event: IncarcerationEvent,
                                 inclusions: Dict[str, bool],
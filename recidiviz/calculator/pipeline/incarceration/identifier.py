@@ -15,9 +15,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # =============================================================================
 """Identifies instances of admission and release from incarceration."""
+import bisect
 from datetime import date
 from typing import List, Optional, Any, Dict, Set, Union, Tuple
 
+import attr
 from dateutil.relativedelta import relativedelta
 from pydot import frozendict
 
@@ -37,7 +39,8 @@ from recidiviz.persistence.entity.state.entities import StateIncarcerationPeriod
 
 def find_incarceration_events(
         sentence_groups: List[StateSentenceGroup],
-        county_of_residence: Optional[str]) -> List[IncarcerationEvent]:
+        county_of_residence: Optional[str],
+        calculation_window_lower_bound: Optional[date] = None) -> List[IncarcerationEvent]:
     """Finds instances of admission or release from incarceration.
 
     Transforms StateIncarcerationPeriods into IncarcerationAdmissionEvents,
@@ -46,6 +49,8 @@ def find_incarceration_events(
 
     Args:
         - incarceration_periods: All of the person's StateIncarcerationPeriods
+        - calculation_window_lower_bound: The first day of the earliest month that can be included in the
+            calculations. If set, no events are found for the months before it.
 
     Returns:
         A list of IncarcerationEvents for the person.
@@ -66,13 +71,18 @@ def find_incarceration_events(
         incarceration_sentences,
         supervision_sentences,
         incarceration_periods,
-        county_of_residence))
+        county_of_residence,
+        calculation_window_lower_bound))
 
-    incarceration_events.extend(find_all_admission_release_events(
+    admission_release_events = find_all_admission_release_events(
         incarceration_sentences,
         supervision_sentences,
         incarceration_periods,
-        county_of_residence))
+        county_of_residence)
+
+    incarceration_events.extend(
+        event for event in admission_release_events
+        if not calculation_window_lower_bound or event.event_date >= calculation_window_lower_bound)
 
     return incarceration_events
 
@@ -119,9 +129,10 @@ def find_all_end_of_month_state_prison_stay_events(
         supervision_sentences: List[StateSupervisionSentence],
         original_incarceration_periods: List[StateIncarcerationPeriod],
         county_of_residence: Optional[str],
+        calculation_window_lower_bound: Optional[date] = None
 ) -> List[IncarcerationStayEvent]:
     """Given the |original_incarceration_periods| generates and returns all IncarcerationStayEvents based on the
-    final day relevant months.
+    final day relevant months. If |calculation_window_lower_bound| is set, skips the months before it.
     """
     incarceration_stay_events: List[IncarcerationStayEvent] = []
 
@@ -133,7 +144,8 @@ def find_all_end_of_month_state_prison_stay_events(
             incarceration_sentences,
             supervision_sentences,
             incarceration_period,
-            county_of_residence)
+            county_of_residence,
+            calculation_window_lower_bound)
 
         if period_stay_events:
             incarceration_stay_events.extend(period_stay_events)
@@ -145,8 +157,10 @@ def find_end_of_month_state_prison_stays(
         incarceration_sentences: List[StateIncarcerationSentence],
         supervision_sentences: List[StateSupervisionSentence],
         incarceration_period: StateIncarcerationPeriod,
-        county_of_residence: Optional[str]) -> List[IncarcerationStayEvent]:
-    """Finds months for which this person was incarcerated in a state prison on the last day of the month.
+        county_of_residence: Optional[str],
+        calculation_window_lower_bound: Optional[date] = None) -> List[IncarcerationStayEvent]:
+    """Finds months for which this person was incarcerated in a state prison on the last day of the month. If
+    |calculation_window_lower_bound| is set, only finds the months on or after it.
     """
     incarceration_stay_events: List[IncarcerationStayEvent] = []
 
@@ -162,15 +176,22 @@ def find_end_of_month_state_prison_stays(
     if admission_date is None:
         return incarceration_stay_events
 
+    end_of_month = last_day_of_month(admission_date)
+
+    if calculation_window_lower_bound:
+        end_of_month = max(end_of_month, last_day_of_month(calculation_window_lower_bound))
+
+    if end_of_month >= release_date:
+        return incarceration_stay_events
+
     supervision_type_at_admission = get_pre_incarceration_supervision_type(
         incarceration_sentences, supervision_sentences, incarceration_period)
 
     sentence_group = _get_sentence_group_for_incarceration_period(incarceration_period)
-
-    end_of_month = last_day_of_month(admission_date)
+    most_serious_charge_timeline = MostSeriousChargeTimeline.for_sentence_group(sentence_group)
 
     while end_of_month < release_date:
-        most_serious_charge = find_most_serious_prior_charge_in_sentence_group(sentence_group, end_of_month)
+        most_serious_charge = most_serious_charge_timeline.most_serious_prior_charge(end_of_month)
         most_serious_offense_ncic_code = most_serious_charge.ncic_code if most_serious_charge else None
         most_serious_offense_statute = most_serious_charge.statute if most_serious_charge else None
 
@@ -227,26 +248,71 @@ def find_most_serious_prior_charge_in_sentence_group(sentence_group: StateSenten
     codes are numbers, some may contain characters such as the letter 'A', so the codes are sorted alphabetically.
     """
 
-    relevant_charges: List[StateCharge] = []
-
-    def is_relevant_charge(sentence_start_date: Optional[date], charge: StateCharge):
-        return charge.ncic_code and sentence_start_date and sentence_start_date < sentence_start_upper_bound
+    return MostSeriousChargeTimeline.for_sentence_group(sentence_group).most_serious_prior_charge(
+        sentence_start_upper_bound)
 
-    for incarceration_sentence in sentence_group.incarceration_sentences:
-        relevant_charges_in_sentence = [charge for charge in incarceration_sentence.charges
-                                        if is_relevant_charge(incarceration_sentence.start_date, charge)]
-        relevant_charges.extend(relevant_charges_in_sentence)
 
-    for supervision_sentence in sentence_group.supervision_sentences:
-        relevant_charges_in_sentence = [charge for charge in supervision_sentence.charges
-                                        if is_relevant_charge(supervision_sentence.start_date, charge)]
-        relevant_charges.extend(relevant_charges_in_sentence)
+@attr.s(frozen=True)
+class MostSeriousChargeTimeline:
+    """The most serious charge associated with the sentences in a sentence group that started on or before each of the
+    sentence start dates in the group, as ranked by find_most_serious_prior_charge_in_sentence_group.
 
-    if relevant_charges:
-        relevant_charges.sort(key=lambda b: b.ncic_code)
-        return relevant_charges[0]
-
-    return None
+    Building the timeline reads the sentences and charges of the group once, so finding the most serious prior charge
+    for each month of a long incarceration period doesn't rank all of the charges again for every month.
+    """
+    # The distinct start dates of the sentences with charges that have an NCIC code, in ascending order
+    start_dates: List[date] = attr.ib()
+
+    # The most serious charge on a sentence that started on or before the start date at the same index
+    most_serious_charges: List[StateCharge] = attr.ib()
+
+    @classmethod
+    def for_sentence_group(cls, sentence_group: StateSentenceGroup) -> 'MostSeriousChargeTimeline':
+        """Builds the timeline from the charges on the sentences in the |sentence_group| with a start date."""
+        # The charges in the order find_most_serious_prior_charge_in_sentence_group considers them, which breaks ties
+        # between equal NCIC codes
+        dated_charges: List[Tuple[date, int, StateCharge]] = []
+
+        sentences: List[Union[StateIncarcerationSentence, StateSupervisionSentence]] = []
+        sentences.extend(sentence_group.incarceration_sentences)
+        sentences.extend(sentence_group.supervision_sentences)
+
+        for sentence in sentences:
+            if not sentence.start_date:
+                continue
+            for charge in sentence.charges:
+                if charge.ncic_code:
+                    dated_charges.append((sentence.start_date, len(dated_charges), charge))
+
+        start_dates: List[date] = []
+        most_serious_charges: List[StateCharge] = []
+        most_serious_key: Optional[Tuple[str, int]] = None
+
+        for start_date, index, charge in sorted(dated_charges, key=lambda dated_charge: dated_charge[:2]):
+            key = (charge.ncic_code, index)
+            if most_serious_key is None or key < most_serious_key:
+                most_serious_key = key
+                most_serious_charge = charge
+            else:
+                most_serious_charge = most_serious_charges[-1]
+
+            if start_dates and start_dates[-1] == start_date:
+                most_serious_charges[-1] = most_serious_charge
+            else:
+                start_dates.append(start_date)
+                most_serious_charges.append(most_serious_charge)
+
+        return cls(start_dates=start_dates, most_serious_charges=most_serious_charges)
+
+    def most_serious_prior_charge(self, sentence_start_upper_bound: date) -> Optional[StateCharge]:
+        """Returns the most serious charge associated with a sentence that started before the
+        |sentence_start_upper_bound|, or None if there is no such charge."""
+        num_prior_start_dates = bisect.bisect_left(self.start_dates, sentence_start_upper_bound)
+
+        if not num_prior_start_dates:
+            return None
+
+        return self.most_serious_charges[num_prior_start_dates - 1]
 
 
 def de_duplicated_admissions(incarceration_periods: List[StateIncarcerationPeriod]) -> List[StateIncarcerationPeriod]:
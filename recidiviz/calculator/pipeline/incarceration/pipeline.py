@@ -25,10 +25,9 @@ import json
 import logging
 import sys
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import datetime
 
-from apache_beam.pvalue import AsDict
 from more_itertools import one
 
 import apache_beam as beam
@@ -44,11 +43,15 @@ from recidiviz.calculator.pipeline.incarceration.metrics import \
 from recidiviz.calculator.pipeline.incarceration.metrics import \
     IncarcerationMetricType as MetricType
 from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, \
-    ConvertDictToKVTuple
+    ConvertDictToKVTuple, ParDoWithKeyedLookups, element_key_lookup_keys
+from recidiviz.calculator.pipeline.utils.calculator_utils import get_calculation_window_lower_bound_date, \
+    last_day_of_month
 from recidiviz.calculator.pipeline.utils.entity_hydration_utils import SetSentencesOnSentenceGroup, \
-    ConvertSentenceToStateSpecificType
+    ConvertSentenceToStateSpecificType, us_mo_sentence_status_lookup_keys
 from recidiviz.calculator.pipeline.utils.execution_utils import get_job_id, calculation_month_limit_arg
 from recidiviz.calculator.pipeline.utils.extractor_utils import BuildRootEntity
+from recidiviz.calculator.pipeline.utils.incremental_utils import IncrementalRunConfig, \
+    MapToCombinedMetricValues, changed_person_ids_query
 from recidiviz.calculator.pipeline.utils.pipeline_args_utils import add_shared_pipeline_arguments, \
     get_apache_beam_pipeline_options_from_args
 from recidiviz.persistence.database.schema.state import schema
@@ -81,6 +84,11 @@ def clear_job_id():
 class ClassifyIncarcerationEvents(beam.DoFn):
     """Classifies incarceration periods as admission and release events."""
 
+    def __init__(self, calculation_month_limit: int = -1):
+        super(ClassifyIncarcerationEvents, self).__init__()
+        # Events are not classified for the months before any month that can be included in the calculations
+        self.calculation_month_limit = calculation_month_limit
+
     # pylint: disable=arguments-differ
     def process(self, element, person_id_to_county):
         """Identifies instances of admission and release from incarceration."""
@@ -97,8 +105,12 @@ class ClassifyIncarcerationEvents(beam.DoFn):
         county_of_residence = person_id_to_county_fields.get('county_of_residence', None) \
             if person_id_to_county_fields else None
 
+        calculation_window_lower_bound = get_calculation_window_lower_bound_date(
+            last_day_of_month(datetime.date.today()), self.calculation_month_limit)
+
         # Find the IncarcerationEvents
-        incarceration_events = identifier.find_incarceration_events(sentence_groups, county_of_residence)
+        incarceration_events = identifier.find_incarceration_events(
+            sentence_groups, county_of_residence, calculation_window_lower_bound)
 
         if not incarceration_events:
             logging.info("No valid incarceration events for person with id: %d. Excluding them from the "
@@ -117,33 +129,29 @@ class GetIncarcerationMetrics(beam.PTransform):
 
     def __init__(self, pipeline_options: Dict[str, str],
                  inclusions: Dict[str, bool],
-                 calculation_month_limit: int):
+                 calculation_month_limit: int,
+                 incremental_config: Optional[IncrementalRunConfig] = None):
         super(GetIncarcerationMetrics, self).__init__()
         self._pipeline_options = pipeline_options
         self.inclusions = inclusions
         self.calculation_month_limit = calculation_month_limit
+        self.incremental_config = incremental_config
 
     def expand(self, input_or_inputs):
-        # Calculate incarceration metric combinations from a StatePerson and their IncarcerationEvents
-        incarceration_metric_combinations = (
+        # Calculate incarceration metric combinations from a StatePerson and their IncarcerationEvents, and combine
+        # the values of the metrics by key
+        incarceration_metric_values = (
             input_or_inputs
-            | 'Map to metric combinations' >>
-            beam.ParDo(CalculateIncarcerationMetricCombinations(),
-                       self.calculation_month_limit, self.inclusions).with_outputs('admissions',
-                                                                                   'populations',
-                                                                                   'releases'))
-
-        admissions_with_sums = (incarceration_metric_combinations.admissions
-                                | 'Calculate admission counts values' >>
-                                beam.CombinePerKey(SumFn()))
-
-        populations_with_sums = (incarceration_metric_combinations.populations
-                                 | 'Calculate population counts values' >>
-                                 beam.CombinePerKey(SumFn()))
+            | 'Map to combined metric values' >>
+            MapToCombinedMetricValues(CalculateIncarcerationMetricCombinations(),
+                                      {'admissions': SumFn(), 'populations': SumFn(), 'releases': SumFn()},
+                                      self.calculation_month_limit, self.inclusions,
+                                      incremental_config=self.incremental_config,
+                                      pipeline_options=self._pipeline_options))
 
-        releases_with_sums = (incarceration_metric_combinations.releases
-                              | 'Calculate release counts values' >>
-                              beam.CombinePerKey(SumFn()))
+        admissions_with_sums = incarceration_metric_values['admissions']
+        populations_with_sums = incarceration_metric_values['populations']
+        releases_with_sums = incarceration_metric_values['releases']
 
         # Produce the IncarcerationAdmissionMetrics
         admission_metrics = (admissions_with_sums | 'Produce admission count metrics' >>
@@ -338,6 +346,11 @@ def parse_arguments(argv):
                              'If set to -1, does not limit the calculations.',
                         default=1)
 
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        help='When set, only recomputes the people whose data changed since the previous run of this '
+                             'job, reusing the person metric contributions it stored for everyone else.')
+
     return parser.parse_known_args(argv)
 
 
@@ -405,12 +418,29 @@ def run(argv):
     person_id_filter_set = set(known_args.person_filter_ids) if known_args.person_filter_ids else None
     state_code = known_args.state_code
 
+    # Add timestamp for local jobs. This also identifies the build of this job in incremental runs.
+    job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
+    all_pipeline_options['job_timestamp'] = job_timestamp
+
+    incremental_config = None
+    person_id_filter_query = None
+    if known_args.incremental:
+        if person_id_filter_set:
+            raise ValueError("Incremental runs can't be limited to the people in person_filter_ids.")
+
+        # Only load the people whose data changed since the previous run of this job
+        incremental_config = IncrementalRunConfig.for_pipeline('incarceration', all_pipeline_options,
+                                                               state_dataset=known_args.input,
+                                                               output_dataset=known_args.output)
+        person_id_filter_query = changed_person_ids_query(incremental_config)
+
     with beam.Pipeline(options=pipeline_options) as p:
         # Get StatePersons
         persons = (p | 'Load StatePersons' >>
                    BuildRootEntity(dataset=query_dataset, root_entity_class=entities.StatePerson,
                                    unifying_id_field=entities.StatePerson.get_class_id_name(),
-                                   build_related_entities=True, unifying_id_field_filter_set=person_id_filter_set))
+                                   build_related_entities=True, unifying_id_field_filter_set=person_id_filter_set,
+                                   unifying_id_field_filter_query=person_id_filter_query))
 
         # Get StateSentenceGroups
         sentence_groups = (p | 'Load StateSentenceGroups' >>
@@ -420,7 +450,8 @@ def run(argv):
                                unifying_id_field=entities.StatePerson.get_class_id_name(),
                                build_related_entities=True,
                                unifying_id_field_filter_set=person_id_filter_set,
-                               state_code=state_code
+                               state_code=state_code,
+                               unifying_id_field_filter_query=person_id_filter_query
                            ))
 
         # Get StateIncarcerationSentences
@@ -431,7 +462,8 @@ def run(argv):
                                        unifying_id_field=entities.StatePerson.get_class_id_name(),
                                        build_related_entities=True,
                                        unifying_id_field_filter_set=person_id_filter_set,
-                                       state_code=state_code
+                                       state_code=state_code,
+                                       unifying_id_field_filter_query=person_id_filter_query
                                    ))
 
         # Get StateSupervisionSentences
@@ -442,7 +474,8 @@ def run(argv):
                                      unifying_id_field=entities.StatePerson.get_class_id_name(),
                                      build_related_entities=True,
                                      unifying_id_field_filter_set=person_id_filter_set,
-                                     state_code=state_code
+                                     state_code=state_code,
+                                     unifying_id_field_filter_query=person_id_filter_query
                                  ))
 
         if state_code is None or state_code == 'US_MO':
@@ -473,13 +506,15 @@ def run(argv):
         supervision_sentences_converted = (
             supervision_sentences
             | 'Convert to state-specific supervision sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         incarceration_sentences_converted = (
             incarceration_sentences
             | 'Convert to state-specific incarceration sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         sentences_and_sentence_groups = (
@@ -517,29 +552,25 @@ def run(argv):
             beam.ParDo(ConvertDictToKVTuple(), 'person_id')
         )
 
+        # The number of months to limit the monthly calculation output to
+        calculation_month_limit = known_args.calculation_month_limit
+
         # Identify IncarcerationEvents events from the StatePerson's StateIncarcerationPeriods
         person_events = (person_and_sentence_groups | 'Classify Incarceration Events' >>
-                         beam.ParDo(ClassifyIncarcerationEvents(), AsDict(person_id_to_county_kv)))
+                         ParDoWithKeyedLookups(ClassifyIncarcerationEvents(calculation_month_limit),
+                                               [person_id_to_county_kv],
+                                               [element_key_lookup_keys]))
 
         # Get dimensions to include and methodologies to use
         inclusions, _ = dimensions_and_methodologies(known_args)
 
-        # Get pipeline job details for accessing job_id
-        all_pipeline_options = pipeline_options.get_all_options()
-
-        # The number of months to limit the monthly calculation output to
-        calculation_month_limit = known_args.calculation_month_limit
-
-        # Add timestamp for local jobs
-        job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
-        all_pipeline_options['job_timestamp'] = job_timestamp
-
         # Get IncarcerationMetrics
         incarceration_metrics = (person_events | 'Get Incarceration Metrics' >>
                                  GetIncarcerationMetrics(
                                      pipeline_options=all_pipeline_options,
                                      inclusions=inclusions,
-                                     calculation_month_limit=calculation_month_limit))
+                                     calculation_month_limit=calculation_month_limit,
+                                     incremental_config=incremental_config))
 
         if person_id_filter_set:
             logging.warning("Non-empty person filter set - returning before writing metrics.")
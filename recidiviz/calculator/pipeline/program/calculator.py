@@ -31,7 +31,7 @@ from recidiviz.calculator.pipeline.utils.calculator_utils import age_at_date, \
     age_bucket, for_characteristics_races_ethnicities, for_characteristics, \
     last_day_of_month, relevant_metric_periods, augmented_combo_list, include_in_monthly_metrics, \
     get_calculation_month_lower_bound_date, first_day_of_month, \
-    characteristics_with_person_id_fields
+    characteristics_with_person_id_fields, get_calculation_window_lower_bound_date
 from recidiviz.calculator.pipeline.utils.assessment_utils import \
     assessment_score_bucket, include_assessment_in_metric
 from recidiviz.calculator.pipeline.utils.metric_utils import \
@@ -81,6 +81,9 @@ def map_program_combinations(person: StatePerson,
     calculation_month_lower_bound = get_calculation_month_lower_bound_date(
         metric_period_end_date, calculation_month_limit)
 
+    # Drop the events that happened before any month that can be included in the output
+    program_events = events_in_calculation_window(program_events, metric_period_end_date, calculation_month_limit)
+
     # Organize the events by the relevant metric periods
     for program_event in program_events:
         relevant_periods = relevant_metric_periods(
@@ -113,6 +116,22 @@ def map_program_combinations(person: StatePerson,
     return metrics
 
 
+def events_in_calculation_window(
+        program_events: List[ProgramEvent],
+        metric_period_end_date: date,
+        calculation_month_limit: int) -> List[ProgramEvent]:
+    """Returns the ProgramEvents that happened in a month that can contribute to either a monthly metric within
+    the calculation_month_limit or a metric period metric ending in the month of the metric_period_end_date. If the
+    calculation_month_limit is -1, returns all of the program_events."""
+    calculation_window_lower_bound = get_calculation_window_lower_bound_date(
+        metric_period_end_date, calculation_month_limit)
+
+    if not calculation_window_lower_bound:
+        return program_events
+
+    return [event for event in program_events if event.event_date >= calculation_window_lower_bound]
+
+
 def characteristic_combinations(person: StatePerson,
                                 program_event: ProgramEvent,
                                 inclusions: Dict[str, bool]) -> \
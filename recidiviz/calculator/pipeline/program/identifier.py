@@ -23,6 +23,8 @@ from recidiviz.calculator.pipeline.program.program_event import \
     ProgramReferralEvent, ProgramEvent
 from recidiviz.calculator.pipeline.utils.assessment_utils import \
     find_most_recent_assessment
+from recidiviz.calculator.pipeline.utils.supervision_period_utils import \
+    SupervisionPeriodIntervalIndex
 from recidiviz.common.constants.state.state_assessment import \
     StateAssessmentType
 from recidiviz.common.constants.state.state_supervision import \
@@ -91,6 +93,9 @@ def find_program_referrals(
     """
     program_referrals: List[ProgramReferralEvent] = []
 
+    supervision_period_index = \
+        supervision_period_index_for_referrals(supervision_periods)
+
     for program_assignment in program_assignments:
         referral_date = program_assignment.referral_date
         program_id = program_assignment.program_id
@@ -104,8 +109,8 @@ def find_program_referrals(
                                             assessments)
 
             relevant_supervision_periods = \
-                find_supervision_periods_during_referral(
-                    referral_date, supervision_periods)
+                supervision_period_index.periods_overlapping_with_date(
+                    referral_date)
 
             program_referrals.extend(referrals_for_supervision_periods(
                 program_assignment.state_code,
@@ -127,19 +132,17 @@ def find_supervision_periods_during_referral(
     """Identifies supervision_periods where the referral_date falls between
     the start and end of the supervision period, indicating that the person
     was serving this supervision period at the time of the referral."""
+    return supervision_period_index_for_referrals(
+        supervision_periods).periods_overlapping_with_date(referral_date)
+
 
-    # Get all valid supervision periods with a start date before or on the
-    # referral date
-    applicable_supervision_periods = [
-        sp for sp in supervision_periods if
-        not is_placeholder(sp)
-        and sp.start_date is not None
-        and sp.start_date <= referral_date
-        and (sp.termination_date is None
-             or sp.termination_date >= referral_date)
-    ]
-
-    return applicable_supervision_periods
+def supervision_period_index_for_referrals(
+        supervision_periods: List[StateSupervisionPeriod]
+) -> SupervisionPeriodIntervalIndex:
+    """Returns an index of the supervision_periods that aren't placeholders,
+    which finds the periods a person was serving at the time of a referral."""
+    return SupervisionPeriodIntervalIndex.for_supervision_periods(
+        [sp for sp in supervision_periods if not is_placeholder(sp)])
 
 
 def referrals_for_supervision_periods(
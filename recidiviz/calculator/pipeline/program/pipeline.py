@@ -22,11 +22,10 @@ import datetime
 import json
 import logging
 import sys
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 import apache_beam as beam
 from apache_beam.options.pipeline_options import SetupOptions
-from apache_beam.pvalue import AsDict
 from apache_beam.typehints import with_input_types, with_output_types
 from more_itertools import one
 
@@ -37,9 +36,11 @@ from recidiviz.calculator.pipeline.program.metrics import \
     ProgramMetricType as MetricType
 from recidiviz.calculator.pipeline.program.program_event import ProgramEvent
 from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, \
-    ConvertDictToKVTuple
+    ConvertDictToKVTuple, ParDoWithKeyedLookups
 from recidiviz.calculator.pipeline.utils.execution_utils import get_job_id, calculation_month_limit_arg
 from recidiviz.calculator.pipeline.utils.extractor_utils import BuildRootEntity
+from recidiviz.calculator.pipeline.utils.incremental_utils import IncrementalRunConfig, \
+    MapToCombinedMetricValues, changed_person_ids_query
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     json_serializable_metric_key, MetricMethodologyType
 from recidiviz.calculator.pipeline.utils.pipeline_args_utils import add_shared_pipeline_arguments, \
@@ -73,21 +74,25 @@ class GetProgramMetrics(beam.PTransform):
 
     def __init__(self, pipeline_options: Dict[str, str],
                  inclusions: Dict[str, bool],
-                 calculation_month_limit: int):
+                 calculation_month_limit: int,
+                 incremental_config: Optional[IncrementalRunConfig] = None):
         super(GetProgramMetrics, self).__init__()
         self._pipeline_options = pipeline_options
         self.inclusions = inclusions
         self.calculation_month_limit = calculation_month_limit
+        self.incremental_config = incremental_config
 
     def expand(self, input_or_inputs):
-        # Calculate program metric combinations from a StatePerson and their ProgramEvents
-        program_metric_combinations = (input_or_inputs | 'Map to metric combinations' >>
-                                       beam.ParDo(
-                                           CalculateProgramMetricCombinations(),
-                                           self.calculation_month_limit, self.inclusions).with_outputs('referrals'))
+        # Calculate program metric combinations from a StatePerson and their ProgramEvents, and combine the values
+        # of the metrics by key
+        program_metric_values = (input_or_inputs | 'Map to combined metric values' >>
+                                 MapToCombinedMetricValues(
+                                     CalculateProgramMetricCombinations(), {'referrals': SumFn()},
+                                     self.calculation_month_limit, self.inclusions,
+                                     incremental_config=self.incremental_config,
+                                     pipeline_options=self._pipeline_options))
 
-        referrals_with_sums = (program_metric_combinations.referrals | 'Calculate program referral values' >>
-                               beam.CombinePerKey(SumFn()))
+        referrals_with_sums = program_metric_values['referrals']
 
         referral_metrics = (referrals_with_sums | 'Produce program referral metrics' >>
                             beam.ParDo(ProduceProgramMetrics(), **self._pipeline_options))
@@ -141,6 +146,14 @@ class ClassifyProgramAssignments(beam.DoFn):
         pass  # Passing unused abstract method.
 
 
+def supervision_period_lookup_keys(element) -> List[int]:
+    """Returns the ids of the StateSupervisionPeriods of the person in the element, which ClassifyProgramAssignments
+    looks up the agent associations of."""
+    _, person_entities = element
+    return [supervision_period.supervision_period_id
+            for supervision_period in person_entities['supervision_periods']]
+
+
 @with_input_types(beam.typehints.Tuple[entities.StatePerson, List[ProgramEvent]],
                   beam.typehints.Optional[int], beam.typehints.Dict[str, bool])
 @with_output_types(beam.typehints.Tuple[str, Any])
@@ -274,6 +287,11 @@ def parse_arguments(argv):
                              'If set to -1, does not limit the calculations.',
                         default=1)
 
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        help='When set, only recomputes the people whose data changed since the previous run of this '
+                             'job, reusing the person metric contributions it stored for everyone else.')
+
     return parser.parse_known_args(argv)
 
 
@@ -333,12 +351,29 @@ def run(argv):
     person_id_filter_set = set(known_args.person_filter_ids) if known_args.person_filter_ids else None
     state_code = known_args.state_code
 
+    # Add timestamp for local jobs. This also identifies the build of this job in incremental runs.
+    job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
+    all_pipeline_options['job_timestamp'] = job_timestamp
+
+    incremental_config = None
+    person_id_filter_query = None
+    if known_args.incremental:
+        if person_id_filter_set:
+            raise ValueError("Incremental runs can't be limited to the people in person_filter_ids.")
+
+        # Only load the people whose data changed since the previous run of this job
+        incremental_config = IncrementalRunConfig.for_pipeline('program', all_pipeline_options,
+                                                               state_dataset=known_args.input,
+                                                               output_dataset=known_args.output)
+        person_id_filter_query = changed_person_ids_query(incremental_config)
+
     with beam.Pipeline(options=pipeline_options) as p:
         # Get StatePersons
         persons = (p | 'Load Persons' >>
                    BuildRootEntity(dataset=input_dataset, root_entity_class=entities.StatePerson,
                                    unifying_id_field=entities.StatePerson.get_class_id_name(),
-                                   build_related_entities=True, unifying_id_field_filter_set=person_id_filter_set))
+                                   build_related_entities=True, unifying_id_field_filter_set=person_id_filter_set,
+                                   unifying_id_field_filter_query=person_id_filter_query))
 
         # Get StateProgramAssignments
         program_assignments = (p | 'Load Program Assignments' >>
@@ -348,7 +383,8 @@ def run(argv):
                                                unifying_id_field=entities.StatePerson.get_class_id_name(),
                                                build_related_entities=True,
                                                unifying_id_field_filter_set=person_id_filter_set,
-                                               state_code=state_code))
+                                               state_code=state_code,
+                                               unifying_id_field_filter_query=person_id_filter_query))
 
         # Get StateAssessments
         assessments = (p | 'Load Assessments' >>
@@ -356,7 +392,8 @@ def run(argv):
                                        unifying_id_field=entities.StatePerson.get_class_id_name(),
                                        build_related_entities=False,
                                        unifying_id_field_filter_set=person_id_filter_set,
-                                       state_code=state_code))
+                                       state_code=state_code,
+                                       unifying_id_field_filter_query=person_id_filter_query))
 
         # Get StateSupervisionPeriods
         supervision_periods = (p | 'Load SupervisionPeriods' >>
@@ -364,7 +401,8 @@ def run(argv):
                                                unifying_id_field=entities.StatePerson.get_class_id_name(),
                                                build_related_entities=False,
                                                unifying_id_field_filter_set=person_id_filter_set,
-                                               state_code=state_code))
+                                               state_code=state_code,
+                                               unifying_id_field_filter_query=person_id_filter_query))
 
         supervision_period_to_agent_association_query = \
             f"SELECT * FROM `{reference_dataset}.supervision_period_to_agent_association`"
@@ -395,29 +433,24 @@ def run(argv):
         # Identify ProgramEvents from the StatePerson's StateProgramAssignments
         person_program_events = (
             persons_entities
-            | beam.ParDo(ClassifyProgramAssignments(),
-                         AsDict(supervision_period_to_agent_associations_as_kv))
+            | ParDoWithKeyedLookups(ClassifyProgramAssignments(),
+                                    [supervision_period_to_agent_associations_as_kv],
+                                    [supervision_period_lookup_keys])
         )
 
         # Get dimensions to include and methodologies to use
         inclusions, _ = dimensions_and_methodologies(known_args)
 
-        # Get pipeline job details for accessing job_id
-        all_pipeline_options = pipeline_options.get_all_options()
-
         # The number of months to limit the monthly calculation output to
         calculation_month_limit = known_args.calculation_month_limit
 
-        # Add timestamp for local jobs
-        job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
-        all_pipeline_options['job_timestamp'] = job_timestamp
-
         # Get program metrics
         program_metrics = (person_program_events | 'Get Program Metrics' >>
                            GetProgramMetrics(
                                pipeline_options=all_pipeline_options,
                                inclusions=inclusions,
-                               calculation_month_limit=calculation_month_limit))
+                               calculation_month_limit=calculation_month_limit,
+                               incremental_config=incremental_config))
 
         if person_id_filter_set:
             logging.warning("Non-empty person filter set - returning before writing metrics.")
@@ -27,12 +27,15 @@ Attributes:
     FOLLOW_UP_PERIODS: a list of integers, the follow-up periods that we measure
         recidivism over, from 1 to 10.
 """
+import bisect
 import logging
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
-from copy import deepcopy
 import datetime
 from datetime import date
+
+import attr
 from dateutil.relativedelta import relativedelta
 
 from recidiviz.calculator.pipeline.recidivism.metrics import \
@@ -54,6 +57,99 @@ from recidiviz.persistence.entity.state.entities import StatePerson
 FOLLOW_UP_PERIODS = range(1, 11)
 
 
+def _return_details_templates() -> List[Dict[str, Any]]:
+    """Returns the return details that augmented_combo_list adds to each combo, in the order it adds them."""
+    templates: List[Dict[str, Any]] = [
+        {},
+        {'return_type': ReincarcerationReturnType.NEW_ADMISSION},
+    ]
+
+    revocation_templates: List[Dict[str, Any]] = [
+        {'return_type': ReincarcerationReturnType.REVOCATION},
+        {'return_type': ReincarcerationReturnType.REVOCATION,
+         'from_supervision_type': ReincarcerationReturnFromSupervisionType.PAROLE},
+        {'return_type': ReincarcerationReturnType.REVOCATION,
+         'from_supervision_type': ReincarcerationReturnFromSupervisionType.PROBATION},
+    ]
+
+    for revocation_template in revocation_templates:
+        templates.append(revocation_template)
+
+        for violation_type in StateSupervisionViolationType:
+            templates.append({**revocation_template, 'source_violation_type': violation_type})
+
+    return templates
+
+
+# The return details that augmented_combo_list adds to each combo that isn't a person-level combo
+_RETURN_DETAILS_TEMPLATES = _return_details_templates()
+
+
+@lru_cache(maxsize=None)
+def _recidivism_values_for_return_details_templates(
+        return_type: Optional[ReincarcerationReturnType],
+        from_supervision_type: Optional[ReincarcerationReturnFromSupervisionType],
+        source_violation_type: Optional[StateSupervisionViolationType]) -> Tuple[int, ...]:
+    """Returns the recidivism value of a return with the given details for each of the _RETURN_DETAILS_TEMPLATES."""
+    return tuple(recidivism_value_for_metric(template, return_type, from_supervision_type, source_violation_type)
+                 for template in _RETURN_DETAILS_TEMPLATES)
+
+
+def _recidivism_values(combo: Dict[str, Any],
+                       augmented_combos: List[Dict[str, Any]],
+                       return_type: Optional[ReincarcerationReturnType],
+                       from_supervision_type: Optional[ReincarcerationReturnFromSupervisionType],
+                       source_violation_type: Optional[StateSupervisionViolationType]) \
+        -> List[Tuple[Dict[str, Any], int]]:
+    """Returns each of the |augmented_combos| returned by augmented_combo_list for the |combo| with the recidivism value
+    of a return with the given details for the augmented combo.
+
+    If the |combo| isn't a person-level combo, the augmented combos only differ from each other in their return
+    details, so their values are looked up by the position of the augmented combo in the list.
+    """
+    if combo.get('person_id') is None:
+        return list(zip(augmented_combos, _recidivism_values_for_return_details_templates(
+            return_type, from_supervision_type, source_violation_type)))
+
+    return [(augmented_combo, recidivism_value_for_metric(augmented_combo, return_type, from_supervision_type,
+                                                          source_violation_type))
+            for augmented_combo in augmented_combos]
+
+
+@attr.s(frozen=True)
+class ReincarcerationTimeline:
+    """The reincarcerations of a person, as returned by the reincarcerations function, sorted by reincarceration
+    date so that the reincarcerations in a window can be found with a bisect."""
+    # The reincarceration dates in ascending order
+    reincarceration_dates: List[date] = attr.ib()
+
+    # The return details of the reincarceration on the date at the same index
+    reincarcerations: List[Dict[str, Any]] = attr.ib()
+
+    @classmethod
+    def from_reincarcerations(cls, all_reincarcerations: Dict[date, Dict[str, Any]]) -> 'ReincarcerationTimeline':
+        reincarceration_dates = sorted(all_reincarcerations)
+        return cls(reincarceration_dates=reincarceration_dates,
+                   reincarcerations=[all_reincarcerations[reincarceration_date]
+                                     for reincarceration_date in reincarceration_dates])
+
+    def _window_indices(self, start_date: date, end_date: date) -> Tuple[int, int]:
+        start_index = bisect.bisect_left(self.reincarceration_dates, start_date)
+        end_index = bisect.bisect_left(self.reincarceration_dates, end_date, lo=start_index)
+        return start_index, end_index
+
+    def in_window(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Returns the reincarcerations on or after the start_date and before the end_date, in order of
+        reincarceration date."""
+        start_index, end_index = self._window_indices(start_date, end_date)
+        return self.reincarcerations[start_index:end_index]
+
+    def count_in_window(self, start_date: date, end_date: date) -> int:
+        """Returns the number of reincarcerations on or after the start_date and before the end_date."""
+        start_index, end_index = self._window_indices(start_date, end_date)
+        return end_index - start_index
+
+
 def map_recidivism_combinations(person: StatePerson,
                                 release_events:
                                 Dict[int, List[ReleaseEvent]],
@@ -102,36 +198,33 @@ def map_recidivism_combinations(person: StatePerson,
         the recidivism value corresponding to that metric.
     """
     metrics = []
-    all_reincarcerations = reincarcerations(release_events)
+    reincarceration_timeline = ReincarcerationTimeline.from_reincarcerations(reincarcerations(release_events))
 
     metric_period_end_date = last_day_of_month(date.today())
 
     for release_cohort, events in release_events.items():
         for event in events:
-            characteristic_combos_rates = \
+            # The map functions don't modify the combos, so they can all map the same ones
+            characteristic_combos = \
                 characteristic_combinations(person, event, inclusions)
-            characteristic_combos_counts = deepcopy(
-                characteristic_combos_rates)
-            characteristic_combos_liberty = deepcopy(
-                characteristic_combos_rates)
 
             rate_metrics = map_recidivism_rate_combinations(
-                characteristic_combos_rates, release_cohort, event,
-                release_events, all_reincarcerations)
+                characteristic_combos, release_cohort, event,
+                release_events, reincarceration_timeline)
 
             metrics.extend(rate_metrics)
 
             count_metrics = \
-                map_recidivism_count_combinations(characteristic_combos_counts,
+                map_recidivism_count_combinations(characteristic_combos,
                                                   event,
-                                                  all_reincarcerations,
+                                                  reincarceration_timeline,
                                                   metric_period_end_date)
 
             metrics.extend(count_metrics)
 
             liberty_metrics = \
                 map_recidivism_liberty_combinations(
-                    characteristic_combos_liberty, event, all_reincarcerations)
+                    characteristic_combos, event, reincarceration_timeline)
 
             metrics.extend(liberty_metrics)
 
@@ -143,7 +236,7 @@ def map_recidivism_rate_combinations(
         release_cohort,
         event: ReleaseEvent,
         all_release_events: Dict[int, List[ReleaseEvent]],
-        all_reincarcerations: Dict[date, Dict[str, Any]]) -> \
+        reincarceration_timeline: ReincarcerationTimeline) -> \
         List[Tuple[Dict[str, Any], Any]]:
     """Maps the given event and characteristic combinations to a variety of
     metrics that track rate-based recidivism.
@@ -156,10 +249,8 @@ def map_recidivism_rate_combinations(
         event: the recidivism event from which the combination was derived
         all_release_events: A dictionary mapping release cohorts to a list of
             ReleaseEvents for the given StatePerson.
-        all_reincarcerations: dictionary where the keys are all dates of
-            reincarceration for the person's ReleaseEvents, and the values
-            are a dictionary containing return type and from supervision type
-            information
+        reincarceration_timeline: the reincarcerations for the person's
+            ReleaseEvents
 
     Returns:
         A list of key-value tuples representing specific metric combinations and
@@ -167,6 +258,15 @@ def map_recidivism_rate_combinations(
     """
     metrics = []
 
+    releases_in_year = sorted_releases_in_year(event.release_date, all_release_events)
+
+    # There will always be at least one release in this list that represents the current release event.
+    # `sorted_releases_in_year` should fail if that is not the case.
+    if not releases_in_year:
+        raise ValueError("Function `sorted_releases_in_year` should not be returning empty lists.")
+
+    is_first_release_in_year = (id(event) == id(releases_in_year[0]))
+
     if isinstance(event, RecidivismReleaseEvent):
         earliest_recidivism_period = earliest_recidivated_follow_up_period(
             event.release_date, event.reincarceration_date)
@@ -178,11 +278,11 @@ def map_recidivism_rate_combinations(
     for combo in characteristic_combos:
         # Don't calculate person-level recidivism rate metrics
         if combo.get('person_id') is None:
-            combo['metric_type'] = ReincarcerationRecidivismMetricType.RATE
-            combo['release_cohort'] = release_cohort
+            rate_combo = augment_combination(combo, {'metric_type': ReincarcerationRecidivismMetricType.RATE,
+                                                     'release_cohort': release_cohort})
 
             metrics.extend(combination_rate_metrics(
-                combo, event, all_release_events, all_reincarcerations,
+                rate_combo, event, reincarceration_timeline, is_first_release_in_year,
                 earliest_recidivism_period, relevant_periods))
 
     return metrics
@@ -191,7 +291,7 @@ def map_recidivism_rate_combinations(
 def map_recidivism_count_combinations(
         characteristic_combos: List[Dict[str, Any]],
         event: ReleaseEvent,
-        all_reincarcerations: Dict[date, Dict[str, Any]],
+        reincarceration_timeline: ReincarcerationTimeline,
         metric_period_end_date: date) -> \
         List[Tuple[Dict[str, Any], Any]]:
     """Maps the given event and characteristic combinations to a variety of metrics that track count-based recidivism.
@@ -202,8 +302,7 @@ def map_recidivism_count_combinations(
     Args:
         characteristic_combos: A list of dictionaries containing all unique combinations of characteristics.
         event: the recidivism event from which the combination was derived
-        all_reincarcerations: dictionary where the keys are all dates of reincarceration for the person's ReleaseEvents,
-            and the values are a dictionary containing return type and from supervision type information
+        reincarceration_timeline: the reincarcerations for the person's ReleaseEvents
         metric_period_end_date: The day the metric periods end
 
     Returns:
@@ -219,25 +318,26 @@ def map_recidivism_count_combinations(
                                                    metric_period_end_date.year,
                                                    metric_period_end_date.month)
 
-        for combo in characteristic_combos:
-            combo['metric_type'] = ReincarcerationRecidivismMetricType.COUNT
+        end_of_event_month = last_day_of_month(reincarceration_date)
 
+        for combo in characteristic_combos:
             # Bucket for the month of the incarceration
-            combo['year'] = reincarceration_date.year
-            combo['month'] = reincarceration_date.month
-            combo['metric_period_months'] = 1
+            month_combo = augment_combination(combo, {'metric_type': ReincarcerationRecidivismMetricType.COUNT,
+                                                      'year': reincarceration_date.year,
+                                                      'month': reincarceration_date.month,
+                                                      'metric_period_months': 1})
 
-            end_of_event_month = last_day_of_month(reincarceration_date)
-
-            metrics.extend(combination_count_metrics(combo, event, all_reincarcerations, end_of_event_month))
+            metrics.extend(combination_count_metrics(month_combo, event, reincarceration_timeline, end_of_event_month))
 
             # Bucket for each of the relevant metric period month lengths
             for relevant_period in relevant_periods:
-                combo['year'] = metric_period_end_date.year
-                combo['month'] = metric_period_end_date.month
-                combo['metric_period_months'] = relevant_period
+                period_combo = augment_combination(combo, {'metric_type': ReincarcerationRecidivismMetricType.COUNT,
+                                                           'year': metric_period_end_date.year,
+                                                           'month': metric_period_end_date.month,
+                                                           'metric_period_months': relevant_period})
 
-                metrics.extend(combination_count_metrics(combo, event, all_reincarcerations, metric_period_end_date))
+                metrics.extend(combination_count_metrics(period_combo, event, reincarceration_timeline,
+                                                         metric_period_end_date))
 
     return metrics
 
@@ -245,7 +345,7 @@ def map_recidivism_count_combinations(
 def map_recidivism_liberty_combinations(
         characteristic_combos: List[Dict[str, Any]],
         event: ReleaseEvent,
-        all_reincarcerations: Dict[date, Dict[str, Any]]) -> \
+        reincarceration_timeline: ReincarcerationTimeline) -> \
         List[Tuple[Dict[str, Any], Any]]:
     """Maps the given event and characteristic combinations to a variety of metrics that track metrics for time at
     liberty.
@@ -262,20 +362,20 @@ def map_recidivism_liberty_combinations(
         month_end_day = last_day_of_month(reincarceration_date)
 
         for combo in characteristic_combos:
-            combo['metric_type'] = ReincarcerationRecidivismMetricType.LIBERTY
-
             # Year bucket
-            combo['start_date'] = year_start_day
-            combo['end_date'] = year_end_day
+            year_combo = augment_combination(combo, {'metric_type': ReincarcerationRecidivismMetricType.LIBERTY,
+                                                     'start_date': year_start_day,
+                                                     'end_date': year_end_day})
 
             metrics.extend(combination_liberty_metrics(
-                combo, event, all_reincarcerations))
+                year_combo, event, reincarceration_timeline))
 
             # Month bucket
-            combo['start_date'] = month_start_day
-            combo['end_date'] = month_end_day
+            month_combo = augment_combination(combo, {'metric_type': ReincarcerationRecidivismMetricType.LIBERTY,
+                                                      'start_date': month_start_day,
+                                                      'end_date': month_end_day})
 
-            metrics.extend(combination_liberty_metrics(combo, event, all_reincarcerations))
+            metrics.extend(combination_liberty_metrics(month_combo, event, reincarceration_timeline))
 
     return metrics
 
@@ -344,15 +444,10 @@ def reincarcerations_in_window(start_date: date,
         all_reincarcerations: the dictionary of reincarcerations to check
 
     Returns:
-        How many of the given reincarcerations are within the window
-        specified by the given start date and end date.
+        The given reincarcerations that are within the window specified by
+        the given start date and end date, in order of reincarceration date.
     """
-    reincarcerations_in_window_dict = \
-        [reincarceration for reincarceration_date, reincarceration
-         in all_reincarcerations.items()
-         if end_date > reincarceration_date >= start_date]
-
-    return reincarcerations_in_window_dict
+    return ReincarcerationTimeline.from_reincarcerations(all_reincarcerations).in_window(start_date, end_date)
 
 
 def returned_within_follow_up_period(event: ReleaseEvent, period: int) -> bool:
@@ -629,8 +724,8 @@ def sorted_releases_in_year(release_date: date, all_release_events: Dict[int, Li
 
 def combination_rate_metrics(combo: Dict[str, Any],
                              event: ReleaseEvent,
-                             all_release_events: Dict[int, List[ReleaseEvent]],
-                             all_reincarcerations: Dict[date, Dict[str, Any]],
+                             reincarceration_timeline: ReincarcerationTimeline,
+                             is_first_release_in_year: bool,
                              earliest_recidivism_period: Optional[int],
                              relevant_periods: List[int]) -> List[Tuple[Dict[str, Any], int]]:
     """Returns all unique recidivism rate metrics for the given combination.
@@ -642,9 +737,8 @@ def combination_rate_metrics(combo: Dict[str, Any],
     Args:
         combo: a characteristic combination to convert into metrics
         event: the release event from which the combination was derived
-        all_release_events: A dictionary mapping release cohorts to a list of ReleaseEvents for the given StatePerson.
-        all_reincarcerations: dictionary where the keys are all dates of reincarceration for the person's ReleaseEvents,
-            and the values are a dictionary containing return type and from supervision type information
+        reincarceration_timeline: the reincarcerations for the person's ReleaseEvents
+        is_first_release_in_year: whether the event is the first release of the person in the year of its release
         earliest_recidivism_period: the earliest follow-up period under which recidivism occurred
         relevant_periods: the list of periods relevant for measurement
 
@@ -654,15 +748,6 @@ def combination_rate_metrics(combo: Dict[str, Any],
     """
     metrics = []
 
-    releases_in_year = sorted_releases_in_year(event.release_date, all_release_events)
-
-    # There will always be at least one release in this list that represents the current release event.
-    # `sorted_releases_in_year` should fail if that is not the case.
-    if not releases_in_year:
-        raise ValueError("Function `sorted_releases_in_year` should not be returning empty lists.")
-
-    is_first_release_in_year = (id(event) == id(releases_in_year[0]))
-
     for period in relevant_periods:
         person_based_combos = augmented_combo_list(combo, event, MetricMethodologyType.PERSON, period)
 
@@ -687,33 +772,26 @@ def combination_rate_metrics(combo: Dict[str, Any],
         elif isinstance(event, RecidivismReleaseEvent):
             if is_first_release_in_year:
                 # Only count the first release in a year for person-based metrics
-                for person_combo in person_based_combos:
-                    metrics.append((person_combo, recidivism_value_for_metric(
-                        person_combo, event.return_type,
-                        event.from_supervision_type,
-                        event.source_violation_type)))
+                metrics.extend(_recidivism_values(combo, person_based_combos, event.return_type,
+                                                  event.from_supervision_type, event.source_violation_type))
 
             end_of_follow_up_period = event.release_date + relativedelta(years=period)
 
-            all_reincarcerations_in_window = reincarcerations_in_window(event.release_date,
-                                                                        end_of_follow_up_period,
-                                                                        all_reincarcerations)
+            all_reincarcerations_in_window = reincarceration_timeline.in_window(event.release_date,
+                                                                               end_of_follow_up_period)
 
             for reincarceration in all_reincarcerations_in_window:
-                for event_combo in event_based_combos:
-                    metrics.append((event_combo, recidivism_value_for_metric(
-                        event_combo,
-                        reincarceration.get('return_type'),
-                        reincarceration.get('from_supervision_type'),
-                        reincarceration.get('source_violation_type'))))
+                metrics.extend(_recidivism_values(combo, event_based_combos,
+                                                  reincarceration.get('return_type'),
+                                                  reincarceration.get('from_supervision_type'),
+                                                  reincarceration.get('source_violation_type')))
 
     return metrics
 
 
 def combination_count_metrics(combo: Dict[str, Any], event:
                               RecidivismReleaseEvent,
-                              all_reincarcerations:
-                              Dict[date, Dict[str, Any]],
+                              reincarceration_timeline: ReincarcerationTimeline,
                               metric_period_end_date: date) \
         -> List[Tuple[Dict[str, Any], int]]:
     """"Returns all unique recidivism count metrics for the given event and combination.
@@ -724,8 +802,7 @@ def combination_count_metrics(combo: Dict[str, Any], event:
     Args:
         combo: a characteristic combination to convert into metrics
         event: the release event from which the combination was derived
-        all_reincarcerations: dictionary where the keys are all dates of reincarceration for the person's ReleaseEvents,
-            and the values are a dictionary containing return type and from supervision type information
+        reincarceration_timeline: the reincarcerations for the person's ReleaseEvents
         metric_period_end_date: The day the metric periods end
 
     Returns:
@@ -744,25 +821,15 @@ def combination_count_metrics(combo: Dict[str, Any], event:
     # to include reincarcerations that happen on the last day of this count window.
     end_date = metric_period_end_date + datetime.timedelta(days=1)
 
-    all_reincarcerations_in_window = reincarcerations_in_window(
-        event.reincarceration_date, end_date, all_reincarcerations)
-
-    if len(all_reincarcerations_in_window) == 1:
+    if reincarceration_timeline.count_in_window(event.reincarceration_date, end_date) == 1:
         # This function will be called for every single one of the person's release events that resulted in a
         # reincarceration. If this is the last instance of reincarceration before the end of the window, then include
         # this in the person-based count.
-        for person_combo in person_based_combos:
-            metrics.append((person_combo, recidivism_value_for_metric(
-                person_combo, event.return_type,
-                event.from_supervision_type,
-                event.source_violation_type)))
-
-    for event_combo in event_based_combos:
-        metrics.append((event_combo, recidivism_value_for_metric(
-            event_combo,
-            event.return_type,
-            event.from_supervision_type,
-            event.source_violation_type)))
+        metrics.extend(_recidivism_values(combo, person_based_combos, event.return_type, event.from_supervision_type,
+                                          event.source_violation_type))
+
+    metrics.extend(_recidivism_values(combo, event_based_combos, event.return_type, event.from_supervision_type,
+                                      event.source_violation_type))
 
     if combo.get('person_id') is not None:
         # Only include person-level count metrics that are applicable to the person
@@ -773,8 +840,7 @@ def combination_count_metrics(combo: Dict[str, Any], event:
 
 def combination_liberty_metrics(combo: Dict[str, Any], event:
                                 RecidivismReleaseEvent,
-                                all_reincarcerations:
-                                Dict[date, Dict[str, Any]]) \
+                                reincarceration_timeline: ReincarcerationTimeline) \
         -> List[Tuple[Dict[str, Any], int]]:
     """Returns all unique recidivism liberty metrics for the given event and combination.
 
@@ -785,8 +851,7 @@ def combination_liberty_metrics(combo: Dict[str, Any], event:
     Args:
         combo: a characteristic combination to convert into metrics
         event: the release event from which the combination was derived
-        all_reincarcerations: dictionary where the keys are all dates of reincarceration for the person's ReleaseEvents,
-            and the values are a dictionary containing return type and from supervision type information
+        reincarceration_timeline: the reincarcerations for the person's ReleaseEvents
 
     Returns:
         A list of key-value tuples representing specific metric combination dictionaries and the number of days the
@@ -810,30 +875,20 @@ def combination_liberty_metrics(combo: Dict[str, Any], event:
     start_date = combo['start_date']
     end_date = combo['end_date'] + datetime.timedelta(days=1)
 
-    all_reincarcerations_in_window = reincarcerations_in_window(start_date, end_date, all_reincarcerations)
-
-    reincarcerations_in_window_after_event = reincarcerations_in_window(event.reincarceration_date,
-                                                                        end_date, all_reincarcerations)
-
-    if len(all_reincarcerations_in_window) == len(reincarcerations_in_window_after_event):
+    if reincarceration_timeline.count_in_window(start_date, end_date) == \
+            reincarceration_timeline.count_in_window(event.reincarceration_date, end_date):
         # This function will be called for every single one of the person's release events that resulted in a
         # reincarceration. If this is the first instance of reincarceration in the window, then include
         # this in the person-based count.
-        for person_combo in person_based_combos:
-            recid_value = recidivism_value_for_metric(
-                person_combo, event.return_type, event.from_supervision_type,
-                event.source_violation_type)
-
+        for person_combo, recid_value in _recidivism_values(combo, person_based_combos, event.return_type,
+                                                            event.from_supervision_type, event.source_violation_type):
             # Only include this metric if the recidivism value for the given combination is 1, meaning the event's
             # return details matches that of the combo
             if recid_value == 1:
                 metrics.append((person_combo, time_at_liberty))
 
-    for event_combo in event_based_combos:
-        recid_value = recidivism_value_for_metric(
-            event_combo, event.return_type, event.from_supervision_type,
-            event.source_violation_type)
-
+    for event_combo, recid_value in _recidivism_values(
+            combo, event_based_combos, event.return_type, event.from_supervision_type, event.source_violation_type):
         # Only include this metric if the recidivism value for the given combination is 1, meaning the event's return
         # details matches that of the combo
         if recid_value == 1:
@@ -891,7 +946,6 @@ def augmented_combo_list(combo: Dict[str, Any],
     if combo.get('person_id') is not None:
         return [person_level_augmented_combo(combo, event, methodology, period)]
 
-    combos = []
     parameters: Dict[str, Any] = {'state_code': event.state_code,
                                   'methodology': methodology}
 
@@ -899,45 +953,8 @@ def augmented_combo_list(combo: Dict[str, Any],
         parameters['follow_up_period'] = period
 
     base_combo = augment_combination(combo, parameters)
-    combos.append(base_combo)
-
-    new_admission_parameters = parameters.copy()
-    new_admission_parameters['return_type'] = ReincarcerationReturnType.NEW_ADMISSION
-
-    combos.append(augment_combination(base_combo, new_admission_parameters))
-
-    revocation_parameters = parameters.copy()
-    revocation_parameters['return_type'] = ReincarcerationReturnType.REVOCATION
-    combo_revocation = augment_combination(base_combo, revocation_parameters)
-    combos.append(combo_revocation)
-
-    for violation_type in StateSupervisionViolationType:
-        violation_parameters = revocation_parameters.copy()
-        violation_parameters['source_violation_type'] = violation_type
-        combos.append(augment_combination(combo_revocation, violation_parameters))
-
-    parole_parameters = revocation_parameters.copy()
-    parole_parameters['from_supervision_type'] = ReincarcerationReturnFromSupervisionType.PAROLE
-    parole_combo = augment_combination(combo_revocation, parole_parameters)
-    combos.append(parole_combo)
-
-    for violation_type in StateSupervisionViolationType:
-        violation_parameters = parole_parameters.copy()
-        violation_parameters['source_violation_type'] = violation_type
-        combos.append(augment_combination(parole_combo, violation_parameters))
-
-    probation_parameters = revocation_parameters.copy()
-    probation_parameters['from_supervision_type'] = \
-        ReincarcerationReturnFromSupervisionType.PROBATION
-    probation_combo = augment_combination(combo_revocation, probation_parameters)
-    combos.append(probation_combo)
-
-    for violation_type in StateSupervisionViolationType:
-        violation_parameters = probation_parameters.copy()
-        violation_parameters['source_violation_type'] = violation_type
-        combos.append(augment_combination(probation_combo, violation_parameters))
 
-    return combos
+    return [{**base_combo, **return_details} for return_details in _RETURN_DETAILS_TEMPLATES]
 
 
 def recidivism_value_for_metric(
@@ -29,7 +29,6 @@ import sys
 from typing import Any, Dict, List, Tuple
 import datetime
 
-from apache_beam.pvalue import AsDict
 from more_itertools import one
 
 import apache_beam as beam
@@ -45,7 +44,8 @@ from recidiviz.calculator.pipeline.recidivism.metrics import \
     ReincarcerationRecidivismMetric
 from recidiviz.calculator.pipeline.recidivism.metrics import \
     ReincarcerationRecidivismMetricType as MetricType
-from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, AverageFn, ConvertDictToKVTuple, AverageFnResult
+from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, AverageFn, ConvertDictToKVTuple, AverageFnResult, \
+    ParDoWithKeyedLookups, element_key_lookup_keys
 from recidiviz.calculator.pipeline.utils.entity_hydration_utils import \
     SetViolationResponseOnIncarcerationPeriod, SetViolationOnViolationsResponse
 from recidiviz.calculator.pipeline.utils.execution_utils import get_job_id
@@ -670,7 +670,9 @@ def run(argv):
         person_events = (
             person_and_incarceration_periods
             | "ClassifyReleaseEvents" >>
-            beam.ParDo(ClassifyReleaseEvents(), AsDict(person_id_to_county_kv))
+            ParDoWithKeyedLookups(ClassifyReleaseEvents(),
+                                  [person_id_to_county_kv],
+                                  [element_key_lookup_keys])
         )
 
         # Get dimensions to include and methodologies to use
@@ -33,7 +33,8 @@ from recidiviz.calculator.pipeline.utils.calculator_utils import age_at_date, \
     age_bucket, for_characteristics_races_ethnicities, for_characteristics, \
     augmented_combo_list, last_day_of_month, relevant_metric_periods, \
     augment_combination, include_in_monthly_metrics, \
-    get_calculation_month_lower_bound_date, characteristics_with_person_id_fields
+    get_calculation_month_lower_bound_date, characteristics_with_person_id_fields, \
+    get_calculation_window_lower_bound_date
 from recidiviz.calculator.pipeline.utils.assessment_utils import \
     assessment_score_bucket, include_assessment_in_metric
 from recidiviz.calculator.pipeline.supervision.metrics import \
@@ -84,6 +85,10 @@ def map_supervision_combinations(person: StatePerson,
 
     supervision_time_buckets.sort(key=attrgetter('year', 'month'))
 
+    # Drop the buckets for months that can't be included in the output
+    supervision_time_buckets = buckets_in_calculation_window(
+        supervision_time_buckets, metric_period_end_date, calculation_month_limit)
+
     periods_and_buckets = _classify_buckets_by_relevant_metric_periods(supervision_time_buckets, metric_period_end_date)
 
     for supervision_time_bucket in supervision_time_buckets:
@@ -189,6 +194,25 @@ def map_supervision_combinations(person: StatePerson,
     return metrics
 
 
+def buckets_in_calculation_window(
+        supervision_time_buckets: List[SupervisionTimeBucket],
+        metric_period_end_date: date,
+        calculation_month_limit: int) -> List[SupervisionTimeBucket]:
+    """Returns the SupervisionTimeBuckets for months that can contribute to either a monthly metric within the
+    calculation_month_limit or a metric period metric ending in the month of the metric_period_end_date. If the
+    calculation_month_limit is -1, returns all of the supervision_time_buckets."""
+    calculation_window_lower_bound = get_calculation_window_lower_bound_date(
+        metric_period_end_date, calculation_month_limit)
+
+    if not calculation_window_lower_bound:
+        return supervision_time_buckets
+
+    return [
+        bucket for bucket in supervision_time_buckets
+        if include_in_monthly_metrics(bucket.year, bucket.month, calculation_window_lower_bound)
+    ]
+
+
 def characteristic_combinations(person: StatePerson,
                                 supervision_time_bucket: SupervisionTimeBucket,
                                 inclusions: Dict[str, bool],
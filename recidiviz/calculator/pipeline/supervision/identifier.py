@@ -90,7 +90,8 @@ def find_supervision_time_buckets(
         assessments: List[StateAssessment],
         violation_responses: List[StateSupervisionViolationResponse],
         ssvr_agent_associations: Dict[int, Dict[Any, Any]],
-        supervision_period_to_agent_associations: Dict[int, Dict[Any, Any]]
+        supervision_period_to_agent_associations: Dict[int, Dict[Any, Any]],
+        calculation_window_lower_bound: Optional[date] = None
 ) -> List[SupervisionTimeBucket]:
     """Finds buckets of time that a person was on supervision and determines if they resulted in revocation return.
 
@@ -124,6 +125,8 @@ def find_supervision_time_buckets(
             about the corresponding StateAgent
         - state_code_filter: the state_code to limit the output to. If this is 'ALL' or is omitted, then all states
         will be included in the result.
+        - calculation_window_lower_bound: The first day of the earliest month that can be included in the calculations.
+            If set, no buckets are found for the months before it.
 
     Returns:
         A list of SupervisionTimeBuckets for the person.
@@ -170,7 +173,8 @@ def find_supervision_time_buckets(
                 months_incarcerated_eom,
                 assessments,
                 violation_responses,
-                supervision_period_to_agent_associations)
+                supervision_period_to_agent_associations,
+                calculation_window_lower_bound)
 
             supervision_termination_bucket = find_supervision_termination_bucket(
                 supervision_sentences,
@@ -194,6 +198,12 @@ def find_supervision_time_buckets(
     else:
         supervision_time_buckets = _expand_dual_supervision_buckets(supervision_time_buckets)
 
+    if calculation_window_lower_bound:
+        supervision_time_buckets = [
+            bucket for bucket in supervision_time_buckets
+            if date(bucket.year, bucket.month, 1) >= calculation_window_lower_bound
+        ]
+
     return supervision_time_buckets
 
 
@@ -207,9 +217,11 @@ def find_time_buckets_for_supervision_period(
         assessments: List[StateAssessment],
         violation_responses: List[StateSupervisionViolationResponse],
         supervision_period_to_agent_associations:
-        Dict[int, Dict[Any, Any]]) -> List[SupervisionTimeBucket]:
+        Dict[int, Dict[Any, Any]],
+        calculation_window_lower_bound: Optional[date] = None) -> List[SupervisionTimeBucket]:
     """Finds months that this person was on supervision for the given StateSupervisionPeriod, where the person was not
-    incarcerated for the full month and did not have a revocation admission that month.
+    incarcerated for the full month and did not have a revocation admission that month. If
+    calculation_window_lower_bound is set, only finds the months on or after it.
 
     Args:
         - supervision_period: The supervision period the person was on
@@ -235,6 +247,9 @@ def find_time_buckets_for_supervision_period(
 
     start_of_month = first_day_of_month(start_date)
 
+    if calculation_window_lower_bound:
+        start_of_month = max(start_of_month, first_day_of_month(calculation_window_lower_bound))
+
     # The last month this person will count towards supervision population is the month of the last full day on
     # supervision.
     month_upper_bound = \
@@ -497,7 +512,7 @@ def _get_revocation_details(incarceration_period: StateIncarcerationPeriod,
 
     if not supervising_officer_external_id and \
             default_to_supervision_period_officer_for_revocation_details_for_state(incarceration_period.state_code):
-        if supervision_period and supervision_period_to_agent_associations:
+        if supervision_period:
             supervising_officer_external_id, supervising_district_external_id = \
                 _get_supervising_officer_and_district(supervision_period, supervision_period_to_agent_associations)
 
@@ -22,11 +22,10 @@ import datetime
 import json
 import logging
 import sys
-from typing import Dict, Any, List, Tuple, Set
+from typing import Dict, Any, List, Optional, Tuple, Set
 
 import apache_beam as beam
 from apache_beam.options.pipeline_options import SetupOptions
-from apache_beam.pvalue import AsDict
 from apache_beam.typehints import with_input_types, with_output_types
 from more_itertools import one
 
@@ -41,11 +40,17 @@ from recidiviz.calculator.pipeline.supervision.metrics import \
     SupervisionMetricType as MetricType
 from recidiviz.calculator.pipeline.supervision.supervision_time_bucket import \
     SupervisionTimeBucket
-from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, ConvertDictToKVTuple, AverageFn
+from recidiviz.calculator.pipeline.utils.beam_utils import SumFn, ConvertDictToKVTuple, AverageFn, \
+    ParDoWithKeyedLookups
+from recidiviz.calculator.pipeline.utils.calculator_utils import get_calculation_window_lower_bound_date, \
+    last_day_of_month
 from recidiviz.calculator.pipeline.utils.entity_hydration_utils import \
-    SetViolationResponseOnIncarcerationPeriod, SetViolationOnViolationsResponse, ConvertSentenceToStateSpecificType
+    SetViolationResponseOnIncarcerationPeriod, SetViolationOnViolationsResponse, ConvertSentenceToStateSpecificType, \
+    us_mo_sentence_status_lookup_keys
 from recidiviz.calculator.pipeline.utils.execution_utils import get_job_id, calculation_month_limit_arg
 from recidiviz.calculator.pipeline.utils.extractor_utils import BuildRootEntity
+from recidiviz.calculator.pipeline.utils.incremental_utils import IncrementalRunConfig, \
+    MapToCombinedMetricValues, changed_person_ids_query
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     json_serializable_metric_key, MetricMethodologyType
 from recidiviz.calculator.pipeline.utils.pipeline_args_utils import add_shared_pipeline_arguments, \
@@ -78,11 +83,13 @@ class GetSupervisionMetrics(beam.PTransform):
     def __init__(self, pipeline_options: Dict[str, str],
                  inclusions: Dict[str, bool],
                  metric_types: Set[str],
-                 calculation_month_limit: int):
+                 calculation_month_limit: int,
+                 incremental_config: Optional[IncrementalRunConfig] = None):
         super(GetSupervisionMetrics, self).__init__()
         self._pipeline_options = pipeline_options
         self.inclusions = inclusions
         self.calculation_month_limit = calculation_month_limit
+        self.incremental_config = incremental_config
 
         for metric_option in MetricType:
             if metric_option.value in metric_types or 'ALL' in metric_types:
@@ -93,59 +100,28 @@ class GetSupervisionMetrics(beam.PTransform):
 
     def expand(self, input_or_inputs):
         # Calculate supervision metric combinations from a StatePerson and their
-        # SupervisionTimeBuckets
-        supervision_metric_combinations = (
-            input_or_inputs | 'Map to metric combinations' >>
-            beam.ParDo(CalculateSupervisionMetricCombinations(),
-                       self.calculation_month_limit, self.inclusions).with_outputs(
-                           'populations',
-                           'revocations',
-                           'successes',
-                           'successful_sentence_lengths',
-                           'assessment_changes',
-                           'revocation_analyses',
-                           'revocation_violation_type_analyses'))
-
-        # Calculate the supervision population values for the metrics combined by key
-        populations_with_sums = (supervision_metric_combinations.populations
-                                 | 'Calculate supervision population values' >>
-                                 beam.CombinePerKey(SumFn()))
-
-        # Calculate the revocation count values for metrics combined by key
-        revocations_with_sums = (supervision_metric_combinations.revocations
-                                 | 'Calculate supervision revocation values' >>
-                                 beam.CombinePerKey(SumFn()))
-
-        # Calculate the supervision success values for the metrics combined by key
-        successes_with_sums = (supervision_metric_combinations.successes
-                               | 'Calculate the supervision success values' >>
-                               beam.CombinePerKey(AverageFn()))
-
-        # Calculate the supervision success sentence lengths values for the metrics combined by key
-        average_successful_sentence_lengths = (supervision_metric_combinations.successful_sentence_lengths
-                                               | 'Calculate the average successful sentence lengths ' >>
-                                               beam.CombinePerKey(AverageFn()))
-
-        # Calculate the assessment score changes for the metrics combined by key
-        assessment_changes_with_averages = (
-            supervision_metric_combinations.assessment_changes
-            | 'Calculate the assessment score change average values' >>
-            beam.CombinePerKey(AverageFn())
-        )
-
-        # Calculate the revocation analyses count values for metrics combined by key
-        revocation_analyses_with_sums = (
-            supervision_metric_combinations.revocation_analyses
-            | 'Calculate the revocation analyses count values' >>
-            beam.CombinePerKey(SumFn())
-        )
-
-        # Calculate the violation type analyses count values for metrics combined by key
-        revocation_violation_type_analyses_with_sums = (
-            supervision_metric_combinations.revocation_violation_type_analyses
-            | 'Calculate the revocation violation type analyses count values' >>
-            beam.CombinePerKey(SumFn())
-        )
+        # SupervisionTimeBuckets, and combine the values of the metrics by key
+        supervision_metric_values = (
+            input_or_inputs | 'Map to combined metric values' >>
+            MapToCombinedMetricValues(CalculateSupervisionMetricCombinations(),
+                                      {'populations': SumFn(),
+                                       'revocations': SumFn(),
+                                       'successes': AverageFn(),
+                                       'successful_sentence_lengths': AverageFn(),
+                                       'assessment_changes': AverageFn(),
+                                       'revocation_analyses': SumFn(),
+                                       'revocation_violation_type_analyses': SumFn()},
+                                      self.calculation_month_limit, self.inclusions,
+                                      incremental_config=self.incremental_config,
+                                      pipeline_options=self._pipeline_options))
+
+        populations_with_sums = supervision_metric_values['populations']
+        revocations_with_sums = supervision_metric_values['revocations']
+        successes_with_sums = supervision_metric_values['successes']
+        average_successful_sentence_lengths = supervision_metric_values['successful_sentence_lengths']
+        assessment_changes_with_averages = supervision_metric_values['assessment_changes']
+        revocation_analyses_with_sums = supervision_metric_values['revocation_analyses']
+        revocation_violation_type_analyses_with_sums = supervision_metric_values['revocation_violation_type_analyses']
 
         # Produce the SupervisionPopulationMetrics
         population_metrics = (populations_with_sums | 'Produce supervision population metrics' >>
@@ -199,6 +175,11 @@ class ClassifySupervisionTimeBuckets(beam.DoFn):
     """Classifies time on supervision as years and months with or without revocation, and classifies months of
     projected completion as either successful or not."""
 
+    def __init__(self, calculation_month_limit: int = -1):
+        super(ClassifySupervisionTimeBuckets, self).__init__()
+        # Buckets are not classified for the months before any month that can be included in the calculations
+        self.calculation_month_limit = calculation_month_limit
+
     #pylint: disable=arguments-differ
     def process(self,
                 element,
@@ -232,6 +213,9 @@ class ClassifySupervisionTimeBuckets(beam.DoFn):
         # Get the StatePerson
         person = one(person_entities['person'])
 
+        calculation_window_lower_bound = get_calculation_window_lower_bound_date(
+            last_day_of_month(datetime.date.today()), self.calculation_month_limit)
+
         # Find the SupervisionTimeBuckets from the supervision and incarceration
         # periods
         supervision_time_buckets = identifier.find_supervision_time_buckets(
@@ -242,7 +226,8 @@ class ClassifySupervisionTimeBuckets(beam.DoFn):
             assessments,
             violation_responses,
             ssvr_agent_associations,
-            supervision_period_to_agent_associations)
+            supervision_period_to_agent_associations,
+            calculation_window_lower_bound)
 
         if not supervision_time_buckets:
             logging.info("No valid supervision time buckets for person with id: %d. Excluding them from the "
@@ -254,6 +239,31 @@ class ClassifySupervisionTimeBuckets(beam.DoFn):
         pass  # Passing unused abstract method.
 
 
+def violation_response_lookup_keys(element) -> List[int]:
+    """Returns the ids of the StateSupervisionViolationResponses of the person in the element, which
+    ClassifySupervisionTimeBuckets looks up the agent associations of."""
+    _, person_entities = element
+
+    violation_responses = list(person_entities['violation_responses'])
+    for incarceration_period in person_entities['incarceration_periods']:
+        if incarceration_period.source_supervision_violation_response:
+            violation_responses.append(incarceration_period.source_supervision_violation_response)
+
+    return [response.supervision_violation_response_id for response in violation_responses]
+
+
+def supervision_period_lookup_keys(element) -> List[int]:
+    """Returns the ids of the StateSupervisionPeriods of the person in the element, which
+    ClassifySupervisionTimeBuckets looks up the agent associations of."""
+    _, person_entities = element
+
+    supervision_periods = list(person_entities['supervision_periods'])
+    for sentence in list(person_entities['supervision_sentences']) + list(person_entities['incarceration_sentences']):
+        supervision_periods.extend(sentence.supervision_periods)
+
+    return [supervision_period.supervision_period_id for supervision_period in supervision_periods]
+
+
 @with_input_types(beam.typehints.Tuple[entities.StatePerson, List[SupervisionTimeBucket]],
                   beam.typehints.Optional[int], beam.typehints.Dict[str, bool])
 @with_output_types(beam.typehints.Tuple[str, Any])
@@ -494,6 +504,11 @@ def parse_arguments(argv):
                              'If set to -1, does not limit the calculations.',
                         default=1)
 
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        help='When set, only recomputes the people whose data changed since the previous run of this '
+                             'job, reusing the person metric contributions it stored for everyone else.')
+
     return parser.parse_known_args(argv)
 
 
@@ -555,6 +570,22 @@ def run(argv):
     # The state_code to run calculations on, or ALL if calculations should be run on all states
     state_code = known_args.state_code
 
+    # Add timestamp for local jobs. This also identifies the build of this job in incremental runs.
+    job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
+    all_pipeline_options['job_timestamp'] = job_timestamp
+
+    incremental_config = None
+    person_id_filter_query = None
+    if known_args.incremental:
+        if person_id_filter_set:
+            raise ValueError("Incremental runs can't be limited to the people in person_filter_ids.")
+
+        # Only load the people whose data changed since the previous run of this job
+        incremental_config = IncrementalRunConfig.for_pipeline('supervision', all_pipeline_options,
+                                                               state_dataset=known_args.input,
+                                                               output_dataset=known_args.output)
+        person_id_filter_query = changed_person_ids_query(incremental_config)
+
     with beam.Pipeline(options=pipeline_options) as p:
         # Get StatePersons
         persons = (p | 'Load Persons' >> BuildRootEntity(dataset=input_dataset,
@@ -562,7 +593,8 @@ def run(argv):
                                                          unifying_id_field=entities.StatePerson.get_class_id_name(),
                                                          build_related_entities=True,
                                                          unifying_id_field_filter_set=person_id_filter_set,
-                                                         state_code=state_code))
+                                                         state_code=state_code,
+                                                         unifying_id_field_filter_query=person_id_filter_query))
 
         # Get StateIncarcerationPeriods
         incarceration_periods = (p | 'Load IncarcerationPeriods' >> BuildRootEntity(
@@ -571,7 +603,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Get StateSupervisionViolations
@@ -581,7 +614,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # TODO(2769): Don't bring this in as a root entity
@@ -592,7 +626,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Get StateSupervisionSentences
@@ -602,7 +637,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Get StateIncarcerationSentences
@@ -612,7 +648,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Get StateSupervisionPeriods
@@ -622,7 +659,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=True,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Get StateAssessments
@@ -632,7 +670,8 @@ def run(argv):
             unifying_id_field=entities.StatePerson.get_class_id_name(),
             build_related_entities=False,
             unifying_id_field_filter_set=person_id_filter_set,
-            state_code=state_code
+            state_code=state_code,
+            unifying_id_field_filter_query=person_id_filter_query
         ))
 
         # Bring in the table that associates StateSupervisionViolationResponses to information about StateAgents
@@ -694,13 +733,15 @@ def run(argv):
         supervision_sentences_converted = (
             supervision_sentences
             | 'Convert to state-specific supervision sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         incarceration_sentences_converted = (
             incarceration_sentences
             | 'Convert to state-specific incarceration sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         # Group StateSupervisionViolationResponses and StateSupervisionViolations by person_id
@@ -753,37 +794,31 @@ def run(argv):
             beam.CoGroupByKey()
         )
 
+        # The number of months to limit the monthly calculation output to
+        calculation_month_limit = known_args.calculation_month_limit
+
         # Identify SupervisionTimeBuckets from the StatePerson's StateSupervisionSentences and StateIncarcerationPeriods
         person_time_buckets = (
             person_periods_and_sentences
             | 'Get SupervisionTimeBuckets' >>
-            beam.ParDo(ClassifySupervisionTimeBuckets(),
-                       AsDict(ssvr_agent_associations_as_kv),
-                       AsDict(supervision_period_to_agent_associations_as_kv)))
+            ParDoWithKeyedLookups(ClassifySupervisionTimeBuckets(calculation_month_limit),
+                                  [ssvr_agent_associations_as_kv, supervision_period_to_agent_associations_as_kv],
+                                  [violation_response_lookup_keys, supervision_period_lookup_keys]))
 
         # Get dimensions to include and methodologies to use
         inclusions, _ = dimensions_and_methodologies(known_args)
 
-        # Get pipeline job details for accessing job_id
-        all_pipeline_options = pipeline_options.get_all_options()
-
         # Get the type of metric to calculate
         metric_types = set(known_args.metric_types) if known_args.metric_types else ['ALL']
 
-        # The number of months to limit the monthly calculation output to
-        calculation_month_limit = known_args.calculation_month_limit
-
-        # Add timestamp for local jobs
-        job_timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S.%f')
-        all_pipeline_options['job_timestamp'] = job_timestamp
-
         # Get supervision metrics
         supervision_metrics = (person_time_buckets | 'Get Supervision Metrics' >>
                                GetSupervisionMetrics(
                                    pipeline_options=all_pipeline_options,
                                    inclusions=inclusions,
                                    metric_types=metric_types,
-                                   calculation_month_limit=calculation_month_limit))
+                                   calculation_month_limit=calculation_month_limit,
+                                   incremental_config=incremental_config))
         if person_id_filter_set:
             logging.warning("Non-empty person filter set - returning before writing metrics.")
             return
@@ -16,9 +16,10 @@
 # =============================================================================
 """Utils for beam calculations."""
 # pylint: disable=abstract-method, arguments-differ, redefined-builtin
-from typing import Any, Dict, NamedTuple
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
 
 import apache_beam as beam
+from apache_beam.transforms.window import GlobalWindows
 from apache_beam.typehints import with_input_types, with_output_types
 
 AverageFnResult = NamedTuple('AverageFnResult', [
@@ -72,6 +73,95 @@ class SumFn(beam.CombineFn):
         return accumulator
 
 
+# The default maximum number of keys a bundle holds partial accumulators for
+# before flushing them
+DEFAULT_MAX_PARTIAL_KEYS = 10000
+
+
+class CombinePerKeyWithPartials(beam.PTransform):
+    """Combines the values of each key with |combine_fn|, like CombinePerKey,
+    after first combining the values of each key within each bundle.
+
+    The metric combinations of a person repeat the same keys many times, so
+    partially combining them before the shuffle cuts the number of elements
+    that are shuffled to the number of distinct keys in each bundle. At most
+    |max_partial_keys| partial accumulators are held in memory at a time; when
+    there are more, they are flushed downstream and combining starts over.
+
+    The input must be in the global window.
+    """
+
+    def __init__(self, combine_fn: beam.CombineFn,
+                 max_partial_keys: int = DEFAULT_MAX_PARTIAL_KEYS):
+        super(CombinePerKeyWithPartials, self).__init__()
+        if max_partial_keys < 1:
+            raise ValueError("Expected max_partial_keys to be positive")
+        self.combine_fn = combine_fn
+        self.max_partial_keys = max_partial_keys
+
+    def expand(self, input_or_inputs):
+        return (input_or_inputs
+                | 'Partially combine per key in each bundle' >>
+                beam.ParDo(_PartiallyCombinePerKey(self.combine_fn,
+                                                   self.max_partial_keys))
+                | 'Combine partial accumulators per key' >>
+                beam.CombinePerKey(MergeAccumulatorsFn(self.combine_fn)))
+
+
+class _PartiallyCombinePerKey(beam.DoFn):
+    """Adds the values of each key in a bundle to an accumulator of the key,
+    outputting (key, accumulator) tuples."""
+
+    def __init__(self, combine_fn: beam.CombineFn, max_partial_keys: int):
+        super(_PartiallyCombinePerKey, self).__init__()
+        self.combine_fn = combine_fn
+        self.max_partial_keys = max_partial_keys
+        self._accumulators: Dict[Any, Any] = {}
+
+    def start_bundle(self):
+        self._accumulators = {}
+
+    def process(self, element, *args, **kwargs):
+        key, value = element
+
+        if key not in self._accumulators:
+            if len(self._accumulators) >= self.max_partial_keys:
+                yield from self._accumulators.items()
+                self._accumulators = {}
+            self._accumulators[key] = self.combine_fn.create_accumulator()
+
+        self._accumulators[key] = self.combine_fn.add_input(self._accumulators[key], value)
+
+    def finish_bundle(self):
+        for key_and_accumulator in self._accumulators.items():
+            yield GlobalWindows.windowed_value(key_and_accumulator)
+        self._accumulators = {}
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+class MergeAccumulatorsFn(beam.CombineFn):
+    """Combine function whose inputs are accumulators of |combine_fn|, e.g.
+    values that were already partially combined."""
+
+    def __init__(self, combine_fn: beam.CombineFn):
+        super(MergeAccumulatorsFn, self).__init__()
+        self.combine_fn = combine_fn
+
+    def create_accumulator(self):
+        return self.combine_fn.create_accumulator()
+
+    def add_input(self, accumulator, input):
+        return self.combine_fn.merge_accumulators([accumulator, input])
+
+    def merge_accumulators(self, accumulators):
+        return self.combine_fn.merge_accumulators(accumulators)
+
+    def extract_output(self, accumulator):
+        return self.combine_fn.extract_output(accumulator)
+
+
 @with_input_types(beam.typehints.Dict[str, Any], str)
 @with_output_types(beam.typehints.Tuple[Any, Dict[str, Any]])
 class ConvertDictToKVTuple(beam.DoFn):
@@ -87,3 +177,118 @@ class ConvertDictToKVTuple(beam.DoFn):
 
     def to_runner_api_parameter(self, _):
         pass  # Passing unused abstract method.
+
+
+# Returns the keys of the rows an element looks up in a reference table
+LookupKeysFn = Callable[[Tuple[Any, Any]], Iterable[Any]]
+
+
+class ParDoWithKeyedLookups(beam.PTransform):
+    """Applies |do_fn| to each (key, value) element of the input, passing each
+    of |tables| to do_fn.process as a dictionary, like an AsDict side input of
+    the table would be.
+
+    Rather than every worker holding each whole table in memory, each element
+    is only given the rows of each table it looks up. The lookup keys of the
+    elements are joined to each table through a CoGroupByKey, and the matched
+    rows are then grouped with the elements by element key. The dictionaries
+    passed with an element hold the rows looked up by all elements with the
+    same key.
+
+    Only the process method of |do_fn| is called.
+    """
+
+    def __init__(self, do_fn: beam.DoFn,
+                 tables: List[beam.pvalue.PCollection],
+                 lookup_keys_fns: List[LookupKeysFn]):
+        """
+        Args:
+            do_fn: The DoFn to apply to each element.
+            tables: PCollections of (lookup key, row) tuples.
+            lookup_keys_fns: For each of |tables|, a function that returns the
+                lookup keys of the rows an element needs from that table.
+        """
+        super(ParDoWithKeyedLookups, self).__init__()
+        if len(tables) != len(lookup_keys_fns):
+            raise ValueError("Expected one lookup keys function per table")
+        self.do_fn = do_fn
+        self.tables = tables
+        self.lookup_keys_fns = lookup_keys_fns
+
+    def expand(self, input_or_inputs):
+        matched_rows = []
+        for index, (table, lookup_keys_fn) in enumerate(
+                zip(self.tables, self.lookup_keys_fns)):
+            lookup_requests = (
+                input_or_inputs
+                | f'Get lookup keys for table {index}' >>
+                beam.FlatMap(_lookup_requests, lookup_keys_fn))
+
+            matched_rows.append(
+                {'requests': lookup_requests, 'rows': table}
+                | f'Join lookup keys to table {index}' >> beam.CoGroupByKey()
+                | f'Key rows of table {index} by element key' >>
+                beam.FlatMap(_rows_by_element_key, index))
+
+        all_matched_rows = (tuple(matched_rows)
+                            | 'Flatten matched rows' >> beam.Flatten())
+
+        return ({'elements': input_or_inputs, 'rows': all_matched_rows}
+                | 'Group elements with matched rows' >> beam.CoGroupByKey()
+                | 'Process elements with lookups' >>
+                beam.ParDo(_ProcessWithLookups(self.do_fn, len(self.tables))))
+
+
+def element_key_lookup_keys(element) -> List[Any]:
+    """Looks up the row of a table keyed by the key of the element, e.g. the
+    person_id."""
+    element_key, _ = element
+    return [element_key]
+
+
+def _lookup_requests(element, lookup_keys_fn: LookupKeysFn):
+    """Yields a (lookup key, element key) tuple for each distinct lookup key
+    of |element|."""
+    element_key, _ = element
+    for lookup_key in set(lookup_keys_fn(element)):
+        if lookup_key is not None:
+            yield lookup_key, element_key
+
+
+def _rows_by_element_key(joined, index: int):
+    """Yields an (element key, (table index, lookup key, row)) tuple for each
+    element key that looked up a row of the table."""
+    lookup_key, grouped = joined
+    rows = list(grouped['rows'])
+    if not rows:
+        return
+
+    # Like AsDict, a table with repeated keys keeps a single row per key
+    row = rows[-1]
+    for element_key in set(grouped['requests']):
+        yield element_key, (index, lookup_key, row)
+
+
+class _ProcessWithLookups(beam.DoFn):
+    """Applies a DoFn to the elements with each key, passing it the rows they
+    looked up from each table as dictionaries."""
+
+    def __init__(self, do_fn: beam.DoFn, num_tables: int):
+        super(_ProcessWithLookups, self).__init__()
+        self.do_fn = do_fn
+        self.num_tables = num_tables
+
+    def process(self, element, *args, **kwargs):
+        element_key, grouped = element
+
+        lookups: List[Dict[Any, Any]] = [{} for _ in range(self.num_tables)]
+        for index, lookup_key, row in grouped['rows']:
+            lookups[index][lookup_key] = row
+
+        for value in grouped['elements']:
+            outputs = self.do_fn.process((element_key, value), *lookups)
+            if outputs:
+                yield from outputs
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
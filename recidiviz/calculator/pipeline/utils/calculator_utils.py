@@ -432,6 +432,28 @@ def get_calculation_month_lower_bound_date(calculation_month_upper_bound: date,
     return calculation_month_lower_bound
 
 
+def get_calculation_window_lower_bound_date(calculation_month_upper_bound: date, calculation_month_limit: int) -> \
+        Optional[date]:
+    """Returns the date at the beginning of the first month with events that can contribute to any metric.
+
+    Events can contribute to the monthly metrics of the months on or after the calculation month lower bound, and to
+    the metric period metrics of each metric period in METRIC_PERIOD_MONTHS ending in the month of the
+    calculation_month_upper_bound. Events that happen before both of these windows are never included in the output, so
+    they can be dropped before any metric combinations are calculated. If the calculation_month_limit is -1, then
+    returns None, as every event can contribute to the monthly metrics.
+    """
+    calculation_month_lower_bound = get_calculation_month_lower_bound_date(
+        calculation_month_upper_bound, calculation_month_limit)
+
+    if not calculation_month_lower_bound:
+        return None
+
+    metric_period_lower_bound = get_calculation_month_lower_bound_date(
+        calculation_month_upper_bound, max(METRIC_PERIOD_MONTHS))
+
+    return min(calculation_month_lower_bound, metric_period_lower_bound)
+
+
 def characteristics_with_person_id_fields(characteristics: Dict[str, Any], person: StatePerson, pipeline: str) -> \
         Dict[str, Any]:
     """Returns an updated characteristics dictionary with the person's person_id and, if applicable, a
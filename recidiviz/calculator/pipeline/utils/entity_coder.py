@@ -0,0 +1,186 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Beam coders for the hydrated entity graphs passed between pipeline stages."""
+import pickle
+from typing import Any, Dict, List, Tuple, Type, Union
+
+import attr
+import apache_beam as beam
+
+from recidiviz.persistence.entity import entity_utils
+from recidiviz.persistence.entity.base_entity import Entity
+from recidiviz.persistence.entity.state import entities as state_entities
+
+# The state entity classes, which are encoded by their index in this tuple
+# rather than by their module and class name
+_ENTITY_CLASSES: Tuple[Type[Entity], ...] = tuple(sorted(
+    entity_utils.get_all_entity_classes_in_module(state_entities),
+    key=lambda entity_class: entity_class.__name__))
+
+_ENTITY_CLASS_INDICES: Dict[Type[Entity], int] = {
+    entity_class: index for index, entity_class in enumerate(_ENTITY_CLASSES)}
+
+_FIELD_NAMES_BY_CLASS: Dict[Type[Entity], Tuple[str, ...]] = {}
+
+# An encoded entity: the index of its class, or the class itself if it is not a
+# state entity class, the values of its fields, and the positions of the
+# fields that reference other entities in the graph with the indices of
+# those entities
+_EncodedEntity = Tuple[Union[int, Type[Entity]], Tuple[Any, ...], Tuple[Tuple[int, Union[int, List[int]]], ...]]
+
+# Marks whether a value encoded by the _EntityOrPickleCoder is an entity graph
+_PICKLED_VALUE = b'\x00'
+_ENTITY_GRAPH = b'\x01'
+
+
+class EntityCoder(beam.coders.Coder):
+    """Coder for an Entity and all of the entities it is connected to.
+
+    The entities in the graph are encoded as a flat list, each as the index of
+    its class and a tuple of its field values, in which the entities it
+    references are replaced by their positions in the list. This is several
+    times smaller than pickling each entity with its field names and class
+    path, and keeps the cycles and shared references of the graph.
+    """
+
+    def encode(self, value):
+        return pickle.dumps(_flatten_entity_graph(value), pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, encoded):
+        return _build_entity_graph(pickle.loads(encoded))
+
+    def is_deterministic(self):
+        return False
+
+    def to_type_hint(self):
+        return Entity
+
+
+class EntityAwareFastPrimitivesCoder(beam.coders.FastPrimitivesCoder):
+    """FastPrimitivesCoder that encodes the entity graphs it finds in tuples,
+    lists and dicts with the EntityCoder, and pickles other unknown types.
+
+    The elements of PCollections without a registered coder, such as the
+    tagged values grouped by a CoGroupByKey, are encoded with this coder.
+    """
+
+    def __init__(self, fallback_coder=None):
+        super(EntityAwareFastPrimitivesCoder, self).__init__(fallback_coder or _EntityOrPickleCoder())
+
+
+class _EntityOrPickleCoder(beam.coders.Coder):
+    """Encodes entity graphs with the EntityCoder and pickles all other
+    values."""
+
+    def __init__(self):
+        super(_EntityOrPickleCoder, self).__init__()
+        self._entity_coder = EntityCoder()
+
+    def encode(self, value):
+        if isinstance(value, Entity):
+            return _ENTITY_GRAPH + self._entity_coder.encode(value)
+        return _PICKLED_VALUE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, encoded):
+        if encoded[:1] == _ENTITY_GRAPH:
+            return self._entity_coder.decode(encoded[1:])
+        return pickle.loads(encoded[1:])
+
+    def is_deterministic(self):
+        return False
+
+
+def register_entity_coders():
+    """Registers the EntityCoder for each state entity class, and the
+    EntityAwareFastPrimitivesCoder as the fallback coder of PCollections
+    without a registered coder."""
+    if Entity in beam.coders.registry.custom_types:
+        return
+
+    beam.coders.registry.register_coder(Entity, EntityCoder)
+    for entity_class in _ENTITY_CLASSES:
+        beam.coders.registry.register_coder(entity_class, EntityCoder)
+    beam.coders.registry.register_fallback_coder(EntityAwareFastPrimitivesCoder)
+
+
+def _field_names(entity_class: Type[Entity]) -> Tuple[str, ...]:
+    field_names = _FIELD_NAMES_BY_CLASS.get(entity_class)
+    if field_names is None:
+        field_names = tuple(field.name for field in attr.fields(entity_class))
+        _FIELD_NAMES_BY_CLASS[entity_class] = field_names
+    return field_names
+
+
+def _flatten_entity_graph(root: Entity) -> List[_EncodedEntity]:
+    """Returns the encoded entities of the graph connected to |root|, in the
+    order they are reached from the root, with the root first."""
+    graph_entities: List[Entity] = [root]
+    indices: Dict[int, int] = {id(root): 0}
+
+    def _index(entity: Entity) -> int:
+        index = indices.get(id(entity))
+        if index is None:
+            index = len(graph_entities)
+            indices[id(entity)] = index
+            graph_entities.append(entity)
+        return index
+
+    encoded_entities: List[_EncodedEntity] = []
+
+    # The list grows as new entities are reached
+    for entity in graph_entities:
+        entity_class = type(entity)
+        values = [getattr(entity, field_name) for field_name in _field_names(entity_class)]
+
+        references = []
+        for position, value in enumerate(values):
+            if isinstance(value, Entity):
+                references.append((position, _index(value)))
+                values[position] = None
+            elif isinstance(value, list) and value and all(isinstance(item, Entity) for item in value):
+                references.append((position, [_index(item) for item in value]))
+                values[position] = None
+
+        encoded_entities.append((_ENTITY_CLASS_INDICES.get(entity_class, entity_class),
+                                 tuple(values),
+                                 tuple(references)))
+
+    return encoded_entities
+
+
+def _build_entity_graph(encoded_entities: List[_EncodedEntity]) -> Entity:
+    """Rebuilds the graph of |encoded_entities|, returning its root."""
+    entity_classes = [_ENTITY_CLASSES[class_key] if isinstance(class_key, int) else class_key
+                      for class_key, _, _ in encoded_entities]
+
+    # Entities are created without calling __init__ so that references to
+    # entities later in the graph can be set
+    graph_entities = [entity_class.__new__(entity_class) for entity_class in entity_classes]
+
+    for entity, entity_class, (_, values, references) in zip(graph_entities, entity_classes, encoded_entities):
+        field_values = dict(zip(_field_names(entity_class), values))
+
+        for position, reference in references:
+            field_name = _field_names(entity_class)[position]
+            if isinstance(reference, list):
+                field_values[field_name] = [graph_entities[index] for index in reference]
+            else:
+                field_values[field_name] = graph_entities[reference]
+
+        entity.__dict__.update(field_values)
+
+    return graph_entities[0]
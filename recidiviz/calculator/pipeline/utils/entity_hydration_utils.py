@@ -73,6 +73,15 @@ class ConvertSentenceToStateSpecificType(beam.DoFn):
         pass  # Passing unused abstract method.
 
 
+def us_mo_sentence_status_lookup_keys(element) -> List[str]:
+    """Returns the external id of a US_MO sentence in a (person_id, sentence) element, which
+    ConvertSentenceToStateSpecificType looks up the sentence statuses of."""
+    _, sentence = element
+    if sentence.state_code == 'US_MO' and sentence.external_id:
+        return [sentence.external_id]
+    return []
+
+
 @with_input_types(beam.typehints.Tuple[int, Dict[str, Any]])
 @with_output_types(beam.typehints.Tuple[int, entities.StateIncarcerationPeriod])
 class SetViolationResponseOnIncarcerationPeriod(beam.DoFn):
@@ -18,12 +18,14 @@
 calculations."""
 import abc
 import logging
-from typing import Any, Dict, Optional, Type, Tuple, Set
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Type, Tuple, Set
 from more_itertools import one
 
 import apache_beam as beam
 from apache_beam.typehints import with_input_types, with_output_types
 
+from recidiviz.calculator.pipeline.utils.entity_coder import register_entity_coders
 from recidiviz.common.attr_mixins import BuildableAttr
 from recidiviz.common.attr_utils import is_property_list, \
     is_property_forward_ref
@@ -33,6 +35,9 @@ from recidiviz.persistence.entity.entity_utils import SchemaEdgeDirectionChecker
 from recidiviz.persistence.entity.state import entities as state_entities
 from recidiviz.persistence.database import schema_utils
 
+# The hydrated entities are passed between stages with the compact EntityCoder
+register_entity_coders()
+
 
 class BuildRootEntity(beam.PTransform):
     """Builds a root Entity by extracting it and the entities it is related
@@ -45,7 +50,8 @@ class BuildRootEntity(beam.PTransform):
                  unifying_id_field: str,
                  build_related_entities: bool,
                  unifying_id_field_filter_set: Optional[Set[int]] = None,
-                 state_code: Optional[str] = None):
+                 state_code: Optional[str] = None,
+                 unifying_id_field_filter_query: Optional[str] = None):
         """Initializes the PTransform with the required arguments.
 
         Arguments:
@@ -61,6 +67,10 @@ class BuildRootEntity(beam.PTransform):
             unifying_id_field_filter_set: When non-empty, we will only build entity
                 objects that can be connected to root entities with one of these
                 unifying ids.
+            state_code: When set, we will only build entity objects with this state_code.
+            unifying_id_field_filter_query: When set, a query selecting a single column of unifying ids. We will only
+                build entity objects that can be connected to root entities with one of the ids it returns. Unlike
+                |unifying_id_field_filter_set|, the ids are not known when the pipeline is built.
         """
 
         super(BuildRootEntity, self).__init__()
@@ -77,6 +87,7 @@ class BuildRootEntity(beam.PTransform):
         self._build_related_entities = build_related_entities
         self._unifying_id_field_filter_set = unifying_id_field_filter_set
         self._state_code = state_code
+        self._unifying_id_field_filter_query = unifying_id_field_filter_query
 
         if not dataset:
             raise ValueError("No valid data source passed to the pipeline.")
@@ -106,7 +117,8 @@ class BuildRootEntity(beam.PTransform):
                                         unifying_id_field=self._unifying_id_field,
                                         parent_id_field=None,
                                         unifying_id_field_filter_set=self._unifying_id_field_filter_set,
-                                        state_code=self._state_code))
+                                        state_code=self._state_code,
+                                        unifying_id_field_filter_query=self._unifying_id_field_filter_query))
 
         if self._build_related_entities:
             # Get the related property entities
@@ -120,7 +132,8 @@ class BuildRootEntity(beam.PTransform):
                                    parent_id_field=self._root_entity_class.get_class_id_name(),
                                    unifying_id_field=self._unifying_id_field,
                                    unifying_id_field_filter_set=self._unifying_id_field_filter_set,
-                                   state_code=self._state_code
+                                   state_code=self._state_code,
+                                   unifying_id_field_filter_query=self._unifying_id_field_filter_query
                                ))
         else:
             properties_dict = {}
@@ -169,12 +182,14 @@ class _ExtractEntityBase(beam.PTransform):
                  unifying_id_field: str,
                  parent_id_field: Optional[str],
                  unifying_id_field_filter_set: Optional[Set[int]],
-                 state_code: Optional[str]):
+                 state_code: Optional[str],
+                 unifying_id_field_filter_query: Optional[str] = None):
         super(_ExtractEntityBase, self).__init__()
         self._dataset = dataset
 
         self._unifying_id_field = unifying_id_field
         self._unifying_id_field_filter_set = unifying_id_field_filter_set
+        self._unifying_id_field_filter_query = unifying_id_field_filter_query
 
         self._parent_id_field = parent_id_field
 
@@ -210,6 +225,11 @@ class _ExtractEntityBase(beam.PTransform):
 
             entity_query = entity_query + f" WHERE {self._unifying_id_field} IN ({', '.join(id_str_set)})"
 
+        if self._entity_has_unifying_id_field() and self._unifying_id_field_filter_query:
+            conjunctive_word = 'AND' if 'WHERE' in entity_query else 'WHERE'
+            entity_query = entity_query + \
+                f" {conjunctive_word} {self._unifying_id_field} IN ({self._unifying_id_field_filter_query})"
+
         if self._entity_has_state_code_field() and self._state_code:
             conjunctive_word = 'AND' if 'WHERE' in entity_query else 'WHERE'
             entity_query = entity_query + f" {conjunctive_word} state_code IN ('{self._state_code}')"
@@ -258,9 +278,10 @@ class _ExtractEntity(_ExtractEntityBase):
                  unifying_id_field: str,
                  parent_id_field: Optional[str],
                  unifying_id_field_filter_set: Optional[Set[int]],
-                 state_code: Optional[str]):
+                 state_code: Optional[str],
+                 unifying_id_field_filter_query: Optional[str] = None):
         super(_ExtractEntity, self).__init__(dataset, entity_class, unifying_id_field, parent_id_field,
-                                             unifying_id_field_filter_set, state_code)
+                                             unifying_id_field_filter_set, state_code, unifying_id_field_filter_query)
 
     def expand(self, input_or_inputs):
         entities_raw = self._get_entities_raw_pcollection(input_or_inputs)
@@ -296,7 +317,8 @@ class _ExtractRelationshipPropertyEntities(beam.PTransform):
                  parent_id_field: str,
                  unifying_id_field: str,
                  unifying_id_field_filter_set: Optional[Set[int]],
-                 state_code: Optional[str]):
+                 state_code: Optional[str],
+                 unifying_id_field_filter_query: Optional[str] = None):
         super(_ExtractRelationshipPropertyEntities, self).__init__()
         self._dataset = dataset
         self._parent_schema_class = parent_schema_class
@@ -304,6 +326,7 @@ class _ExtractRelationshipPropertyEntities(beam.PTransform):
         self._unifying_id_field = unifying_id_field
         self._unifying_id_field_filter_set = unifying_id_field_filter_set
         self._state_code = state_code
+        self._unifying_id_field_filter_query = unifying_id_field_filter_query
 
     def expand(self, input_or_inputs):
         names_to_properties = self._parent_schema_class. \
@@ -340,7 +363,8 @@ class _ExtractRelationshipPropertyEntities(beam.PTransform):
                                     association_table_parent_id_field=self._parent_id_field,
                                     association_table_entity_id_field=entity_id_field,
                                     unifying_id_field_filter_set=self._unifying_id_field_filter_set,
-                                    state_code=self._state_code)
+                                    state_code=self._state_code,
+                                    unifying_id_field_filter_query=self._unifying_id_field_filter_query)
                                 )
 
                 # 1-to-many relationship
@@ -354,7 +378,8 @@ class _ExtractRelationshipPropertyEntities(beam.PTransform):
                                     unifying_id_field=self._unifying_id_field,
                                     parent_id_field=self._parent_id_field,
                                     unifying_id_field_filter_set=self._unifying_id_field_filter_set,
-                                    state_code=self._state_code)
+                                    state_code=self._state_code,
+                                    unifying_id_field_filter_query=self._unifying_id_field_filter_query)
                                 )
 
                 # 1-to-1 relationship (from parent class perspective)
@@ -374,7 +399,8 @@ class _ExtractRelationshipPropertyEntities(beam.PTransform):
                                     association_table_parent_id_field=self._parent_id_field,
                                     association_table_entity_id_field=association_table_entity_id_field,
                                     unifying_id_field_filter_set=self._unifying_id_field_filter_set,
-                                    state_code=self._state_code)
+                                    state_code=self._state_code,
+                                    unifying_id_field_filter_query=self._unifying_id_field_filter_query)
                                 )
 
                 properties_dict[property_name] = entities
@@ -398,9 +424,11 @@ class _ExtractEntityWithAssociationTable(_ExtractEntityBase):
                  association_table_parent_id_field: str,
                  association_table_entity_id_field: str,
                  unifying_id_field_filter_set: Optional[Set[int]],
-                 state_code: Optional[str]):
+                 state_code: Optional[str],
+                 unifying_id_field_filter_query: Optional[str] = None):
         super(_ExtractEntityWithAssociationTable, self).__init__(
-            dataset, entity_class, unifying_id_field, parent_id_field, unifying_id_field_filter_set, state_code)
+            dataset, entity_class, unifying_id_field, parent_id_field, unifying_id_field_filter_set, state_code,
+            unifying_id_field_filter_query)
 
         self._association_table_parent_id_field = association_table_parent_id_field
         self._association_table_entity_id_field = association_table_entity_id_field
@@ -630,14 +658,14 @@ class _HydrateRootEntitiesWithRelationshipPropertyEntities(beam.DoFn):
 
         The hydration works like this:
 
-        For each root entity, go through the each property name for all of the
-        attributes on the entity that are relationships to other entities. If
-        there is a corresponding relationship property group for this property
-        name in the entities_dict, then iterate through that group to see if
-        the root_id attached to that entity matches the root_entity id. When
-        you find a related entity that should be connected to the root_entity,
-        add this entity as a related property on the root_entity. This process
-        hydrates all given related properties on each root_entity.
+        For each attribute on the root entities that is a relationship to
+        other entities, bucket the entities in the corresponding relationship
+        property group in the entities_dict by the root_id attached to them.
+        Then, for each root entity, add the entities in the bucket for its id
+        as related properties on the root_entity. This process hydrates all
+        given related properties on each root_entity, and reads each
+        relationship property group once, no matter how many root entities
+        the unifying id has.
         """
         schema_class = kwargs.get('schema_class')
 
@@ -654,18 +682,25 @@ class _HydrateRootEntitiesWithRelationshipPropertyEntities(beam.DoFn):
         # Get the root entities
         root_entities = entities_dict.get(schema_class.__tablename__)
 
-        for root_entity in root_entities:
-            for property_name in relationship_property_names:
-                # Get the hydrated instances of this property
-                relationship_property_group = \
-                    entities_dict.get(property_name)
+        # Get the hydrated instances of each property, by root id
+        entities_by_property_and_root_id: Dict[str, Dict[int, List[Any]]] = {}
+        for property_name in relationship_property_names:
+            relationship_property_group = entities_dict.get(property_name)
 
-                if not relationship_property_group:
-                    continue
+            if not relationship_property_group:
+                continue
+
+            entities_by_root_id: Dict[int, List[Any]] = defaultdict(list)
+            for root_id, entity in relationship_property_group:
+                entities_by_root_id[root_id].append(entity)
 
-                entities = [entity
-                            for root_id, entity in relationship_property_group
-                            if root_id == root_entity.get_id()]
+            entities_by_property_and_root_id[property_name] = \
+                entities_by_root_id
+
+        for root_entity in root_entities:
+            for property_name, entities_by_root_id in \
+                    entities_by_property_and_root_id.items():
+                entities = entities_by_root_id.get(root_entity.get_id())
 
                 if not entities:
                     continue
@@ -0,0 +1,509 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Utils for incremental calculation pipeline runs.
+
+An incremental run only identifies events and calculates metric combinations
+for the people whose data changed since the previous run of the same job. Every
+run stores the metric combinations of each person, partially combined per
+metric key into accumulators of the sum or average the metric is calculated
+with, as their contributions in the person metric contributions table of the
+pipeline. The next run reads the stored contributions of everyone who did not
+change, merges them with the contributions of the recomputed people, and
+extracts the metric values from the merged accumulators exactly as a full run
+would.
+
+A person is recomputed when:
+    - a snapshot in one of their history tables may have been opened or
+      closed since the previous run, or
+    - one of the dates on their entities has passed since the previous run,
+      e.g. a release date that was in the future.
+
+Everyone is recomputed when the previous run was in a different month, when
+today is the last day of the month and the previous run was not today (the
+calculations look at which months have ended), or when the job was rebuilt,
+since stored contributions are only reused by runs with the same job_name and
+job_timestamp, i.e. runs of the same Dataflow template.
+
+Every run records the highest snapshot id of each history table as its
+high-water marks. Snapshot ids are allocated before the snapshots are
+committed and exported, so a snapshot can appear in the exported history
+table after a snapshot with a higher id, e.g. when its transaction commits
+after the export that exports the higher snapshot. So a snapshot is new to a
+run if its id is above the high-water marks of the latest run from at least
+HIGH_WATER_MARK_LAG_DAYS before the previous run, since every snapshot below
+those marks had appeared by the previous run. Recomputing someone who didn't
+change since the previous run is harmless.
+
+Changes that are only visible through the reference tables joined in by the
+pipelines, and changes to association tables, are picked up the next time
+everyone is recomputed.
+
+Once a run has computed all of its contributions, it records the run and the
+number of contributions in the incremental runs table of the pipeline. Only
+runs whose recorded number of contributions matches the number stored in the
+contributions table are reused, so the contributions of a run that failed or
+was only partially written are never read.
+
+Both tables must exist in the output dataset, like the metric tables. The
+person metric contributions table of a pipeline has the columns:
+    job_id STRING, calculation_date DATE, person_id INTEGER,
+    metric_tag STRING, metric_key STRING, metric_accumulator STRING
+and must be partitioned by calculation_date with a partition expiration of a
+few days, so that only the contributions of the latest runs are kept. The
+incremental runs table of a pipeline has the columns:
+    job_name STRING, job_timestamp STRING, job_id STRING,
+    calculation_date DATE, high_water_marks STRING,
+    num_contributions INTEGER
+where high_water_marks holds the highest snapshot id of each history table as
+a JSON object keyed by table name.
+"""
+# pylint: disable=abstract-method, arguments-differ
+import datetime
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import apache_beam as beam
+import attr
+from apache_beam.typehints import with_input_types, with_output_types
+
+from recidiviz.calculator.pipeline.utils.beam_utils import \
+    CombinePerKeyWithPartials, MergeAccumulatorsFn
+from recidiviz.calculator.pipeline.utils.execution_utils import get_job_id
+from recidiviz.calculator.pipeline.utils.extractor_utils import \
+    ReadFromBigQuery
+from recidiviz.persistence.database import schema_utils
+from recidiviz.persistence.entity.state import entities
+
+PERSON_METRIC_CONTRIBUTIONS_TABLE_SUFFIX = '_person_metric_contributions'
+
+INCREMENTAL_RUNS_TABLE_SUFFIX = '_incremental_runs'
+
+# The most days it can take for a snapshot to appear in the exported history
+# tables after a snapshot with a higher id has appeared, which is more than the
+# time between two exports
+HIGH_WATER_MARK_LAG_DAYS = 3
+
+
+@attr.s(frozen=True)
+class IncrementalRunConfig:
+    """Where an incremental run of a pipeline job finds the changed people and
+    the contributions stored by the previous run."""
+    # The GCP project of the datasets
+    project: str = attr.ib()
+
+    # The dataset of the state tables
+    state_dataset: str = attr.ib()
+
+    # The dataset the pipeline writes its output to
+    output_dataset: str = attr.ib()
+
+    # The name of the person metric contributions table of the pipeline
+    contributions_table: str = attr.ib()
+
+    # The name of the incremental runs table of the pipeline
+    runs_table: str = attr.ib()
+
+    # The name of the job, which keys the recorded runs
+    job_name: str = attr.ib()
+
+    # The time the job was built, which keys the recorded runs
+    job_timestamp: str = attr.ib()
+
+    @classmethod
+    def for_pipeline(cls,
+                     pipeline_type: str,
+                     pipeline_options: Dict[str, str],
+                     state_dataset: str,
+                     output_dataset: str) -> 'IncrementalRunConfig':
+        """Builds the config for a run of a |pipeline_type| pipeline job with
+        the given |pipeline_options|."""
+        return cls(
+            project=pipeline_options['project'],
+            state_dataset=state_dataset,
+            output_dataset=output_dataset,
+            contributions_table=
+            pipeline_type + PERSON_METRIC_CONTRIBUTIONS_TABLE_SUFFIX,
+            runs_table=pipeline_type + INCREMENTAL_RUNS_TABLE_SUFFIX,
+            job_name=pipeline_options['job_name'],
+            job_timestamp=pipeline_options['job_timestamp'])
+
+    def state_table_ref(self, table_name: str) -> str:
+        return f'`{self.project}.{self.state_dataset}.{table_name}`'
+
+    @property
+    def contributions_table_ref(self) -> str:
+        return f'`{self.project}.{self.output_dataset}.{self.contributions_table}`'
+
+    @property
+    def runs_table_ref(self) -> str:
+        return f'`{self.project}.{self.output_dataset}.{self.runs_table}`'
+
+
+def _history_tables() -> List[Tuple[str, str]]:
+    """Returns the name and snapshot id column of each history table that
+    references a person. These are only exported when
+    export_config.EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES is set."""
+    return [(table.name, list(table.primary_key.columns)[0].name)
+            for table in schema_utils.get_state_person_history_table_classes()]
+
+
+def _person_tables_with_dates() -> List[Tuple[str, List[str]]]:
+    """Returns the name and date columns of each state table that references a
+    person and has date columns."""
+    tables = []
+    for table in schema_utils.get_state_table_classes():
+        if table.name.endswith('_history') or 'person_id' not in table.columns:
+            continue
+        date_columns = [column.name for column in table.columns
+                        if str(column.type) == 'DATE']
+        if date_columns:
+            tables.append((table.name, date_columns))
+    return tables
+
+
+def _previous_run_query(config: IncrementalRunConfig) -> str:
+    """Returns a query for the job_id, calculation_date and high_water_marks of
+    the latest completed run of the job, which returns no rows if there is no
+    such run or its contributions can't be reused today.
+
+    A run is complete if the contributions table holds as many of its
+    contributions as the run recorded."""
+    stored_counts = \
+        f"SELECT job_id, COUNT(*) AS num_stored_contributions " \
+        f"FROM {config.contributions_table_ref} " \
+        f"GROUP BY job_id"
+
+    latest_completed_run = \
+        f"SELECT runs.job_id, runs.calculation_date, runs.high_water_marks " \
+        f"FROM {config.runs_table_ref} runs " \
+        f"LEFT JOIN ({stored_counts}) stored " \
+        f"ON runs.job_id = stored.job_id " \
+        f"WHERE runs.job_name = '{config.job_name}' " \
+        f"AND runs.job_timestamp = '{config.job_timestamp}' " \
+        f"AND runs.num_contributions = IFNULL(stored.num_stored_contributions, 0) " \
+        f"ORDER BY runs.calculation_date DESC, runs.job_id DESC LIMIT 1"
+
+    return \
+        f"SELECT * FROM ({latest_completed_run}) " \
+        f"WHERE high_water_marks IS NOT NULL " \
+        f"AND DATE_TRUNC(calculation_date, MONTH) = DATE_TRUNC(CURRENT_DATE(), MONTH) " \
+        f"AND (calculation_date = CURRENT_DATE() " \
+        f"OR EXTRACT(MONTH FROM DATE_ADD(CURRENT_DATE(), INTERVAL 1 DAY)) = EXTRACT(MONTH FROM CURRENT_DATE()))"
+
+
+def _settled_run_query(config: IncrementalRunConfig) -> str:
+    """Returns a query for the high_water_marks of the latest run of the job
+    from at least HIGH_WATER_MARK_LAG_DAYS before the previous run, below
+    which every snapshot had appeared by the previous run. Returns no rows if
+    there is no such run."""
+    return \
+        f"SELECT runs.high_water_marks " \
+        f"FROM {config.runs_table_ref} runs " \
+        f"JOIN previous_run ON TRUE " \
+        f"WHERE runs.job_name = '{config.job_name}' " \
+        f"AND runs.high_water_marks IS NOT NULL " \
+        f"AND runs.calculation_date <= " \
+        f"DATE_SUB(previous_run.calculation_date, INTERVAL {HIGH_WATER_MARK_LAG_DAYS} DAY) " \
+        f"ORDER BY runs.calculation_date DESC, runs.job_id DESC LIMIT 1"
+
+
+def changed_person_ids_query(config: IncrementalRunConfig) -> str:
+    """Returns a query for the person_ids of the people that the run described
+    by |config| has to recompute."""
+    selects = [
+        f"SELECT person_id FROM {config.state_table_ref('state_person')} "
+        f"WHERE NOT EXISTS (SELECT job_id FROM previous_run)"
+    ]
+
+    # Every change to an entity adds a snapshot to its history table, so the
+    # people with a snapshot that may not have appeared by the previous run
+    # changed. Without a settled run, everyone with a snapshot is recomputed.
+    for table_name, snapshot_id_column in _history_tables():
+        selects.append(
+            f"SELECT person_id FROM {config.state_table_ref(table_name)} {table_name} "
+            f"JOIN previous_run ON TRUE "
+            f"LEFT JOIN settled_run ON TRUE "
+            f"WHERE {table_name}.{snapshot_id_column} > "
+            f"IFNULL(CAST(JSON_EXTRACT_SCALAR(settled_run.high_water_marks, '$.{table_name}') AS INT64), 0)")
+
+    for table_name, date_columns in _person_tables_with_dates():
+        passed_dates = ' OR '.join(
+            f"({table_name}.{column} > previous_run.calculation_date AND {table_name}.{column} <= CURRENT_DATE())"
+            for column in date_columns)
+        selects.append(
+            f"SELECT person_id FROM {config.state_table_ref(table_name)} {table_name} "
+            f"JOIN previous_run ON TRUE "
+            f"WHERE {passed_dates}")
+
+    return f"WITH previous_run AS ({_previous_run_query(config)}), " \
+        f"settled_run AS ({_settled_run_query(config)}) " + ' UNION DISTINCT '.join(selects)
+
+
+def stored_contributions_query(config: IncrementalRunConfig) -> str:
+    """Returns a query for the contributions stored by the previous run of the
+    job for the people that the run described by |config| does not
+    recompute."""
+    return \
+        f"SELECT contributions.person_id, contributions.metric_tag, contributions.metric_key, " \
+        f"contributions.metric_accumulator " \
+        f"FROM {config.contributions_table_ref} contributions " \
+        f"JOIN ({_previous_run_query(config)}) previous_run " \
+        f"ON contributions.job_id = previous_run.job_id " \
+        f"WHERE contributions.person_id NOT IN ({changed_person_ids_query(config)})"
+
+
+def high_water_marks_query(config: IncrementalRunConfig) -> str:
+    """Returns a query for the highest snapshot id of each of the history
+    tables, in a column named after the table.
+
+    Snapshots with lower ids may still appear, so these marks are only used by
+    runs more than HIGH_WATER_MARK_LAG_DAYS later, see _settled_run_query."""
+    max_snapshot_ids = ', '.join(
+        f"(SELECT MAX({snapshot_id_column}) FROM {config.state_table_ref(table_name)}) AS {table_name}"
+        for table_name, snapshot_id_column in _history_tables())
+
+    return f"SELECT {max_snapshot_ids}"
+
+
+class MapToCombinedMetricValues(beam.PTransform):
+    """Maps each StatePerson and their events to metric combinations with
+    |calculate_fn|, and combines the values of each metric key with the
+    CombineFn of the metric type the combination is tagged with.
+
+    Returns a dictionary of PCollections of (metric key, combined value)
+    tuples, keyed by the tags of |combine_fns|.
+
+    When an |incremental_config| is given, the input only holds the people
+    that changed since the previous run. Their combinations are partially
+    combined into contributions, which are merged with the contributions the
+    previous run stored for everyone else. All contributions are written to
+    the contributions table for the next run, and the run is recorded in the
+    incremental runs table.
+    """
+
+    def __init__(self, calculate_fn: beam.DoFn, combine_fns: Dict[str, beam.CombineFn], *args,
+                 incremental_config: Optional[IncrementalRunConfig] = None,
+                 pipeline_options: Optional[Dict[str, str]] = None,
+                 **kwargs):
+        super(MapToCombinedMetricValues, self).__init__()
+        self.calculate_fn = calculate_fn
+        self.combine_fns = combine_fns
+        self.args = args
+        self.kwargs = kwargs
+        self.incremental_config = incremental_config
+        self.pipeline_options = pipeline_options
+
+        if incremental_config and not pipeline_options:
+            raise ValueError("Incremental runs must be given the pipeline options")
+
+    def expand(self, input_or_inputs):
+        tags = list(self.combine_fns.keys())
+
+        if not self.incremental_config:
+            metric_combinations = (input_or_inputs
+                                   | 'Calculate metric combinations' >>
+                                   beam.ParDo(self.calculate_fn, *self.args, **self.kwargs).with_outputs(*tags))
+
+            return {tag: (metric_combinations[tag]
+                          | f'Calculate {tag} values' >>
+                          CombinePerKeyWithPartials(combine_fn))
+                    for tag, combine_fn in self.combine_fns.items()}
+
+        recomputed_contributions = (
+            input_or_inputs
+            | 'Calculate person metric contributions' >>
+            beam.ParDo(_CalculatePersonMetricContributions(self.calculate_fn, self.combine_fns),
+                       *self.args, **self.kwargs))
+
+        stored_contributions = (
+            input_or_inputs.pipeline
+            | 'Read stored person metric contributions' >>
+            ReadFromBigQuery(query=stored_contributions_query(self.incremental_config)))
+
+        contributions = ((recomputed_contributions, stored_contributions)
+                         | 'Merge recomputed and stored person metric contributions' >>
+                         beam.Flatten())
+
+        self._write_contributions_and_record_run(input_or_inputs.pipeline, contributions)
+
+        tagged_accumulators = (contributions
+                               | 'Tag person metric contributions' >>
+                               beam.ParDo(_TagPersonMetricContribution()).with_outputs(*tags))
+
+        return {tag: (tagged_accumulators[tag]
+                      | f'Calculate {tag} values' >>
+                      CombinePerKeyWithPartials(MergeAccumulatorsFn(combine_fn)))
+                for tag, combine_fn in self.combine_fns.items()}
+
+    def _write_contributions_and_record_run(self, pipeline, contributions):
+        """Writes |contributions| to the contributions table, and records the
+        run with the number of contributions in the incremental runs
+        table."""
+        high_water_marks = (
+            pipeline
+            | 'Read high-water marks' >>
+            ReadFromBigQuery(query=high_water_marks_query(self.incremental_config)))
+
+        contributions_table = self.incremental_config.output_dataset + '.' + \
+            self.incremental_config.contributions_table
+
+        _ = (contributions
+             | 'Convert person metric contributions to dict to be written to BQ' >>
+             beam.ParDo(_PersonMetricContributionWritableDict(), **self.pipeline_options)
+             | f"Write person metric contributions to BQ table: {contributions_table}" >>
+             beam.io.WriteToBigQuery(
+                 table=contributions_table,
+                 create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER,
+                 write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND
+             ))
+
+        num_contributions = (contributions
+                             | 'Count person metric contributions' >>
+                             beam.combiners.Count.Globally())
+
+        runs_table = self.incremental_config.output_dataset + '.' + self.incremental_config.runs_table
+
+        _ = (num_contributions
+             | 'Convert incremental run to dict to be written to BQ' >>
+             beam.ParDo(_IncrementalRunWritableDict(),
+                        beam.pvalue.AsSingleton(high_water_marks), **self.pipeline_options)
+             | f"Write incremental run to BQ table: {runs_table}" >>
+             beam.io.WriteToBigQuery(
+                 table=runs_table,
+                 create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER,
+                 write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND
+             ))
+
+
+@with_input_types(beam.typehints.Tuple[entities.StatePerson, Any])
+@with_output_types(beam.typehints.Dict[str, Any])
+class _CalculatePersonMetricContributions(beam.DoFn):
+    """Applies a metric combinations DoFn to a StatePerson and their events,
+    yielding the combinations of each metric key, combined into an
+    accumulator of the CombineFn of its tag, as a contribution of the
+    person."""
+
+    def __init__(self, calculate_fn: beam.DoFn, combine_fns: Dict[str, beam.CombineFn]):
+        super(_CalculatePersonMetricContributions, self).__init__()
+        self.calculate_fn = calculate_fn
+        self.combine_fns = combine_fns
+
+    def process(self, element, *args, **kwargs):
+        person, _ = element
+
+        accumulators: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        for tagged_output in self.calculate_fn.process(element, *args, **kwargs):
+            combine_fn = self.combine_fns[tagged_output.tag]
+            tag_accumulators = accumulators[tagged_output.tag]
+
+            json_key, value = tagged_output.value
+            if json_key not in tag_accumulators:
+                tag_accumulators[json_key] = combine_fn.create_accumulator()
+            tag_accumulators[json_key] = combine_fn.add_input(tag_accumulators[json_key], value)
+
+        for tag, tag_accumulators in accumulators.items():
+            for json_key, accumulator in tag_accumulators.items():
+                yield {
+                    'person_id': person.person_id,
+                    'metric_tag': tag,
+                    'metric_key': json_key,
+                    'metric_accumulator': json.dumps(accumulator)
+                }
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+@with_input_types(beam.typehints.Dict[str, Any])
+@with_output_types(beam.typehints.Tuple[str, Any])
+class _TagPersonMetricContribution(beam.DoFn):
+    """Converts a contribution into a (metric key, accumulator) tuple, tagged
+    by metric type."""
+
+    def process(self, element, *args, **kwargs):
+        accumulator = json.loads(element['metric_accumulator'])
+
+        # Accumulators that are tuples are stored as JSON arrays
+        if isinstance(accumulator, list):
+            accumulator = tuple(accumulator)
+
+        yield beam.pvalue.TaggedOutput(element['metric_tag'], (element['metric_key'], accumulator))
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+@with_input_types(beam.typehints.Dict[str, Any],
+                  **{'runner': str,
+                     'project': str,
+                     'job_name': str,
+                     'region': str,
+                     'job_timestamp': str}
+                  )
+@with_output_types(beam.typehints.Dict[str, Any])
+class _PersonMetricContributionWritableDict(beam.DoFn):
+    """Adds the job_id and calculation_date of the run to a contribution, so
+    that the next run can find the contributions of this run."""
+
+    def __init__(self):
+        super(_PersonMetricContributionWritableDict, self).__init__()
+        self._job_id: Optional[str] = None
+
+    def process(self, element, **kwargs):
+        pipeline_options = kwargs
+
+        if not self._job_id:
+            self._job_id = get_job_id(pipeline_options)
+
+        yield {
+            'job_id': self._job_id,
+            'calculation_date': datetime.date.today().isoformat(),
+            **element
+        }
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+@with_input_types(int,
+                  beam.typehints.Dict[str, Any],
+                  **{'runner': str,
+                     'project': str,
+                     'job_name': str,
+                     'region': str,
+                     'job_timestamp': str}
+                  )
+@with_output_types(beam.typehints.Dict[str, Any])
+class _IncrementalRunWritableDict(beam.DoFn):
+    """Builds the record of a run from its number of contributions and the
+    high-water marks of the history tables."""
+
+    def process(self, element, high_water_marks, **kwargs):
+        pipeline_options = kwargs
+
+        yield {
+            'job_name': pipeline_options['job_name'],
+            'job_timestamp': pipeline_options['job_timestamp'],
+            'job_id': get_job_id(pipeline_options),
+            'calculation_date': datetime.date.today().isoformat(),
+            'high_water_marks': json.dumps(high_water_marks, sort_keys=True),
+            'num_contributions': element
+        }
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
@@ -15,10 +15,14 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # =============================================================================
 """Utils for validating and manipulating supervision periods for use in calculations."""
+import bisect
+import datetime
+import heapq
 import logging
 from datetime import date
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import attr
 from dateutil.relativedelta import relativedelta
 
 from recidiviz.persistence.entity.state.entities import StateSupervisionPeriod
@@ -91,3 +95,94 @@ def _supervision_periods_overlapping_with_date(
     ]
 
     return overlapping_periods
+
+
+@attr.s(frozen=True)
+class SupervisionPeriodIntervalIndex:
+    """An index of the supervision periods of a person that finds the periods that overlap with a date with a bisect,
+    instead of checking every period for every date.
+
+    A supervision period overlaps with a date if it starts on or before the date and has no termination date or
+    terminates on or after the date. Periods without a start date never overlap with a date.
+
+    The set of overlapping periods only changes on the start dates and the days after the termination dates of the
+    periods. For each of these boundary dates, the index stores the range of periods, in start date order, that
+    holds every period overlapping with the dates up to the next boundary date, so a lookup only checks the
+    termination dates of the periods in that range.
+    """
+    # The periods that can overlap with a date, with their position in the list given to the index, in ascending
+    # order of start date
+    periods_by_start_date: List[Tuple[int, StateSupervisionPeriod]] = attr.ib()
+
+    # The dates on which the set of overlapping supervision periods changes, in ascending order
+    boundary_dates: List[date] = attr.ib()
+
+    # The start and end of the range of |periods_by_start_date| that holds the periods overlapping with each date
+    # from the boundary date at the same index up to the next boundary date
+    candidate_ranges: List[Tuple[int, int]] = attr.ib()
+
+    @classmethod
+    def for_supervision_periods(cls, supervision_periods: List[StateSupervisionPeriod]) \
+            -> 'SupervisionPeriodIntervalIndex':
+        """Builds the index by sweeping over the start dates and the days after the termination dates of the
+        |supervision_periods|, keeping the started periods in a heap by start date order so that the earliest
+        started period that hasn't terminated is found without rebuilding the set of overlapping periods at every
+        boundary date."""
+        periods_by_start_date = sorted(
+            ((index, supervision_period) for index, supervision_period in enumerate(supervision_periods)
+             if supervision_period.start_date is not None and (
+                 supervision_period.termination_date is None
+                 or supervision_period.termination_date >= supervision_period.start_date)),
+            key=lambda indexed_period: (indexed_period[1].start_date, indexed_period[0]))
+
+        # The day after the termination date of each period, or None if it never stops overlapping
+        end_dates: List[Optional[date]] = [
+            supervision_period.termination_date + datetime.timedelta(days=1)
+            if supervision_period.termination_date is not None and supervision_period.termination_date < date.max
+            else None
+            for _, supervision_period in periods_by_start_date]
+
+        boundary_dates = sorted(
+            {supervision_period.start_date for _, supervision_period in periods_by_start_date}
+            | {end_date for end_date in end_dates if end_date is not None})
+
+        candidate_ranges: List[Tuple[int, int]] = []
+        started_positions: List[int] = []
+        num_started = 0
+
+        for boundary_date in boundary_dates:
+            while num_started < len(periods_by_start_date) and \
+                    periods_by_start_date[num_started][1].start_date <= boundary_date:
+                heapq.heappush(started_positions, num_started)
+                num_started += 1
+
+            # Terminated periods are only removed once they are the earliest started period, since only the
+            # earliest started period that still overlaps is needed
+            while started_positions and end_dates[started_positions[0]] is not None \
+                    and end_dates[started_positions[0]] <= boundary_date:
+                heapq.heappop(started_positions)
+
+            first_candidate = started_positions[0] if started_positions else num_started
+            candidate_ranges.append((first_candidate, num_started))
+
+        return cls(periods_by_start_date=periods_by_start_date,
+                   boundary_dates=boundary_dates,
+                   candidate_ranges=candidate_ranges)
+
+    def periods_overlapping_with_date(self, intersection_date: date) -> List[StateSupervisionPeriod]:
+        """Returns the supervision periods that overlap with the intersection_date, in the order they were given to
+        the index."""
+        boundary_index = bisect.bisect_right(self.boundary_dates, intersection_date) - 1
+
+        if boundary_index < 0:
+            return []
+
+        first_candidate, end_candidate = self.candidate_ranges[boundary_index]
+        overlapping_periods = [
+            (index, supervision_period)
+            for index, supervision_period in self.periods_by_start_date[first_candidate:end_candidate]
+            if supervision_period.termination_date is None or intersection_date <= supervision_period.termination_date
+        ]
+        overlapping_periods.sort(key=lambda indexed_period: indexed_period[0])
+
+        return [supervision_period for _, supervision_period in overlapping_periods]
@@ -52,7 +52,8 @@ class BQExportCloudTaskManager:
     def get_bq_queue_info(self) -> CloudTaskQueueInfo:
         return self._get_queue_info(BIGQUERY_QUEUE_V2)
 
-    def create_bq_task(self, table_name: str, schema_type: str):
+    def create_bq_task(self, table_name: str, schema_type: str,
+                       incremental: bool = False):
         """Create a BigQuery table export path.
 
         Args:
@@ -60,9 +61,12 @@ class BQExportCloudTaskManager:
                 the *_TABLES_TO_EXPORT for the given schema.
             schema_type: The schema of the table being exported, either 'jails'
                 or 'state'.
+            incremental: Whether to only export the rows of the table that
+                changed since its last export.
             url: App Engine worker URL.
         """
-        body = {'table_name': table_name, 'schema_type': schema_type}
+        body = {'table_name': table_name, 'schema_type': schema_type,
+                'incremental': incremental}
         task_id = '{}-{}-{}-{}'.format(
             table_name,
             schema_type,
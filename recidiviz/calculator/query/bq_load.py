@@ -19,7 +19,7 @@
 
 import concurrent
 import logging
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 from google.cloud import bigquery
 from google.cloud import exceptions
@@ -36,7 +36,9 @@ _BQ_LOAD_WAIT_TIMEOUT_SECONDS = 300
 
 def start_table_load(
         dataset_ref: bigquery.dataset.DatasetReference,
-        table_name: str, schema_type: SchemaType) -> \
+        table_name: str, schema_type: SchemaType,
+        source_uris: Optional[List[str]] = None,
+        destination_table_id: Optional[str] = None) -> \
         Optional[Tuple[bigquery.job.LoadJob, bigquery.table.TableReference]]:
     """Loads a table from CSV data in GCS to BigQuery.
 
@@ -57,6 +59,11 @@ def start_table_load(
             in the export_config.*_TABLES_TO_EXPORT for the given module
         schema_type: The schema of the table being loaded, either
             SchemaType.JAILS or SchemaType.STATE.
+        source_uris: The GCS URIs of the CSV files to load, e.g. when the
+            table was exported in shards. Defaults to the export URI of the
+            table in export_config.
+        destination_table_id: The table to load into, e.g. a staging table
+            for an incremental export. Defaults to |table_name|.
     Returns:
         (load_job, table_ref) where load_job is the LoadJob object containing
             job details, and table_ref is the destination TableReference object.
@@ -72,8 +79,9 @@ def start_table_load(
 
     bq_utils.create_dataset_if_necessary(dataset_ref)
 
-    uri = export_config.gcs_export_uri(table_name)
-    table_ref = dataset_ref.table(table_name)
+    uri: Union[str, List[str]] = source_uris if source_uris \
+        else export_config.gcs_export_uri(table_name)
+    table_ref = dataset_ref.table(destination_table_id or table_name)
 
     try:
         bq_schema = [
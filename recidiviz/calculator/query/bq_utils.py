@@ -17,7 +17,9 @@
 
 """Helper functions for creating and updating BigQuery datasets/tables/views."""
 
+import datetime
 import logging
+from typing import Optional
 
 from google.cloud import bigquery
 from google.cloud import exceptions
@@ -64,6 +66,20 @@ def table_exists(
         return False
 
 
+def get_table_last_modified(
+        dataset_ref: bigquery.dataset.DatasetReference,
+        table_id: str) -> Optional[datetime.datetime]:
+    """Returns the time a BigQuery Table or View in a Dataset was last
+    modified, or None if it does not exist."""
+    try:
+        return client().get_table(dataset_ref.table(table_id)).modified
+    except exceptions.NotFound:
+        logging.warning(
+            "Table [%s] does not exist in dataset [%s]",
+            table_id, str(dataset_ref))
+        return None
+
+
 def create_or_update_view(
         dataset_ref: bigquery.dataset.DatasetReference,
         view: bqview.BigQueryView):
@@ -19,7 +19,7 @@
 
 import logging
 import time
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import googleapiclient.errors
 
@@ -115,8 +115,8 @@ def wait_until_operation_finished(operation_id: str) -> bool:
     return operation_success
 
 
-def export_table(schema_type: SchemaType, table_name: str, export_query: str) \
-        -> bool:
+def export_table(schema_type: SchemaType, table_name: str, export_query: str,
+                 export_uri: Optional[str] = None) -> bool:
     """Export a Cloud SQL table to a CSV file on GCS.
 
     Given a table name and export_query, retrieve the export URI from
@@ -128,11 +128,14 @@ def export_table(schema_type: SchemaType, table_name: str, export_query: str) \
             SchemaType.STATE, where this table lives.
         table_name: Table to export.
         export_query: Corresponding query for the table.
+        export_uri: GCS URI to write the CSV data to. Defaults to the export
+            URI of the table in export_config.
     Returns:
         True if operation succeeded without errors, False if not.
     """
 
-    export_uri = export_config.gcs_export_uri(table_name)
+    if export_uri is None:
+        export_uri = export_config.gcs_export_uri(table_name)
     export_context = create_export_context(
         schema_type, export_uri, export_query)
 
@@ -17,13 +17,18 @@
 
 """Create and update views and their parent dataset.
 
-If views are derived from other views, they must be listed after the views
-they rely on in VIEWS_TO_UPDATE.
+Views derived from other views are deployed after the views they rely on, based
+on the tables each view query references, so VIEWS_TO_UPDATE may be in any
+order.
 """
 
+import argparse
+import logging
 from typing import List
 
-from recidiviz.calculator.query import bqview, bq_utils
+from google.cloud import bigquery
+
+from recidiviz.calculator.query import bqview, bq_utils, view_deployer
 from recidiviz.calculator.query.county import view_config
 from recidiviz.calculator.query.county.views.bonds import bond_views
 from recidiviz.calculator.query.county.views.charges import charge_views
@@ -32,6 +37,7 @@ from recidiviz.calculator.query.county.views.state_aggregates import \
     state_aggregate_views
 from recidiviz.calculator.query.county.views.stitch import stitch_views
 from recidiviz.calculator.query.county.views.vera import vera_views
+from recidiviz.utils import metadata
 
 VIEWS_TO_UPDATE: List[bqview.BigQueryView] = \
     state_aggregate_views.STATE_AGGREGATE_VIEWS + \
@@ -44,25 +50,54 @@ VIEWS_TO_UPDATE: List[bqview.BigQueryView] = \
 
 def create_dataset_and_update_views(
         dataset_name: str,
-        views_to_update: List[bqview.BigQueryView]):
+        views_to_update: List[bqview.BigQueryView],
+        dry_run: bool = False):
     """Create and update Views and their parent Dataset.
 
     Create a parent Views dataset if it does not exist, and
     creates or updates the underlying Views as defined in
     recidiviz.calculator.bq.views.bqview
 
+    Views are deployed concurrently, with each View deployed only once all
+    Views it references have been deployed. If the Views reference each other
+    in a cycle, or reference a View in the dataset that is not being deployed,
+    nothing is deployed.
+
     Args:
         dataset_name: Name of BigQuery dataset to contain Views. Gets created
             if it does not already exist.
         views_to_update: View objects to be created or updated.
             Should be VIEWS_TO_UPDATE defined at top of view_manager.py
+        dry_run: If True, only validates the View dependencies and logs the
+            Views that would be deployed, without calling BigQuery.
     """
+    if dry_run:
+        views_dataset_ref = bigquery.dataset.DatasetReference(
+            metadata.project_id(), dataset_name)
+        view_deployer.deploy_views(views_dataset_ref, views_to_update,
+                                   view_deployer.log_view_deploy)
+        return
+
     views_dataset_ref = bq_utils.client().dataset(dataset_name)
     bq_utils.create_dataset_if_necessary(views_dataset_ref)
 
-    for view in views_to_update:
-        bq_utils.create_or_update_view(views_dataset_ref, view)
+    view_deployer.deploy_views(views_dataset_ref, views_to_update,
+                               bq_utils.create_or_update_view)
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Create or update all views.')
+    parser.add_argument('--dry_run', action='store_true',
+                        help='Validate the view dependency graph and log the '
+                             'views that would be deployed, without calling '
+                             'BigQuery.')
+    return parser
 
 
 if __name__ == '__main__':
-    create_dataset_and_update_views(view_config.VIEWS_DATASET, VIEWS_TO_UPDATE)
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
+    create_dataset_and_update_views(view_config.VIEWS_DATASET,
+                                    VIEWS_TO_UPDATE,
+                                    dry_run=arguments.dry_run)
@@ -25,6 +25,13 @@ Add columns to *_COLUMNS_TO_EXCLUDE to exclude them from the export.
 
 *_BASE_TABLES_BQ_DATASET is the BigQuery dataset to export the tables to.
 
+Add tables to *_TABLES_TO_SHARD to export them in id-range shards.
+
+The history tables in INCREMENTAL_CALCULATION_HISTORY_TABLES are only exported
+when EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES is set, which it must be
+when a calculation pipeline job runs incrementally, i.e. has
+`incremental: True` in a calculation pipeline templates file.
+
 gcs_export_uri defines the export URI location in Google Cloud Storage.
 """
 # pylint: disable=line-too-long
@@ -58,11 +65,36 @@ COUNTY_COLUMNS_TO_EXCLUDE = {
 
 COUNTY_BASE_TABLES_BQ_DATASET = 'census'
 
+# Mapping from table name to the number of id-range shards to export that table
+# in, for tables large enough that a single export would dominate the export
+# run. Each shard is exported by its own Cloud SQL export operation.
+COUNTY_TABLES_TO_SHARD: Dict[str, int] = {
+    'person': 4,
+    'booking': 4,
+    'charge': 8,
+}
+
 ######### STATE EXPORT VALUES #########
 
+# Whether to export the history tables that incremental calculation pipeline
+# runs use to find the people whose data has changed. Each of them adds a full
+# table export to every nightly state export, so only set this when a
+# calculation pipeline job has `incremental: True` in its templates file.
+EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES = False
+
+# The history tables of all entities that reference a person, which incremental
+# calculation pipeline runs read.
+INCREMENTAL_CALCULATION_HISTORY_TABLES = [
+    table.name
+    for table in schema_utils.get_state_person_history_table_classes()
+]
+
 # History tables that should be included in the export
 STATE_HISTORY_TABLES_TO_INCLUDE_IN_EXPORT = [
-    'state_person_history'
+    'state_person_history',
+    *(table_name for table_name in INCREMENTAL_CALCULATION_HISTORY_TABLES
+      if EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES and
+      table_name != 'state_person_history')
 ]
 
 # Excluding history tables
@@ -84,20 +116,45 @@ STATE_TABLES_TO_EXPORT = tuple(
 # As of right now, we aren't excluding any columns from the state schema export.
 STATE_COLUMNS_TO_EXCLUDE: Dict[str, List[str]] = {}
 
+# Mapping from table name to the number of id-range shards to export that table
+# in. See COUNTY_TABLES_TO_SHARD.
+STATE_TABLES_TO_SHARD: Dict[str, int] = {
+    'state_person_history': 4,
+    'state_charge': 4,
+}
+
 STATE_BASE_TABLES_BQ_DATASET = 'state'
 
-def gcs_export_uri(table_name: str) -> str:
-    """Return export URI location in Google Cloud Storage given a table name."""
+def gcs_export_bucket() -> str:
+    """Return the Google Cloud Storage bucket that tables are exported to."""
     project_id = str(metadata.project_id())
     assert 'recidiviz' in project_id, (
         'If you are running a manual export, '
         'you must set the GOOGLE_CLOUD_PROJECT '
         'environment variable to specify which project bucket to export into.'
     )
-    bucket = '{}-dbexport'.format(project_id)
+    return '{}-dbexport'.format(project_id)
+
+
+def gcs_export_uri(table_name: str) -> str:
+    """Return export URI location in Google Cloud Storage given a table name."""
     GCS_EXPORT_URI_FORMAT = 'gs://{bucket}/{table_name}.csv'
-    uri = GCS_EXPORT_URI_FORMAT.format(bucket=bucket, table_name=table_name)
-    logging.info("GCS URI [%s] in project [%s]", uri, project_id)
+    uri = GCS_EXPORT_URI_FORMAT.format(bucket=gcs_export_bucket(),
+                                       table_name=table_name)
+    logging.info("GCS URI [%s]", uri)
+    return uri
+
+
+def gcs_export_shard_uri(table_name: str, shard: int, num_shards: int) -> str:
+    """Return export URI location in Google Cloud Storage of one id-range
+    shard of a table."""
+    GCS_EXPORT_SHARD_URI_FORMAT = \
+        'gs://{bucket}/{table_name}-{shard:05d}-of-{num_shards:05d}.csv'
+    uri = GCS_EXPORT_SHARD_URI_FORMAT.format(bucket=gcs_export_bucket(),
+                                             table_name=table_name,
+                                             shard=shard,
+                                             num_shards=num_shards)
+    logging.info("GCS URI [%s]", uri)
     return uri
 
 ############################################
@@ -16,6 +16,7 @@
 # =============================================================================
 
 """Export data from Cloud SQL and load it into BigQuery."""
+import argparse
 from http import HTTPStatus
 import json
 import logging
@@ -26,18 +27,20 @@ from flask import request
 from google.cloud import bigquery
 
 from recidiviz.calculator.query import export_config, cloudsql_export,\
-    bq_utils, bq_load
+    bq_utils, bq_load, pipelined_export
 from recidiviz.calculator.query.bq_export_cloud_task_manager import \
     BQExportCloudTaskManager
 from recidiviz.persistence.database.sqlalchemy_engine_manager import SchemaType
 from recidiviz.utils.auth import authenticate_request
 from recidiviz.utils import pubsub_helper
+from recidiviz.utils.params import get_bool_param_value
 
 
 def export_table_then_load_table(
         table: str,
         dataset_ref: bigquery.dataset.DatasetReference,
-        schema_type: SchemaType) -> bool:
+        schema_type: SchemaType,
+        incremental: bool = False) -> bool:
     """Exports a Cloud SQL table to CSV, then loads it into BigQuery.
 
     Waits until the BigQuery load is completed.
@@ -49,13 +52,18 @@ def export_table_then_load_table(
             Gets created if it does not already exist.
         schema_type: The schema, either SchemaType.COUNTY or SchemaType.STATE
             where this table lives.
+        incremental: If True and the table has history, only exports the rows
+            that changed since its last successful export and merges them into
+            the BigQuery table. See pipelined_export for details.
     Returns:
         True if load succeeds, else False.
     """
     if schema_type == SchemaType.JAILS:
         export_queries = export_config.COUNTY_TABLE_EXPORT_QUERIES
+        tables_to_export = export_config.COUNTY_TABLES_TO_EXPORT
     elif schema_type == SchemaType.STATE:
         export_queries = export_config.STATE_TABLE_EXPORT_QUERIES
+        tables_to_export = export_config.STATE_TABLES_TO_EXPORT
     else:
         logging.error("Unknown schema_type: %s", schema_type)
         return False
@@ -68,6 +76,15 @@ def export_table_then_load_table(
             "the TABLES_TO_EXPORT for the %s schema_type?", table, schema_type)
         return False
 
+    if incremental:
+        table_to_export = next(
+            table_class for table_class in tables_to_export
+            if table_class.name == table)
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            schema_type, dataset_ref, [table_to_export],
+            {table: export_query}, {}, incremental=True)
+        return all(stats.success for stats in manifest.tables)
+
     export_success = cloudsql_export.export_table(schema_type,
                                                   table,
                                                   export_query)
@@ -115,42 +132,58 @@ def export_then_load_all_sequentially(schema_type: SchemaType):
         export_table_then_load_table(table.name, dataset_ref, schema_type)
 
 
-def export_all_then_load_all(schema_type: SchemaType):
-    """Export all tables from Cloud SQL in the given schema, then load all
-    tables to BigQuery.
+def export_all_then_load_all(schema_type: SchemaType,
+                             incremental: bool = False):
+    """Export all tables from Cloud SQL in the given schema, and load each
+    table into BigQuery as soon as its export has finished.
 
-    Exports happen in sequence (one at a time),
-    then once all exports are completed, the BigQuery loads happen in parallel.
+    Exports happen in sequence (one at a time), because Cloud SQL can only
+    support one export operation at a time, while the BigQuery loads happen
+    in parallel with later exports. Tables listed in the *_TABLES_TO_SHARD of
+    the schema are exported in id-range shards.
 
     For example, for tables A, B, C:
     1. Export Table A
-    2. Export Table B
-    3. Export Table C
-    4. Load Tables A, B, C in parallel.
+    2. Export Table B, load Table A
+    3. Export Table C, load Table B
+    4. Load Table C
+
+    If |incremental| is True, tables with history only export the rows that
+    changed since their last successful export, which are then merged into
+    their BigQuery tables. Otherwise all tables are fully exported and replace
+    their BigQuery tables.
+
+    See pipelined_export for details.
     """
     if schema_type == SchemaType.JAILS:
         tables_to_export = export_config.COUNTY_TABLES_TO_EXPORT
         base_tables_dataset_ref = bq_utils.client().dataset(
             export_config.COUNTY_BASE_TABLES_BQ_DATASET)
         export_queries = export_config.COUNTY_TABLE_EXPORT_QUERIES
+        tables_to_shard = export_config.COUNTY_TABLES_TO_SHARD
     elif schema_type == SchemaType.STATE:
         tables_to_export = export_config.STATE_TABLES_TO_EXPORT
         base_tables_dataset_ref = bq_utils.client().dataset(
             export_config.STATE_BASE_TABLES_BQ_DATASET)
         export_queries = export_config.STATE_TABLE_EXPORT_QUERIES
+        tables_to_shard = export_config.STATE_TABLES_TO_SHARD
     else:
         logging.error("Invalid schema_type requested. Must be either"
                       " SchemaType.JAILS or SchemaType.STATE.")
         return
 
-    logging.info("Beginning CloudSQL export")
-    cloudsql_export.export_all_tables(schema_type,
-                                      tables_to_export,
-                                      export_queries)
+    logging.info("Beginning pipelined CloudSQL export and BQ table load")
+    manifest = pipelined_export.export_then_load_all_pipelined(
+        schema_type, base_tables_dataset_ref, tables_to_export,
+        export_queries, tables_to_shard, incremental=incremental)
 
-    logging.info("Beginning BQ table load")
-    bq_load.load_all_tables_concurrently(
-        base_tables_dataset_ref, tables_to_export, schema_type)
+    failed_tables = [stats.table_name for stats in manifest.tables
+                     if not stats.success]
+    if failed_tables:
+        logging.error("Failed to export then load tables %s", failed_tables)
+    logging.info("Exported then loaded [%s] tables in [%.1f] seconds",
+                 len(manifest.tables) - len(failed_tables),
+                 manifest.total_seconds)
 
 
 export_manager_blueprint = flask.Blueprint('export_manager', __name__)
@@ -166,11 +199,15 @@ def handle_bq_export_task():
     URL Parameters:
         table_name: Table to export then import. Table must be defined
             in export_config.COUNTY_TABLES_TO_EXPORT.
+        schema_type: The schema of the table, either 'jails' or 'state'.
+        incremental: Whether to only export the rows that changed since the
+            last export of the table. Defaults to False.
     """
     json_data = request.get_data(as_text=True)
     data = json.loads(json_data)
     table_name = data['table_name']
     schema_type_str = data['schema_type']
+    incremental = data.get('incremental', False)
 
     if schema_type_str == SchemaType.JAILS.value:
         schema_type = SchemaType.JAILS
@@ -185,7 +222,8 @@ def handle_bq_export_task():
 
     logging.info("Starting BQ export task for table: %s", table_name)
 
-    success = export_table_then_load_table(table_name, dataset_ref, schema_type)
+    success = export_table_then_load_table(table_name, dataset_ref, schema_type,
+                                           incremental=incremental)
 
     return ('', HTTPStatus.OK if success else HTTPStatus.INTERNAL_SERVER_ERROR)
 
@@ -247,14 +285,21 @@ def create_all_state_bq_export_tasks():
     export_config.STATE_TABLES_TO_EXPORT.
 
     Re-creates all tasks if any task fails to be created.
+
+    Endpoint path parameters:
+        incremental: Whether each task should only export the rows that
+            changed since the last export of its table. Defaults to False.
     """
     schema_type_str = SchemaType.STATE.value
+    incremental = get_bool_param_value('incremental', request.args,
+                                       default=False)
 
     logging.info("Beginning BQ export for state schema tables.")
 
     task_manager = BQExportCloudTaskManager()
     for table in export_config.STATE_TABLES_TO_EXPORT:
-        task_manager.create_bq_task(table.name, schema_type_str)
+        task_manager.create_bq_task(table.name, schema_type_str,
+                                    incremental=incremental)
 
     pub_sub_topic = 'v1.calculator.recidivism'
     pub_sub_message = 'State export to BQ complete'
@@ -262,9 +307,21 @@ def create_all_state_bq_export_tasks():
     return ('', HTTPStatus.OK)
 
 
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Export all state tables from Cloud SQL to BigQuery.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only export the rows of tables with history '
+                             'that changed since their last export, and '
+                             'merge them into the BigQuery tables.')
+    return parser
+
+
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
 
     local_export_schema_type = SchemaType.STATE
 
-    export_all_then_load_all(local_export_schema_type)
+    export_all_then_load_all(local_export_schema_type,
+                             incremental=arguments.incremental)
@@ -0,0 +1,235 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Helpers for exporting only the rows of Cloud SQL tables that changed since
+the last export, and merging them into the BigQuery tables.
+
+Changes are found using the historical snapshot tables. Every change to a
+master table row inserts a new snapshot into its history table, and closes the
+previous snapshot of the row by setting its valid_to in the same transaction.
+So a row changed since the last export if its history table has a snapshot
+that the last export didn't see.
+
+Snapshot ids are allocated when a snapshot is written, not when its
+transaction commits, so a transaction that was still open during an export can
+commit snapshots with lower ids than the highest id the export saw. So each
+export records a high-water mark of the snapshot ids that every earlier
+transaction has committed below, which is the highest snapshot id seen by an
+earlier export that ran at least MAX_COMMIT_DELAY before it. The next export
+re-exports every snapshot above that id, and the rows it re-exports that were
+already exported are harmless, since the changed rows are merged into the
+BigQuery table by primary key.
+
+A history table is exported by re-exporting every snapshot of each master row
+that has a new snapshot, so that the snapshots closed by those changes are
+exported too, whatever valid_to they were closed with.
+
+Master rows are never deleted from tables with history, so deletes don't need
+to be merged. Tables without a history table are always fully exported.
+"""
+import datetime
+from typing import Dict, List, Optional
+
+import attr
+import sqlalchemy
+from google.cloud import bigquery
+from sqlalchemy.engine import Engine
+
+HISTORY_TABLE_SUFFIX = '_history'
+
+STAGING_TABLE_SUFFIX = '_incremental'
+
+# The longest a transaction that writes snapshots may stay open after writing
+# them, so the longest a snapshot may take to commit after its id is allocated
+MAX_COMMIT_DELAY = datetime.timedelta(hours=1)
+
+
+@attr.s(frozen=True)
+class HighWaterMark:
+    """The snapshot ids of a history table seen by an export."""
+    # The highest snapshot id at the time of the export
+    max_snapshot_id: int = attr.ib()
+    # When |max_snapshot_id| was read
+    read_time: datetime.datetime = attr.ib()
+    # Every snapshot with an id up to this one was committed before the
+    # export, so was exported by it or an earlier export. None if no earlier
+    # export ran long enough before this one to know, in which case the next
+    # export is a full export.
+    exported_snapshot_id: Optional[int] = attr.ib()
+
+    def to_json(self) -> Dict[str, object]:
+        return {'max_snapshot_id': self.max_snapshot_id,
+                'read_time': self.read_time.isoformat(),
+                'exported_snapshot_id': self.exported_snapshot_id}
+
+    @classmethod
+    def from_json(cls, json_dict: Dict[str, object]) -> 'HighWaterMark':
+        exported_snapshot_id = json_dict['exported_snapshot_id']
+        return cls(
+            max_snapshot_id=int(json_dict['max_snapshot_id']),  # type: ignore
+            read_time=datetime.datetime.fromisoformat(
+                str(json_dict['read_time'])),
+            exported_snapshot_id=None if exported_snapshot_id is None
+            else int(exported_snapshot_id))  # type: ignore
+
+
+@attr.s(frozen=True)
+class IncrementalTableConfig:
+    """How to find the changed rows of a table that can be exported
+    incrementally."""
+    table_name: str = attr.ib()
+    # The primary key column of the table, which changed rows are merged on
+    key_column: str = attr.ib()
+    # The history table that records changes to rows of the table. For a
+    # history table, this is the table itself.
+    history_table: sqlalchemy.Table = attr.ib()
+    # The column of the history table that references the primary key of the
+    # master table, whose snapshots are exported together
+    master_key_column: str = attr.ib()
+
+    @property
+    def is_history_table(self) -> bool:
+        return self.history_table.name == self.table_name
+
+
+def get_incremental_config(
+        table: sqlalchemy.Table,
+        all_tables: Dict[str, sqlalchemy.Table]
+) -> Optional[IncrementalTableConfig]:
+    """Returns the IncrementalTableConfig of |table|, or None if |table| can't
+    be exported incrementally.
+
+    Args:
+        table: The table to export.
+        all_tables: All tables in the schema of |table|, by name.
+    """
+    key_column = _single_primary_key_column(table)
+    if key_column is None:
+        return None
+
+    if table.name.endswith(HISTORY_TABLE_SUFFIX):
+        master_table = all_tables.get(table.name[:-len(HISTORY_TABLE_SUFFIX)])
+        master_key_column = _single_primary_key_column(master_table)
+        if master_key_column is None or master_key_column not in table.c:
+            return None
+        return IncrementalTableConfig(table_name=table.name,
+                                      key_column=key_column,
+                                      history_table=table,
+                                      master_key_column=master_key_column)
+
+    history_table = all_tables.get(table.name + HISTORY_TABLE_SUFFIX)
+    if history_table is None or key_column not in history_table.c:
+        return None
+    return IncrementalTableConfig(table_name=table.name,
+                                  key_column=key_column,
+                                  history_table=history_table,
+                                  master_key_column=key_column)
+
+
+def _single_primary_key_column(table: Optional[sqlalchemy.Table]) \
+        -> Optional[str]:
+    if table is None:
+        return None
+    primary_key_columns = list(table.primary_key.columns)
+    if len(primary_key_columns) != 1:
+        return None
+    return primary_key_columns[0].name
+
+
+def get_max_snapshot_id(engine: Engine, history_table: sqlalchemy.Table) \
+        -> Optional[int]:
+    """Returns the highest snapshot id of |history_table|, or None if it has no
+    snapshots."""
+    snapshot_id_column = list(history_table.primary_key.columns)[0]
+    return engine.execute(
+        sqlalchemy.select([sqlalchemy.func.max(snapshot_id_column)])).scalar()
+
+
+def next_high_water_mark(previous_mark: Optional[HighWaterMark],
+                         max_snapshot_id: int,
+                         read_time: datetime.datetime) -> HighWaterMark:
+    """Returns the high-water mark of an export that saw snapshot ids up to
+    |max_snapshot_id| at |read_time|, where |previous_mark| is the mark of the
+    last successful export of the same table.
+
+    Snapshots seen by the previous export were allocated before its mark was
+    read, so if that was at least MAX_COMMIT_DELAY ago, every snapshot up to
+    its |max_snapshot_id| has been committed, and is seen by this export.
+    Otherwise snapshots allocated shortly before the previous export may still
+    commit, so the export keeps the previous mark's |exported_snapshot_id|.
+    """
+    if previous_mark is None:
+        exported_snapshot_id = None
+    elif read_time - previous_mark.read_time >= MAX_COMMIT_DELAY:
+        exported_snapshot_id = previous_mark.max_snapshot_id
+    else:
+        exported_snapshot_id = previous_mark.exported_snapshot_id
+    return HighWaterMark(max_snapshot_id=max_snapshot_id,
+                         read_time=read_time,
+                         exported_snapshot_id=exported_snapshot_id)
+
+
+def incremental_export_query(export_query: str,
+                             config: IncrementalTableConfig,
+                             high_water_mark: HighWaterMark) -> str:
+    """Restricts |export_query| to the rows that may have changed since the
+    export that recorded |high_water_mark|, which must have an
+    |exported_snapshot_id|.
+
+    For a history table, these are all snapshots of the master rows that have
+    a new snapshot, including the snapshots that were closed by the change."""
+    if high_water_mark.exported_snapshot_id is None:
+        raise ValueError(
+            f"High-water mark of table [{config.table_name}] has no exported "
+            f"snapshot id.")
+    history_table = config.history_table
+    snapshot_id_column = list(history_table.primary_key.columns)[0].name
+    changed_master_keys = \
+        f'SELECT {config.master_key_column} FROM {history_table.name} ' \
+        f'WHERE {snapshot_id_column} > {high_water_mark.exported_snapshot_id}'
+
+    return f'{export_query} WHERE {config.master_key_column} IN (' \
+        f'{changed_master_keys})'
+
+
+def merge_query(dataset_ref: bigquery.dataset.DatasetReference,
+                table_id: str,
+                columns: List[str],
+                key_column: str) -> str:
+    """Returns a query that merges the rows of the staging table of
+    |table_id| into |table_id|, updating rows whose |key_column| matches and
+    inserting all others."""
+    target = f'`{dataset_ref.project}.{dataset_ref.dataset_id}.{table_id}`'
+    staging = f'`{dataset_ref.project}.{dataset_ref.dataset_id}.' \
+        f'{staging_table_id(table_id)}`'
+    updates = ', '.join(f'{column} = staging.{column}' for column in columns
+                        if column != key_column)
+    column_list = ', '.join(columns)
+    staging_column_list = ', '.join(f'staging.{column}' for column in columns)
+
+    query = f'MERGE {target} target USING {staging} staging ' \
+        f'ON target.{key_column} = staging.{key_column} '
+    if updates:
+        query += f'WHEN MATCHED THEN UPDATE SET {updates} '
+    query += f'WHEN NOT MATCHED THEN INSERT ({column_list}) ' \
+        f'VALUES ({staging_column_list})'
+    return query
+
+
+def staging_table_id(table_id: str) -> str:
+    """Returns the id of the table that the changed rows of |table_id| are
+    loaded into before they are merged."""
+    return table_id + STAGING_TABLE_SUFFIX
@@ -0,0 +1,502 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Exports Cloud SQL tables to GCS and loads them into BigQuery as a pipeline.
+
+Cloud SQL only supports one export operation at a time, so tables are still
+exported one after another, but each table's BigQuery load is started as soon
+as its own export finishes, while the next table is being exported.
+
+Large tables can be exported in id-range shards, each exported by its own
+export operation, so no single export operation dominates the run. All shards
+of a table are loaded into BigQuery with a single load job.
+
+In incremental mode, tables with history are exported by only exporting the
+rows that changed since the last successful export of the table, and merging
+them into the BigQuery table. See incremental_export for details. Tables that
+have no history, or whose high-water mark doesn't yet tell which of their rows
+were exported, such as tables that have never been exported, are fully
+exported.
+
+The timings and loaded row counts of every table are recorded in a run
+manifest, which is written to the export bucket.
+"""
+import datetime
+import json
+import logging
+import math
+import time
+from concurrent import futures
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import attr
+import sqlalchemy
+from google.cloud import bigquery, exceptions, storage
+
+from recidiviz.calculator.query import bq_load, bq_utils, cloudsql_export, \
+    export_config, incremental_export
+from recidiviz.calculator.query.incremental_export import HighWaterMark, \
+    IncrementalTableConfig
+from recidiviz.persistence.database.base_schema import JailsBase, StateBase
+from recidiviz.persistence.database.sqlalchemy_engine_manager import \
+    SQLAlchemyEngineManager, SchemaType
+
+# The maximum number of BigQuery loads waited on at the same time
+DEFAULT_MAX_IN_FLIGHT_LOADS = 16
+
+MANIFEST_DIRECTORY = 'export_manifests'
+
+HIGH_WATER_MARKS_FILENAME = 'high_water_marks.json'
+
+_SCHEMA_BASES = {
+    SchemaType.JAILS: JailsBase,
+    SchemaType.STATE: StateBase,
+}
+
+# A range of ids [lower, upper). A bound of None leaves that side of the range
+# open, so that the shards of a table cover every row, including any rows
+# written after the shard bounds were computed.
+IdRange = Tuple[Optional[int], Optional[int]]
+
+_storage_client = None
+
+
+def storage_client() -> storage.Client:
+    global _storage_client
+    if not _storage_client:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+@attr.s
+class TableExportStats:
+    """The timings and loaded row count of one table in an export run."""
+    table_name: str = attr.ib()
+    num_shards: int = attr.ib()
+    export_seconds: Optional[float] = attr.ib(default=None)
+    load_seconds: Optional[float] = attr.ib(default=None)
+    # For an incremental export, the number of changed rows merged
+    num_rows: Optional[int] = attr.ib(default=None)
+    success: bool = attr.ib(default=False)
+    incremental: bool = attr.ib(default=False)
+
+
+@attr.s(frozen=True)
+class ExportRunManifest:
+    """A record of a single export run of all tables in a schema."""
+    schema_type: str = attr.ib()
+    start_time: str = attr.ib()
+    total_seconds: float = attr.ib()
+    tables: List[TableExportStats] = attr.ib()
+
+    def to_json(self) -> str:
+        return json.dumps(attr.asdict(self), indent=2, sort_keys=True)
+
+
+def split_id_range(min_id: int, max_id: int, num_shards: int) -> List[IdRange]:
+    """Splits the ids from |min_id| to |max_id| into at most |num_shards|
+    contiguous ranges of equal width. The first range has no lower bound and
+    the last range has no upper bound."""
+    width = max(1, math.ceil((max_id - min_id + 1) / num_shards))
+    bounds = list(range(min_id + width, max_id + 1, width))[:num_shards - 1]
+    lower_bounds: List[Optional[int]] = [None, *bounds]
+    upper_bounds: List[Optional[int]] = [*bounds, None]
+    return list(zip(lower_bounds, upper_bounds))
+
+
+def sharded_export_query(export_query: str, id_column: str,
+                         id_range: IdRange) -> str:
+    """Restricts |export_query| to rows whose |id_column| is in |id_range|."""
+    lower, upper = id_range
+    conditions = []
+    if lower is not None:
+        conditions.append(f'{id_column} >= {lower}')
+    if upper is not None:
+        conditions.append(f'{id_column} < {upper}')
+    if not conditions:
+        return export_query
+    return f'{export_query} WHERE {" AND ".join(conditions)}'
+
+
+def get_id_range_shards(schema_type: SchemaType,
+                        table: sqlalchemy.Table,
+                        num_shards: int) -> Optional[List[IdRange]]:
+    """Returns the id ranges to export |table| in, or None if the table should
+    be exported in a single operation.
+
+    A table can only be sharded if it has a single integer primary key, and the
+    database of |schema_type| is reachable to look up the range of its ids.
+    """
+    if num_shards <= 1:
+        return None
+
+    primary_key_columns = list(table.primary_key.columns)
+    if len(primary_key_columns) != 1 or \
+            not isinstance(primary_key_columns[0].type, sqlalchemy.Integer):
+        logging.warning("Can't shard table [%s], which does not have a single "
+                        "integer primary key.", table.name)
+        return None
+    id_column = primary_key_columns[0]
+
+    engine = SQLAlchemyEngineManager.get_engine_for_schema_base(
+        _SCHEMA_BASES[schema_type])
+    if engine is None:
+        logging.warning("No engine set for schema [%s], exporting table [%s] "
+                        "without sharding.", schema_type, table.name)
+        return None
+
+    min_id, max_id = engine.execute(sqlalchemy.select(
+        [sqlalchemy.func.min(id_column),
+         sqlalchemy.func.max(id_column)])).fetchone()
+    if min_id is None:
+        return None
+
+    return split_id_range(min_id, max_id, num_shards)
+
+
+def export_then_load_all_pipelined(
+        schema_type: SchemaType,
+        dataset_ref: bigquery.dataset.DatasetReference,
+        tables: Sequence[sqlalchemy.Table],
+        export_queries: Dict[str, str],
+        tables_to_shard: Dict[str, int],
+        incremental: bool = False,
+        max_in_flight_loads: int = DEFAULT_MAX_IN_FLIGHT_LOADS
+) -> ExportRunManifest:
+    """Exports each of |tables| from Cloud SQL, starting its BigQuery load as
+    soon as its export finishes.
+
+    For example, for tables A, B, C:
+    1. Export Table A
+    2. Start load of Table A, export Table B
+    3. Start load of Table B, export Table C
+    4. Start load of Table C
+    5. Wait for all loads to finish.
+
+    Args:
+        schema_type: The schema, either SchemaType.JAILS or SchemaType.STATE,
+            where the tables live.
+        dataset_ref: The BigQuery dataset to load the tables into.
+        tables: The tables to export then load.
+        export_queries: The export query of each table, by table name.
+        tables_to_shard: The number of id-range shards to export each table
+            in, by table name. Tables that are not listed are not sharded.
+        incremental: If True, only exports the rows of each table that changed
+            since its last successful export, where possible, and merges them
+            into the BigQuery table. Otherwise every table is fully exported
+            and replaces its BigQuery table.
+        max_in_flight_loads: The maximum number of loads to wait on at once.
+    Returns:
+        The manifest of the run, which is also written to the export bucket.
+    """
+    start_time = datetime.datetime.now()
+    run_start = time.perf_counter()
+    all_stats: List[TableExportStats] = []
+
+    high_water_marks: Dict[str, HighWaterMark] = {}
+    incremental_configs: Dict[str, IncrementalTableConfig] = {}
+    new_high_water_marks: Dict[str, HighWaterMark] = {}
+    if incremental:
+        high_water_marks = _load_high_water_marks(schema_type)
+        # The new high-water marks are read before any table is exported, so
+        # that any change made during the export is exported by the next run.
+        incremental_configs, new_high_water_marks = \
+            _get_incremental_configs(schema_type, tables, high_water_marks)
+
+    with futures.ThreadPoolExecutor(
+            max_workers=max_in_flight_loads) as executor:
+        load_futures: Dict[futures.Future, TableExportStats] = {}
+        for table in tables:
+            try:
+                export_query = export_queries[table.name]
+            except KeyError:
+                logging.error("Unknown table name [%s]. Is it listed in "
+                              "the TABLES_TO_EXPORT for the %s schema_type?",
+                              table.name, schema_type)
+                all_stats.append(TableExportStats(table.name, num_shards=0))
+                continue
+
+            config = incremental_configs.get(table.name)
+            high_water_mark = high_water_marks.get(table.name)
+            if config and high_water_mark and \
+                    high_water_mark.exported_snapshot_id is not None:
+                stats, source_uris = _export_changed_rows(
+                    schema_type, table, export_query, config, high_water_mark)
+                merge_key: Optional[str] = config.key_column
+            else:
+                stats, source_uris = _export_table(
+                    schema_type, table, export_query,
+                    tables_to_shard.get(table.name, 1))
+                merge_key = None
+            all_stats.append(stats)
+            if source_uris is None:
+                logging.error("Skipping BigQuery load of table [%s], "
+                              "which failed to export.", table.name)
+                continue
+
+            load_futures[executor.submit(
+                _load_table, dataset_ref, table.name, schema_type,
+                source_uris, merge_key)] = stats
+
+        for future in futures.as_completed(load_futures):
+            stats = load_futures[future]
+            stats.success, stats.load_seconds, stats.num_rows = future.result()
+
+    if incremental:
+        # Only advance the high-water marks of tables that were successfully
+        # exported, so failed tables are caught up by the next run. The marks
+        # are read again first, since other tables of the schema may have been
+        # exported by export tasks that ran at the same time.
+        high_water_marks = _load_high_water_marks(schema_type)
+        for stats in all_stats:
+            if stats.success and stats.table_name in new_high_water_marks:
+                high_water_marks[stats.table_name] = \
+                    new_high_water_marks[stats.table_name]
+        _save_high_water_marks(schema_type, high_water_marks)
+
+    manifest = ExportRunManifest(
+        schema_type=schema_type.value,
+        start_time=start_time.isoformat(),
+        total_seconds=time.perf_counter() - run_start,
+        tables=all_stats)
+    _save_manifest(manifest)
+    return manifest
+
+
+def _get_incremental_configs(
+        schema_type: SchemaType,
+        tables: Sequence[sqlalchemy.Table],
+        high_water_marks: Dict[str, HighWaterMark]
+) -> Tuple[Dict[str, IncrementalTableConfig], Dict[str, HighWaterMark]]:
+    """Returns the IncrementalTableConfig and the high-water mark of the
+    current export of each of |tables| that can be exported incrementally, by
+    table name, where |high_water_marks| are the marks of their last
+    successful exports."""
+    schema_base = _SCHEMA_BASES[schema_type]
+    engine = SQLAlchemyEngineManager.get_engine_for_schema_base(schema_base)
+    if engine is None:
+        logging.warning("No engine set for schema [%s], exporting all tables "
+                        "in full.", schema_type)
+        return {}, {}
+
+    configs: Dict[str, IncrementalTableConfig] = {}
+    marks: Dict[str, HighWaterMark] = {}
+    max_snapshot_ids: Dict[str, Optional[int]] = {}
+    read_time = datetime.datetime.now()
+    for table in tables:
+        config = incremental_export.get_incremental_config(
+            table, schema_base.metadata.tables)
+        if config is None:
+            continue
+        configs[table.name] = config
+
+        history_table_name = config.history_table.name
+        if history_table_name not in max_snapshot_ids:
+            max_snapshot_ids[history_table_name] = \
+                incremental_export.get_max_snapshot_id(
+                    engine, config.history_table)
+        max_snapshot_id = max_snapshot_ids[history_table_name]
+        if max_snapshot_id is not None:
+            marks[table.name] = incremental_export.next_high_water_mark(
+                high_water_marks.get(table.name), max_snapshot_id, read_time)
+
+    return configs, marks
+
+
+def _export_table(
+        schema_type: SchemaType,
+        table: sqlalchemy.Table,
+        export_query: str,
+        num_shards: int
+) -> Tuple[TableExportStats, Optional[List[str]]]:
+    """Exports |table|, in shards if possible when |num_shards| > 1.
+
+    Returns the stats of the export, and the URIs of the exported files, or
+    None if any part of the export failed.
+    """
+    export_start = time.perf_counter()
+
+    id_ranges = get_id_range_shards(schema_type, table, num_shards)
+    if id_ranges is None:
+        exports = [(export_config.gcs_export_uri(table.name), export_query)]
+    else:
+        id_column = list(table.primary_key.columns)[0].name
+        exports = [
+            (export_config.gcs_export_shard_uri(table.name, i, len(id_ranges)),
+             sharded_export_query(export_query, id_column, id_range))
+            for i, id_range in enumerate(id_ranges)]
+
+    success = True
+    for export_uri, query in exports:
+        if not cloudsql_export.export_table(schema_type, table.name, query,
+                                            export_uri=export_uri):
+            success = False
+            break
+
+    stats = TableExportStats(
+        table.name, num_shards=len(exports),
+        export_seconds=time.perf_counter() - export_start)
+    logging.info("Exported table [%s] in [%s] shards in [%.1f] seconds.",
+                 table.name, stats.num_shards, stats.export_seconds)
+
+    if not success:
+        return stats, None
+    return stats, [export_uri for export_uri, _ in exports]
+
+
+def _export_changed_rows(
+        schema_type: SchemaType,
+        table: sqlalchemy.Table,
+        export_query: str,
+        config: IncrementalTableConfig,
+        high_water_mark: HighWaterMark
+) -> Tuple[TableExportStats, Optional[List[str]]]:
+    """Exports the rows of |table| that may have changed since the export that
+    recorded |high_water_mark|.
+
+    Returns the stats of the export, and the URIs of the exported files, or
+    None if the export failed.
+    """
+    export_start = time.perf_counter()
+
+    export_uri = export_config.gcs_export_uri(
+        incremental_export.staging_table_id(table.name))
+    success = cloudsql_export.export_table(
+        schema_type, table.name,
+        incremental_export.incremental_export_query(
+            export_query, config, high_water_mark),
+        export_uri=export_uri)
+
+    stats = TableExportStats(
+        table.name, num_shards=1,
+        export_seconds=time.perf_counter() - export_start,
+        incremental=True)
+    logging.info("Exported changed rows of table [%s] in [%.1f] seconds.",
+                 table.name, stats.export_seconds)
+
+    if not success:
+        return stats, None
+    return stats, [export_uri]
+
+
+def _load_table(
+        dataset_ref: bigquery.dataset.DatasetReference,
+        table_name: str,
+        schema_type: SchemaType,
+        source_uris: List[str],
+        merge_key: Optional[str] = None
+) -> Tuple[bool, Optional[float], Optional[int]]:
+    """Loads the exported files of a table into BigQuery and waits for the
+    load to finish.
+
+    If |merge_key| is set, the files only contain changed rows. They are loaded
+    into a staging table, then merged into the table on |merge_key|.
+
+    Returns whether the load succeeded, how long it took and how many rows
+    were loaded.
+    """
+    load_start = time.perf_counter()
+    destination_table_id = \
+        incremental_export.staging_table_id(table_name) if merge_key else None
+    load_job_started = bq_load.start_table_load(
+        dataset_ref, table_name, schema_type, source_uris=source_uris,
+        destination_table_id=destination_table_id)
+    if not load_job_started:
+        return False, None, None
+
+    load_job, table_ref = load_job_started
+    success = bq_load.wait_for_table_load(load_job, table_ref)
+    if success and merge_key:
+        success = _merge_staging_table(dataset_ref, table_name, schema_type,
+                                       merge_key)
+    load_seconds = time.perf_counter() - load_start
+    if not success:
+        return False, load_seconds, None
+    return True, load_seconds, load_job.output_rows
+
+
+def _merge_staging_table(dataset_ref: bigquery.dataset.DatasetReference,
+                         table_name: str,
+                         schema_type: SchemaType,
+                         merge_key: str) -> bool:
+    """Merges the staging table of |table_name| into the table, then deletes
+    the staging table. Returns True if the merge succeeded."""
+    if schema_type == SchemaType.JAILS:
+        export_schema = export_config.COUNTY_TABLE_EXPORT_SCHEMA
+    else:
+        export_schema = export_config.STATE_TABLE_EXPORT_SCHEMA
+    columns = [field['name'] for field in export_schema[table_name]]
+
+    query = incremental_export.merge_query(dataset_ref, table_name, columns,
+                                           merge_key)
+    logging.info("Merging changed rows into table [%s]: %s", table_name, query)
+    try:
+        bq_utils.client().query(query).result()
+    except exceptions.GoogleCloudError:
+        logging.exception("Failed to merge changed rows into table [%s]",
+                          table_name)
+        return False
+
+    bq_utils.client().delete_table(
+        dataset_ref.table(incremental_export.staging_table_id(table_name)),
+        not_found_ok=True)
+    return True
+
+
+def _high_water_marks_path(schema_type: SchemaType) -> str:
+    return f'{MANIFEST_DIRECTORY}/{schema_type.value}/' \
+        f'{HIGH_WATER_MARKS_FILENAME}'
+
+
+def _load_high_water_marks(schema_type: SchemaType) \
+        -> Dict[str, HighWaterMark]:
+    blob = storage_client().bucket(export_config.gcs_export_bucket()).blob(
+        _high_water_marks_path(schema_type))
+    try:
+        marks_json = json.loads(blob.download_as_string())
+    except exceptions.NotFound:
+        logging.info("No high-water marks found for schema [%s], exporting "
+                     "all tables in full.", schema_type)
+        return {}
+    return {table_name: HighWaterMark.from_json(mark_json)
+            for table_name, mark_json in marks_json.items()}
+
+
+def _save_high_water_marks(schema_type: SchemaType,
+                           marks: Dict[str, HighWaterMark]) -> None:
+    blob = storage_client().bucket(export_config.gcs_export_bucket()).blob(
+        _high_water_marks_path(schema_type))
+    blob.upload_from_string(
+        json.dumps({table_name: mark.to_json()
+                    for table_name, mark in marks.items()}, sort_keys=True),
+        content_type='application/json')
+
+
+def _save_manifest(manifest: ExportRunManifest) -> None:
+    """Writes |manifest| to the export bucket. A failure to write the manifest
+    does not fail the export run."""
+    manifest_json = manifest.to_json()
+    logging.info("Export run manifest: %s", manifest_json)
+
+    path = f'{MANIFEST_DIRECTORY}/{manifest.schema_type}/' \
+        f'{manifest.start_time}.json'
+    try:
+        blob = storage_client().bucket(
+            export_config.gcs_export_bucket()).blob(path)
+        blob.upload_from_string(manifest_json,
+                                content_type='application/json')
+    except exceptions.GoogleCloudError:
+        logging.exception("Failed to write export run manifest [%s]", path)
@@ -16,17 +16,16 @@
 # =============================================================================
 """Export data from BigQuery to JSON files in Cloud Storage."""
 import logging
-from typing import List
 
-from google.cloud import bigquery
-
-from recidiviz.calculator.query import bqview, bq_utils
+from recidiviz.calculator.query import bq_utils, view_export_orchestrator
 
 from recidiviz.calculator.query.state import view_manager, view_config, \
     dashboard_export_config
 
 
-def export_dashboard_data_to_cloud_storage(bucket: str):
+def export_dashboard_data_to_cloud_storage(
+        bucket: str,
+        incremental: bool = True) -> view_export_orchestrator.ExportResult:
     """Exports data needed by the dashboard to the cloud storage bucket.
 
     This is a two-step process. First, for each view, the view query is executed
@@ -35,33 +34,27 @@ def export_dashboard_data_to_cloud_storage(bucket: str):
     This has to be a two-step process because BigQuery doesn't support exporting
     a view directly, it must be materialized in a table first.
 
+    Exports for each state and view run concurrently. If |incremental| is set,
+    views whose underlying tables and queries have not changed since they were
+    last exported are skipped.
+
     Args:
         bucket: The cloud storage location where the exported data should go.
+        incremental: Whether to skip views that have not changed since the last
+            export.
     """
     view_manager.create_dataset_and_update_views(
         view_config.DASHBOARD_VIEWS_DATASET, view_manager.VIEWS_TO_UPDATE)
 
     dataset_ref = bq_utils.client().dataset(view_config.DASHBOARD_VIEWS_DATASET)
-    views_to_export = dashboard_export_config.VIEWS_TO_EXPORT
-
-    _export_views_to_tables(dataset_ref, views_to_export)
-
-    _export_view_tables_to_cloud_storage(dataset_ref, views_to_export, bucket)
-
-
-def _export_views_to_tables(dataset_ref: bigquery.dataset.DatasetReference,
-                            views_to_export: List[bqview.BigQueryView]):
-    for state in dashboard_export_config.STATES_TO_EXPORT:
-        for view in views_to_export:
-            bq_utils.create_or_update_table_from_view(dataset_ref, view, state)
-
 
-def _export_view_tables_to_cloud_storage(
-        dataset_ref: bigquery.dataset.DatasetReference, views_to_export:
-        List[bqview.BigQueryView], bucket: str):
-    for state in dashboard_export_config.STATES_TO_EXPORT:
-        for view in views_to_export:
-            bq_utils.export_to_cloud_storage(dataset_ref, bucket, view, state)
+    return view_export_orchestrator.export_views_to_cloud_storage(
+        dataset_ref,
+        bucket,
+        views_to_export=dashboard_export_config.VIEWS_TO_EXPORT,
+        all_views=view_manager.VIEWS_TO_UPDATE,
+        state_codes=dashboard_export_config.STATES_TO_EXPORT,
+        incremental=incremental)
 
 
 if __name__ == '__main__':
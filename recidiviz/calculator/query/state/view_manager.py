@@ -22,9 +22,13 @@ If running locally, be sure to have GOOGLE_CLOUD_PROJECT set as an environment
 variable.
 """
 
+import argparse
+import logging
 from typing import List
 
-from recidiviz.calculator.query import bqview, bq_utils
+from google.cloud import bigquery
+
+from recidiviz.calculator.query import bqview, bq_utils, view_deployer
 
 from recidiviz.calculator.query.state import view_config
 from recidiviz.calculator.query.state.views.admissions import admissions_views
@@ -37,6 +41,7 @@ from recidiviz.calculator.query.state.views.revocation_analysis import \
     revocation_analysis_views
 from recidiviz.calculator.query.state.views.revocations import revocations_views
 from recidiviz.calculator.query.state.views.supervision import supervision_views
+from recidiviz.utils import metadata
 
 VIEWS_TO_UPDATE: List[bqview.BigQueryView] = \
     reference_views.REF_VIEWS + \
@@ -55,25 +60,53 @@ DATAFLOW_VIEWS: List[bqview.BigQueryView] = \
 
 def create_dataset_and_update_views(
         dataset_name: str,
-        views_to_update: List[bqview.BigQueryView]):
+        views_to_update: List[bqview.BigQueryView],
+        dry_run: bool = False):
     """Create and update Views and their parent Dataset.
 
     Create a parent Views dataset if it does not exist, and
     creates or updates the underlying Views as defined in
     recidiviz.calculator.bq.views.bqview
 
+    Views are deployed concurrently, with each View deployed only once all
+    Views it references have been deployed. If the Views reference each other
+    in a cycle, or reference a View in the dataset that is not being deployed,
+    nothing is deployed.
+
     Args:
         dataset_name: Name of BigQuery dataset to contain Views. Gets created
             if it does not already exist.
         views_to_update: View objects to be created or updated.
+        dry_run: If True, only validates the View dependencies and logs the
+            Views that would be deployed, without calling BigQuery.
     """
+    if dry_run:
+        views_dataset_ref = bigquery.dataset.DatasetReference(
+            metadata.project_id(), dataset_name)
+        view_deployer.deploy_views(views_dataset_ref, views_to_update,
+                                   view_deployer.log_view_deploy)
+        return
+
     views_dataset_ref = bq_utils.client().dataset(dataset_name)
     bq_utils.create_dataset_if_necessary(views_dataset_ref)
 
-    for view in views_to_update:
-        bq_utils.create_or_update_view(views_dataset_ref, view)
+    view_deployer.deploy_views(views_dataset_ref, views_to_update,
+                               bq_utils.create_or_update_view)
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Create or update all views.')
+    parser.add_argument('--dry_run', action='store_true',
+                        help='Validate the view dependency graph and log the '
+                             'views that would be deployed, without calling '
+                             'BigQuery.')
+    return parser
 
 
 if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
     create_dataset_and_update_views(view_config.DASHBOARD_VIEWS_DATASET,
-                                    VIEWS_TO_UPDATE)
+                                    VIEWS_TO_UPDATE,
+                                    dry_run=arguments.dry_run)
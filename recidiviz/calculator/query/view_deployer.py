@@ -0,0 +1,148 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Deploys BigQuery views concurrently, in dependency order.
+
+The dependencies between views are found by parsing each view's query for the
+`[project.]dataset.table` names it references. Views are deployed in waves:
+every view in a wave only depends on views from earlier waves, so all views in
+a wave can be created or updated in parallel. The dependency graph is fully
+validated before any view is deployed.
+"""
+import logging
+import re
+from concurrent import futures
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+from google.cloud import bigquery
+
+from recidiviz.calculator.query import bqview
+
+# The maximum number of views created or updated at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Matches backtick-quoted table references, capturing the dataset and table
+_TABLE_REFERENCE_REGEX = re.compile(r'`(?:[\w-]+\.)?(\w+)\.(\w+)`')
+
+DeployFn = Callable[[bigquery.dataset.DatasetReference, bqview.BigQueryView],
+                    None]
+
+
+class ViewDagError(ValueError):
+    """Raised when the views to deploy can't be ordered by their
+    dependencies."""
+
+
+def get_referenced_tables(view: bqview.BigQueryView) -> Set[Tuple[str, str]]:
+    """Returns the (dataset_id, table_id) of every table or view referenced in
+    the query of |view|."""
+    return set(_TABLE_REFERENCE_REGEX.findall(view.view_query))
+
+
+def get_view_dependencies(
+        dataset_id: str,
+        views: Sequence[bqview.BigQueryView]) -> Dict[str, Set[str]]:
+    """Returns a map of each view_id in |views| to the ids of the views it
+    references in the |dataset_id| dataset.
+
+    Raises a ViewDagError if two views share an id, or if a view references a
+    table in |dataset_id| that is not one of |views|.
+    """
+    view_ids = [view.view_id for view in views]
+    duplicate_ids = {view_id for view_id in view_ids
+                     if view_ids.count(view_id) > 1}
+    if duplicate_ids:
+        raise ViewDagError(
+            f"Found multiple views with ids {sorted(duplicate_ids)}")
+
+    all_view_ids = set(view_ids)
+    dependencies: Dict[str, Set[str]] = {}
+    for view in views:
+        referenced_ids = {
+            table_id for referenced_dataset_id, table_id
+            in get_referenced_tables(view)
+            if referenced_dataset_id == dataset_id}
+
+        missing_ids = referenced_ids - all_view_ids
+        if missing_ids:
+            raise ViewDagError(
+                f"View [{view.view_id}] references {sorted(missing_ids)} in "
+                f"dataset [{dataset_id}], which are not views being deployed")
+        dependencies[view.view_id] = referenced_ids
+
+    return dependencies
+
+
+def get_deploy_waves(
+        dataset_id: str,
+        views: Sequence[bqview.BigQueryView]
+) -> List[List[bqview.BigQueryView]]:
+    """Groups |views| into waves that can each be deployed in parallel, once all
+    earlier waves have been deployed. Within a wave, views keep the order they
+    have in |views|.
+
+    Raises a ViewDagError if the views can't be ordered, e.g. if there is a
+    dependency cycle.
+    """
+    dependencies = get_view_dependencies(dataset_id, views)
+
+    waves: List[List[bqview.BigQueryView]] = []
+    deployed_ids: Set[str] = set()
+    remaining = list(views)
+    while remaining:
+        wave = [view for view in remaining
+                if dependencies[view.view_id] <= deployed_ids]
+        if not wave:
+            raise ViewDagError(
+                f"Found a dependency cycle among views "
+                f"{sorted(view.view_id for view in remaining)}")
+        waves.append(wave)
+        deployed_ids.update(view.view_id for view in wave)
+        remaining = [view for view in remaining
+                     if view.view_id not in deployed_ids]
+
+    return waves
+
+
+def deploy_views(dataset_ref: bigquery.dataset.DatasetReference,
+                 views: Sequence[bqview.BigQueryView],
+                 deploy_fn: DeployFn,
+                 max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+    """Calls |deploy_fn| for every view in |views|, running up to |max_workers|
+    calls at a time, and only once every view a view depends on has been
+    deployed.
+
+    The dependency graph is validated before |deploy_fn| is ever called. If
+    any deploy fails, no later waves are deployed and the error is raised.
+    """
+    waves = get_deploy_waves(dataset_ref.dataset_id, views)
+    logging.info("Deploying [%s] views in [%s] waves.", len(views), len(waves))
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, wave in enumerate(waves):
+            logging.info("Deploying wave [%s] of [%s] views.", i, len(wave))
+            deploy_futures = [executor.submit(deploy_fn, dataset_ref, view)
+                              for view in wave]
+            for future in futures.as_completed(deploy_futures):
+                future.result()
+
+
+def log_view_deploy(dataset_ref: bigquery.dataset.DatasetReference,
+                    view: bqview.BigQueryView) -> None:
+    """A stand-in for bq_utils.create_or_update_view that only logs the view
+    that would be deployed, for validating a deploy offline."""
+    logging.info("[Dry run] Would create or update view [%s] in dataset [%s]",
+                 view.view_id, dataset_ref.dataset_id)
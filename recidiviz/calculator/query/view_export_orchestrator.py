@@ -0,0 +1,240 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Exports BigQuery views to JSON files in Cloud Storage, concurrently and
+incrementally.
+
+Each (state, view) export materializes the view into a table and then extracts
+that table to Cloud Storage. Exports run concurrently, with a bounded number in
+flight, and each extract starts as soon as its own materialization finishes.
+
+A manifest stored alongside the exported files records a fingerprint of the
+inputs of every successful export: a hash of the queries of the view and all
+views it is built on, and the last modified time of every table those queries
+read from. An export is skipped if its fingerprint matches the manifest.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import re
+from concurrent import futures
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import attr
+from google.cloud import bigquery, exceptions, storage
+
+from recidiviz.calculator.query import bqview, bq_utils, view_deployer
+
+# The maximum number of (state, view) exports in flight at the same time
+DEFAULT_MAX_IN_FLIGHT_EXPORTS = 8
+
+MANIFEST_FILENAME = 'export_manifest.json'
+
+# Views whose results depend on the date they are queried can't be skipped
+# based on their inputs alone, so they are exported at most once per day.
+_DATE_DEPENDENT_QUERY_REGEX = re.compile(
+    r'\bCURRENT_(DATE|DATETIME|TIME|TIMESTAMP)\b', re.IGNORECASE)
+
+Fingerprint = Dict[str, object]
+
+_storage_client = None
+
+
+def storage_client() -> storage.Client:
+    global _storage_client
+    if not _storage_client:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+@attr.s(frozen=True)
+class ExportResult:
+    """The (state_code, view_id) pairs that were exported and skipped."""
+    exported: List[Tuple[str, str]] = attr.ib()
+    skipped: List[Tuple[str, str]] = attr.ib()
+
+
+def export_views_to_cloud_storage(
+        dataset_ref: bigquery.dataset.DatasetReference,
+        bucket: str,
+        views_to_export: Sequence[bqview.BigQueryView],
+        all_views: Sequence[bqview.BigQueryView],
+        state_codes: Sequence[str],
+        incremental: bool = True,
+        max_in_flight_exports: int = DEFAULT_MAX_IN_FLIGHT_EXPORTS
+) -> ExportResult:
+    """Materializes and exports each of |views_to_export| for each of
+    |state_codes| to |bucket|.
+
+    Args:
+        dataset_ref: The dataset containing the views.
+        bucket: The cloud storage bucket to export to.
+        views_to_export: The views to export.
+        all_views: All views in |dataset_ref|, used to find the tables each
+            exported view is built on.
+        state_codes: The states to export each view for.
+        incremental: If True, skips exports whose inputs have not changed
+            since they were last exported.
+        max_in_flight_exports: The maximum number of exports to run at once.
+    """
+    manifest = _load_manifest(bucket) if incremental else {}
+    fingerprints = _FingerprintBuilder(dataset_ref, all_views)
+
+    to_export: List[Tuple[str, bqview.BigQueryView, Fingerprint]] = []
+    skipped: List[Tuple[str, str]] = []
+    for view in views_to_export:
+        fingerprint = fingerprints.build(view)
+        for state_code in state_codes:
+            key = _manifest_key(state_code, view)
+            if incremental and _is_complete(fingerprint) \
+                    and manifest.get(key) == fingerprint:
+                skipped.append((state_code, view.view_id))
+            else:
+                to_export.append((state_code, view, fingerprint))
+
+    logging.info("Exporting [%s] views, skipping [%s] unchanged views.",
+                 len(to_export), len(skipped))
+
+    exported: List[Tuple[str, str]] = []
+    errors: List[Exception] = []
+    with futures.ThreadPoolExecutor(
+            max_workers=max_in_flight_exports) as executor:
+        export_futures = {
+            executor.submit(_export_view, dataset_ref, bucket, view,
+                            state_code): (state_code, view, fingerprint)
+            for state_code, view, fingerprint in to_export}
+        for future in futures.as_completed(export_futures):
+            state_code, view, fingerprint = export_futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logging.error("Failed to export view [%s] for [%s]: %s",
+                              view.view_id, state_code, e)
+                errors.append(e)
+                continue
+            exported.append((state_code, view.view_id))
+            manifest[_manifest_key(state_code, view)] = fingerprint
+
+    # Record successful exports even if some failed, so they are skipped when
+    # the export is retried.
+    _save_manifest(bucket, manifest)
+
+    if errors:
+        raise errors[0]
+
+    return ExportResult(exported=exported, skipped=skipped)
+
+
+def _export_view(dataset_ref: bigquery.dataset.DatasetReference,
+                 bucket: str,
+                 view: bqview.BigQueryView,
+                 state_code: str) -> None:
+    bq_utils.create_or_update_table_from_view(dataset_ref, view, state_code)
+    bq_utils.export_to_cloud_storage(dataset_ref, bucket, view, state_code)
+
+
+class _FingerprintBuilder:
+    """Builds the fingerprint of the inputs of a view, fetching the last
+    modified time of each input table at most once."""
+
+    def __init__(self, dataset_ref: bigquery.dataset.DatasetReference,
+                 all_views: Sequence[bqview.BigQueryView]):
+        self.dataset_ref = dataset_ref
+        self.views_by_id = {view.view_id: view for view in all_views}
+        self.last_modified: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def build(self, view: bqview.BigQueryView) -> Fingerprint:
+        upstream_views, input_tables = self._get_upstream(view)
+
+        queries_hash = hashlib.sha256()
+        for upstream_view in sorted(upstream_views,
+                                    key=lambda v: v.view_id):
+            queries_hash.update(upstream_view.view_query.encode('utf-8'))
+
+        fingerprint: Fingerprint = {
+            'queries_hash': queries_hash.hexdigest(),
+            'tables': {f'{dataset_id}.{table_id}':
+                       self._get_last_modified(dataset_id, table_id)
+                       for dataset_id, table_id in sorted(input_tables)},
+        }
+        if any(_DATE_DEPENDENT_QUERY_REGEX.search(v.view_query)
+               for v in upstream_views):
+            fingerprint['date'] = _today().isoformat()
+        return fingerprint
+
+    def _get_upstream(
+            self, view: bqview.BigQueryView
+    ) -> Tuple[List[bqview.BigQueryView], Set[Tuple[str, str]]]:
+        """Returns |view| and all views it is built on, and all tables that
+        are not views that those views read from."""
+        upstream_views: Dict[str, bqview.BigQueryView] = {}
+        input_tables: Set[Tuple[str, str]] = set()
+        unprocessed = [view]
+        while unprocessed:
+            current = unprocessed.pop()
+            if current.view_id in upstream_views:
+                continue
+            upstream_views[current.view_id] = current
+            for dataset_id, table_id in \
+                    view_deployer.get_referenced_tables(current):
+                if dataset_id == self.dataset_ref.dataset_id \
+                        and table_id in self.views_by_id:
+                    unprocessed.append(self.views_by_id[table_id])
+                else:
+                    input_tables.add((dataset_id, table_id))
+        return list(upstream_views.values()), input_tables
+
+    def _get_last_modified(self, dataset_id: str,
+                           table_id: str) -> Optional[str]:
+        key = (dataset_id, table_id)
+        if key not in self.last_modified:
+            dataset_ref = bigquery.dataset.DatasetReference(
+                self.dataset_ref.project, dataset_id)
+            modified = bq_utils.get_table_last_modified(dataset_ref, table_id)
+            self.last_modified[key] = \
+                modified.isoformat() if modified else None
+        return self.last_modified[key]
+
+
+def _today() -> datetime.date:
+    return datetime.date.today()
+
+
+def _is_complete(fingerprint: Fingerprint) -> bool:
+    """An input table that could not be found has no last modified time, so
+    a fingerprint that includes one can't show the inputs are unchanged."""
+    tables: Dict[str, Optional[str]] = fingerprint['tables']  # type: ignore
+    return all(modified is not None for modified in tables.values())
+
+
+def _manifest_key(state_code: str, view: bqview.BigQueryView) -> str:
+    return f'{state_code}/{view.view_id}'
+
+
+def _load_manifest(bucket: str) -> Dict[str, Fingerprint]:
+    blob = storage_client().bucket(bucket).blob(MANIFEST_FILENAME)
+    try:
+        return json.loads(blob.download_as_string())
+    except exceptions.NotFound:
+        logging.info("No export manifest found in bucket [%s]", bucket)
+        return {}
+
+
+def _save_manifest(bucket: str, manifest: Dict[str, Fingerprint]) -> None:
+    blob = storage_client().bucket(bucket).blob(MANIFEST_FILENAME)
+    blob.upload_from_string(json.dumps(manifest, sort_keys=True),
+                            content_type='application/json')
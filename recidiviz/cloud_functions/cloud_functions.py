@@ -41,7 +41,8 @@ from recidiviz.ingest.aggregate.regions.tx import tx_aggregate_ingest
 from recidiviz.persistence.database.schema.aggregate import dao
 from recidiviz.utils import metadata
 from recidiviz.utils.auth import authenticate_request
-from recidiviz.utils.params import get_str_param_value
+from recidiviz.utils.params import get_str_param_value, \
+    get_bool_param_value
 
 cloud_functions_blueprint = Blueprint('cloud_functions', __name__)
 
@@ -121,15 +122,20 @@ def dashboard_export():
 
     Endpoint path parameters:
         bucket: A string indicating the GCP cloud storage bucket to export to
+        incremental: Whether to skip views that have not changed since they
+            were last exported. Defaults to True.
     """
 
     # The cloud storage bucket to export to
     bucket = get_str_param_value('bucket', request.args)
+    incremental = get_bool_param_value('incremental', request.args,
+                                       default=True)
 
     logging.info("Attempting to export dashboard data to cloud storage"
                  " bucket: %s.", bucket)
 
-    dashboard_export_manager.export_dashboard_data_to_cloud_storage(bucket)
+    dashboard_export_manager.export_dashboard_data_to_cloud_storage(
+        bucket, incremental=incremental)
 
     return '', HTTPStatus.OK
 
@@ -16,7 +16,7 @@
 # ============================================================================
 """Logic for Attr objects that can be built with a Builder."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Set
 import datetime
 import attr
 
@@ -131,52 +131,102 @@ class BuildableAttr:
         if not build_dict:
             raise ValueError("build_dict cannot be empty")
 
-        cls_builder = cls.builder()
+        converters = _get_field_converters(cls)
 
-        for field, attribute in attr.fields_dict(cls).items():
+        for field, error in converters.non_flat_field_errors.items():
             if field in build_dict:
-                if is_list(attribute):
-                    raise ValueError("build_dict should be a dictionary of "
-                                     "flat values. Should not contain any "
-                                     f"lists: {build_dict}.")
-                if is_forward_ref(attribute):
-                    # TODO(1886): Implement detection of non-ForwardRefs
-                    # ForwardRef fields are expected to be references to other
-                    # BuildableAttrs
-                    raise ValueError("build_dict should be a dictionary of "
-                                     "flat values. Should not contain any "
-                                     f"ForwardRef fields: {build_dict}")
-
-                if is_enum(attribute):
-                    value = cls.extract_enum_value(build_dict, field, attribute)
-                elif is_date(attribute):
-                    value = cls.extract_date_value(build_dict, field)
-                else:
-                    value = build_dict.get(field)
-
-                setattr(cls_builder, field, value)
-
-        return cls_builder.build()
-
-    @classmethod
-    def extract_enum_value(cls, build_dict, field, attribute):
-        enum_cls = get_enum_cls(attribute)
-
-        value = build_dict.get(field)
+                raise ValueError(f"{error}: {build_dict}")
 
+        values = {}
+        for field, converter in converters.converters.items():
+            if field in build_dict:
+                value = build_dict[field]
+                values[field] = converter(value) if converter else value
+
+        fields_with_value = values.keys() | converters.fields_with_defaults
+        if len(fields_with_value) != len(converters.all_fields):
+            raise BuilderException(
+                cls, converters.all_fields, fields_with_value)
+
+        return cls(**values)
+
+
+@attr.s(frozen=True)
+class _FieldConverters:
+    """How to build a BuildableAttr class from a dictionary of flat values.
+    These are derived from the attr fields of the class once, instead of on
+    every call to build_from_dictionary."""
+
+    # The converter for the dictionary value of each flat field, or None if
+    # the value is used as is
+    converters: Dict[str, Optional[Callable[[Any], Any]]] = attr.ib()
+
+    # The error to raise for each field that can't be built from a flat value
+    non_flat_field_errors: Dict[str, str] = attr.ib()
+
+    all_fields: Set[str] = attr.ib()
+    fields_with_defaults: Set[str] = attr.ib()
+
+
+_FIELD_CONVERTERS: Dict[type, _FieldConverters] = {}
+
+
+def _get_field_converters(cls) -> _FieldConverters:
+    """Returns the _FieldConverters for |cls|, building them on the first call
+    for the class."""
+    converters = _FIELD_CONVERTERS.get(cls)
+    if converters is None:
+        converters = _build_field_converters(cls)
+        _FIELD_CONVERTERS[cls] = converters
+    return converters
+
+
+def _build_field_converters(cls) -> _FieldConverters:
+    converters: Dict[str, Optional[Callable[[Any], Any]]] = {}
+    non_flat_field_errors: Dict[str, str] = {}
+
+    for field, attribute in attr.fields_dict(cls).items():
+        if is_list(attribute):
+            non_flat_field_errors[field] = \
+                "build_dict should be a dictionary of flat values. Should " \
+                "not contain any lists"
+        elif is_forward_ref(attribute):
+            # TODO(1886): Implement detection of non-ForwardRefs
+            # ForwardRef fields are expected to be references to other
+            # BuildableAttrs
+            non_flat_field_errors[field] = \
+                "build_dict should be a dictionary of flat values. Should " \
+                "not contain any ForwardRef fields"
+        elif is_enum(attribute):
+            converters[field] = _enum_converter(get_enum_cls(attribute))
+        elif is_date(attribute):
+            converters[field] = _convert_date_value
+        else:
+            converters[field] = None
+
+    return _FieldConverters(
+        converters=converters,
+        non_flat_field_errors=non_flat_field_errors,
+        all_fields=set(attr.fields_dict(cls).keys()),
+        fields_with_defaults={
+            field for field, attribute in attr.fields_dict(cls).items()
+            if attribute.default is not attr.NOTHING})
+
+
+def _enum_converter(enum_cls) -> Callable[[Any], Any]:
+    def _convert_enum_value(value):
         return enum_cls(value) if value else None
+    return _convert_enum_value
 
-    @classmethod
-    def extract_date_value(cls, build_dict, field):
-        value = build_dict.get(field)
 
-        if value and isinstance(value, str):
-            if is_yyyymmdd_date(value):
-                value = parse_yyyymmdd_date(value)
-            else:
-                value = datetime.datetime.strptime(value, '%Y-%m-%d').date()
+def _convert_date_value(value):
+    if value and isinstance(value, str):
+        if is_yyyymmdd_date(value):
+            value = parse_yyyymmdd_date(value)
+        else:
+            value = datetime.datetime.strptime(value, '%Y-%m-%d').date()
 
-        return value
+    return value
 
 
 class BuilderException(Exception):
@@ -29,6 +29,7 @@ share the same county names.
 
 More info: https://en.wikipedia.org/wiki/FIPS_county_code
 """
+import functools
 
 import pandas as pd
 import us
@@ -62,14 +63,21 @@ def add_column_to_df(df: pd.DataFrame, county_names: pd.Series,
 
 def get_fips_for(state: us.states) -> pd.DataFrame:
     """Get the [county_name, fips] df, filtering for the given |state|."""
+    fips = _get_fips_for_state_code(int(state.fips))
+    if fips.empty:
+        raise FipsMergingError(
+            "Failed to find FIPS codes for state: {}".format(state))
+
+    # Copy the cached df to allow callers to mutate the result
+    return fips.copy()
 
+
+@functools.lru_cache(maxsize=None)
+def _get_fips_for_state_code(state_code: int) -> pd.DataFrame:
     # Copy _FIPS to allow mutating the view created after filtering by state
     fips = _FIPS.copy()
 
-    fips = fips[fips.state_code == int(state.fips)]
-    if fips.empty:
-        raise FipsMergingError(
-            "Failed to find FIPS codes for state: {}".format(state))
+    fips = fips[fips.state_code == state_code]
 
     fips['county_name'] = fips['county_name'].apply(_sanitize_county_name)
     fips = fips.set_index('county_name')
@@ -17,7 +17,9 @@
 """Contains logic for fuzzy matching FIPS."""
 
 import difflib
-from typing import Iterable
+import functools
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 
@@ -27,22 +29,114 @@ from recidiviz.common.errors import FipsMergingError
 def fuzzy_join(df1: pd.DataFrame, df2: pd.DataFrame,
                cutoff: float) -> pd.DataFrame:
     """Merges df1 to df2 by choosing the closest index (fuzzy) to join on."""
-    df1.index = df1.index.map(lambda x: best_match(x, df2.index, cutoff))
+    matcher = get_matcher(df2.index)
+    df1.index = df1.index.map(lambda x: matcher.best_match(x, cutoff))
     return df1.join(df2)
 
 
 def best_match(county_name: str, known_county_names: Iterable[str],
                cutoff: float) -> str:
     """Returns the closest match of |county_name| in |known_county_names|."""
-    close_matches = difflib.get_close_matches(county_name, known_county_names,
-                                              n=1, cutoff=cutoff)
+    return get_matcher(known_county_names).best_match(county_name, cutoff)
 
-    if not close_matches:
-        raise FipsMergingError(
-            "Failed to fuzzy match '{}' to known county_names in the state: "
-            "{}".format(county_name, known_county_names))
 
-    closest_match = close_matches[0]
+def get_matcher(known_county_names: Iterable[str]) -> 'FuzzyMatcher':
+    """Returns a FuzzyMatcher for |known_county_names|, which is only built the
+    first time it is requested for a given set of names in this process."""
+    return _get_matcher(tuple(known_county_names))
 
-    # Cast to a str since `difflib.get_close_matches` returns a Sequence[str]
-    return str(closest_match)
+
+@functools.lru_cache(maxsize=128)
+def _get_matcher(known_county_names: Tuple[str, ...]) -> 'FuzzyMatcher':
+    return FuzzyMatcher(known_county_names)
+
+
+class FuzzyMatcher:
+    """Finds the closest match of a county name among a fixed set of known
+    county names.
+
+    Returns exactly the match `difflib.get_close_matches(n=1)` would, but
+    avoids scoring every known name against every query. Exact matches are
+    found with a set lookup. Otherwise, an inverted character index gives the
+    number of characters each known name shares with the query, which is the
+    upper bound on the difflib ratio used by `SequenceMatcher.quick_ratio`.
+    Known names are scored in decreasing order of that bound, and the search
+    stops once no remaining name can beat the best match found. Results are
+    memoized per (county_name, cutoff).
+    """
+
+    def __init__(self, known_county_names: Tuple[str, ...]):
+        self.known_county_names = known_county_names
+        self._known_names_set = set(known_county_names)
+        self._names = sorted(self._known_names_set)
+        # Inverted index of character to (name index, occurrences in name)
+        self._char_postings: Dict[str, List[Tuple[int, int]]] = \
+            defaultdict(list)
+        for i, name in enumerate(self._names):
+            for char, count in Counter(name).items():
+                self._char_postings[char].append((i, count))
+        self._best_matches: Dict[Tuple[str, float], Optional[str]] = {}
+
+    def best_match(self, county_name: str, cutoff: float) -> str:
+        """Returns the closest match of |county_name| in the known county names
+        with a similarity ratio of at least |cutoff|."""
+        key = (county_name, cutoff)
+        if key not in self._best_matches:
+            self._best_matches[key] = self._find_best_match(county_name,
+                                                            cutoff)
+        closest_match = self._best_matches[key]
+
+        if closest_match is None:
+            raise FipsMergingError(
+                "Failed to fuzzy match '{}' to known county_names in the "
+                "state: {}".format(county_name, self.known_county_names))
+
+        return closest_match
+
+    def _find_best_match(self, county_name: str,
+                         cutoff: float) -> Optional[str]:
+        """Returns the closest match of |county_name|, or None if no known
+        name has a ratio of at least |cutoff|."""
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError(f"cutoff must be in [0.0, 1.0]: [{cutoff}]")
+
+        if county_name in self._known_names_set:
+            return county_name
+
+        # The number of characters shared with each known name, counting
+        # multiplicity, bounds its ratio from above
+        shared_chars = [0] * len(self._names)
+        for char, count in Counter(county_name).items():
+            for i, name_count in self._char_postings.get(char, ()):
+                shared_chars[i] += min(count, name_count)
+
+        candidates = []
+        for name, matches in zip(self._names, shared_chars):
+            upper_bound = _ratio(matches, len(county_name) + len(name))
+            if upper_bound >= cutoff:
+                candidates.append((upper_bound, name))
+        candidates.sort(reverse=True)
+
+        # Mirror difflib.get_close_matches, which scores each possibility as
+        # seq1 against the query as seq2, and breaks ties on score by choosing
+        # the greatest string.
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(county_name)
+        best_score, best_name = -1.0, None
+        for upper_bound, name in candidates:
+            if upper_bound < best_score:
+                break
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            if score >= cutoff and (score, name) > (best_score, best_name or ''):
+                best_score, best_name = score, name
+
+        return best_name
+
+
+def _ratio(matches: int, length: int) -> float:
+    # Matches difflib._calculate_ratio so that bounds compare exactly with the
+    # scores returned by SequenceMatcher.ratio.
+    if length:
+        return 2.0 * matches / length
+    return 1.0
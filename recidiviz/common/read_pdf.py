@@ -17,11 +17,11 @@
 """Used to make calls from the default service to the read_pdf service in order
 to run tabula to parse PDFs. """
 import os
-import pickle
 
 import tabula
 
 from recidiviz.cloud_functions.cloud_function_utils import make_iap_request
+from recidiviz.read_pdf.serialization import deserialize_tabula_output
 from recidiviz.utils import environment
 from recidiviz.utils.metadata import project_id
 
@@ -46,4 +46,4 @@ def read_pdf(
                                         'filename': os.path.basename(filename)},
                                 json=kwargs)
     response.raise_for_status()
-    return pickle.loads(response.content)
+    return deserialize_tabula_output(response.content)
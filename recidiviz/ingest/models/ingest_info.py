@@ -17,7 +17,7 @@
 
 """Represents data scraped for a single individual."""
 from abc import abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from recidiviz.common.str_field_utils import to_snake_case
 
@@ -43,6 +43,9 @@ PLURALS = {'person': 'people', 'booking': 'bookings', 'charge': 'charges',
            'state_supervision_violation_response': 'state_supervision_violation_responses'
            }
 
+# Canonical keys of IngestObjects, by id
+KeyCache = Dict[int, str]
+
 
 class IngestObject:
     """Abstract base class for all the objects contained by IngestInfo"""
@@ -57,11 +60,29 @@ class IngestObject:
         return to_bool(self)
 
     def __str__(self):
-        return to_string(self)
+        return self._to_string()
 
     def __repr__(self):
         return to_repr(self)
 
+    def _to_string(self, key_cache: Optional[KeyCache] = None) -> str:
+        return to_string(self, key_cache=key_cache)
+
+    def canonical_key(self, key_cache: Optional[KeyCache] = None) -> str:
+        """Returns the key that IngestObjects are ordered by, which is
+        str(self).
+
+        The keys of this object and its descendants are stored in and reused
+        from |key_cache|, so each object in a tree is only rendered once. The
+        cached keys are only valid while the tree isn't modified.
+        """
+        if key_cache is None:
+            return self._to_string()
+        obj_id = id(self)
+        if obj_id not in key_cache:
+            key_cache[obj_id] = self._to_string(key_cache)
+        return key_cache[obj_id]
+
     @abstractmethod
     def __setattr__(self, key, value):
         """Implement using restricted_setattr"""
@@ -83,8 +104,9 @@ class IngestInfo(IngestObject):
     def __bool__(self):
         return to_bool(self, exclude=['_state_people_by_id'])
 
-    def __str__(self):
-        return to_string(self, exclude=['_state_people_by_id'])
+    def _to_string(self, key_cache: Optional[KeyCache] = None) -> str:
+        return to_string(self, exclude=['_state_people_by_id'],
+                         key_cache=key_cache)
 
     def __repr__(self):
         return to_repr(self, exclude=['_state_people_by_id'])
@@ -119,18 +141,20 @@ class IngestInfo(IngestObject):
         return next((sp for sp in self.state_people if sp.state_person_id == state_person_id), None)
 
     def prune(self) -> 'IngestInfo':
-        self.people = [person.prune() for person in self.people if person]
-        self.state_people = [person.prune() for person in self.state_people if person]
+        self.people = _prune_all(self.people)
+        self.state_people = _prune_all(self.state_people)
         return self
 
-    def sort(self):
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
         for person in self.people:
-            person.sort()
-        self.people.sort()
+            person.sort(key_cache)
+        _sort_all(self.people, key_cache)
 
         for person in self.state_people:
-            person.sort()
-        self.state_people.sort()
+            person.sort(key_cache)
+        _sort_all(self.state_people, key_cache)
 
     def get_all_people(self, predicate=lambda _: True) -> List['Person']:
         return [person for person in self.people if predicate(person)]
@@ -201,13 +225,15 @@ class Person(IngestObject):
                     None)
 
     def prune(self) -> 'Person':
-        self.bookings = [booking.prune() for booking in self.bookings if booking]
+        self.bookings = _prune_all(self.bookings)
         return self
 
-    def sort(self):
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
         for booking in self.bookings:
-            booking.sort()
-        self.bookings.sort()
+            booking.sort(key_cache)
+        _sort_all(self.bookings, key_cache)
 
 
 class Booking(IngestObject):
@@ -274,15 +300,15 @@ class Booking(IngestObject):
         return self.arrest if self.arrest and self.arrest.arrest_id == arrest_id else None
 
     def prune(self) -> 'Booking':
-        self.charges = [charge.prune() for charge in self.charges if charge]
+        self.charges = _prune_all(self.charges)
         self.holds = [hold for hold in self.holds if hold]
         if not self.arrest:
             self.arrest = None
         return self
 
-    def sort(self):
-        self.charges.sort()
-        self.holds.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.charges, key_cache)
+        _sort_all(self.holds, key_cache)
 
 
 class Arrest(IngestObject):
@@ -547,22 +573,24 @@ class StatePerson(IngestObject):
         return next((sg for sg in self.state_sentence_groups if sg.state_sentence_group_id == sentence_group_id), None)
 
     def prune(self) -> 'StatePerson':
-        self.state_sentence_groups = [sg.prune() for sg in self.state_sentence_groups if sg]
+        self.state_sentence_groups = _prune_all(self.state_sentence_groups)
         if not self.supervising_officer:
             self.supervising_officer = None
         return self
 
-    def sort(self):
-        self.state_person_races.sort()
-        self.state_person_ethnicities.sort()
-        self.state_aliases.sort()
-        self.state_person_external_ids.sort()
-        self.state_assessments.sort()
-        self.state_program_assignments.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
+        _sort_all(self.state_person_races, key_cache)
+        _sort_all(self.state_person_ethnicities, key_cache)
+        _sort_all(self.state_aliases, key_cache)
+        _sort_all(self.state_person_external_ids, key_cache)
+        _sort_all(self.state_assessments, key_cache)
+        _sort_all(self.state_program_assignments, key_cache)
 
         for sentence_group in self.state_sentence_groups:
-            sentence_group.sort()
-        self.state_sentence_groups.sort()
+            sentence_group.sort(key_cache)
+        _sort_all(self.state_sentence_groups, key_cache)
 
 
 class StatePersonExternalId(IngestObject):
@@ -700,24 +728,26 @@ class StateSentenceGroup(IngestObject):
                     None)
 
     def prune(self) -> 'StateSentenceGroup':
-        self.state_supervision_sentences = [ss.prune() for ss in self.state_supervision_sentences if ss]
+        self.state_supervision_sentences = _prune_all(self.state_supervision_sentences)
 
-        self.state_incarceration_sentences = [ins.prune() for ins in self.state_incarceration_sentences if ins]
+        self.state_incarceration_sentences = _prune_all(self.state_incarceration_sentences)
 
-        self.state_fines = [fine.prune() for fine in self.state_fines if fine]
+        self.state_fines = _prune_all(self.state_fines)
 
         return self
 
-    def sort(self):
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
         for supervision_sentence in self.state_supervision_sentences:
-            supervision_sentence.sort()
-        self.state_supervision_sentences.sort()
+            supervision_sentence.sort(key_cache)
+        _sort_all(self.state_supervision_sentences, key_cache)
 
         for incarceration_sentence in self.state_incarceration_sentences:
-            incarceration_sentence.sort()
-        self.state_incarceration_sentences.sort()
+            incarceration_sentence.sort(key_cache)
+        _sort_all(self.state_incarceration_sentences, key_cache)
 
-        self.state_fines.sort()
+        _sort_all(self.state_fines, key_cache)
 
 
 class StateSupervisionSentence(IngestObject):
@@ -776,24 +806,26 @@ class StateSupervisionSentence(IngestObject):
                     None)
 
     def prune(self) -> 'StateSupervisionSentence':
-        self.state_charges = [sc.prune() for sc in self.state_charges if sc]
+        self.state_charges = _prune_all(self.state_charges)
 
-        self.state_incarceration_periods = [ip.prune() for ip in self.state_incarceration_periods if ip]
+        self.state_incarceration_periods = _prune_all(self.state_incarceration_periods)
 
-        self.state_supervision_periods = [sp.prune() for sp in self.state_supervision_periods if sp]
+        self.state_supervision_periods = _prune_all(self.state_supervision_periods)
 
         return self
 
-    def sort(self):
-        self.state_charges.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
+        _sort_all(self.state_charges, key_cache)
 
         for incarceration_period in self.state_incarceration_periods:
-            incarceration_period.sort()
-        self.state_incarceration_periods.sort()
+            incarceration_period.sort(key_cache)
+        _sort_all(self.state_incarceration_periods, key_cache)
 
         for supervision_period in self.state_supervision_periods:
-            supervision_period.sort()
-        self.state_supervision_periods.sort()
+            supervision_period.sort(key_cache)
+        _sort_all(self.state_supervision_periods, key_cache)
 
 
 class StateIncarcerationSentence(IngestObject):
@@ -861,24 +893,26 @@ class StateIncarcerationSentence(IngestObject):
                     None)
 
     def prune(self) -> 'StateIncarcerationSentence':
-        self.state_charges = [sc.prune() for sc in self.state_charges if sc]
+        self.state_charges = _prune_all(self.state_charges)
 
-        self.state_incarceration_periods = [ip.prune() for ip in self.state_incarceration_periods if ip]
+        self.state_incarceration_periods = _prune_all(self.state_incarceration_periods)
 
-        self.state_supervision_periods = [sp.prune() for sp in self.state_supervision_periods if sp]
+        self.state_supervision_periods = _prune_all(self.state_supervision_periods)
 
         return self
 
-    def sort(self):
-        self.state_charges.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        if key_cache is None:
+            key_cache = {}
+        _sort_all(self.state_charges, key_cache)
 
         for incarceration_period in self.state_incarceration_periods:
-            incarceration_period.sort()
-        self.state_incarceration_periods.sort()
+            incarceration_period.sort(key_cache)
+        _sort_all(self.state_incarceration_periods, key_cache)
 
         for supervision_period in self.state_supervision_periods:
-            supervision_period.sort()
-        self.state_supervision_periods.sort()
+            supervision_period.sort(key_cache)
+        _sort_all(self.state_supervision_periods, key_cache)
 
 
 class StateFine(IngestObject):
@@ -904,11 +938,11 @@ class StateFine(IngestObject):
         return charge
 
     def prune(self) -> 'StateFine':
-        self.state_charges = [sc.prune() for sc in self.state_charges if sc]
+        self.state_charges = _prune_all(self.state_charges)
         return self
 
-    def sort(self):
-        self.state_charges.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.state_charges, key_cache)
 
 
 class StateCharge(IngestObject):
@@ -1089,15 +1123,15 @@ class StateIncarcerationPeriod(IngestObject):
         self.state_incarceration_incidents = [ii for ii in self.state_incarceration_incidents if ii]
         self.state_parole_decisions = [pd for pd in self.state_parole_decisions if pd]
         self.state_assessments = [a for a in self.state_assessments if a]
-        self.state_program_assignments = [p.prune() for p in self.state_program_assignments if p]
+        self.state_program_assignments = _prune_all(self.state_program_assignments)
 
         return self
 
-    def sort(self):
-        self.state_incarceration_incidents.sort()
-        self.state_parole_decisions.sort()
-        self.state_assessments.sort()
-        self.state_program_assignments.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.state_incarceration_incidents, key_cache)
+        _sort_all(self.state_parole_decisions, key_cache)
+        _sort_all(self.state_assessments, key_cache)
+        _sort_all(self.state_program_assignments, key_cache)
 
 
 class StateSupervisionPeriod(IngestObject):
@@ -1176,16 +1210,16 @@ class StateSupervisionPeriod(IngestObject):
 
         self.state_supervision_violation_entries = [sv for sv in self.state_supervision_violation_entries if sv]
         self.state_assessments = [a for a in self.state_assessments if a]
-        self.state_program_assignments = [p.prune() for p in self.state_program_assignments if p]
+        self.state_program_assignments = _prune_all(self.state_program_assignments)
         self.state_supervision_case_type_entries = [c for c in self.state_supervision_case_type_entries if c]
 
         return self
 
-    def sort(self):
-        self.state_supervision_violation_entries.sort()
-        self.state_assessments.sort()
-        self.state_program_assignments.sort()
-        self.state_supervision_case_type_entries.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.state_supervision_violation_entries, key_cache)
+        _sort_all(self.state_assessments, key_cache)
+        _sort_all(self.state_program_assignments, key_cache)
+        _sort_all(self.state_supervision_case_type_entries, key_cache)
 
 
 class StateSupervisionCaseTypeEntry(IngestObject):
@@ -1241,8 +1275,8 @@ class StateIncarcerationIncident(IngestObject):
         self.state_incarceration_incident_outcomes = [iio for iio in self.state_incarceration_incident_outcomes if iio]
         return self
 
-    def sort(self):
-        self.state_incarceration_incident_outcomes.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.state_incarceration_incident_outcomes, key_cache)
 
 
 class StateIncarcerationIncidentOutcome(IngestObject):
@@ -1290,8 +1324,8 @@ class StateParoleDecision(IngestObject):
         self.decision_agents = [da for da in self.decision_agents if da]
         return self
 
-    def sort(self):
-        self.decision_agents.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.decision_agents, key_cache)
 
 
 class StateSupervisionViolationTypeEntry(IngestObject):
@@ -1384,8 +1418,8 @@ class StateSupervisionViolation(IngestObject):
 
         return self
 
-    def sort(self):
-        self.state_supervision_violation_responses.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.state_supervision_violation_responses, key_cache)
 
 
 class StateSupervisionViolationResponseDecisionEntry(IngestObject):
@@ -1452,8 +1486,8 @@ class StateSupervisionViolationResponse(IngestObject):
         self.decision_agents = [da for da in self.decision_agents if da]
         return self
 
-    def sort(self):
-        self.decision_agents.sort()
+    def sort(self, key_cache: Optional[KeyCache] = None):
+        _sort_all(self.decision_agents, key_cache)
 
 
 class StateAgent(IngestObject):
@@ -1532,7 +1566,9 @@ def to_bool(obj, exclude=None):
     return any(any(v) if isinstance(v, list) else v for k, v in obj.__dict__.items() if k not in exclude)
 
 
-def to_string(obj, exclude=None):
+def to_string(obj, exclude=None, key_cache: Optional[KeyCache] = None):
+    """Renders |obj| and its descendants. If |key_cache| is given, descendants
+    are rendered through IngestObject.canonical_key."""
     if exclude is None:
         exclude = []
     out = [obj.__class__.__name__ + ':']
@@ -1541,12 +1577,39 @@ def to_string(obj, exclude=None):
             continue
         if isinstance(val, list):
             for index, elem in enumerate(val):
-                out += '{}[{}]: {}'.format(key, index, elem).split('\n')
+                out += '{}[{}]: {}'.format(
+                    key, index, _render(elem, key_cache)).split('\n')
         elif val is not None:
-            out += '{}: {}'.format(key, val).split('\n')
+            out += '{}: {}'.format(key, _render(val, key_cache)).split('\n')
     return '\n   '.join(out)
 
 
+def _render(val, key_cache: Optional[KeyCache]):
+    if key_cache is not None and isinstance(val, IngestObject):
+        return val.canonical_key(key_cache)
+    return val
+
+
+def _sort_all(objs: List[IngestObject],
+              key_cache: Optional[KeyCache] = None) -> None:
+    """Sorts |objs| in the same order as objs.sort(), computing the key of
+    each object once rather than rendering it at every comparison."""
+    if key_cache is None:
+        key_cache = {}
+    objs.sort(key=lambda obj: obj.canonical_key(key_cache))
+
+
+def _prune_all(objs: List[IngestObject]) -> List[IngestObject]:
+    """Prunes each of |objs| and drops the ones that are empty.
+
+    Pruning only drops empty descendants, so it doesn't change whether an
+    object is empty. Checking after pruning lets the check stop at the first
+    non-empty field, rather than walk every empty descendant first.
+    """
+    pruned = [obj.prune() for obj in objs]
+    return [obj for obj in pruned if obj]
+
+
 def to_repr(obj, exclude=None):
     if exclude is None:
         exclude = []
@@ -52,9 +52,6 @@ fully drain its push queue of work before returning to the docket, or may lease
 another docket item on its own time.
 
 Attributes:
-    BACKGROUND_BATCH_SIZE: (int) the number of rows to load from a name list
-        file into memory at a time, for individual enqueue into the docket,
-        for background scrapes specifically
     SNAPSHOT_BATCH_SIZE: (int) the number of snapshots or records to query from
         the database into memory at a time, for individual enqueue into the
         docket, for snapshot scrapes specifically
@@ -66,6 +63,7 @@ Attributes:
 import csv
 import json
 import logging
+import time
 from typing import Tuple, Optional
 
 from google.cloud import pubsub
@@ -121,8 +119,9 @@ def load_background_target_list(scrape_key: ScrapeKey, name_file: str,
     """Load background scrape docket items, from name file.
 
     Iterates over a CSV of common names, loading a docket item for the scraper
-    to search for each one. We load batches of lines into memory at a time,
-    until the entire file has been processed.
+    to search for each one. The file is streamed one line at a time, and items
+    are published through the batch publisher with a bounded number of items in
+    flight, so memory use doesn't grow with the size of the file.
 
     If a name was provided in the initial request, will attempt to only load
     names from the index of that name in the file onward, allowing for
@@ -139,7 +138,6 @@ def load_background_target_list(scrape_key: ScrapeKey, name_file: str,
     Returns:
         N/A
     """
-    futures = []
     # If a query is provided then the names aren't relevant until we find the
     # query name, so `should_write_names` starts as False. If no query is
     # provided then all names should be written.
@@ -148,6 +146,10 @@ def load_background_target_list(scrape_key: ScrapeKey, name_file: str,
     pubsub_helper.create_topic_and_subscription(
         scrape_key, pubsub_type=PUBSUB_TYPE)
 
+    start = time.perf_counter()
+    publisher = pubsub_helper.BoundedPublisher(
+        pubsub_helper.get_topic_path(scrape_key, pubsub_type=PUBSUB_TYPE))
+
     with open(name_file, 'r') as csvfile:
         names_reader = csv.reader(csvfile)
 
@@ -162,18 +164,21 @@ def load_background_target_list(scrape_key: ScrapeKey, name_file: str,
                 should_write_names = name == query_name
 
             if should_write_names:
-                futures.append(_add_to_query_docket(scrape_key, name))
+                publisher.publish(_serialize_docket_item(name))
 
     # The query string was not found, add it as a separate docket item.
     if not should_write_names:
         logging.info("Couldn't find user-provided name [%s] in name list, "
                      "adding one-off docket item for the name instead.",
                      str(query_name))
-        futures.append(_add_to_query_docket(scrape_key, query_name))
+        publisher.publish(_serialize_docket_item(query_name))
 
-    for future in futures:
-        future.result()
-    logging.info("Finished loading background target list to docket.")
+    num_published = publisher.wait()
+    seconds = time.perf_counter() - start
+    logging.info("Finished loading background target list to docket: loaded "
+                 "[%s] items ([%s] bytes) in [%.1f] seconds ([%.0f] items/s).",
+                 num_published, publisher.num_bytes, seconds,
+                 num_published / seconds if seconds else 0)
 
 
 def load_empty_message(scrape_key: ScrapeKey):
@@ -220,7 +225,11 @@ def _add_to_query_docket(scrape_key: ScrapeKey, item):
                   scrape_key, item)
     return pubsub_helper.get_publisher().publish(
         pubsub_helper.get_topic_path(scrape_key, pubsub_type=PUBSUB_TYPE),
-        data=json.dumps(item).encode())
+        data=_serialize_docket_item(item))
+
+
+def _serialize_docket_item(item) -> bytes:
+    return json.dumps(item).encode()
 
 
 # ########################## #
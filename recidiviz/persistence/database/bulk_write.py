@@ -0,0 +1,247 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Contains logic for writing county record trees to Postgres with multi-row
+upserts, rather than merging each record tree into the Session one at a time.
+
+The record trees are flattened into per-table batches of rows. Primary keys for
+new rows are allocated up front from each table's sequence, so that all foreign
+keys can be filled in before anything is written. Rows are then written in
+table dependency order with `INSERT ... ON CONFLICT DO UPDATE` statements in the
+transaction of the provided Session.
+
+Only columns that have been set on a schema object are written. This matches
+the behavior of Session.merge, which leaves any column that was never set on the
+merged object untouched in the database.
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, List, Tuple, Any, Iterable
+
+from sqlalchemy import Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.interfaces import MANYTOONE, ONETOMANY
+
+from recidiviz.persistence.database.base_schema import JailsBase
+from recidiviz.persistence.database.database_entity import DatabaseEntity
+from recidiviz.persistence.database.schema.county import schema as county_schema
+
+# Maximum number of rows written in a single multi-row INSERT statement
+_UPSERT_BATCH_SIZE = 1000
+
+_POSTGRES_DIALECT_NAME = 'postgresql'
+
+_ALLOCATE_PRIMARY_KEYS_QUERY = text(
+    'SELECT nextval(pg_get_serial_sequence(:table_name, :column_name)) '
+    'FROM generate_series(1, :count)')
+
+_Row = Dict[str, Any]
+
+
+def supports_bulk_upsert(session: Session) -> bool:
+    """Returns True if the database the |session| is bound to supports the
+    statements used by upsert_county_record_trees.
+    """
+    return session.get_bind().dialect.name == _POSTGRES_DIALECT_NAME
+
+
+def upsert_county_record_trees(
+        session: Session,
+        root_people: List[county_schema.Person],
+        orphaned_entities: List[DatabaseEntity]) -> None:
+    """Writes all entities in all record trees rooted at |root_people|, as well
+    as all |orphaned_entities| and their descendants, using one multi-row upsert
+    per table and column set.
+
+    After this returns, every entity in the provided record trees has its
+    primary key and all foreign keys set to the values that were written.
+    """
+    objects_by_table = _collect_objects_by_table(
+        list(root_people) + list(orphaned_entities))
+
+    logging.info("Starting bulk upsert of [%s] entities across [%s] tables.",
+                 sum(len(objs) for objs in objects_by_table.values()),
+                 len(objects_by_table))
+
+    for table_name, schema_objects in objects_by_table.items():
+        _assign_primary_keys(session, table_name, schema_objects)
+
+    for schema_objects in objects_by_table.values():
+        for schema_object in schema_objects:
+            _propagate_foreign_keys(schema_object)
+    _set_bond_and_sentence_booking_ids(
+        objects_by_table.get(county_schema.Booking.__tablename__, []))
+
+    for table in JailsBase.metadata.sorted_tables:
+        if table.name not in objects_by_table:
+            continue
+        for statement in _upsert_statements(table,
+                                            objects_by_table[table.name]):
+            session.execute(statement)
+
+    logging.info("Bulk upsert complete.")
+
+
+def _collect_objects_by_table(
+        start_schema_objects: List[DatabaseEntity]
+) -> Dict[str, List[DatabaseEntity]]:
+    """Returns every schema object reachable from |start_schema_objects|,
+    grouped by table name. Each object is returned exactly once.
+    """
+    objects_by_table: Dict[str, List[DatabaseEntity]] = defaultdict(list)
+    seen_ids = set()
+    unprocessed = list(start_schema_objects)
+    while unprocessed:
+        schema_object = unprocessed.pop()
+        if id(schema_object) in seen_ids:
+            continue
+        seen_ids.add(id(schema_object))
+        objects_by_table[schema_object.__table__.name].append(schema_object)
+        unprocessed.extend(_get_related_objects(schema_object))
+    return objects_by_table
+
+
+def _get_related_objects(
+        schema_object: DatabaseEntity) -> List[DatabaseEntity]:
+    related_objects: List[DatabaseEntity] = []
+    for relationship in inspect(type(schema_object)).relationships:
+        related = schema_object.__dict__.get(relationship.key)
+        if isinstance(related, list):
+            related_objects.extend(related)
+        elif related is not None:
+            related_objects.append(related)
+    return related_objects
+
+
+def _assign_primary_keys(session: Session,
+                         table_name: str,
+                         schema_objects: List[DatabaseEntity]) -> None:
+    """Allocates primary keys from the sequence of |table_name| for every
+    object in |schema_objects| that does not yet have one.
+    """
+    new_objects = [schema_object for schema_object in schema_objects
+                   if schema_object.get_primary_key() is None]
+    if not new_objects:
+        return
+
+    schema_cls = type(new_objects[0])
+    primary_keys = session.execute(
+        _ALLOCATE_PRIMARY_KEYS_QUERY,
+        {'table_name': table_name,
+         'column_name': schema_cls.get_primary_key_column_name(),
+         'count': len(new_objects)}).fetchall()
+
+    if len(primary_keys) != len(new_objects):
+        raise ValueError(
+            f"Expected [{len(new_objects)}] primary keys to be allocated for "
+            f"table [{table_name}], found [{len(primary_keys)}]")
+
+    # pylint: disable=protected-access
+    primary_key_property_name = schema_cls._get_primary_key_property_name()
+    for schema_object, (primary_key,) in zip(new_objects, primary_keys):
+        setattr(schema_object, primary_key_property_name, primary_key)
+
+
+def _propagate_foreign_keys(schema_object: DatabaseEntity) -> None:
+    """Sets all foreign key columns that correspond to relationships on
+    |schema_object|, in either direction, from the primary keys of the related
+    objects.
+    """
+    mapper = inspect(type(schema_object))
+    for relationship in mapper.relationships:
+        related = schema_object.__dict__.get(relationship.key)
+        if related is None:
+            continue
+
+        if relationship.direction == MANYTOONE:
+            for local_col, remote_col in relationship.local_remote_pairs:
+                _copy_column_value(src=related, src_col=remote_col,
+                                   dst=schema_object, dst_col=local_col)
+        elif relationship.direction == ONETOMANY:
+            children = related if isinstance(related, list) else [related]
+            for child in children:
+                for local_col, remote_col in relationship.local_remote_pairs:
+                    _copy_column_value(src=schema_object, src_col=local_col,
+                                       dst=child, dst_col=remote_col)
+
+
+def _copy_column_value(src: DatabaseEntity, src_col,
+                       dst: DatabaseEntity, dst_col) -> None:
+    src_property = inspect(type(src)).get_property_by_column(src_col)
+    dst_property = inspect(type(dst)).get_property_by_column(dst_col)
+    setattr(dst, dst_property.key, getattr(src, src_property.key))
+
+
+def _set_bond_and_sentence_booking_ids(
+        bookings: List[county_schema.Booking]) -> None:
+    """Bonds and sentences reference their booking through a foreign key which
+    has no corresponding relationship, so it must be set manually on any new
+    bonds and sentences.
+    """
+    for booking in bookings:
+        for charge in booking.charges:
+            if charge.bond is not None and charge.bond.booking_id is None:
+                charge.bond.booking_id = booking.booking_id
+            if charge.sentence is not None and \
+                    charge.sentence.booking_id is None:
+                charge.sentence.booking_id = booking.booking_id
+
+
+def _upsert_statements(table: Table,
+                       schema_objects: List[DatabaseEntity]) -> Iterable:
+    """Yields multi-row upsert statements which write all |schema_objects| to
+    |table|.
+
+    A multi-row INSERT requires every row to have the same columns, so rows are
+    batched by the set of columns which have been set on each object.
+    """
+    rows_by_columns: Dict[Tuple[str, ...], List[_Row]] = defaultdict(list)
+    for schema_object in schema_objects:
+        row = _to_row(schema_object)
+        rows_by_columns[tuple(sorted(row.keys()))].append(row)
+
+    primary_key_column_name = type(
+        schema_objects[0]).get_primary_key_column_name()
+
+    for columns, rows in rows_by_columns.items():
+        for i in range(0, len(rows), _UPSERT_BATCH_SIZE):
+            insert = postgresql.insert(table).values(
+                rows[i:i + _UPSERT_BATCH_SIZE])
+            update_columns = {column: insert.excluded[column]
+                              for column in columns
+                              if column != primary_key_column_name}
+            if update_columns:
+                yield insert.on_conflict_do_update(
+                    index_elements=[primary_key_column_name],
+                    set_=update_columns)
+            else:
+                yield insert.on_conflict_do_nothing(
+                    index_elements=[primary_key_column_name])
+
+
+def _to_row(schema_object: DatabaseEntity) -> _Row:
+    """Returns a dictionary of column key to value for every column that has
+    been set on |schema_object|.
+    """
+    row: _Row = {}
+    for column_property in inspect(type(schema_object)).column_attrs:
+        if column_property.key not in schema_object.__dict__:
+            continue
+        column = column_property.columns[0]
+        row[column.key] = schema_object.__dict__[column_property.key]
+    return row
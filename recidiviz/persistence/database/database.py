@@ -16,7 +16,7 @@
 # =============================================================================
 """Contains logic for communicating with a SQL Database."""
 import logging
-from typing import List
+from typing import List, Tuple
 from more_itertools import one
 
 from sqlalchemy.orm import Session
@@ -24,6 +24,7 @@ from sqlalchemy.orm import Session
 import recidiviz.persistence.database.history.historical_snapshot_update as \
     update_snapshots
 from recidiviz.common.ingest_metadata import IngestMetadata, SystemLevel
+from recidiviz.persistence.database import bulk_write
 from recidiviz.persistence.database.database_entity import DatabaseEntity
 from recidiviz.persistence.database.schema.schema_person_type import \
     SchemaPersonType
@@ -82,42 +83,16 @@ def _save_record_trees(session: Session,
     #  a session merge/flush for the county code.
     if metadata.system_level == SystemLevel.COUNTY:
         check_all_objs_have_type(root_people, county_schema.Person)
-        _set_dummy_booking_ids(root_people)
-
-        # Merge is recursive for all related entities, so this persists all
-        # master entities in all record trees
-        #
-        # Merge and flush is required to ensure all master entities, including
-        # newly created ones, have primary keys set before performing historical
-        # snapshot operations
-
-        logging.info("Starting Session merge of [%s] persons.",
-                     str(len(root_people)))
-
-        merged_root_people = []
-        for root_person in root_people:
-            merged_root_people.append(session.merge(root_person))
-            if len(merged_root_people) % 200 == 0:
-                logging.info("Merged [%s] of [%s] people.",
-                             str(len(merged_root_people)),
-                             str(len(root_people)))
-
-        logging.info("Starting Session merge of [%s] orphaned entities.",
-                     str(len(orphaned_entities)))
-        merged_orphaned_entities = []
-        for entity in orphaned_entities:
-            merged_orphaned_entities.append(session.merge(entity))
-            if len(merged_orphaned_entities) % 200 == 0:
-                logging.info("Merged [%s] of [%s] entities.",
-                             str(len(merged_orphaned_entities)),
-                             str(len(orphaned_entities)))
-
-        logging.info("Session flush start.")
-        session.flush()
-        logging.info("Session flush complete.")
 
-        check_all_objs_have_type(merged_root_people, county_schema.Person)
-        _overwrite_dummy_booking_ids(merged_root_people)
+        if bulk_write.supports_bulk_upsert(session):
+            bulk_write.upsert_county_record_trees(
+                session, root_people, orphaned_entities)
+            merged_root_people = root_people
+            merged_orphaned_entities = orphaned_entities
+        else:
+            merged_root_people, merged_orphaned_entities = \
+                _merge_county_record_trees(
+                    session, root_people, orphaned_entities)
 
     elif metadata.system_level == SystemLevel.STATE:
         merged_root_people = root_people
@@ -134,6 +109,56 @@ def _save_record_trees(session: Session,
     return merged_root_people
 
 
+def _merge_county_record_trees(
+        session: Session,
+        root_people: List[county_schema.Person],
+        orphaned_entities: List[DatabaseEntity]
+) -> Tuple[List[county_schema.Person], List[DatabaseEntity]]:
+    """Merges all county record trees rooted at |root_people| and all
+    |orphaned_entities| into the |session| one at a time, and flushes the
+    session so that all new entities have primary keys set. Returns the merged
+    people and orphaned entities.
+    """
+    _set_dummy_booking_ids(root_people)
+
+    # Merge is recursive for all related entities, so this persists all
+    # master entities in all record trees
+    #
+    # Merge and flush is required to ensure all master entities, including
+    # newly created ones, have primary keys set before performing historical
+    # snapshot operations
+
+    logging.info("Starting Session merge of [%s] persons.",
+                 str(len(root_people)))
+
+    merged_root_people = []
+    for root_person in root_people:
+        merged_root_people.append(session.merge(root_person))
+        if len(merged_root_people) % 200 == 0:
+            logging.info("Merged [%s] of [%s] people.",
+                         str(len(merged_root_people)),
+                         str(len(root_people)))
+
+    logging.info("Starting Session merge of [%s] orphaned entities.",
+                 str(len(orphaned_entities)))
+    merged_orphaned_entities = []
+    for entity in orphaned_entities:
+        merged_orphaned_entities.append(session.merge(entity))
+        if len(merged_orphaned_entities) % 200 == 0:
+            logging.info("Merged [%s] of [%s] entities.",
+                         str(len(merged_orphaned_entities)),
+                         str(len(orphaned_entities)))
+
+    logging.info("Session flush start.")
+    session.flush()
+    logging.info("Session flush complete.")
+
+    check_all_objs_have_type(merged_root_people, county_schema.Person)
+    _overwrite_dummy_booking_ids(merged_root_people)
+
+    return merged_root_people, merged_orphaned_entities
+
+
 def _set_dummy_booking_ids(root_people: List[county_schema.Person]) -> None:
     """Horrible hack to allow flushing new bookings. If the booking is new, it
     won't have a primary key until it is flushed. However, that flush will fail
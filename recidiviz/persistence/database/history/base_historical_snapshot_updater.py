@@ -31,7 +31,10 @@ from typing import List, Generic, Type, Set, Callable, Optional, Dict
 
 import attr
 
-from sqlalchemy import text
+from sqlalchemy import Integer, any_, bindparam, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm.attributes import set_committed_value
 
 from recidiviz.persistence.database.session import Session
 from recidiviz.common.ingest_metadata import IngestMetadata, SystemLevel
@@ -44,6 +47,9 @@ from recidiviz.persistence.database.schema_utils import \
     HISTORICAL_TABLE_CLASS_SUFFIX
 from recidiviz.persistence.entity.entity_utils import SchemaEdgeDirectionChecker
 
+# Maximum number of snapshots inserted in a single multi-row INSERT statement
+_INSERT_BATCH_SIZE = 500
+
 
 class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
     """
@@ -153,10 +159,14 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
         logging.info(
             "Provided start and end times set for registered entities")
 
+        snapshot_writes = _SnapshotWriteBatch()
         for snapshot_context in context_registry.all_contexts():
-            self._write_snapshots(session, snapshot_context,
+            self._write_snapshots(snapshot_writes, snapshot_context,
                                   ingest_metadata.ingest_time, schema)
 
+        self._execute_snapshot_writes(
+            session, snapshot_writes, ingest_metadata.ingest_time)
+
         logging.info("All historical snapshots written")
 
     def _fetch_most_recent_snapshots_for_all_entities(
@@ -192,74 +202,49 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
         """Returns a list containing the most recent snapshot for each ID in
         |entity_ids| with type |master_class|
         """
-
-        # Get name of historical table in database (as distinct from name of ORM
-        # class representing historical table in code)
         history_table_class = _get_historical_class(master_class, schema)
-        history_table_name = history_table_class.__table__.name
-        history_table_primary_key_col_name = \
-            history_table_class.get_primary_key_column_name()
+        history_primary_key_col = getattr(
+            history_table_class,
+            history_table_class.get_property_name_by_column_name(
+                history_table_class.get_primary_key_column_name()))
         # See module assumption #2
-        master_table_primary_key_col_name = \
-            master_class.get_primary_key_column_name()
-        ids_list = ', '.join([str(id) for id in entity_ids])
-
-        # Get snapshot IDs in a separate query. The subquery logic here is ugly
-        # and easier to do as a raw string query than through the ORM query, but
-        # the return type of a raw string query is just a collection of values
-        # rather than an ORM model. Doing this step as a separate query enables
-        # passing just the IDs to the second request, which allows proper ORM
-        # models to be returned as a result.
-        snapshot_ids_query = f'''
-        SELECT
-          history.{history_table_primary_key_col_name},
-          history.{master_table_primary_key_col_name},
-          history.valid_to
-        FROM {history_table_name} history
-        JOIN (
-          SELECT 
-            {master_table_primary_key_col_name}, 
-            MAX(valid_from) AS valid_from
-          FROM {history_table_name}
-          WHERE {master_table_primary_key_col_name} IN ({ids_list})
-          GROUP BY {master_table_primary_key_col_name}
-        ) AS most_recent_valid_from
-        ON history.{master_table_primary_key_col_name} = 
-            most_recent_valid_from.{master_table_primary_key_col_name}
-        WHERE history.valid_from = most_recent_valid_from.valid_from;
-        '''
-
-        results = session.execute(text(snapshot_ids_query)).fetchall()
+        history_master_key_col = getattr(
+            history_table_class,
+            history_table_class.get_property_name_by_column_name(
+                master_class.get_primary_key_column_name()))
+
+        # Ranks the snapshots of each master entity by recency. Ties share a
+        # rank, so that all snapshots sharing the most recent valid_from are
+        # returned with rank 1.
+        ranked_snapshots = session.query(
+            history_primary_key_col.label('snapshot_id'),
+            history_table_class.valid_to.label('valid_to'),
+            func.rank().over(
+                partition_by=history_master_key_col,
+                order_by=history_table_class.valid_from.desc()
+            ).label('recency_rank')
+        ).filter(
+            _in_bound_ids(session, history_master_key_col, 'master_ids')
+        ).subquery()
 
         # Use only results where valid_to is None to exclude any overlapping
         # non-open snapshots
-        snapshot_ids = [snapshot_id for snapshot_id, master_id, valid_to
-                        in results if valid_to is None]
-
-        # Removing the below early return will pass in tests but fail in
-        # production, because SQLite allows "IN ()" but Postgres does not
-        if not snapshot_ids:
-            return []
-
-        filter_statement = \
-            '{historical_table}.{primary_key_column} IN ({ids_list})'.format(
-                historical_table=history_table_name,
-                primary_key_column=
-                history_table_class.get_primary_key_column_name(),
-                ids_list=', '.join([str(id) for id in snapshot_ids]))
-
         return session.query(history_table_class) \
-            .filter(text(filter_statement)) \
+            .join(ranked_snapshots,
+                  history_primary_key_col == ranked_snapshots.c.snapshot_id) \
+            .filter(ranked_snapshots.c.recency_rank == 1) \
+            .filter(ranked_snapshots.c.valid_to.is_(None)) \
+            .params(master_ids=list(entity_ids)) \
             .all()
 
     def _write_snapshots(self,
-                         session: Session,
+                         snapshot_writes: '_SnapshotWriteBatch',
                          context: '_SnapshotContext',
                          snapshot_time: datetime,
                          schema: ModuleType) -> None:
         """
-        Writes snapshots for any new entities and any entities that have
-        changes.
+        Adds snapshot writes to |snapshot_writes| for any new entities and any
+        entities that have changes.
 
         If an entity has no existing snapshots and has a provided start time
         earlier than |snapshot_time|, will backdate the snapshot to the provided
@@ -290,14 +275,14 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
 
         if context.most_recent_snapshot is None:
             self._write_snapshots_for_new_entities(
-                session, context, snapshot_time, schema)
+                snapshot_writes, context, snapshot_time, schema)
         else:
             self._write_snapshots_for_existing_entities(
-                session, context, snapshot_time, schema)
+                snapshot_writes, context, snapshot_time, schema)
 
     def _write_snapshots_for_new_entities(
             self,
-            session: Session,
+            snapshot_writes: '_SnapshotWriteBatch',
             context: '_SnapshotContext',
             snapshot_time: datetime,
             schema) -> None:
@@ -333,10 +318,10 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
         else:
             new_historical_snapshot.valid_from = snapshot_time
 
-        # Snapshot must be merged separately from record tree, as they are not
+        # Snapshot must be written separately from record tree, as they are not
         # included in the ORM model relationships (to avoid needing to load
         # the entire snapshot chain at once)
-        session.merge(new_historical_snapshot)
+        snapshot_writes.snapshots_to_insert.append(new_historical_snapshot)
 
         # If both start and end time were provided, an earlier snapshot needs to
         # be created, reflecting the state of the entity before its current
@@ -350,11 +335,12 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
 
             self.post_process_initial_snapshot(context, initial_snapshot)
 
-            session.merge(initial_snapshot)
+            snapshot_writes.snapshots_to_insert.append(initial_snapshot)
 
     def _write_snapshots_for_existing_entities(
             self,
-            session: Session, context: '_SnapshotContext',
+            snapshot_writes: '_SnapshotWriteBatch',
+            context: '_SnapshotContext',
             snapshot_time: datetime,
             schema: ModuleType) -> None:
         """Writes snapshot updates for entities that already have snapshots
@@ -367,10 +353,10 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
             context.schema_object, new_historical_snapshot)
         new_historical_snapshot.valid_from = snapshot_time
 
-        # Snapshot must be merged separately from record tree, as they are not
+        # Snapshot must be written separately from record tree, as they are not
         # included in the ORM model relationships (to avoid needing to load
         # the entire snapshot chain at once)
-        session.merge(new_historical_snapshot)
+        snapshot_writes.snapshots_to_insert.append(new_historical_snapshot)
 
         # Close last snapshot if one is present
         if context.most_recent_snapshot is not None:
@@ -381,8 +367,56 @@ class BaseHistoricalSnapshotUpdater(Generic[SchemaPersonType]):
                     f"must be a subclass of "
                     f"[{HistoryTableSharedColumns.__name__}]")
 
-            context.most_recent_snapshot.valid_to = snapshot_time
-            session.merge(context.most_recent_snapshot)
+            snapshot_writes.snapshots_to_close.append(
+                context.most_recent_snapshot)
+
+    @staticmethod
+    def _execute_snapshot_writes(session: Session,
+                                 snapshot_writes: '_SnapshotWriteBatch',
+                                 snapshot_time: datetime) -> None:
+        """Closes all snapshots in |snapshot_writes| with a period end time of
+        |snapshot_time| and inserts all new snapshots, issuing one UPDATE per
+        historical table and one multi-row INSERT per batch of new snapshots.
+        """
+        # New snapshots reference their master entities, so any pending master
+        # entities must be written first
+        session.flush()
+
+        snapshots_to_close_by_class: Dict[Type, List[DatabaseEntity]] = \
+            defaultdict(list)
+        for snapshot in snapshot_writes.snapshots_to_close:
+            snapshots_to_close_by_class[type(snapshot)].append(snapshot)
+
+        for historical_class, snapshots in snapshots_to_close_by_class.items():
+            table = historical_class.__table__
+            primary_key_col = \
+                table.c[historical_class.get_primary_key_column_name()]
+            session.execute(
+                table.update()
+                .where(_in_bound_ids(session, primary_key_col, 'snapshot_ids'))
+                .values(valid_to=snapshot_time),
+                {'snapshot_ids': [snapshot.get_primary_key()
+                                  for snapshot in snapshots]})
+            # The snapshots were loaded in this session, so they are updated
+            # in place without marking them as modified
+            for snapshot in snapshots:
+                set_committed_value(snapshot, 'valid_to', snapshot_time)
+
+        rows_by_table: Dict[str, List[Dict]] = defaultdict(list)
+        tables_by_name = {}
+        for snapshot in snapshot_writes.snapshots_to_insert:
+            table = type(snapshot).__table__
+            tables_by_name[table.name] = table
+            rows_by_table[table.name].append(_to_insert_row(snapshot))
+
+        for table_name, rows in rows_by_table.items():
+            for i in range(0, len(rows), _INSERT_BATCH_SIZE):
+                session.execute(tables_by_name[table_name].insert().values(
+                    rows[i:i + _INSERT_BATCH_SIZE]))
+
+        logging.info("Closed [%s] and inserted [%s] historical snapshots",
+                     len(snapshot_writes.snapshots_to_close),
+                     len(snapshot_writes.snapshots_to_insert))
 
     def _assert_all_root_entities_unique(
             self,
@@ -532,6 +566,38 @@ def _get_master_class(historical_class: Type[DatabaseEntity],
     return getattr(schema, master_class_name)
 
 
+def _in_bound_ids(session: Session, column, param_name: str):
+    """Returns a filter clause restricting |column| to the list of ids bound to
+    the parameter |param_name|. On Postgres, the ids are bound as a single
+    array parameter.
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        return column == any_(bindparam(param_name,
+                                        type_=postgresql.ARRAY(Integer)))
+    return column.in_(bindparam(param_name, expanding=True))
+
+
+def _to_insert_row(snapshot: DatabaseEntity) -> Dict:
+    """Returns a dictionary of column key to value for every column on
+    |snapshot| except its primary key, which is assigned by the database.
+    """
+    primary_key_column_name = snapshot.get_primary_key_column_name()
+    row = {}
+    for column_property in inspect(type(snapshot)).column_attrs:
+        column = column_property.columns[0]
+        if column.name == primary_key_column_name:
+            continue
+        row[column.key] = getattr(snapshot, column_property.key)
+    return row
+
+
+@attr.s
+class _SnapshotWriteBatch:
+    """Container for all snapshot writes for a single snapshot update"""
+    snapshots_to_insert: List[DatabaseEntity] = attr.ib(factory=list)
+    snapshots_to_close: List[DatabaseEntity] = attr.ib(factory=list)
+
+
 @attr.s
 class _SnapshotContext:
     """Container for all data required for snapshot operations for a single
@@ -18,9 +18,14 @@
 """Data Access Object (DAO) with logic for accessing aggregate information from
 a SQL Database."""
 
+import io
 import logging
+from typing import List, Tuple, Type
 
+import attr
 import pandas as pd
+from sqlalchemy import Integer, Table, UniqueConstraint
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
@@ -28,36 +33,206 @@ from recidiviz.persistence.database.sqlalchemy_engine_manager import \
     SQLAlchemyEngineManager
 from recidiviz.persistence.database.base_schema import JailsBase
 
+_POSTGRES_DIALECT_NAME = 'postgresql'
 
-def write_df(table: DeclarativeMeta, df: pd.DataFrame) -> None:
+
+@attr.s(frozen=True)
+class WriteDfResult:
+    """The number of rows from a DataFrame that were written to a table, and
+    the number that were skipped because they already existed or couldn't be
+    written."""
+    rows_inserted: int = attr.ib()
+    rows_skipped: int = attr.ib()
+    # The number of existing rows that were updated, with |update_existing|
+    rows_updated: int = attr.ib(default=0)
+
+
+def write_df(table: DeclarativeMeta,
+             df: pd.DataFrame,
+             update_existing: bool = False) -> WriteDfResult:
     """
     Writes the |df| to the |table|.
 
     The column headers on |df| must match the column names in |table|. All rows
     in |df| will be appended to |table|. If a row in |df| already exists in
-    |table|, then that row will be skipped.
+    |table|, then that row will be skipped, unless |update_existing| is set, in
+    which case the existing row is updated with the values in |df|. Whether a
+    row already exists is determined by the unique constraints on |table|.
+
+    Rows that can't be written, e.g. because they violate a constraint on
+    |table|, are skipped.
+
+    On Postgres, the whole |df| is loaded with a single COPY and merged into
+    |table| with a single INSERT ... ON CONFLICT statement. If any row can't be
+    written, the rows are merged one at a time instead.
     """
+    engine = SQLAlchemyEngineManager.get_engine_for_schema_base(JailsBase)
+
+    if engine.dialect.name == _POSTGRES_DIALECT_NAME:
+        result = _copy_df(engine, table.__table__, df, update_existing)
+    elif update_existing:
+        raise ValueError(
+            f"Updating existing rows is not supported for the "
+            f"[{engine.dialect.name}] dialect")
+    else:
+        result = _write_df_with_to_sql(engine, table, df)
+
+    logging.info("Wrote [%s] rows to [%s] table, updated [%s] rows, skipped "
+                 "[%s] rows.", result.rows_inserted, table.__tablename__,
+                 result.rows_updated, result.rows_skipped)
+    return result
+
+
+def _copy_df(engine: Engine,
+             table: Table,
+             df: pd.DataFrame,
+             update_existing: bool) -> WriteDfResult:
+    """Streams |df| into a temporary table with COPY and merges it into |table|
+    in a single statement, all within one transaction.
+
+    The temporary table has none of the constraints of |table|, so if a row
+    violates one, the merge is rolled back and the rows are merged one at a
+    time, skipping the rows that can't be written."""
+    columns = ', '.join(df.columns)
+    temp_table_name = f'tmp_{table.name}'
+    unique_columns = _get_unique_columns(table)
+    num_rows = len(df)
+
+    if update_existing:
+        update_columns = [column for column in df.columns
+                          if column not in unique_columns]
+        conflict_clause = \
+            f'ON CONFLICT ({", ".join(unique_columns)}) DO ' + (
+                'UPDATE SET ' + ', '.join(f'{column} = EXCLUDED.{column}'
+                                          for column in update_columns)
+                if update_columns else 'NOTHING')
+        # A single INSERT ... ON CONFLICT DO UPDATE may not update the same row
+        # twice, so only keep the last row in |df| for each unique key.
+        df = df.drop_duplicates(subset=unique_columns, keep='last')
+    else:
+        conflict_clause = 'ON CONFLICT DO NOTHING'
+
+    # Returns whether each written row was inserted rather than updated, since
+    # a row updated by ON CONFLICT DO UPDATE has the updating transaction as
+    # its xmax, and an inserted row has no xmax.
+    merge_statement = \
+        f'INSERT INTO {table.name} ({columns}) ' \
+        f'SELECT {columns} FROM {temp_table_name} {{where_clause}}' \
+        f'{conflict_clause} RETURNING (xmax = 0)'
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {temp_table_name} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table.name} WITH NO DATA')
+            cursor.copy_expert(
+                f'COPY {temp_table_name} ({columns}) FROM STDIN '
+                f'WITH (FORMAT csv)',
+                _to_csv_buffer(table, df))
+            cursor.execute('SAVEPOINT merge_all_rows')
+            try:
+                cursor.execute(merge_statement.format(where_clause=''))
+                written_rows = cursor.fetchall()
+            except engine.dialect.dbapi.IntegrityError:
+                cursor.execute('ROLLBACK TO SAVEPOINT merge_all_rows')
+                written_rows = _merge_rows_one_by_one(
+                    cursor, table, temp_table_name, columns, merge_statement,
+                    engine.dialect.dbapi.IntegrityError)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    rows_inserted = sum(1 for (inserted,) in written_rows if inserted)
+    rows_updated = len(written_rows) - rows_inserted
+    return WriteDfResult(
+        rows_inserted=rows_inserted,
+        rows_skipped=num_rows - rows_inserted - rows_updated,
+        rows_updated=rows_updated)
+
+
+def _merge_rows_one_by_one(cursor,
+                           table: Table,
+                           temp_table_name: str,
+                           columns: str,
+                           merge_statement: str,
+                           integrity_error: Type[Exception]) \
+        -> List[Tuple[bool]]:
+    """Merges the rows of |temp_table_name| into |table| one at a time with
+    |merge_statement|, skipping the rows that raise |integrity_error|. Returns
+    the rows returned by the merges."""
+    written_rows: List[Tuple[bool]] = []
+    cursor.execute(f'SELECT ctid::text, {columns} FROM {temp_table_name}')
+    for row_id, *row in cursor.fetchall():
+        cursor.execute('SAVEPOINT merge_row')
+        try:
+            cursor.execute(
+                merge_statement.format(where_clause='WHERE ctid = %s::tid '),
+                (row_id,))
+            written_rows.extend(cursor.fetchall())
+        except integrity_error:
+            # Skip rows that can't be written
+            cursor.execute('ROLLBACK TO SAVEPOINT merge_row')
+            logging.info("Skipping write_df to [%s] table: %s.", table.name,
+                         row)
+    return written_rows
+
+
+def _get_unique_columns(table: Table) -> List[str]:
+    unique_constraints = [constraint for constraint in table.constraints
+                          if isinstance(constraint, UniqueConstraint)]
+    if len(unique_constraints) != 1:
+        raise ValueError(
+            f"Expected exactly one unique constraint on table [{table.name}], "
+            f"found [{len(unique_constraints)}]")
+    return [column.name for column in unique_constraints[0].columns]
+
+
+def _to_csv_buffer(table: Table, df: pd.DataFrame) -> io.StringIO:
+    """Returns |df| serialized as CSV, without a header row. Missing values are
+    written as empty fields, which COPY reads as NULL."""
+    df = df.copy()
+    for column in df.columns:
+        # Integer columns with missing values are parsed as floats, which COPY
+        # can't read into an integer column.
+        if isinstance(table.columns[column].type, Integer) \
+                and df[column].dtype.kind == 'f':
+            df[column] = df[column].astype('Int64')
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+
+def _write_df_with_to_sql(engine: Engine,
+                          table: DeclarativeMeta,
+                          df: pd.DataFrame) -> WriteDfResult:
     try:
-        df.to_sql(table.__tablename__,
-                  SQLAlchemyEngineManager.get_engine_for_schema_base(JailsBase),
-                  if_exists='append',
-                  index=False)
+        df.to_sql(table.__tablename__, engine, if_exists='append', index=False)
     except IntegrityError:
-        _write_df_only_successful_rows(table, df)
+        return _write_df_only_successful_rows(engine, table, df)
+    return WriteDfResult(rows_inserted=len(df), rows_skipped=0)
 
 
 def _write_df_only_successful_rows(
-        table: DeclarativeMeta, df: pd.DataFrame) -> None:
+        engine: Engine,
+        table: DeclarativeMeta,
+        df: pd.DataFrame) -> WriteDfResult:
     """If the dataframe can't be written all at once (eg. some rows already
     exist in the database) then we write only the rows that we can."""
+    rows_inserted = 0
     for i in range(len(df)):
         row = df.iloc[i:i + 1]
         try:
-            row.to_sql(table.__tablename__,
-                       SQLAlchemyEngineManager.get_engine_for_schema_base(
-                           JailsBase),
-                       if_exists='append',
+            row.to_sql(table.__tablename__, engine, if_exists='append',
                        index=False)
+            rows_inserted += 1
         except IntegrityError:
             # Skip rows that can't be written
             logging.info("Skipping write_df to %s table: %s.", table, row)
+    return WriteDfResult(rows_inserted=rows_inserted,
+                         rows_skipped=len(df) - rows_inserted)
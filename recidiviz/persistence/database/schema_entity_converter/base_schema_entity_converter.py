@@ -192,46 +192,25 @@ class BaseSchemaEntityConverter(Generic[SrcBaseType, DstBaseType]):
         if src_id in self._converted_map:
             return self._converted_map[src_id]
 
-        schema_cls: Type[DatabaseEntity] = self._get_schema_class(src)
-        entity_cls: Type[Entity] = self._get_entity_class(src)
-
-        if entity_cls is None or schema_cls is None:
-            raise DatabaseConversionError("Both |entity_cls| and |schema_cls| "
-                                          "should be not None")
+        plan = self._get_conversion_plan(src)
 
         if isinstance(src, Entity):
             dst_builder: \
-                Union[BuildableAttr.Builder, DatabaseEntity] = schema_cls()
-        elif isinstance(src, DatabaseEntity):
-            if not issubclass(entity_cls, BuildableAttr):
-                raise DatabaseConversionError(
-                    f"Expected [{entity_cls}] to be a subclass of "
-                    f"BuildableAttr, but it is not")
-
-            dst_builder = entity_cls.builder()
+                Union[BuildableAttr.Builder, DatabaseEntity] = plan.dst_cls()
         else:
-            raise DatabaseConversionError(
-                "Unable to convert class [{0}]".format(src.__class__))
+            dst_builder = plan.dst_cls.builder()
 
-        for field, attribute in attr.fields_dict(entity_cls).items():
-            if self._should_skip_field(entity_cls, field):
-                continue
-
-            if self._direction_checker.is_back_edge(src, field) and \
-                    not populate_back_edges:
+        for field_plan in plan.field_plans:
+            if field_plan.is_back_edge and not populate_back_edges:
                 continue
 
+            field = field_plan.field
             v = getattr(src, field)
 
-            if not isinstance(attribute, attr.Attribute):
-                raise DatabaseConversionError(
-                    f"Expected attribute with class [{attribute.__class__}] to "
-                    f"be an instance of Attribute, but it is not")
-
             if isinstance(v, list):
                 values = []
                 for next_src in v:
-                    if self._direction_checker.is_back_edge(src, field):
+                    if field_plan.is_back_edge:
                         self._register_back_edge(src, next_src, field)
                         continue
                     values.append(self._convert_forward(next_src,
@@ -241,19 +220,18 @@ class BaseSchemaEntityConverter(Generic[SrcBaseType, DstBaseType]):
                     continue
 
                 value: Optional[Any] = values
-            elif issubclass(type(v), Entity) or issubclass(type(v),
-                                                           DatabaseEntity):
+            elif isinstance(v, (Entity, DatabaseEntity)):
                 next_src = v
-                if self._direction_checker.is_back_edge(src, field):
+                if field_plan.is_back_edge:
                     self._register_back_edge(src, next_src, field)
                     continue
                 value = self._convert_forward(v, populate_back_edges)
             elif v is None:
                 value = None
-            elif is_enum(attribute):
-                value = self._convert_enum(src,
-                                           field,
-                                           attribute)
+            elif field_plan.enum_cls is not None:
+                value = field_plan.enum_cls(v) \
+                    if plan.direction == _Direction.SCHEMA_TO_ENTITY \
+                    else v.value
             else:
                 value = v
 
@@ -271,6 +249,60 @@ class BaseSchemaEntityConverter(Generic[SrcBaseType, DstBaseType]):
 
         return dst
 
+    def _get_conversion_plan(
+            self, src: Union[SrcBaseType, DstBaseType]) -> '_ConversionPlan':
+        """Returns the conversion plan for the class of |src|, compiling and
+        caching it the first time an object of that class is converted.
+        """
+        key = (type(self), type(src))
+        plan = _CONVERSION_PLANS.get(key)
+        if plan is None:
+            plan = self._compile_conversion_plan(src)
+            _CONVERSION_PLANS[key] = plan
+        return plan
+
+    def _compile_conversion_plan(
+            self, src: Union[SrcBaseType, DstBaseType]) -> '_ConversionPlan':
+        """Builds the list of fields that must be converted for objects with the
+        same class as |src|, along with everything about each field that does
+        not depend on the value of the field on a particular object.
+        """
+        schema_cls: Type[DatabaseEntity] = self._get_schema_class(src)
+        entity_cls: Type[Entity] = self._get_entity_class(src)
+
+        if entity_cls is None or schema_cls is None:
+            raise DatabaseConversionError("Both |entity_cls| and |schema_cls| "
+                                          "should be not None")
+
+        direction = _Direction.for_cls(type(src))
+        if direction == _Direction.SCHEMA_TO_ENTITY and \
+                not issubclass(entity_cls, BuildableAttr):
+            raise DatabaseConversionError(
+                f"Expected [{entity_cls}] to be a subclass of "
+                f"BuildableAttr, but it is not")
+
+        field_plans = []
+        for field, attribute in attr.fields_dict(entity_cls).items():
+            if self._should_skip_field(entity_cls, field):
+                continue
+
+            if not isinstance(attribute, attr.Attribute):
+                raise DatabaseConversionError(
+                    f"Expected attribute with class [{attribute.__class__}] to "
+                    f"be an instance of Attribute, but it is not")
+
+            field_plans.append(_FieldPlan(
+                field=field,
+                is_back_edge=self._direction_checker.is_back_edge(src, field),
+                enum_cls=get_enum_cls(attribute)
+                if is_enum(attribute) else None))
+
+        return _ConversionPlan(
+            direction=direction,
+            dst_cls=schema_cls if direction == _Direction.ENTITY_TO_SCHEMA
+            else entity_cls,
+            field_plans=field_plans)
+
     def _lookup_edges(
             self,
             next_src_ids: List[SrcIdType]
@@ -361,10 +393,26 @@ class BaseSchemaEntityConverter(Generic[SrcBaseType, DstBaseType]):
         self._check_is_valid_module(src)
         return getattr(self._get_schema_module(), src.__class__.__name__)
 
-    @staticmethod
-    def _convert_enum(src, field, attribute):
-        if isinstance(src, DatabaseEntity):
-            enum_cls = get_enum_cls(attribute)
-            return enum_cls(getattr(src, field))
 
-        return getattr(src, field).value
+@attr.s(frozen=True)
+class _FieldPlan:
+    """Everything needed to convert a single field that depends only on the
+    class of the object being converted."""
+    field: FieldNameType = attr.ib()
+    is_back_edge: bool = attr.ib()
+    # Set only for enum fields
+    enum_cls: Optional[Type[Enum]] = attr.ib()
+
+
+@attr.s(frozen=True)
+class _ConversionPlan:
+    """The precompiled list of fields to convert for a given source class, along
+    with the class of the converted object."""
+    direction: _Direction = attr.ib()
+    dst_cls: Type = attr.ib()
+    field_plans: List[_FieldPlan] = attr.ib()
+
+
+# Cache of (converter class, src class) to the plan for converting objects of
+# that src class with that converter
+_CONVERSION_PLANS: Dict[Tuple[Type, Type], _ConversionPlan] = {}
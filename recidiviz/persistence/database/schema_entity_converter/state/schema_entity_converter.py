@@ -22,8 +22,6 @@ objects.
 from types import ModuleType
 from typing import Type, TypeVar
 
-import attr
-
 from recidiviz.persistence.database.database_entity import DatabaseEntity
 from recidiviz.persistence.database.schema_entity_converter. \
     base_schema_entity_converter import (
@@ -79,16 +77,12 @@ class _StateSchemaEntityConverter(BaseSchemaEntityConverter[SrcBaseType,
     def _add_person_to_dst(
             self, person: StatePersonType, dst: DstBaseType):
         self._set_person_on_dst(person, dst)
-        entity_cls: Type[Entity] = self._get_entity_class(dst)
-
-        for field, _ in attr.fields_dict(entity_cls).items():
-            if self._should_skip_field(entity_cls, field):
-                continue
 
-            if self._direction_checker.is_back_edge(dst, field):
+        for field_plan in self._get_conversion_plan(dst).field_plans:
+            if field_plan.is_back_edge:
                 continue
 
-            v = getattr(dst, field)
+            v = getattr(dst, field_plan.field)
             if isinstance(v, list):
                 for next_dst in v:
                     self._set_person_on_child(person, next_dst)
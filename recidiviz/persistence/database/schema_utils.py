@@ -69,6 +69,14 @@ def get_state_table_classes() -> Iterator[Table]:
     yield from get_all_table_classes_in_module(state_schema)
 
 
+def get_state_person_history_table_classes() -> Iterator[Table]:
+    """Yields the history tables of the state entities that reference a
+    person."""
+    for table in get_state_table_classes():
+        if table.name.endswith('_history') and 'person_id' in table.columns:
+            yield table
+
+
 def get_non_history_state_database_entities():
     to_return = []
     for cls in _get_all_database_entities_in_module(state_schema):
@@ -15,9 +15,13 @@
 # =============================================================================
 
 """Utilities for managing ingest infos stored on Datastore."""
+from concurrent import futures
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
+import json
 import logging
+import zlib
+
 import attr
 import cattr
 
@@ -90,6 +94,12 @@ def clear_ds():
 
 NUM_GRPC_RETRIES = 2
 
+# The Datastore limit for entity deletes in one call
+MAX_DATASTORE_BATCH_SIZE = 500
+
+# Maximum number of concurrent delete_multi calls when cleaning up a region
+MAX_CONCURRENT_DELETES = 8
+
 
 @attr.s(frozen=True)
 class BatchIngestInfoData:
@@ -126,6 +136,11 @@ class _DatastoreIngestInfo:
     def get_batch_ingest_info_data(cls, entity):
         batch_ingest_info_data_serialized = \
             cls(entity).__dict__['_entity']['batch_ingest_info_data']
+        # Ingest infos written before compression was added are stored as
+        # embedded entities rather than compressed bytes.
+        if isinstance(batch_ingest_info_data_serialized, bytes):
+            batch_ingest_info_data_serialized = json.loads(
+                zlib.decompress(batch_ingest_info_data_serialized))
         batch_ingest_info_data = BatchIngestInfoData.from_serializable(
             batch_ingest_info_data_serialized)
         return batch_ingest_info_data
@@ -134,15 +149,17 @@ class _DatastoreIngestInfo:
     def new(cls, key, session_start_time=None,
             region=None, ingest_info=None, task_hash=None, error=None,
             trace_id=None):
-        new_ingest_info = cls(datastore.Entity(key))
+        new_ingest_info = cls(datastore.Entity(
+            key, exclude_from_indexes=('batch_ingest_info_data',)))
         batch_ingest_info_data = BatchIngestInfoData(task_hash=task_hash,
                                                      ingest_info=ingest_info,
                                                      error=error,
                                                      trace_id=trace_id)
         # pylint: disable=protected-access
         new_ingest_info._entity['region']: str = region
-        new_ingest_info._entity['batch_ingest_info_data']: str = \
-            batch_ingest_info_data.to_serializable()
+        new_ingest_info._entity['batch_ingest_info_data']: bytes = \
+            zlib.compress(json.dumps(
+                batch_ingest_info_data.to_serializable()).encode('utf-8'))
         new_ingest_info._entity['session_start_time']: datetime = \
             session_start_time
         return new_ingest_info
@@ -252,36 +269,36 @@ def batch_delete_ingest_infos_for_region(region: str):
         Args:
             region: (string) Region to delete ingest infos for
         """
-    results = _get_ingest_info_entities_for_region(region)
-    # The Datastore limit for entity writes in one call is 500. Therefore,
-    # divide the entities to delete into chunks of 500.
-    if len(results) > 500:
-        list_of_chunks = _divide_into_chunks(results=results, chunk_size=500)
-        for chunk in list_of_chunks:
-            try:
-                retry_grpc(
-                    NUM_GRPC_RETRIES, ds().delete_multi,
-                    [chunk_item.key for chunk_item in chunk]
-                )
-            except Exception:
-                raise DatastoreBatchDeleteError(region)
-    else:
+    # Only the keys are needed for deletion, so the (potentially very large)
+    # ingest info payloads are never fetched.
+    key_chunks = _divide_into_chunks(
+        _get_ingest_info_keys_for_region(region),
+        chunk_size=MAX_DATASTORE_BATCH_SIZE)
+
+    with futures.ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_DELETES) as executor:
         try:
-            retry_grpc(
-                NUM_GRPC_RETRIES, ds().delete_multi,
-                [result.key for result in results]
-            )
+            delete_futures = [
+                executor.submit(retry_grpc, NUM_GRPC_RETRIES,
+                                ds().delete_multi, chunk)
+                for chunk in key_chunks]
+            for future in futures.as_completed(delete_futures):
+                future.result()
         except Exception:
             raise DatastoreBatchDeleteError(region)
 
 
-def _divide_into_chunks(results: List[datastore.Entity], chunk_size: int) -> \
-        List[List[datastore.Entity]]:
-    list_of_chunks = []
-    for i in range(0, len(results), chunk_size):
-        chunk = results[i: i + chunk_size]
-        list_of_chunks.append(chunk)
-    return list_of_chunks
+def _divide_into_chunks(results: Iterator, chunk_size: int) -> \
+        Iterator[List]:
+    chunk: List = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 def _batch_ingest_info_data_from_entities(
         entity_list: List[datastore.Entity]) -> List[BatchIngestInfoData]:
@@ -307,3 +324,18 @@ def _get_ingest_info_entities_for_region(region: str, session_start_time=None) \
         raise DatastoreBatchGetError(region)
 
     return list(results)
+
+
+def _get_ingest_info_keys_for_region(region: str) -> Iterator[datastore.Key]:
+    logging.info("Getting ingest info keys for region: [%s]", region)
+    keys_query = ds().query(kind=INGEST_INFO_KIND)
+    keys_query.add_filter('region', '=', region)
+    keys_query.keys_only()
+
+    try:
+        results = retry_grpc(
+            NUM_GRPC_RETRIES, keys_query.fetch, limit=None)
+    except Exception:
+        raise DatastoreBatchGetError(region)
+
+    return (entity.key for entity in results)
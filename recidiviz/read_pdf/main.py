@@ -18,19 +18,33 @@
 """Entrypoint to read_pdf application."""
 import logging
 import os
-import pickle
 import tempfile
+from typing import Any, Dict
 
 import gcsfs
 import tabula
 from flask import Flask, request
 
 from recidiviz.cloud_functions.cloud_function_utils import GCSFS_NO_CACHING
+from recidiviz.read_pdf.parse_cache import ParseCache, file_checksum, \
+    parse_cache_key
+from recidiviz.read_pdf.serialization import serialize_tabula_output
 from recidiviz.utils import metadata
 from recidiviz.utils.auth import authenticate_request
 
 app = Flask(__name__)
 
+_PARSE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'read_pdf_cache')
+
+_parse_cache = None
+
+
+def _get_parse_cache() -> ParseCache:
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = ParseCache(_PARSE_CACHE_DIR)
+    return _parse_cache
+
 
 @app.route('/read_pdf', methods=['POST'])
 @authenticate_request
@@ -50,7 +64,12 @@ def read_pdf():
         names with values that are possibly nested dictionaries, as in the
         'pandas_options' kwarg.
 
-    The HTTP response is the pandas dataframe as a csv.
+    The HTTP response is the output of |tabula.read_pdf|, serialized with
+    |serialize_tabula_output|.
+
+    Results are cached on local disk, keyed by the checksum of the file and the
+    tabula options, so repeated requests to parse the same file with the same
+    options do not run tabula again.
     """
     if 'location' not in request.args or 'filename' not in request.args:
         raise ValueError("'location' and 'filename' must be provided.")
@@ -62,17 +81,45 @@ def read_pdf():
     # Don't use the gcsfs cache
     fs = gcsfs.GCSFileSystem(project=project_id, cache_timeout=GCSFS_NO_CACHING)
     logging.info("The path to download from is [%s]", filename)
-    logging.info("The files in the directory are:")
-    logging.info(fs.ls(location))
+    options = request.json or {}
 
     # Providing a stream buffer to tabula reader does not work because it
     # tries to load the file into the local filesystem, since appengine is a
     # read only filesystem (except for the tmpdir) we download the file into
     # the local tmpdir and pass that in.
     tmpdir_path = os.path.join(tempfile.gettempdir(), filename)
-    fs.get(path, tmpdir_path)
-    output = tabula.read_pdf(tmpdir_path, **(request.json or {}))
-    return pickle.dumps(output)
+
+    # Prefer the checksum GCS stores for the object, so that cached results
+    # can be returned without downloading the file.
+    checksum = _get_gcs_checksum(fs, path)
+    downloaded = False
+    if not checksum:
+        fs.get(path, tmpdir_path)
+        downloaded = True
+        checksum = file_checksum(tmpdir_path)
+
+    cache_key = parse_cache_key(checksum, options)
+    cached = _get_parse_cache().get(cache_key)
+    if cached is not None:
+        logging.info("Returning cached result for [%s]", path)
+        return cached
+
+    if not downloaded:
+        fs.get(path, tmpdir_path)
+    output = serialize_tabula_output(tabula.read_pdf(tmpdir_path, **options))
+    _get_parse_cache().put(cache_key, output)
+    return output
+
+
+def _get_gcs_checksum(fs: gcsfs.GCSFileSystem, path: str) -> str:
+    """Returns the checksum GCS stores for the object at |path|, or an empty
+    string if it has none."""
+    info: Dict[str, Any] = fs.info(path)
+    if info.get('md5Hash'):
+        return 'md5:' + info['md5Hash']
+    if info.get('crc32c'):
+        return 'crc32c:' + info['crc32c']
+    return ''
 
 
 @app.errorhandler(500)
@@ -0,0 +1,102 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""A local disk cache of serialized tabula.read_pdf results, keyed by the
+checksum of the parsed file and the options it was parsed with."""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+# The default maximum total size of all cached results, after which the least
+# recently used results are evicted.
+DEFAULT_MAX_CACHE_SIZE_BYTES = 1024 * 1024 * 1024
+
+_CACHE_FILE_SUFFIX = '.cache'
+
+
+def parse_cache_key(checksum: str, options: Dict[str, Any]) -> str:
+    """Returns the cache key for parsing a file with checksum |checksum|
+    with the given tabula |options|. Options that differ only in the order of
+    their keys map to the same key."""
+    normalized_options = json.dumps(options, sort_keys=True,
+                                    separators=(',', ':'))
+    return hashlib.sha256(
+        f'{checksum}:{normalized_options}'.encode('utf-8')).hexdigest()
+
+
+def file_checksum(path: str) -> str:
+    """Returns the sha256 checksum of the contents of the file at |path|."""
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+class ParseCache:
+    """Stores serialized parse results as files in |cache_dir|."""
+
+    def __init__(self, cache_dir: str,
+                 max_size_bytes: int = DEFAULT_MAX_CACHE_SIZE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Mark the result as recently used, for eviction
+        os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Stores |data| under |key|. The file is written to a temporary path
+        and renamed, so concurrent readers never see a partial result."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _CACHE_FILE_SUFFIX)
+
+    def _evict(self) -> None:
+        """Deletes the least recently used results until the total size of the
+        cache is at most |max_size_bytes|."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_CACHE_FILE_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            logging.info("Evicting [%s] from the parse cache.", path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,114 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Serializes the output of tabula.read_pdf to and from bytes, so that it can be
+sent between the read_pdf service and its callers without pickling.
+
+The serialized output is a 4 byte length prefix, followed by a JSON header,
+followed by one Arrow IPC stream per DataFrame. The header records whether the
+output was a single DataFrame or a list of DataFrames, the original column
+labels of each DataFrame and the size of each stream. DataFrames with
+MultiIndex columns, whose labels are tuples that don't survive JSON, are
+rejected.
+"""
+import json
+import struct
+from typing import List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+
+TabulaOutput = Optional[Union[pd.DataFrame, List[pd.DataFrame]]]
+
+_HEADER_LENGTH_FORMAT = '>I'
+_HEADER_LENGTH_SIZE = struct.calcsize(_HEADER_LENGTH_FORMAT)
+
+_KIND_NONE = 'none'
+_KIND_DATAFRAME = 'dataframe'
+_KIND_LIST = 'list'
+
+
+def serialize_tabula_output(output: TabulaOutput) -> bytes:
+    """Serializes the |output| of a tabula.read_pdf call, which is either
+    None, a single DataFrame or a list of DataFrames."""
+    if output is None:
+        kind, dfs = _KIND_NONE, []
+    elif isinstance(output, pd.DataFrame):
+        kind, dfs = _KIND_DATAFRAME, [output]
+    elif isinstance(output, list):
+        kind, dfs = _KIND_LIST, output
+    else:
+        raise ValueError(
+            f"Unexpected tabula output type [{type(output).__name__}]")
+
+    column_labels = [_column_labels(df) for df in dfs]
+    streams = [_to_arrow_stream(df) for df in dfs]
+    header = json.dumps({
+        'kind': kind,
+        'tables': [{'columns': columns, 'size': len(stream)}
+                   for columns, stream in zip(column_labels, streams)]
+    }).encode('utf-8')
+
+    return b''.join(
+        [struct.pack(_HEADER_LENGTH_FORMAT, len(header)), header] + streams)
+
+
+def deserialize_tabula_output(data: bytes) -> TabulaOutput:
+    """Deserializes bytes produced by serialize_tabula_output."""
+    (header_length,) = struct.unpack_from(_HEADER_LENGTH_FORMAT, data)
+    offset = _HEADER_LENGTH_SIZE + header_length
+    header = json.loads(data[_HEADER_LENGTH_SIZE:offset].decode('utf-8'))
+
+    dfs = []
+    for table in header['tables']:
+        df = _from_arrow_stream(data[offset:offset + table['size']])
+        df.columns = table['columns']
+        dfs.append(df)
+        offset += table['size']
+
+    if header['kind'] == _KIND_NONE:
+        return None
+    if header['kind'] == _KIND_DATAFRAME:
+        return dfs[0]
+    return dfs
+
+
+def _column_labels(df: pd.DataFrame) -> list:
+    if isinstance(df.columns, pd.MultiIndex):
+        raise ValueError(
+            f"Can't serialize a DataFrame with MultiIndex columns "
+            f"{df.columns.tolist()}")
+    return df.columns.tolist()
+
+
+def _to_arrow_stream(df: pd.DataFrame) -> bytes:
+    # Arrow requires unique string column names, but tabula may return
+    # DataFrames with integer or duplicate labels. The original labels are
+    # stored in the header instead.
+    df = df.copy(deep=False)
+    df.columns = [str(i) for i in range(len(df.columns))]
+    table = pa.Table.from_pandas(df)
+
+    sink = pa.BufferOutputStream()
+    writer = pa.RecordBatchStreamWriter(sink, table.schema)
+    writer.write_table(table)
+    writer.close()
+    return sink.getvalue().to_pybytes()
+
+
+def _from_arrow_stream(stream: bytes) -> pd.DataFrame:
+    return pa.RecordBatchStreamReader(pa.py_buffer(stream)) \
+        .read_all().to_pandas()
@@ -15,9 +15,15 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # =============================================================================
 
-"""Entrypoint for the application."""
+"""Entrypoint for the application.
+
+The blueprints loaded when the app starts are chosen by the server role in the
+RECIDIVIZ_SERVER_ROLE environment variable, which defaults to all blueprints.
+See server_blueprints.py for the available roles.
+"""
 import datetime
 import logging
+import os
 
 from flask import Flask
 from opencensus.common.transports.async_ import AsyncTransport
@@ -25,21 +31,7 @@ from opencensus.ext.flask.flask_middleware import FlaskMiddleware
 from opencensus.trace import config_integration
 from opencensus.trace.exporters import file_exporter, stackdriver_exporter
 
-from recidiviz.backup.backup_manager import backup_manager_blueprint
-from recidiviz.calculator.query.export_manager import export_manager_blueprint
-from recidiviz.calculator.pipeline.utils.dataflow_monitor_manager import \
-    dataflow_monitor_blueprint
-from recidiviz.cloud_functions.cloud_functions import cloud_functions_blueprint
-from recidiviz.ingest.aggregate.scrape_aggregate_reports import \
-    scrape_aggregate_reports_blueprint
-from recidiviz.ingest.aggregate.single_count import store_single_count_blueprint
-from recidiviz.ingest.direct.direct_ingest_control import direct_ingest_control
-from recidiviz.ingest.scrape.infer_release import infer_release_blueprint
-from recidiviz.ingest.scrape.scraper_control import scraper_control
-from recidiviz.ingest.scrape.scraper_status import scraper_status
-from recidiviz.ingest.scrape.worker import worker
-from recidiviz.persistence.actions import actions
-from recidiviz.persistence.batch_persistence import batch_blueprint
+from recidiviz import server_blueprints
 from recidiviz.persistence.database.sqlalchemy_engine_manager import \
     SQLAlchemyEngineManager
 from recidiviz.utils import environment, structured_logging, metadata
@@ -47,26 +39,6 @@ from recidiviz.utils import environment, structured_logging, metadata
 structured_logging.setup()
 logging.info("[%s] Running server.py", datetime.datetime.now().isoformat())
 
-app = Flask(__name__)
-app.register_blueprint(scraper_control, url_prefix='/scraper')
-app.register_blueprint(scraper_status, url_prefix='/scraper')
-app.register_blueprint(worker, url_prefix='/scraper')
-app.register_blueprint(direct_ingest_control, url_prefix='/direct')
-app.register_blueprint(actions, url_prefix='/ingest')
-app.register_blueprint(infer_release_blueprint, url_prefix='/infer_release')
-app.register_blueprint(cloud_functions_blueprint, url_prefix='/cloud_function')
-app.register_blueprint(batch_blueprint, url_prefix='/batch')
-app.register_blueprint(
-    scrape_aggregate_reports_blueprint, url_prefix='/scrape_aggregate_reports')
-app.register_blueprint(store_single_count_blueprint, url_prefix='/single_count')
-app.register_blueprint(export_manager_blueprint, url_prefix='/export_manager')
-app.register_blueprint(backup_manager_blueprint, url_prefix='/backup_manager')
-app.register_blueprint(dataflow_monitor_blueprint,
-                       url_prefix='/dataflow_monitor')
-
-if environment.in_gae():
-    SQLAlchemyEngineManager.init_engines_for_server_postgres_instances()
-
 # Setup tracing of requests not traced by default
 if environment.in_gae():
     exporter = stackdriver_exporter.StackdriverExporter(
@@ -75,10 +47,20 @@ else:
     exporter = file_exporter.FileExporter(file_name='traces')
 
 
-# TODO(596): This is a no-op until the next release of `opencensus`.
-app.config['OPENCENSUS_TRACE_PARAMS'] = {
-    'BLACKLIST_HOSTNAMES': ['metadata']  # Don't trace metadata requests
-}
-middleware = FlaskMiddleware(app, exporter=exporter)
+def _setup_tracing(flask_app: Flask) -> None:
+    # TODO(596): This is a no-op until the next release of `opencensus`.
+    flask_app.config['OPENCENSUS_TRACE_PARAMS'] = {
+        'BLACKLIST_HOSTNAMES': ['metadata']  # Don't trace metadata requests
+    }
+    FlaskMiddleware(flask_app, exporter=exporter)
+
+
+app = server_blueprints.create_app(
+    os.getenv('RECIDIVIZ_SERVER_ROLE', server_blueprints.ALL_ROLE),
+    configure_app=_setup_tracing)
+
+if environment.in_gae():
+    SQLAlchemyEngineManager.init_engines_for_server_postgres_instances()
+
 config_integration.trace_integrations(
     ['google_cloud_clientlibs', 'requests', 'sqlalchemy'])
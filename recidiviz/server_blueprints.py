@@ -0,0 +1,192 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Builds the Flask app for a server role.
+
+Importing a blueprint imports everything it depends on, e.g. the scrapers,
+pandas or the BigQuery client, which costs memory and startup time in every
+worker. A server role names the blueprints the server is expected to serve.
+Those are imported and registered when the app is built. Every other blueprint
+is only imported, into an app of its own, on the first request for its URL
+prefix.
+"""
+import importlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+import attr
+from flask import Blueprint, Flask
+from werkzeug.exceptions import HTTPException, NotFound
+
+
+@attr.s(frozen=True)
+class BlueprintSpec:
+    """Where to find a blueprint and where to register it."""
+    # The module that defines the blueprint
+    module: str = attr.ib()
+    # The name of the blueprint in |module|
+    attribute: str = attr.ib()
+    url_prefix: str = attr.ib()
+
+    def load(self) -> Blueprint:
+        return getattr(importlib.import_module(self.module), self.attribute)
+
+
+BLUEPRINTS: Dict[str, BlueprintSpec] = {
+    'scraper_control': BlueprintSpec(
+        'recidiviz.ingest.scrape.scraper_control', 'scraper_control',
+        '/scraper'),
+    'scraper_status': BlueprintSpec(
+        'recidiviz.ingest.scrape.scraper_status', 'scraper_status',
+        '/scraper'),
+    'worker': BlueprintSpec(
+        'recidiviz.ingest.scrape.worker', 'worker', '/scraper'),
+    'direct_ingest_control': BlueprintSpec(
+        'recidiviz.ingest.direct.direct_ingest_control',
+        'direct_ingest_control', '/direct'),
+    'actions': BlueprintSpec(
+        'recidiviz.persistence.actions', 'actions', '/ingest'),
+    'infer_release': BlueprintSpec(
+        'recidiviz.ingest.scrape.infer_release', 'infer_release_blueprint',
+        '/infer_release'),
+    'cloud_functions': BlueprintSpec(
+        'recidiviz.cloud_functions.cloud_functions',
+        'cloud_functions_blueprint', '/cloud_function'),
+    'batch': BlueprintSpec(
+        'recidiviz.persistence.batch_persistence', 'batch_blueprint',
+        '/batch'),
+    'scrape_aggregate_reports': BlueprintSpec(
+        'recidiviz.ingest.aggregate.scrape_aggregate_reports',
+        'scrape_aggregate_reports_blueprint', '/scrape_aggregate_reports'),
+    'single_count': BlueprintSpec(
+        'recidiviz.ingest.aggregate.single_count',
+        'store_single_count_blueprint', '/single_count'),
+    'export_manager': BlueprintSpec(
+        'recidiviz.calculator.query.export_manager',
+        'export_manager_blueprint', '/export_manager'),
+    'backup_manager': BlueprintSpec(
+        'recidiviz.backup.backup_manager', 'backup_manager_blueprint',
+        '/backup_manager'),
+    'dataflow_monitor': BlueprintSpec(
+        'recidiviz.calculator.pipeline.utils.dataflow_monitor_manager',
+        'dataflow_monitor_blueprint', '/dataflow_monitor'),
+}
+
+ALL_ROLE = 'all'
+
+# The blueprints loaded when the app for each role is built
+ROLES: Dict[str, List[str]] = {
+    ALL_ROLE: list(BLUEPRINTS),
+    'scrape': ['scraper_control', 'scraper_status', 'worker', 'actions',
+               'infer_release', 'batch', 'scrape_aggregate_reports',
+               'single_count'],
+    'direct_ingest': ['direct_ingest_control'],
+    'export': ['export_manager', 'backup_manager', 'dataflow_monitor',
+               'cloud_functions'],
+}
+
+AppConfigurer = Callable[[Flask], None]
+
+
+def create_app(role: str = ALL_ROLE,
+               configure_app: Optional[AppConfigurer] = None,
+               blueprints: Optional[Dict[str, BlueprintSpec]] = None,
+               roles: Optional[Dict[str, List[str]]] = None) -> Flask:
+    """Builds the app for |role|.
+
+    Args:
+        role: The role of the server, which must be a key of |roles|.
+        configure_app: Called with the app, and with each app that is later
+            built for a lazily loaded blueprint, e.g. to set up tracing.
+        blueprints: All blueprints served by the app, by name. Defaults to
+            BLUEPRINTS.
+        roles: The names of the blueprints to load up front for each role.
+            Defaults to ROLES.
+    """
+    blueprints = BLUEPRINTS if blueprints is None else blueprints
+    roles = ROLES if roles is None else roles
+    if role not in roles:
+        raise ValueError(f"Unknown server role [{role}], expected one of "
+                         f"{sorted(roles)}")
+
+    app = _build_app(__name__, [blueprints[name] for name in roles[role]],
+                     configure_app)
+    lazy_specs = [spec for name, spec in blueprints.items()
+                  if name not in roles[role]]
+    logging.info("Built app for role [%s], [%s] blueprints loaded lazily",
+                 role, len(lazy_specs))
+    if lazy_specs:
+        app.wsgi_app = _LazyBlueprintDispatcher(  # type: ignore
+            app, lazy_specs, configure_app)
+    return app
+
+
+def _build_app(import_name: str,
+               specs: List[BlueprintSpec],
+               configure_app: Optional[AppConfigurer]) -> Flask:
+    app = Flask(import_name)
+    for spec in specs:
+        app.register_blueprint(spec.load(), url_prefix=spec.url_prefix)
+    if configure_app:
+        configure_app(app)
+    return app
+
+
+class _LazyBlueprintDispatcher:
+    """WSGI middleware that sends requests the app can't route, but that fall
+    under the URL prefix of a lazily loaded blueprint, to an app built for the
+    blueprints with that prefix on the first such request."""
+
+    def __init__(self, app: Flask, lazy_specs: List[BlueprintSpec],
+                 configure_app: Optional[AppConfigurer]):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.configure_app = configure_app
+        self.specs_by_prefix: Dict[str, List[BlueprintSpec]] = {}
+        for spec in lazy_specs:
+            self.specs_by_prefix.setdefault(spec.url_prefix, []).append(spec)
+        self.lazy_apps: Dict[str, Flask] = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        prefix = self._get_lazy_prefix(environ)
+        if prefix is None:
+            return self.wsgi_app(environ, start_response)
+        return self._get_lazy_app(prefix)(environ, start_response)
+
+    def _get_lazy_prefix(self, environ) -> Optional[str]:
+        path = environ.get('PATH_INFO', '')
+        for prefix in self.specs_by_prefix:
+            if path == prefix or path.startswith(prefix + '/'):
+                # Blueprints loaded up front may share the prefix
+                try:
+                    self.app.url_map.bind_to_environ(environ).match()
+                except NotFound:
+                    return prefix
+                except HTTPException:
+                    return None
+                return None
+        return None
+
+    def _get_lazy_app(self, prefix: str) -> Flask:
+        with self.lock:
+            if prefix not in self.lazy_apps:
+                logging.info("Loading blueprints for prefix [%s]", prefix)
+                self.lazy_apps[prefix] = _build_app(
+                    self.app.import_name, self.specs_by_prefix[prefix],
+                    self.configure_app)
+            return self.lazy_apps[prefix]
@@ -928,6 +928,30 @@ class TestMapIncarcerationCombinations(unittest.TestCase):
                    for combo, value in incarceration_combinations if combo.get('person_id') is not None)
 
 
+class TestEventsInCalculationWindow(unittest.TestCase):
+    """Tests the events_in_calculation_window function."""
+
+    def test_events_in_calculation_window(self):
+        incarceration_events = [
+            IncarcerationAdmissionEvent(
+                state_code='CA',
+                event_date=event_date,
+                facility='SAN QUENTIN',
+                county_of_residence=_COUNTY_OF_RESIDENCE,
+            ) for event_date in [date(1990, 3, 12), date(2005, 1, 31), date(2005, 2, 1), date(2008, 1, 3)]
+        ]
+
+        # With a one month limit, the events in the 36 month metric period are kept
+        self.assertEqual(incarceration_events[2:], calculator.events_in_calculation_window(
+            incarceration_events, date(2008, 1, 31), 1))
+
+        self.assertEqual(incarceration_events[1:], calculator.events_in_calculation_window(
+            incarceration_events, date(2008, 1, 31), 37))
+
+        self.assertEqual(incarceration_events, calculator.events_in_calculation_window(
+            incarceration_events, date(2008, 1, 31), -1))
+
+
 class TestCharacteristicCombinations(unittest.TestCase):
     """Tests the characteristic_combinations function."""
 
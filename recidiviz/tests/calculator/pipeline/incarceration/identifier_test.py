@@ -598,6 +598,48 @@ class TestFindEndOfMonthStatePrisonStays(unittest.TestCase):
         self.assertEqual(expected_month_count, len(incarceration_events))
         self.assertEqual(expected_incarceration_events, incarceration_events)
 
+    def test_find_end_of_month_state_prison_stays_sentenced_during_stay(self):
+        incarceration_period = \
+            StateIncarcerationPeriod.new_with_defaults(
+                incarceration_period_id=1111,
+                incarceration_type=StateIncarcerationType.STATE_PRISON,
+                status=StateIncarcerationPeriodStatus.NOT_IN_CUSTODY,
+                state_code='TX',
+                facility='PRISON3',
+                admission_date=date(2000, 1, 20),
+                admission_reason=AdmissionReason.NEW_ADMISSION,
+                release_date=date(2000, 4, 10),
+                release_reason=ReleaseReason.SENTENCE_SERVED)
+
+        incarceration_sentence_1 = StateIncarcerationSentence.new_with_defaults(
+            incarceration_sentence_id=9797,
+            start_date=date(2000, 1, 1),
+            incarceration_periods=[incarceration_period],
+            charges=[StateCharge.new_with_defaults(ncic_code='3606', statute='3606')]
+        )
+        incarceration_sentence_2 = StateIncarcerationSentence.new_with_defaults(
+            incarceration_sentence_id=9898,
+            start_date=date(2000, 2, 29),
+            incarceration_periods=[incarceration_period],
+            charges=[StateCharge.new_with_defaults(ncic_code='1316', statute='1316')]
+        )
+        incarceration_period.incarceration_sentences = [incarceration_sentence_1, incarceration_sentence_2]
+
+        sentence_group = StateSentenceGroup.new_with_defaults(
+            sentence_group_id=6666, external_id='12345',
+            incarceration_sentences=[incarceration_sentence_1, incarceration_sentence_2])
+        incarceration_sentence_1.sentence_group = sentence_group
+        incarceration_sentence_2.sentence_group = sentence_group
+
+        incarceration_events = \
+            self._run_find_end_of_month_state_prison_stays_with_no_sentences(
+                incarceration_period, _COUNTY_OF_RESIDENCE
+            )
+
+        self.assertEqual(
+            [(date(2000, 1, 31), '3606'), (date(2000, 2, 29), '3606'), (date(2000, 3, 31), '1316')],
+            [(event.event_date, event.most_serious_offense_statute) for event in incarceration_events])
+
     @freeze_time('2019-11-01')
     def test_find_end_of_month_state_prison_stays_no_release(self):
         incarceration_period = \
@@ -632,6 +674,40 @@ class TestFindEndOfMonthStatePrisonStays(unittest.TestCase):
         self.assertEqual(expected_month_count, len(incarceration_events))
         self.assertEqual(expected_incarceration_events, incarceration_events)
 
+    @freeze_time('2019-11-01')
+    def test_find_end_of_month_state_prison_stays_calculation_window(self):
+        incarceration_period = \
+            StateIncarcerationPeriod.new_with_defaults(
+                incarceration_period_id=1111,
+                incarceration_type=StateIncarcerationType.STATE_PRISON,
+                status=StateIncarcerationPeriodStatus.NOT_IN_CUSTODY,
+                state_code='TX',
+                facility='PRISON3',
+                admission_date=date(2018, 1, 20),
+                admission_reason=AdmissionReason.NEW_ADMISSION)
+
+        incarceration_sentence = StateIncarcerationSentence.new_with_defaults(
+            incarceration_sentence_id=9797,
+            incarceration_periods=[incarceration_period]
+        )
+        incarceration_period.supervision_sentences = [incarceration_sentence]
+
+        sentence_group = StateSentenceGroup.new_with_defaults(sentence_group_id=6666, external_id='12345')
+        incarceration_sentence.sentence_group = sentence_group
+
+        incarceration_events = identifier.find_end_of_month_state_prison_stays(
+            [], [], incarceration_period, _COUNTY_OF_RESIDENCE, calculation_window_lower_bound=date(2019, 6, 1))
+
+        expected_incarceration_events = expected_incarceration_stay_events(incarceration_period, 22)[-5:]
+
+        self.assertEqual(date(2019, 6, 30), incarceration_events[0].event_date)
+        self.assertEqual(expected_incarceration_events, incarceration_events)
+
+        incarceration_events = identifier.find_end_of_month_state_prison_stays(
+            [], [], incarceration_period, _COUNTY_OF_RESIDENCE, calculation_window_lower_bound=date(2019, 11, 1))
+
+        self.assertEqual([], incarceration_events)
+
     def test_find_end_of_month_state_prison_stays_no_admission(self):
         incarceration_period = \
             StateIncarcerationPeriod.new_with_defaults(
@@ -1829,6 +1905,77 @@ class TestFindMostSeriousOffenseStatuteInSentenceGroup(unittest.TestCase):
         self.assertEqual(most_serious_statute, '8888')
 
 
+class TestMostSeriousChargeTimeline(unittest.TestCase):
+    """Tests the MostSeriousChargeTimeline class."""
+
+    def test_most_serious_charge_timeline(self):
+        charge_1 = StateCharge.new_with_defaults(charge_id=1, ncic_code='3606', statute='A')
+        charge_2 = StateCharge.new_with_defaults(charge_id=2, ncic_code='1316', statute='B')
+        charge_3 = StateCharge.new_with_defaults(charge_id=3, ncic_code='1316', statute='C')
+        charge_4 = StateCharge.new_with_defaults(charge_id=4, ncic_code='0901', statute='D')
+        charge_5 = StateCharge.new_with_defaults(charge_id=5, ncic_code='1010', statute='E')
+
+        sentence_group = StateSentenceGroup.new_with_defaults(
+            incarceration_sentences=[
+                StateIncarcerationSentence.new_with_defaults(
+                    start_date=date(2005, 3, 1),
+                    charges=[charge_1, StateCharge.new_with_defaults(statute='no ncic code')]),
+                StateIncarcerationSentence.new_with_defaults(
+                    start_date=date(2008, 1, 1),
+                    charges=[charge_3]),
+                StateIncarcerationSentence.new_with_defaults(
+                    start_date=None,
+                    charges=[charge_4]),
+            ],
+            supervision_sentences=[
+                StateSupervisionSentence.new_with_defaults(
+                    start_date=date(2008, 1, 1),
+                    charges=[charge_2]),
+                StateSupervisionSentence.new_with_defaults(
+                    start_date=date(2008, 1, 1),
+                    charges=[charge_5]),
+            ]
+        )
+
+        timeline = identifier.MostSeriousChargeTimeline.for_sentence_group(sentence_group)
+
+        self.assertEqual([date(2005, 3, 1), date(2008, 1, 1)], timeline.start_dates)
+
+        for upper_bound, expected_charge in [(date(2005, 3, 1), None),
+                                             (date(2005, 3, 2), charge_1),
+                                             (date(2008, 1, 1), charge_1),
+                                             # Ties between NCIC codes go to the earlier sentence in the group
+                                             (date(2008, 1, 2), charge_5),
+                                             (date(2020, 1, 1), charge_5)]:
+            self.assertEqual(expected_charge, timeline.most_serious_prior_charge(upper_bound))
+            self.assertEqual(
+                expected_charge, identifier.find_most_serious_prior_charge_in_sentence_group(
+                    sentence_group, upper_bound))
+
+    def test_most_serious_charge_timeline_ties(self):
+        charge_1 = StateCharge.new_with_defaults(charge_id=1, ncic_code='1316', statute='A')
+        charge_2 = StateCharge.new_with_defaults(charge_id=2, ncic_code='1316', statute='B')
+
+        sentence_group = StateSentenceGroup.new_with_defaults(
+            incarceration_sentences=[
+                StateIncarcerationSentence.new_with_defaults(start_date=date(2008, 1, 1), charges=[charge_1]),
+            ],
+            supervision_sentences=[
+                StateSupervisionSentence.new_with_defaults(start_date=date(2005, 1, 1), charges=[charge_2]),
+            ]
+        )
+
+        timeline = identifier.MostSeriousChargeTimeline.for_sentence_group(sentence_group)
+
+        self.assertEqual(charge_2, timeline.most_serious_prior_charge(date(2008, 1, 1)))
+        self.assertEqual(charge_1, timeline.most_serious_prior_charge(date(2008, 1, 2)))
+
+    def test_most_serious_charge_timeline_empty(self):
+        timeline = identifier.MostSeriousChargeTimeline.for_sentence_group(StateSentenceGroup.new_with_defaults())
+
+        self.assertIsNone(timeline.most_serious_prior_charge(date(2008, 1, 1)))
+
+
 def expected_incarceration_stay_events(
         incarceration_period: StateIncarcerationPeriod,
         expected_month_count: int) -> List[IncarcerationStayEvent]:
@@ -40,11 +40,11 @@ from recidiviz.calculator.pipeline.incarceration.metrics import \
     IncarcerationMetric, IncarcerationMetricType
 from recidiviz.calculator.pipeline.utils import extractor_utils
 from recidiviz.calculator.pipeline.utils.beam_utils import \
-    ConvertDictToKVTuple
+    ConvertDictToKVTuple, ParDoWithKeyedLookups, element_key_lookup_keys
 from recidiviz.calculator.pipeline.utils.calculator_utils import \
     last_day_of_month
 from recidiviz.calculator.pipeline.utils.entity_hydration_utils import SetSentencesOnSentenceGroup, \
-    ConvertSentenceToStateSpecificType
+    ConvertSentenceToStateSpecificType, us_mo_sentence_status_lookup_keys
 from recidiviz.common.constants.state.state_incarceration import \
     StateIncarcerationType
 from recidiviz.common.constants.state.state_incarceration_period import \
@@ -344,13 +344,15 @@ class TestIncarcerationPipeline(unittest.TestCase):
         supervision_sentences_converted = (
             supervision_sentences
             | 'Convert to state-specific supervision sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         incarceration_sentences_converted = (
             incarceration_sentences
             | 'Convert to state-specific incarceration sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         sentences_and_sentence_groups = (
@@ -390,9 +392,9 @@ class TestIncarcerationPipeline(unittest.TestCase):
         person_events = (
             person_and_sentence_groups |
             'Classify Incarceration Events' >>
-            beam.ParDo(
+            ParDoWithKeyedLookups(
                 pipeline.ClassifyIncarcerationEvents(),
-                AsDict(person_id_to_county_kv)))
+                [person_id_to_county_kv], [element_key_lookup_keys]))
 
         # Get pipeline job details for accessing job_id
         all_pipeline_options = PipelineOptions().get_all_options()
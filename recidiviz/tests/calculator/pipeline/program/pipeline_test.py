@@ -38,6 +38,8 @@ from recidiviz.calculator.pipeline.program.metrics import ProgramMetric, \
 from recidiviz.calculator.pipeline.program.program_event import \
     ProgramReferralEvent
 from recidiviz.calculator.pipeline.utils import extractor_utils
+from recidiviz.calculator.pipeline.utils.beam_utils import \
+    ParDoWithKeyedLookups
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     MetricMethodologyType, json_serializable_metric_key
 from recidiviz.common.constants.state.state_assessment import \
@@ -276,10 +278,10 @@ class TestProgramPipeline(unittest.TestCase):
         # StateProgramAssignments
         person_program_events = (
             persons_entities
-            | beam.ParDo(pipeline.ClassifyProgramAssignments(),
-                         AsDict(
-                             supervision_period_to_agent_associations_as_kv
-                         ))
+            | ParDoWithKeyedLookups(
+                pipeline.ClassifyProgramAssignments(),
+                [supervision_period_to_agent_associations_as_kv],
+                [pipeline.supervision_period_lookup_keys])
         )
 
         # Get pipeline job details for accessing job_id
@@ -204,6 +204,28 @@ def test_releases_in_window_with_revocation_returns():
     assert reincarcerations[2].get('from_supervision_type') is None
 
 
+def test_reincarceration_timeline():
+    reincarceration_2016 = {'return_type': ReincarcerationReturnType.REVOCATION}
+    reincarceration_2012 = {'return_type': ReincarcerationReturnType.NEW_ADMISSION}
+    reincarceration_2020 = {'return_type': ReincarcerationReturnType.NEW_ADMISSION}
+
+    # Not in order of reincarceration date
+    timeline = calculator.ReincarcerationTimeline.from_reincarcerations({
+        date(2016, 5, 13): reincarceration_2016,
+        date(2012, 4, 30): reincarceration_2012,
+        date(2020, 11, 20): reincarceration_2020})
+
+    assert timeline.in_window(date(2012, 4, 30), date(2020, 11, 20)) == \
+        [reincarceration_2012, reincarceration_2016]
+    assert timeline.count_in_window(date(2012, 4, 30), date(2020, 11, 20)) == 2
+    assert timeline.in_window(date(2012, 5, 1), date(2020, 11, 21)) == \
+        [reincarceration_2016, reincarceration_2020]
+    assert timeline.in_window(date(2016, 5, 14), date(2020, 11, 20)) == []
+    assert timeline.count_in_window(date(2016, 5, 14), date(2020, 11, 20)) == 0
+    assert timeline.in_window(date(2021, 1, 1), date(2020, 1, 1)) == []
+    assert timeline.count_in_window(date(2021, 1, 1), date(2020, 1, 1)) == 0
+
+
 def test_earliest_recidivated_follow_up_period_later_month_in_year():
     release_date = date(2012, 4, 20)
     reincarceration_date = date(2016, 5, 13)
@@ -762,6 +784,10 @@ class TestMapRecidivismCombinations(unittest.TestCase):
 
         self.assertEqual(expected_combos_count, len(recidivism_combinations))
 
+        # Each metric has a combination of its own
+        self.assertEqual(len(recidivism_combinations),
+                         len({id(combination) for combination, _ in recidivism_combinations}))
+
         for combination, value in recidivism_combinations:
             if combination.get('metric_type') == MetricType.RATE and \
                     combination.get('follow_up_period') <= 5 or \
@@ -41,7 +41,8 @@ from recidiviz.calculator.pipeline.recidivism.metrics import \
     ReincarcerationRecidivismRateMetric
 from recidiviz.calculator.pipeline.recidivism.metrics import \
     ReincarcerationRecidivismMetricType as MetricType
-from recidiviz.calculator.pipeline.utils.beam_utils import ConvertDictToKVTuple, AverageFnResult
+from recidiviz.calculator.pipeline.utils.beam_utils import ConvertDictToKVTuple, AverageFnResult, \
+    ParDoWithKeyedLookups, element_key_lookup_keys
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     MetricMethodologyType
 from recidiviz.calculator.pipeline.utils import extractor_utils
@@ -524,7 +525,9 @@ class TestRecidivismPipeline(unittest.TestCase):
         person_events = (
             person_and_incarceration_periods
             | "ClassifyReleaseEvents" >>
-            beam.ParDo(ClassifyReleaseEvents(), AsDict(person_id_to_county_kv))
+            ParDoWithKeyedLookups(ClassifyReleaseEvents(),
+                                  [person_id_to_county_kv],
+                                  [element_key_lookup_keys])
         )
 
         # Get pipeline job details for accessing job_id
@@ -218,6 +218,64 @@ class TestClassifySupervisionTimeBuckets(unittest.TestCase):
             )
         ])
 
+    def test_find_supervision_time_buckets_calculation_window(self):
+        """Tests the find_supervision_time_buckets function when a calculation_window_lower_bound is set, where no
+        buckets are found for the months before the lower bound."""
+        supervision_period = \
+            StateSupervisionPeriod.new_with_defaults(
+                supervision_period_id=111,
+                external_id='sp1',
+                status=StateSupervisionPeriodStatus.TERMINATED,
+                state_code='US_ND',
+                start_date=date(2018, 3, 5),
+                termination_date=date(2018, 5, 19),
+                termination_reason=
+                StateSupervisionPeriodTerminationReason.DISCHARGE,
+                supervision_type=StateSupervisionType.PROBATION
+            )
+
+        supervision_sentence = \
+            StateSupervisionSentence.new_with_defaults(
+                supervision_sentence_id=111,
+                start_date=date(2017, 1, 1),
+                external_id='ss1',
+                state_code='US_ND',
+                status=StateSentenceStatus.COMPLETED,
+                supervision_type=StateSupervisionType.PROBATION,
+                projected_completion_date=date(2018, 5, 19),
+                completion_date=date(2018, 5, 19),
+                supervision_periods=[supervision_period]
+            )
+
+        all_supervision_time_buckets = identifier.find_supervision_time_buckets(
+            [supervision_sentence], [], [supervision_period], [], [], [],
+            DEFAULT_SSVR_AGENT_ASSOCIATIONS,
+            DEFAULT_SUPERVISION_PERIOD_AGENT_ASSOCIATIONS
+        )
+
+        supervision_time_buckets = identifier.find_supervision_time_buckets(
+            [supervision_sentence], [], [supervision_period], [], [], [],
+            DEFAULT_SSVR_AGENT_ASSOCIATIONS,
+            DEFAULT_SUPERVISION_PERIOD_AGENT_ASSOCIATIONS,
+            calculation_window_lower_bound=date(2018, 5, 1)
+        )
+
+        self.assertEqual(len(all_supervision_time_buckets), 5)
+        self.assertEqual(len(supervision_time_buckets), 3)
+        self.assertCountEqual(supervision_time_buckets, [
+            bucket for bucket in all_supervision_time_buckets
+            if (bucket.year, bucket.month) >= (2018, 5)
+        ])
+
+        supervision_time_buckets = identifier.find_supervision_time_buckets(
+            [supervision_sentence], [], [supervision_period], [], [], [],
+            DEFAULT_SSVR_AGENT_ASSOCIATIONS,
+            DEFAULT_SUPERVISION_PERIOD_AGENT_ASSOCIATIONS,
+            calculation_window_lower_bound=date(2018, 6, 1)
+        )
+
+        self.assertEqual([], supervision_time_buckets)
+
     def test_find_supervision_time_buckets_overlaps_year(self):
         """Tests the find_supervision_time_buckets function for a single
         supervision period with no incarceration periods, where the supervision
@@ -44,8 +44,10 @@ from recidiviz.calculator.pipeline.supervision.supervision_time_bucket import \
     NonRevocationReturnSupervisionTimeBucket, \
     RevocationReturnSupervisionTimeBucket,\
     ProjectedSupervisionCompletionBucket, SupervisionTerminationBucket
-from recidiviz.calculator.pipeline.utils.beam_utils import AverageFnResult, ConvertDictToKVTuple
-from recidiviz.calculator.pipeline.utils.entity_hydration_utils import ConvertSentenceToStateSpecificType
+from recidiviz.calculator.pipeline.utils.beam_utils import AverageFnResult, ConvertDictToKVTuple, \
+    ParDoWithKeyedLookups
+from recidiviz.calculator.pipeline.utils.entity_hydration_utils import ConvertSentenceToStateSpecificType, \
+    us_mo_sentence_status_lookup_keys
 from recidiviz.calculator.pipeline.utils.metric_utils import \
     MetricMethodologyType
 from recidiviz.calculator.pipeline.utils import extractor_utils
@@ -498,13 +500,15 @@ class TestSupervisionPipeline(unittest.TestCase):
         supervision_sentences_converted = (
             supervision_sentences
             | 'Convert to state-specific supervision sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         incarceration_sentences_converted = (
             incarceration_sentences
             | 'Convert to state-specific incarceration sentences' >>
-            beam.ParDo(ConvertSentenceToStateSpecificType(), AsDict(us_mo_sentence_statuses_by_sentence))
+            ParDoWithKeyedLookups(ConvertSentenceToStateSpecificType(), [us_mo_sentence_statuses_by_sentence],
+                                  [us_mo_sentence_status_lookup_keys])
         )
 
         # Group each StatePerson with their StateIncarcerationPeriods and
@@ -555,19 +559,16 @@ class TestSupervisionPipeline(unittest.TestCase):
             beam.ParDo(pipeline.ConvertDictToKVTuple(), 'supervision_period_id')
         )
 
-        identifier_options = {
-            'state_code': 'ALL'
-        }
-
         # Identify SupervisionTimeBuckets from the StatePerson's
         # StateSupervisionSentences and StateIncarcerationPeriods
         person_time_buckets = (
             person_periods_and_sentences
-            | beam.ParDo(
+            | ParDoWithKeyedLookups(
                 pipeline.ClassifySupervisionTimeBuckets(),
-                AsDict(ssvr_agent_associations_as_kv),
-                AsDict(supervision_periods_to_agent_associations_as_kv),
-                **identifier_options))
+                [ssvr_agent_associations_as_kv,
+                 supervision_periods_to_agent_associations_as_kv],
+                [pipeline.violation_response_lookup_keys,
+                 pipeline.supervision_period_lookup_keys]))
 
         # Get pipeline job details for accessing job_id
         all_pipeline_options = PipelineOptions().get_all_options()
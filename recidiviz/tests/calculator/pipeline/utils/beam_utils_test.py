@@ -15,10 +15,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # =============================================================================
 """Tests for utils/beam_utils.py."""
+# pylint: disable=protected-access
 
 import unittest
 
 import apache_beam as beam
+from apache_beam.pvalue import AsDict
 from apache_beam.testing.test_pipeline import TestPipeline
 from apache_beam.testing.util import assert_that, equal_to
 
@@ -26,6 +28,25 @@ from recidiviz.calculator.pipeline.utils import beam_utils
 from recidiviz.calculator.pipeline.utils.beam_utils import AverageFnResult
 
 
+class _LookUpRows(beam.DoFn):
+    """Outputs each element with the rows it looks up in two tables."""
+
+    # pylint: disable=arguments-differ
+    def process(self, element, first_table, second_table, *args, **kwargs):
+        person_id, lookup_ids = element
+        yield (person_id,
+               [first_table.get(lookup_id) for lookup_id in lookup_ids],
+               [second_table.get(lookup_id) for lookup_id in lookup_ids])
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+def _lookup_ids(element):
+    _, lookup_ids = element
+    return lookup_ids
+
+
 class TestBeamUtils(unittest.TestCase):
     """Tests for the beam_utils functions."""
     def testAverageFn(self):
@@ -115,3 +136,108 @@ class TestBeamUtils(unittest.TestCase):
         assert_that(output, equal_to([]))
 
         test_pipeline.run()
+
+    def testCombinePerKeyWithPartials(self):
+        test_input = [('a', 1), ('a', 1), ('b', 0), ('a', 0), ('b', 1), ('c', 1)]
+
+        test_pipeline = TestPipeline()
+
+        inputs = test_pipeline | beam.Create(test_input)
+
+        sums = (inputs
+                | 'Test SumFn with partials' >>
+                beam_utils.CombinePerKeyWithPartials(beam_utils.SumFn()))
+
+        averages = (inputs
+                    | 'Test AverageFn with partials' >>
+                    beam_utils.CombinePerKeyWithPartials(beam_utils.AverageFn()))
+
+        assert_that(sums, equal_to([('a', 2), ('b', 1), ('c', 1)]), label='Check sums')
+        assert_that(averages, equal_to([
+            ('a', AverageFnResult(average_of_inputs=(2.0 / 3), input_count=3, sum_of_inputs=2)),
+            ('b', AverageFnResult(average_of_inputs=0.5, input_count=2, sum_of_inputs=1)),
+            ('c', AverageFnResult(average_of_inputs=1.0, input_count=1, sum_of_inputs=1))
+        ]), label='Check averages')
+
+        test_pipeline.run()
+
+    def testCombinePerKeyWithPartials_FlushesPartials(self):
+        test_input = [('a', 1), ('b', 1), ('a', 1), ('c', 1), ('a', 1), ('b', 1)]
+
+        test_pipeline = TestPipeline()
+
+        partials = (test_pipeline
+                    | beam.Create(test_input)
+                    | 'Partially combine' >>
+                    beam.ParDo(beam_utils._PartiallyCombinePerKey(beam_utils.SumFn(), max_partial_keys=1)))
+
+        sums = (partials
+                | 'Combine partials' >>
+                beam.CombinePerKey(beam_utils.MergeAccumulatorsFn(beam_utils.SumFn())))
+
+        # Each partial accumulator is flushed when a new key arrives
+        assert_that(partials, equal_to([('a', 1), ('b', 1), ('a', 1), ('c', 1), ('a', 1), ('b', 1)]),
+                    label='Check partials')
+        assert_that(sums, equal_to([('a', 3), ('b', 2), ('c', 1)]), label='Check sums')
+
+        test_pipeline.run()
+
+    def testCombinePerKeyWithPartials_InvalidMaxPartialKeys(self):
+        with self.assertRaises(ValueError):
+            beam_utils.CombinePerKeyWithPartials(beam_utils.SumFn(), max_partial_keys=0)
+
+    def testParDoWithKeyedLookups(self):
+        elements = [(1, [10, 11]), (1, [12]), (2, [10, 13]), (3, []),
+                    (4, [14])]
+        first_table = [(10, 'a'), (11, 'b'), (12, 'c'), (13, 'd'),
+                       (15, 'unused')]
+        second_table = [(10, 'x'), (14, 'y')]
+
+        correct_output = [
+            (1, ['a', 'b'], ['x', None]),
+            (1, ['c'], [None]),
+            (2, ['a', 'd'], ['x', None]),
+            (3, [], []),
+            (4, [None], ['y']),
+        ]
+
+        test_pipeline = TestPipeline()
+
+        element_pcollection = (test_pipeline
+                               | 'Create elements' >> beam.Create(elements))
+        first = test_pipeline | 'Create first table' >> beam.Create(
+            first_table)
+        second = test_pipeline | 'Create second table' >> beam.Create(
+            second_table)
+
+        output = (element_pcollection
+                  | 'Test ParDoWithKeyedLookups' >>
+                  beam_utils.ParDoWithKeyedLookups(
+                      _LookUpRows(), [first, second],
+                      [_lookup_ids, _lookup_ids]))
+
+        side_input_output = (element_pcollection
+                             | 'Look up with side inputs' >>
+                             beam.ParDo(_LookUpRows(), AsDict(first),
+                                        AsDict(second)))
+
+        assert_that(output, equal_to(correct_output))
+        assert_that(side_input_output, equal_to(correct_output),
+                    label='Side input output')
+
+        test_pipeline.run()
+
+    def testParDoWithKeyedLookups_NoInput(self):
+        test_pipeline = TestPipeline()
+
+        table = test_pipeline | 'Create table' >> beam.Create([(10, 'a')])
+        output = (test_pipeline
+                  | 'Create elements' >> beam.Create([])
+                  | 'Test ParDoWithKeyedLookups' >>
+                  beam_utils.ParDoWithKeyedLookups(
+                      _LookUpRows(), [table, table],
+                      [_lookup_ids, _lookup_ids]))
+
+        assert_that(output, equal_to([]))
+
+        test_pipeline.run()
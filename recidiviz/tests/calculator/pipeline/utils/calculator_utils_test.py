@@ -501,6 +501,30 @@ class TestRelevantMetricPeriods(unittest.TestCase):
         self.assertEqual(expected_periods, relevant_periods)
 
 
+class TestGetCalculationWindowLowerBoundDate(unittest.TestCase):
+    """Tests the get_calculation_window_lower_bound_date function."""
+
+    def test_get_calculation_window_lower_bound_date(self):
+        lower_bound = calculator_utils.get_calculation_window_lower_bound_date(date(2008, 1, 31), 1)
+
+        self.assertEqual(date(2005, 2, 1), lower_bound)
+
+        # The first day of the window is in the 36 month period, and the day before it is not
+        self.assertEqual([36], calculator_utils.relevant_metric_periods(lower_bound, 2008, 1))
+        self.assertEqual([], calculator_utils.relevant_metric_periods(date(2005, 1, 31), 2008, 1))
+
+    def test_get_calculation_window_lower_bound_date_longer_than_metric_periods(self):
+        lower_bound = calculator_utils.get_calculation_window_lower_bound_date(date(2008, 1, 31), 60)
+
+        self.assertEqual(date(2003, 2, 1), lower_bound)
+        self.assertEqual(calculator_utils.get_calculation_month_lower_bound_date(date(2008, 1, 31), 60), lower_bound)
+
+    def test_get_calculation_window_lower_bound_date_no_limit(self):
+        lower_bound = calculator_utils.get_calculation_window_lower_bound_date(date(2008, 1, 31), -1)
+
+        self.assertIsNone(lower_bound)
+
+
 INCLUDED_PIPELINES = ['incarceration', 'supervision']
 
 
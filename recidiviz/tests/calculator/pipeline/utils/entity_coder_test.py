@@ -0,0 +1,142 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for utils/entity_coder.py."""
+import pickle
+import unittest
+from datetime import date
+from typing import List
+
+import attr
+import apache_beam as beam
+
+from recidiviz.calculator.pipeline.utils import entity_coder
+from recidiviz.calculator.pipeline.utils.entity_coder import EntityCoder, EntityAwareFastPrimitivesCoder
+from recidiviz.common.constants.state.state_incarceration_period import StateIncarcerationPeriodStatus
+from recidiviz.persistence.entity.state import entities
+
+
+@attr.s(eq=False)
+class _StateSpecificIncarcerationPeriod(entities.StateIncarcerationPeriod):
+    """An entity subclass that is not in the state entities module."""
+    movement_codes: List[str] = attr.ib(factory=list)
+
+
+def _person_graph() -> entities.StatePerson:
+    person = entities.StatePerson.new_with_defaults(person_id=123, birthdate=date(1980, 1, 1))
+
+    race = entities.StatePersonRace.new_with_defaults(person_race_id=1, state_code='US_ND', person=person)
+    person.races = [race]
+
+    incarceration_period = entities.StateIncarcerationPeriod.new_with_defaults(
+        incarceration_period_id=10, external_id='ip1', state_code='US_ND',
+        status=StateIncarcerationPeriodStatus.NOT_IN_CUSTODY,
+        admission_date=date(2010, 1, 1), release_date=date(2010, 2, 1))
+    sentence_group = entities.StateSentenceGroup.new_with_defaults(
+        sentence_group_id=20, state_code='US_ND', person=person)
+    incarceration_sentence = entities.StateIncarcerationSentence.new_with_defaults(
+        incarceration_sentence_id=30, state_code='US_ND', person=person, sentence_group=sentence_group,
+        incarceration_periods=[incarceration_period])
+    incarceration_period.incarceration_sentences = [incarceration_sentence]
+    sentence_group.incarceration_sentences = [incarceration_sentence]
+    person.sentence_groups = [sentence_group]
+
+    return person
+
+
+class TestEntityCoder(unittest.TestCase):
+    """Tests the EntityCoder."""
+
+    def test_round_trip(self):
+        person = _person_graph()
+
+        coder = EntityCoder()
+        decoded = coder.decode(coder.encode(person))
+
+        self.assertEqual(person, decoded)
+        self.assertIsNot(person, decoded)
+
+    def test_round_trip_keeps_cycles_and_shared_references(self):
+        coder = EntityCoder()
+        decoded = coder.decode(coder.encode(_person_graph()))
+
+        self.assertIs(decoded, decoded.races[0].person)
+
+        sentence_group = decoded.sentence_groups[0]
+        incarceration_sentence = sentence_group.incarceration_sentences[0]
+        self.assertIs(decoded, incarceration_sentence.person)
+        self.assertIs(sentence_group, incarceration_sentence.sentence_group)
+        self.assertIs(incarceration_sentence,
+                      incarceration_sentence.incarceration_periods[0].incarceration_sentences[0])
+
+    def test_round_trip_from_non_root_entity(self):
+        person = _person_graph()
+        incarceration_period = person.sentence_groups[0].incarceration_sentences[0].incarceration_periods[0]
+
+        coder = EntityCoder()
+        decoded = coder.decode(coder.encode(incarceration_period))
+
+        self.assertEqual(incarceration_period, decoded)
+        self.assertEqual(person, decoded.incarceration_sentences[0].person)
+
+    def test_round_trip_entity_subclass(self):
+        incarceration_period = _StateSpecificIncarcerationPeriod.new_with_defaults(
+            incarceration_period_id=10, state_code='US_MO', movement_codes=['CODE1', 'CODE2'])
+        incarceration_period.incarceration_sentences = [
+            entities.StateIncarcerationSentence.new_with_defaults(
+                incarceration_sentence_id=30, state_code='US_MO', incarceration_periods=[incarceration_period])
+        ]
+
+        coder = EntityCoder()
+        decoded = coder.decode(coder.encode(incarceration_period))
+
+        self.assertIsInstance(decoded, _StateSpecificIncarcerationPeriod)
+        self.assertEqual(10, decoded.incarceration_period_id)
+        self.assertEqual(['CODE1', 'CODE2'], decoded.movement_codes)
+        self.assertIs(decoded, decoded.incarceration_sentences[0].incarceration_periods[0])
+
+    def test_encoding_is_smaller_than_pickle(self):
+        person = _person_graph()
+
+        self.assertLess(len(EntityCoder().encode(person)), len(pickle.dumps(person, pickle.HIGHEST_PROTOCOL)))
+
+
+class TestEntityAwareFastPrimitivesCoder(unittest.TestCase):
+    """Tests the EntityAwareFastPrimitivesCoder."""
+
+    def test_round_trip(self):
+        person = _person_graph()
+        value = (123, ('person', person), {'agent': {'agent_id': 5}}, [date(2020, 1, 1)])
+
+        coder = EntityAwareFastPrimitivesCoder()
+        decoded = coder.decode(coder.encode(value))
+
+        self.assertEqual(value, decoded)
+        self.assertIs(decoded[1][1], decoded[1][1].races[0].person)
+
+    def test_register_entity_coders(self):
+        entity_coder.register_entity_coders()
+
+        registry = beam.coders.registry
+
+        self.assertIsInstance(registry.get_coder(entities.StatePerson), EntityCoder)
+        self.assertIsInstance(registry.get_coder(beam.typehints.Tuple[int, entities.StateIncarcerationPeriod]),
+                              beam.coders.TupleCoder)
+        self.assertIsInstance(registry.get_coder(beam.typehints.Any), EntityAwareFastPrimitivesCoder)
+
+        # Registering the coders again does not change the fallback coder
+        entity_coder.register_entity_coders()
+        self.assertIsInstance(registry.get_coder(beam.typehints.Any), EntityAwareFastPrimitivesCoder)
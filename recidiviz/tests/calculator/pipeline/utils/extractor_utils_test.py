@@ -804,6 +804,21 @@ class TestExtractEntity(unittest.TestCase):
 
             test_pipeline.run()
 
+    def testExtractEntity_FilterQuery(self):
+        entity_class = entity_utils.get_entity_class_in_module_with_name(
+            entities, 'StateIncarcerationPeriod')
+
+        extract_entity = extractor_utils._ExtractEntity(
+            dataset='recidiviz-123.state', entity_class=entity_class, unifying_id_field='person_id',
+            parent_id_field=None, unifying_id_field_filter_set=None, state_code='US_ND',
+            unifying_id_field_filter_query='SELECT person_id FROM `recidiviz-123.state.changed_people`')
+
+        self.assertEqual(
+            "SELECT * FROM `recidiviz-123.state.state_incarceration_period` "
+            "WHERE person_id IN (SELECT person_id FROM `recidiviz-123.state.changed_people`) "
+            "AND state_code IN ('US_ND')",
+            extract_entity._get_entities_table_sql_query())
+
     def testExtractEntity_InvalidUnifyingIdField(self):
         person = remove_relationship_properties(
             database_test_utils.generate_test_person(123, [], None, None, None))
@@ -1688,6 +1703,61 @@ class TestHydrateRootEntityWithRelationshipPropertyEntities(unittest.TestCase):
         test_pipeline.run()
 
 
+    def testHydrateRelationshipsOnEntities_MultipleRootsInGroup(self):
+        person_id = 143
+
+        fine_1 = entities.StateFine.new_with_defaults(
+            fine_id=1111, status=entities.StateFineStatus.PAID,
+            state_code='us_ca')
+        fine_2 = entities.StateFine.new_with_defaults(
+            fine_id=2222, status=entities.StateFineStatus.PAID,
+            state_code='us_ca')
+        sentence_group = entities.StateSentenceGroup.new_with_defaults(
+            sentence_group_id=7895, status=StateSentenceStatus.SUSPENDED,
+            state_code='us_ca')
+        charges = [entities.StateCharge.new_with_defaults(
+            charge_id=charge_id, status=entities.ChargeStatus.PENDING,
+            state_code='us_ca') for charge_id in range(1, 6)]
+
+        element = [(person_id, {
+            schema.StateFine.__tablename__: [fine_1, fine_2],
+            'sentence_group': [(fine_2.fine_id, sentence_group)],
+            'charges': [(fine_1.fine_id, charges[0]),
+                        (fine_2.fine_id, charges[1]),
+                        (fine_1.fine_id, charges[2]),
+                        (fine_2.fine_id, charges[3]),
+                        (fine_1.fine_id, charges[4])]
+        })]
+
+        output_fine_1 = entities.StateFine.new_with_defaults(
+            fine_id=1111, status=entities.StateFineStatus.PAID,
+            state_code='us_ca', charges=[charges[0], charges[2], charges[4]])
+        output_fine_2 = entities.StateFine.new_with_defaults(
+            fine_id=2222, status=entities.StateFineStatus.PAID,
+            state_code='us_ca', sentence_group=sentence_group,
+            charges=[charges[1], charges[3]])
+
+        hydrate_kwargs = {'schema_class': schema.StateFine}
+
+        test_pipeline = TestPipeline()
+
+        output = (
+            test_pipeline
+            | "Convert to PCollection" >>
+            beam.Create(element)
+            | "Hydrate fines with relationship property entities" >>
+            beam.ParDo(
+                extractor_utils.
+                _HydrateRootEntitiesWithRelationshipPropertyEntities(),
+                **hydrate_kwargs)
+        )
+
+        assert_that(output, equal_to([(person_id, output_fine_1),
+                                      (person_id, output_fine_2)]))
+
+        test_pipeline.run()
+
+
 class TestRepackageUnifyingIdParentIdStructure(unittest.TestCase):
     """Tests the RepackageUnifyingIdParentIdStructure DoFn."""
 
@@ -0,0 +1,229 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for utils/incremental_utils.py."""
+# pylint: disable=protected-access
+import unittest
+
+import apache_beam as beam
+from apache_beam.testing.test_pipeline import TestPipeline
+from apache_beam.testing.util import assert_that, equal_to
+
+from recidiviz.calculator.pipeline.utils import incremental_utils
+from recidiviz.calculator.pipeline.utils.beam_utils import AverageFn, \
+    MergeAccumulatorsFn, SumFn
+from recidiviz.calculator.pipeline.utils.incremental_utils import \
+    IncrementalRunConfig
+from recidiviz.persistence.entity.state.entities import StatePerson
+
+_PIPELINE_OPTIONS = {
+    'project': 'recidiviz-123',
+    'job_name': 'full-us-nd-supervision-calculations',
+    'job_timestamp': '2020-03-01_09_00_00.000000'
+}
+
+
+class _CalculateCounts(beam.DoFn):
+    """Outputs a count combination for each event, tagged by event type."""
+
+    # pylint: disable=arguments-differ
+    def process(self, element, *args, **kwargs):
+        _, events = element
+        for event_type, value in events:
+            yield beam.pvalue.TaggedOutput(event_type, (f'{{"type": "{event_type}"}}', value))
+
+    def to_runner_api_parameter(self, _):
+        pass  # Passing unused abstract method.
+
+
+class TestIncrementalRunConfig(unittest.TestCase):
+    """Tests the queries of incremental runs."""
+
+    def setUp(self):
+        self.config = IncrementalRunConfig.for_pipeline(
+            'supervision', _PIPELINE_OPTIONS, state_dataset='state', output_dataset='dataflow_metrics')
+
+    def test_for_pipeline(self):
+        self.assertEqual('recidiviz-123', self.config.project)
+        self.assertEqual('supervision_person_metric_contributions', self.config.contributions_table)
+        self.assertEqual('supervision_incremental_runs', self.config.runs_table)
+        self.assertEqual('full-us-nd-supervision-calculations', self.config.job_name)
+        self.assertEqual('2020-03-01_09_00_00.000000', self.config.job_timestamp)
+        self.assertEqual('`recidiviz-123.dataflow_metrics.supervision_person_metric_contributions`',
+                         self.config.contributions_table_ref)
+        self.assertEqual('`recidiviz-123.dataflow_metrics.supervision_incremental_runs`',
+                         self.config.runs_table_ref)
+
+    def test_previous_run_query_only_completed_runs(self):
+        query = incremental_utils._previous_run_query(self.config)
+
+        self.assertIn('FROM `recidiviz-123.dataflow_metrics.supervision_incremental_runs` runs '
+                      'LEFT JOIN (SELECT job_id, COUNT(*) AS num_stored_contributions '
+                      'FROM `recidiviz-123.dataflow_metrics.supervision_person_metric_contributions` '
+                      'GROUP BY job_id) stored ON runs.job_id = stored.job_id', query)
+        self.assertIn("runs.job_name = 'full-us-nd-supervision-calculations' "
+                      "AND runs.job_timestamp = '2020-03-01_09_00_00.000000' "
+                      "AND runs.num_contributions = IFNULL(stored.num_stored_contributions, 0)", query)
+
+    def test_changed_person_ids_query(self):
+        query = incremental_utils.changed_person_ids_query(self.config)
+
+        self.assertTrue(query.startswith(
+            f'WITH previous_run AS ({incremental_utils._previous_run_query(self.config)}), '
+            f'settled_run AS ({incremental_utils._settled_run_query(self.config)}) '))
+
+        # Everyone is recomputed without a usable previous run
+        self.assertIn('SELECT person_id FROM `recidiviz-123.state.state_person` '
+                      'WHERE NOT EXISTS (SELECT job_id FROM previous_run)', query)
+
+        # People with snapshots that may not have appeared by the previous run are recomputed
+        self.assertIn('LEFT JOIN settled_run ON TRUE '
+                      'WHERE state_incarceration_period_history.incarceration_period_history_id > '
+                      'IFNULL(CAST(JSON_EXTRACT_SCALAR(settled_run.high_water_marks, '
+                      "'$.state_incarceration_period_history') AS INT64), 0)", query)
+        self.assertNotIn('state_agent_history', query)
+
+        # People with dates that passed since the previous run are recomputed
+        self.assertIn('(state_incarceration_period.release_date > previous_run.calculation_date '
+                      'AND state_incarceration_period.release_date <= CURRENT_DATE())', query)
+
+    def test_settled_run_query(self):
+        query = incremental_utils._settled_run_query(self.config)
+
+        # Snapshots below the marks of a run from just before the previous run may not have
+        # appeared by the previous run, e.g. if they were committed after a snapshot with a
+        # higher id was exported, so only the marks of an older run are used
+        self.assertIn("WHERE runs.job_name = 'full-us-nd-supervision-calculations' "
+                      "AND runs.high_water_marks IS NOT NULL "
+                      "AND runs.calculation_date <= "
+                      "DATE_SUB(previous_run.calculation_date, INTERVAL 3 DAY)", query)
+        self.assertTrue(query.endswith('ORDER BY runs.calculation_date DESC, runs.job_id DESC LIMIT 1'))
+
+    def test_stored_contributions_query(self):
+        query = incremental_utils.stored_contributions_query(self.config)
+
+        self.assertTrue(query.startswith(
+            'SELECT contributions.person_id, contributions.metric_tag, contributions.metric_key, '
+            'contributions.metric_accumulator '
+            'FROM `recidiviz-123.dataflow_metrics.supervision_person_metric_contributions` contributions '))
+        self.assertIn('ON contributions.job_id = previous_run.job_id', query)
+        self.assertIn('WHERE contributions.person_id NOT IN '
+                      f'({incremental_utils.changed_person_ids_query(self.config)})', query)
+
+    def test_high_water_marks_query(self):
+        query = incremental_utils.high_water_marks_query(self.config)
+
+        self.assertTrue(query.startswith('SELECT (SELECT MAX('))
+        self.assertIn('(SELECT MAX(person_history_id) FROM `recidiviz-123.state.state_person_history`) '
+                      'AS state_person_history', query)
+
+
+class TestMapToCombinedMetricValues(unittest.TestCase):
+    """Tests the MapToCombinedMetricValues PTransform."""
+
+    def test_map_to_combined_metric_values(self):
+        person = StatePerson.new_with_defaults(person_id=123)
+
+        test_pipeline = TestPipeline()
+
+        output = (test_pipeline
+                  | beam.Create([(person, [('admissions', 1), ('releases', 1), ('admissions', 1)])])
+                  | 'Map to combined metric values' >>
+                  incremental_utils.MapToCombinedMetricValues(_CalculateCounts(),
+                                                              {'admissions': SumFn(), 'releases': SumFn()}))
+
+        assert_that(output['admissions'], equal_to([('{"type": "admissions"}', 2)]), label='Check admissions')
+        assert_that(output['releases'], equal_to([('{"type": "releases"}', 1)]), label='Check releases')
+
+        test_pipeline.run()
+
+    def test_map_to_combined_metric_values_incremental_no_pipeline_options(self):
+        config = IncrementalRunConfig.for_pipeline(
+            'supervision', _PIPELINE_OPTIONS, state_dataset='state', output_dataset='dataflow_metrics')
+
+        with self.assertRaises(ValueError):
+            incremental_utils.MapToCombinedMetricValues(_CalculateCounts(), {'admissions': SumFn()},
+                                                        incremental_config=config)
+
+    def test_person_metric_contributions_round_trip(self):
+        person = StatePerson.new_with_defaults(person_id=123)
+        combine_fns = {'admissions': SumFn(), 'successes': AverageFn()}
+
+        test_pipeline = TestPipeline()
+
+        contributions = (
+            test_pipeline
+            | beam.Create([(person, [('admissions', 1), ('admissions', 1), ('successes', 1), ('successes', 0)])])
+            | 'Calculate contributions' >>
+            beam.ParDo(incremental_utils._CalculatePersonMetricContributions(_CalculateCounts(), combine_fns)))
+
+        assert_that(contributions, equal_to([
+            {'person_id': 123, 'metric_tag': 'admissions', 'metric_key': '{"type": "admissions"}',
+             'metric_accumulator': '2'},
+            {'person_id': 123, 'metric_tag': 'successes', 'metric_key': '{"type": "successes"}',
+             'metric_accumulator': '[1, 2]'},
+        ]), label='Check contributions')
+
+        stored_contributions = test_pipeline | 'Create stored contributions' >> beam.Create([
+            {'person_id': 456, 'metric_tag': 'admissions', 'metric_key': '{"type": "admissions"}',
+             'metric_accumulator': '3'},
+            {'person_id': 456, 'metric_tag': 'successes', 'metric_key': '{"type": "successes"}',
+             'metric_accumulator': '[0, 2]'},
+        ])
+
+        output = ((contributions, stored_contributions)
+                  | 'Merge contributions' >> beam.Flatten()
+                  | 'Tag contributions' >>
+                  beam.ParDo(incremental_utils._TagPersonMetricContribution()).with_outputs(
+                      'admissions', 'successes'))
+
+        admissions = (output.admissions
+                      | 'Merge admissions' >> beam.CombinePerKey(MergeAccumulatorsFn(combine_fns['admissions'])))
+        successes = (output.successes
+                     | 'Merge successes' >> beam.CombinePerKey(MergeAccumulatorsFn(combine_fns['successes']))
+                     | 'Extract success averages' >> beam.Map(lambda kv: (kv[0], kv[1].average_of_inputs)))
+
+        assert_that(admissions, equal_to([('{"type": "admissions"}', 5)]), label='Check admissions')
+        assert_that(successes, equal_to([('{"type": "successes"}', 0.25)]), label='Check successes')
+
+        test_pipeline.run()
+
+    def test_incremental_run_writable_dict(self):
+        pipeline_options = {
+            'runner': 'DirectRunner',
+            'region': 'us-west1',
+            **_PIPELINE_OPTIONS
+        }
+
+        test_pipeline = TestPipeline()
+
+        high_water_marks = test_pipeline | 'Create high-water marks' >> beam.Create([
+            {'state_person_history': 10, 'state_assessment_history': None}])
+
+        output = (test_pipeline
+                  | 'Create count' >> beam.Create([7])
+                  | 'Record run' >>
+                  beam.ParDo(incremental_utils._IncrementalRunWritableDict(),
+                             beam.pvalue.AsSingleton(high_water_marks), **pipeline_options)
+                  | 'Get recorded fields' >> beam.Map(
+                      lambda run: (run['job_name'], run['high_water_marks'], run['num_contributions'])))
+
+        assert_that(output, equal_to([(
+            'full-us-nd-supervision-calculations',
+            '{"state_assessment_history": null, "state_person_history": 10}',
+            7)]))
+
+        test_pipeline.run()
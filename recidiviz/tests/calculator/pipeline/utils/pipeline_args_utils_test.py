@@ -27,8 +27,9 @@ class TestPipelineArgsUtils(unittest.TestCase):
 
     DEFAULT_INCARCERATION_PIPELINE_ARGS =   \
         Namespace(calculation_month_limit=1, include_age=True, include_ethnicity=True, include_gender=True,
-                  include_race=True, input='state', methodology='BOTH', output='dataflow_metrics',
-                  person_filter_ids=None, reference_input='dashboard_views', state_code=None)
+                  include_race=True, incremental=False, input='state', methodology='BOTH',
+                  output='dataflow_metrics', person_filter_ids=None, reference_input='dashboard_views',
+                  state_code=None)
 
     DEFAULT_APACHE_BEAM_OPTIONS_DICT = {
         'runner': 'DataflowRunner',
@@ -94,6 +95,7 @@ class TestPipelineArgsUtils(unittest.TestCase):
             '--include_age=False',
             '--include_ethnicity=False',
             '--include_gender=False',
+            '--incremental',
             '--save_as_template'
         ]
 
@@ -104,8 +106,9 @@ class TestPipelineArgsUtils(unittest.TestCase):
         # Assert
         expected_incarceration_pipeline_args = \
             Namespace(calculation_month_limit=6, include_age=False, include_ethnicity=False, include_gender=False,
-                      include_race=False, input='county', methodology='EVENT', output='dataflow_metrics_2',
-                      person_filter_ids=None, reference_input='dashboard_views_2', state_code=None)
+                      include_race=False, incremental=True, input='county', methodology='EVENT',
+                      output='dataflow_metrics_2', person_filter_ids=None, reference_input='dashboard_views_2',
+                      state_code=None)
 
         self.assertEqual(incarceration_pipeline_args, expected_incarceration_pipeline_args)
 
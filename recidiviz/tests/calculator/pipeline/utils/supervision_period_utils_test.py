@@ -17,13 +17,15 @@
 # pylint: disable=unused-import,wrong-import-order
 
 """Tests for supervision_period_utils.py."""
+import random
 import unittest
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
 
 from recidiviz.calculator.pipeline.utils.supervision_period_utils import \
-    _find_last_supervision_period_terminated_before_date, SUPERVISION_PERIOD_PROXIMITY_DAY_LIMIT
+    _find_last_supervision_period_terminated_before_date, SUPERVISION_PERIOD_PROXIMITY_DAY_LIMIT, \
+    _supervision_periods_overlapping_with_date, SupervisionPeriodIntervalIndex
 from recidiviz.persistence.entity.state.entities import StateSupervisionPeriod
 
 
@@ -186,3 +188,62 @@ class TestFindMostRecentlyTerminatedSupervisionPeriod(unittest.TestCase):
             supervision_periods=[supervision_period_recent])
 
         self.assertIsNone(most_recently_terminated_period)
+
+
+class TestSupervisionPeriodIntervalIndex(unittest.TestCase):
+    """Tests the SupervisionPeriodIntervalIndex class."""
+
+    def test_periods_overlapping_with_date(self):
+        open_period = StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=1,
+            start_date=date(2005, 3, 1))
+        terminated_period = StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=2,
+            start_date=date(2003, 1, 1),
+            termination_date=date(2005, 3, 1))
+        one_day_period = StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=3,
+            start_date=date(2005, 3, 1),
+            termination_date=date(2005, 3, 1))
+        no_start_period = StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=4,
+            termination_date=date(2005, 3, 1))
+        terminated_before_start_period = StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=5,
+            start_date=date(2004, 1, 1),
+            termination_date=date(2003, 1, 1))
+
+        index = SupervisionPeriodIntervalIndex.for_supervision_periods(
+            [open_period, terminated_period, one_day_period, no_start_period, terminated_before_start_period])
+
+        self.assertEqual([], index.periods_overlapping_with_date(date(2002, 12, 31)))
+        self.assertEqual([terminated_period], index.periods_overlapping_with_date(date(2003, 1, 1)))
+        self.assertEqual([terminated_period], index.periods_overlapping_with_date(date(2005, 2, 28)))
+        self.assertEqual([open_period, terminated_period, one_day_period],
+                         index.periods_overlapping_with_date(date(2005, 3, 1)))
+        self.assertEqual([open_period], index.periods_overlapping_with_date(date(2005, 3, 2)))
+        self.assertEqual([open_period], index.periods_overlapping_with_date(date.max))
+
+    def test_periods_overlapping_with_date_matches_filter(self):
+        random.seed(0)
+
+        supervision_periods = []
+        for supervision_period_id in range(50):
+            start_date = date(2000, 1, 1) + relativedelta(days=random.randint(0, 1000))
+            supervision_periods.append(StateSupervisionPeriod.new_with_defaults(
+                supervision_period_id=supervision_period_id,
+                start_date=random.choice([start_date, start_date, None]),
+                termination_date=random.choice(
+                    [start_date + relativedelta(days=random.randint(-5, 300)), None])))
+
+        index = SupervisionPeriodIntervalIndex.for_supervision_periods(supervision_periods)
+
+        for days in range(-10, 1400):
+            intersection_date = date(2000, 1, 1) + relativedelta(days=days)
+            self.assertEqual(_supervision_periods_overlapping_with_date(intersection_date, supervision_periods),
+                             index.periods_overlapping_with_date(intersection_date))
+
+    def test_periods_overlapping_with_date_no_periods(self):
+        index = SupervisionPeriodIntervalIndex.for_supervision_periods([])
+
+        self.assertEqual([], index.periods_overlapping_with_date(date(2005, 3, 1)))
@@ -57,7 +57,8 @@ class TestBQExportCloudTaskManager(unittest.TestCase):
 
         body = {
             'table_name': table_name,
-            'schema_type': schema_type
+            'schema_type': schema_type,
+            'incremental': False
         }
 
         task = tasks_v2.types.task_pb2.Task(
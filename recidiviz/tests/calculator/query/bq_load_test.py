@@ -107,6 +107,20 @@ class BqLoadTest(unittest.TestCase):
         )
 
 
+    def test_start_table_load_source_uris(self):
+        """Test that start_table_load loads from |source_uris| if given."""
+        source_uris = ['gs://fake-export-uri-0', 'gs://fake-export-uri-1']
+        bq_load.start_table_load(self.mock_dataset, self.mock_table_id,
+                                 self.schema_type, source_uris=source_uris)
+
+        mock_client = self.mock_bq_utils.client.return_value
+        mock_client.load_table_from_uri.assert_called_with(
+            source_uris,
+            self.mock_dataset.table(self.mock_table_id),
+            job_config=mock.ANY
+        )
+
+
     def test_wait_for_table_load_calls_result(self):
         """Test that wait_for_table_load calls load_job.result()"""
         bq_load.wait_for_table_load(self.mock_load_job, self.mock_table)
@@ -80,5 +80,39 @@ class ViewManagerTest(unittest.TestCase):
             self.mock_dataset)
 
         self.mock_bq_utils.create_or_update_view.assert_has_calls(
-            [mock.call(self.mock_dataset, view) for view in self.mock_views]
+            [mock.call(self.mock_dataset, view) for view in self.mock_views],
+            any_order=True
         )
+
+    def test_create_dataset_and_update_views_dryRun(self):
+        """Test that create_dataset_and_update_views does not call BigQuery
+            in a dry run.
+        """
+        # pylint: disable=import-outside-toplevel
+        from recidiviz.calculator.query.county import view_manager
+
+        with mock.patch('recidiviz.utils.metadata.project_id',
+                        return_value=self.mock_project_id):
+            view_manager.create_dataset_and_update_views(
+                self.mock_view_dataset_name,
+                self.mock_views,
+                dry_run=True
+            )
+
+        self.mock_bq_utils.create_dataset_if_necessary.assert_not_called()
+        self.mock_bq_utils.create_or_update_view.assert_not_called()
+
+    def test_views_to_update_dependenciesAreValid(self):
+        """Test that every view referenced by a view in VIEWS_TO_UPDATE is
+            also in VIEWS_TO_UPDATE, and that there are no cycles.
+        """
+        # pylint: disable=import-outside-toplevel
+        from recidiviz.calculator.query import view_deployer
+        from recidiviz.calculator.query.county import view_config, \
+            view_manager
+
+        waves = view_deployer.get_deploy_waves(
+            view_config.VIEWS_DATASET, view_manager.VIEWS_TO_UPDATE)
+
+        self.assertEqual(len(view_manager.VIEWS_TO_UPDATE),
+                         sum(len(wave) for wave in waves))
@@ -17,11 +17,13 @@
 
 """Tests for export_config.py."""
 
+import os
 import string
 import unittest
 from unittest import mock
 
 import sqlalchemy
+import yaml
 
 from recidiviz.calculator.query import export_config
 
@@ -293,3 +295,31 @@ class ExportConfigTest(unittest.TestCase):
 
         for table in export_config.STATE_TABLES_TO_EXCLUDE_FROM_EXPORT:
             self.assertNotIn(table.name, to_export_names)
+
+    def test_incremental_calculation_history_tables_exported(self):
+        """Make sure the history tables of incremental calculation runs are
+        exported if a calculation pipeline job runs incrementally."""
+        pipeline_dir = os.path.join(
+            os.path.dirname(export_config.__file__), '..', 'pipeline')
+        pipelines = []
+        for templates_file in ('prod_calculation_pipeline_templates.yaml',
+                               'staging_only_calculation_pipeline_templates'
+                               '.yaml'):
+            with open(os.path.join(pipeline_dir, templates_file), 'r',
+                      encoding='utf-8') as templates:
+                pipelines += yaml.safe_load(templates).get('pipelines') or []
+
+        if any(pipeline.get('incremental') for pipeline in pipelines):
+            self.assertTrue(
+                export_config.EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES)
+
+        if export_config.EXPORT_INCREMENTAL_CALCULATION_HISTORY_TABLES:
+            for table_name in \
+                    export_config.INCREMENTAL_CALCULATION_HISTORY_TABLES:
+                self.assertIn(
+                    table_name,
+                    export_config.STATE_HISTORY_TABLES_TO_INCLUDE_IN_EXPORT)
+        else:
+            self.assertEqual(
+                ['state_person_history'],
+                export_config.STATE_HISTORY_TABLES_TO_INCLUDE_IN_EXPORT)
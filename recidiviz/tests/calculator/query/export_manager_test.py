@@ -99,6 +99,31 @@ class ExportManagerTestCounty(unittest.TestCase):
             dataset, table, self.schema_type)
 
 
+    @mock.patch('recidiviz.calculator.query.export_manager.pipelined_export')
+    def test_export_table_then_load_table_incremental(self,
+                                                      mock_pipelined_export):
+        """Test that export_table_then_load_table exports only the changed
+        rows of the table with the pipelined exporter when incremental."""
+        table = self.mock_export_config.COUNTY_TABLES_TO_EXPORT[0]
+        mock_pipelined_export.export_then_load_all_pipelined.return_value = \
+            mock.Mock(tables=[mock.Mock(table_name=table.name, success=True)])
+
+        self.assertTrue(export_manager.export_table_then_load_table(
+            table.name, self.mock_dataset, self.schema_type,
+            incremental=True))
+
+        mock_pipelined_export.export_then_load_all_pipelined.\
+            assert_called_once_with(
+                self.schema_type,
+                self.mock_dataset,
+                [table],
+                {table.name: self.mock_table_query},
+                {},
+                incremental=True)
+        self.mock_cloudsql_export.export_table.assert_not_called()
+        self.mock_bq_load.start_table_load_and_wait.assert_not_called()
+
+
     def test_export_table_then_load_table_doesnt_load(self):
         """Test that export_table_then_load_table doesn't load if export fails.
         """
@@ -146,33 +171,54 @@ class ExportManagerTestCounty(unittest.TestCase):
             export_manager.export_then_load_all_sequentially('nonsense')
 
 
-    def test_export_all_then_load_all(self):
-        """Test that export_all_then_load_all exports all tables then loads all
-            tables.
+    @mock.patch('recidiviz.calculator.query.export_manager.pipelined_export')
+    def test_export_all_then_load_all(self, mock_pipelined_export):
+        """Test that export_all_then_load_all exports then loads all tables
+            with the pipelined exporter.
         """
         default_dataset = self.mock_client.dataset(
             self.mock_export_config.COUNTY_BASE_TABLES_BQ_DATASET)
+        mock_pipelined_export.export_then_load_all_pipelined.return_value = \
+            mock.Mock(tables=[mock.Mock(table_name='first_table',
+                                        success=True)],
+                      total_seconds=1.0)
 
-        mock_parent = mock.Mock()
-        mock_parent.attach_mock(
-            self.mock_cloudsql_export.export_all_tables, 'export_all')
-        mock_parent.attach_mock(
-            self.mock_bq_load.load_all_tables_concurrently, 'load_all')
+        export_manager.export_all_then_load_all(self.schema_type)
 
-        export_all_then_load_all_calls = [
-            mock.call.export_all(
+        mock_pipelined_export.export_then_load_all_pipelined.\
+            assert_called_once_with(
                 self.schema_type,
-                self.mock_export_config.COUNTY_TABLES_TO_EXPORT,
-                self.mock_export_config.COUNTY_TABLE_EXPORT_QUERIES),
-            mock.call.load_all(
                 default_dataset,
                 self.mock_export_config.COUNTY_TABLES_TO_EXPORT,
-                self.schema_type)
-        ]
-
-        export_manager.export_all_then_load_all(self.schema_type)
+                self.mock_export_config.COUNTY_TABLE_EXPORT_QUERIES,
+                self.mock_export_config.COUNTY_TABLES_TO_SHARD,
+                incremental=False)
+        self.mock_cloudsql_export.export_all_tables.assert_not_called()
+        self.mock_bq_load.load_all_tables_concurrently.assert_not_called()
+
+    @mock.patch('recidiviz.calculator.query.export_manager.pipelined_export')
+    def test_export_all_then_load_all_incremental(self, mock_pipelined_export):
+        mock_pipelined_export.export_then_load_all_pipelined.return_value = \
+            mock.Mock(tables=[mock.Mock(table_name='first_table',
+                                        success=True)],
+                      total_seconds=1.0)
+
+        export_manager.export_all_then_load_all(self.schema_type,
+                                                incremental=True)
+
+        self.assertTrue(mock_pipelined_export.export_then_load_all_pipelined
+                        .call_args[1]['incremental'])
+
+    @mock.patch('recidiviz.calculator.query.export_manager.pipelined_export')
+    def test_export_all_then_load_all_logs_failures(self,
+                                                    mock_pipelined_export):
+        mock_pipelined_export.export_then_load_all_pipelined.return_value = \
+            mock.Mock(tables=[mock.Mock(table_name='first_table',
+                                        success=False)],
+                      total_seconds=1.0)
 
-        mock_parent.assert_has_calls(export_all_then_load_all_calls)
+        with self.assertLogs(level='ERROR'):
+            export_manager.export_all_then_load_all(self.schema_type)
 
 
     def test_export_all_then_load_all_fails_invalid_module(self):
@@ -202,7 +248,8 @@ class ExportManagerTestCounty(unittest.TestCase):
             content_type='application/json',
             headers={'X-Appengine-Inbound-Appid': 'test-project'})
         assert response.status_code == HTTPStatus.OK
-        mock_export.assert_called_with(table, dataset_ref, SchemaType.JAILS)
+        mock_export.assert_called_with(table, dataset_ref, SchemaType.JAILS,
+                                       incremental=False)
 
     @mock.patch('recidiviz.utils.metadata.project_id')
     @mock.patch('recidiviz.calculator.query.export_manager.export_table_then_load_table')
@@ -226,7 +273,34 @@ class ExportManagerTestCounty(unittest.TestCase):
             content_type='application/json',
             headers={'X-Appengine-Inbound-Appid': 'test-project'})
         assert response.status_code == HTTPStatus.OK
-        mock_export.assert_called_with(table, dataset_ref, SchemaType.STATE)
+        mock_export.assert_called_with(table, dataset_ref, SchemaType.STATE,
+                                       incremental=False)
+
+    @mock.patch('recidiviz.utils.metadata.project_id')
+    @mock.patch('recidiviz.calculator.query.export_manager.export_table_then_load_table')
+    def test_handle_bq_export_task_incremental(self, mock_export,
+                                               mock_project_id):
+        """Tests that the export is incremental when the
+        /export_manager/export endpoint is hit with incremental set."""
+        self.mock_client.dataset.return_value = 'dataset'
+        mock_export.return_value = True
+
+        mock_project_id.return_value = 'test-project'
+        table = 'fake_table'
+        module = 'STATE'
+        dataset_ref = 'dataset'
+        route = '/export'
+        data = {"table_name": table, "schema_type": module,
+                "incremental": True}
+
+        response = self.mock_flask_client.post(
+            route,
+            data=json.dumps(data),
+            content_type='application/json',
+            headers={'X-Appengine-Inbound-Appid': 'test-project'})
+        assert response.status_code == HTTPStatus.OK
+        mock_export.assert_called_with(table, dataset_ref, SchemaType.STATE,
+                                       incremental=True)
 
     @mock.patch('recidiviz.utils.metadata.project_id')
     @mock.patch('recidiviz.calculator.query.export_manager.export_table_then_load_table')
@@ -316,3 +390,26 @@ class ExportManagerTestCounty(unittest.TestCase):
             assert_not_called()
         mock_pubsub_helper.publish_message_to_topic.assert_called_with(
             message=message, topic=topic)
+
+    @mock.patch('recidiviz.utils.metadata.project_id')
+    @mock.patch(
+        'recidiviz.calculator.query.export_manager.BQExportCloudTaskManager')
+    def test_create_all_state_bq_export_tasks_incremental(self,
+                                                          mock_task_manager,
+                                                          mock_project_id):
+        """Tests that incremental export tasks are created for each state table
+        when the /create_state_export_tasks endpoint is hit with incremental
+        set."""
+        self.mock_export_config.STATE_TABLES_TO_EXPORT = \
+            self.mock_export_config.COUNTY_TABLES_TO_EXPORT
+
+        mock_project_id.return_value = 'test-project'
+        route = '/create_state_export_tasks?incremental=true'
+
+        response = self.mock_flask_client.get(
+            route,
+            headers={'X-Appengine-Inbound-Appid': 'test-project'})
+        assert response.status_code == HTTPStatus.OK
+        mock_task_manager.return_value.create_bq_task.assert_has_calls([
+            mock.call('first_table', 'STATE', incremental=True),
+            mock.call('second_table', 'STATE', incremental=True)])
@@ -0,0 +1,262 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for incremental_export.py."""
+import datetime
+import unittest
+
+from google.cloud import bigquery
+
+from recidiviz.calculator.query import incremental_export
+from recidiviz.calculator.query.incremental_export import HighWaterMark
+from recidiviz.persistence.database.base_schema import JailsBase
+from recidiviz.persistence.database.schema.county import schema
+from recidiviz.persistence.database.session_factory import SessionFactory
+from recidiviz.persistence.database.sqlalchemy_engine_manager import \
+    SQLAlchemyEngineManager
+from recidiviz.tests.utils import fakes
+
+_ALL_TABLES = JailsBase.metadata.tables
+
+_READ_TIME = datetime.datetime(2020, 1, 10, 4)
+
+
+def _mark(max_snapshot_id, exported_snapshot_id, read_time=_READ_TIME):
+    return HighWaterMark(max_snapshot_id=max_snapshot_id,
+                         read_time=read_time,
+                         exported_snapshot_id=exported_snapshot_id)
+
+
+class IncrementalExportTest(unittest.TestCase):
+    """Tests for incremental_export.py."""
+
+    def test_get_incremental_config_master_table(self):
+        config = incremental_export.get_incremental_config(
+            schema.Person.__table__, _ALL_TABLES)
+
+        self.assertEqual(config.key_column, 'person_id')
+        self.assertEqual(config.history_table, schema.PersonHistory.__table__)
+        self.assertFalse(config.is_history_table)
+
+    def test_get_incremental_config_history_table(self):
+        config = incremental_export.get_incremental_config(
+            schema.PersonHistory.__table__, _ALL_TABLES)
+
+        self.assertEqual(config.key_column, 'person_history_id')
+        self.assertEqual(config.history_table, schema.PersonHistory.__table__)
+        self.assertEqual(config.master_key_column, 'person_id')
+        self.assertTrue(config.is_history_table)
+
+    def test_get_incremental_config_no_history(self):
+        self.assertIsNone(incremental_export.get_incremental_config(
+            schema.ScraperSuccess.__table__, _ALL_TABLES))
+
+    def test_get_max_snapshot_id(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        engine = SQLAlchemyEngineManager.get_engine_for_schema_base(JailsBase)
+        history_table = schema.PersonHistory.__table__
+
+        self.assertIsNone(
+            incremental_export.get_max_snapshot_id(engine, history_table))
+
+        session = SessionFactory.for_schema_base(JailsBase)
+        person = schema.Person(person_id=1, region='region',
+                               jurisdiction_id='12345678')
+        session.add(person)
+        session.add(schema.PersonHistory(
+            person_history_id=1, person_id=1, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 1),
+            valid_to=datetime.datetime(2020, 1, 3)))
+        session.add(schema.PersonHistory(
+            person_history_id=2, person_id=1, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 2)))
+        session.commit()
+        session.close()
+
+        self.assertEqual(
+            incremental_export.get_max_snapshot_id(engine, history_table), 2)
+
+    def test_next_high_water_mark_first_export(self):
+        self.assertEqual(
+            incremental_export.next_high_water_mark(None, 10, _READ_TIME),
+            _mark(10, None))
+
+    def test_next_high_water_mark(self):
+        previous_mark = _mark(7, 4, read_time=_READ_TIME - datetime.timedelta(
+            days=1))
+
+        self.assertEqual(
+            incremental_export.next_high_water_mark(
+                previous_mark, 10, _READ_TIME),
+            _mark(10, 7))
+
+    def test_next_high_water_mark_previous_export_too_recent(self):
+        # Snapshots allocated shortly before the previous export may not have
+        # been committed yet, so they are exported again by the next export
+        previous_mark = _mark(7, 4, read_time=_READ_TIME - datetime.timedelta(
+            minutes=10))
+
+        self.assertEqual(
+            incremental_export.next_high_water_mark(
+                previous_mark, 10, _READ_TIME),
+            _mark(10, 4))
+
+    def test_high_water_mark_json(self):
+        mark = _mark(10, 8)
+        self.assertEqual(HighWaterMark.from_json(mark.to_json()), mark)
+
+    def test_high_water_mark_json_no_exported_snapshot_id(self):
+        mark = _mark(10, None)
+        self.assertEqual(HighWaterMark.from_json(mark.to_json()), mark)
+
+    def test_incremental_export_query_master_table(self):
+        config = incremental_export.get_incremental_config(
+            schema.Person.__table__, _ALL_TABLES)
+        mark = _mark(12, 10)
+
+        self.assertEqual(
+            incremental_export.incremental_export_query(
+                'SELECT person_id, region FROM person', config, mark),
+            "SELECT person_id, region FROM person WHERE person_id IN ("
+            "SELECT person_id FROM person_history WHERE "
+            "person_history_id > 10)")
+
+    def test_incremental_export_query_history_table(self):
+        config = incremental_export.get_incremental_config(
+            schema.PersonHistory.__table__, _ALL_TABLES)
+        mark = _mark(12, 10)
+
+        # Every snapshot of a changed person is exported again, including
+        # the snapshots closed by the change
+        self.assertEqual(
+            incremental_export.incremental_export_query(
+                'SELECT person_history_id FROM person_history', config, mark),
+            "SELECT person_history_id FROM person_history WHERE person_id IN ("
+            "SELECT person_id FROM person_history WHERE "
+            "person_history_id > 10)")
+
+    def test_incremental_export_query_history_table_closed_snapshot(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        engine = SQLAlchemyEngineManager.get_engine_for_schema_base(JailsBase)
+        config = incremental_export.get_incremental_config(
+            schema.PersonHistory.__table__, _ALL_TABLES)
+
+        session = SessionFactory.for_schema_base(JailsBase)
+        for person_id in (1, 2):
+            session.add(schema.Person(person_id=person_id, region='region',
+                                      jurisdiction_id='12345678'))
+        # Person 1 was last exported with an open snapshot, which a later
+        # change closed with a valid_to from long before the last export
+        session.add(schema.PersonHistory(
+            person_history_id=1, person_id=1, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 1),
+            valid_to=datetime.datetime(2020, 1, 2)))
+        session.add(schema.PersonHistory(
+            person_history_id=2, person_id=2, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 1)))
+        session.add(schema.PersonHistory(
+            person_history_id=3, person_id=1, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 2)))
+        session.commit()
+        session.close()
+
+        query = incremental_export.incremental_export_query(
+            'SELECT person_history_id FROM person_history', config,
+            _mark(2, 2))
+
+        self.assertEqual(
+            sorted(row[0] for row in engine.execute(query)), [1, 3])
+
+    def test_incremental_export_query_no_exported_snapshot_id(self):
+        config = incremental_export.get_incremental_config(
+            schema.Person.__table__, _ALL_TABLES)
+
+        with self.assertRaises(ValueError):
+            incremental_export.incremental_export_query(
+                'SELECT person_id FROM person', config, _mark(10, None))
+
+    def test_snapshot_committed_after_later_snapshot(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        engine = SQLAlchemyEngineManager.get_engine_for_schema_base(JailsBase)
+        config = incremental_export.get_incremental_config(
+            schema.Person.__table__, _ALL_TABLES)
+
+        def add_person(person_id):
+            session = SessionFactory.for_schema_base(JailsBase)
+            session.add(schema.Person(person_id=person_id, region='region',
+                                      jurisdiction_id='12345678'))
+            session.add(schema.PersonHistory(
+                person_history_id=person_id, person_id=person_id,
+                region='region', jurisdiction_id='12345678',
+                valid_from=datetime.datetime(2020, 1, 9)))
+            session.commit()
+            session.close()
+
+        def export(previous_mark, read_time):
+            mark = incremental_export.next_high_water_mark(
+                previous_mark,
+                incremental_export.get_max_snapshot_id(
+                    engine, config.history_table),
+                read_time)
+            query = incremental_export.incremental_export_query(
+                'SELECT person_id FROM person', config, previous_mark)
+            return mark, sorted(row[0] for row in engine.execute(query))
+
+        add_person(1)
+        first_mark = _mark(1, 1, read_time=_READ_TIME)
+
+        # Snapshot 2 is allocated before snapshot 3, but only commits after
+        # the export that sees snapshot 3
+        add_person(3)
+        second_mark, exported = export(
+            first_mark, _READ_TIME + datetime.timedelta(days=1))
+        self.assertEqual(exported, [3])
+        add_person(2)
+
+        _, exported = export(second_mark,
+                             _READ_TIME + datetime.timedelta(days=2))
+        self.assertEqual(exported, [2, 3])
+
+    def test_merge_query(self):
+        dataset_ref = bigquery.dataset.DatasetReference('project', 'census')
+
+        self.assertEqual(
+            incremental_export.merge_query(
+                dataset_ref, 'person', ['person_id', 'region', 'race'],
+                'person_id'),
+            'MERGE `project.census.person` target '
+            'USING `project.census.person_incremental` staging '
+            'ON target.person_id = staging.person_id '
+            'WHEN MATCHED THEN UPDATE SET region = staging.region, '
+            'race = staging.race '
+            'WHEN NOT MATCHED THEN INSERT (person_id, region, race) '
+            'VALUES (staging.person_id, staging.region, staging.race)')
+
+    def test_merge_query_key_only(self):
+        dataset_ref = bigquery.dataset.DatasetReference('project', 'census')
+
+        self.assertEqual(
+            incremental_export.merge_query(
+                dataset_ref, 'table', ['id'], 'id'),
+            'MERGE `project.census.table` target '
+            'USING `project.census.table_incremental` staging '
+            'ON target.id = staging.id '
+            'WHEN NOT MATCHED THEN INSERT (id) VALUES (staging.id)')
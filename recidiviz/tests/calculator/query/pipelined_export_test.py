@@ -0,0 +1,512 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for pipelined_export.py."""
+import datetime
+import json
+import unittest
+from unittest import mock
+
+import sqlalchemy
+from freezegun import freeze_time
+from google.cloud import bigquery, exceptions
+
+from recidiviz.calculator.query import pipelined_export
+from recidiviz.calculator.query.incremental_export import HighWaterMark
+from recidiviz.persistence.database.base_schema import JailsBase
+from recidiviz.persistence.database.schema.county import schema
+from recidiviz.persistence.database.session_factory import SessionFactory
+from recidiviz.persistence.database.sqlalchemy_engine_manager import \
+    SchemaType
+from recidiviz.tests.utils import fakes
+
+
+class ShardingTest(unittest.TestCase):
+    """Tests for splitting tables into id-range shards."""
+
+    def test_split_id_range(self):
+        self.assertEqual(
+            pipelined_export.split_id_range(1, 100, 4),
+            [(None, 26), (26, 51), (51, 76), (76, None)])
+
+    def test_split_id_range_fewer_ids_than_shards(self):
+        self.assertEqual(pipelined_export.split_id_range(1, 2, 4),
+                         [(None, 2), (2, None)])
+        self.assertEqual(pipelined_export.split_id_range(5, 5, 4),
+                         [(None, None)])
+
+    def test_split_id_range_covers_all_ids(self):
+        for min_id, max_id, num_shards in [(1, 7, 3), (0, 1000, 7),
+                                           (10, 19, 10), (3, 4, 2)]:
+            id_ranges = pipelined_export.split_id_range(
+                min_id, max_id, num_shards)
+            self.assertLessEqual(len(id_ranges), num_shards)
+            for i in range(min_id - 5, max_id + 5):
+                matching = [
+                    (lower, upper) for lower, upper in id_ranges
+                    if (lower is None or lower <= i)
+                    and (upper is None or i < upper)]
+                self.assertEqual(len(matching), 1)
+
+    def test_sharded_export_query(self):
+        query = 'SELECT a, b FROM t'
+        self.assertEqual(
+            pipelined_export.sharded_export_query(query, 'id', (None, 10)),
+            'SELECT a, b FROM t WHERE id < 10')
+        self.assertEqual(
+            pipelined_export.sharded_export_query(query, 'id', (10, 20)),
+            'SELECT a, b FROM t WHERE id >= 10 AND id < 20')
+        self.assertEqual(
+            pipelined_export.sharded_export_query(query, 'id', (20, None)),
+            'SELECT a, b FROM t WHERE id >= 20')
+        self.assertEqual(
+            pipelined_export.sharded_export_query(query, 'id', (None, None)),
+            query)
+
+    def test_get_id_range_shards(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        session = SessionFactory.for_schema_base(JailsBase)
+        for person_id in range(1, 101):
+            session.add(schema.Person(person_id=person_id, region='region',
+                                      jurisdiction_id='12345678'))
+        session.commit()
+        session.close()
+
+        self.assertEqual(
+            pipelined_export.get_id_range_shards(
+                SchemaType.JAILS, schema.Person.__table__, 4),
+            [(None, 26), (26, 51), (51, 76), (76, None)])
+
+    def test_get_id_range_shards_empty_table(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        self.assertIsNone(pipelined_export.get_id_range_shards(
+            SchemaType.JAILS, schema.Person.__table__, 4))
+
+    def test_get_id_range_shards_single_shard(self):
+        self.assertIsNone(pipelined_export.get_id_range_shards(
+            SchemaType.JAILS, schema.Person.__table__, 1))
+
+    def test_get_id_range_shards_no_integer_primary_key(self):
+        table = sqlalchemy.Table(
+            'string_keyed', sqlalchemy.MetaData(),
+            sqlalchemy.Column('id', sqlalchemy.String, primary_key=True))
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(pipelined_export.get_id_range_shards(
+                SchemaType.JAILS, table, 4))
+
+
+class ExportThenLoadAllPipelinedTest(unittest.TestCase):
+    """Tests for export_then_load_all_pipelined."""
+
+    def setUp(self):
+        self.schema_type = SchemaType.JAILS
+        self.dataset_ref = bigquery.dataset.DatasetReference(
+            'fake-recidiviz-project', 'census')
+        self.tables = [schema.Person.__table__, schema.Booking.__table__]
+        self.export_queries = {
+            'person': 'SELECT person_id FROM person',
+            'booking': 'SELECT booking_id FROM booking',
+        }
+
+        self.cloudsql_export_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.cloudsql_export')
+        self.mock_cloudsql_export = self.cloudsql_export_patcher.start()
+        self.mock_cloudsql_export.export_table.return_value = True
+
+        self.bq_load_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.bq_load')
+        self.mock_bq_load = self.bq_load_patcher.start()
+        self.mock_bq_load.start_table_load.side_effect = \
+            lambda dataset_ref, table_name, schema_type, source_uris, \
+            destination_table_id: (
+                mock.Mock(output_rows=len(table_name)),
+                dataset_ref.table(destination_table_id or table_name))
+        self.mock_bq_load.wait_for_table_load.return_value = True
+
+        self.export_config_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.export_config')
+        self.mock_export_config = self.export_config_patcher.start()
+        self.mock_export_config.gcs_export_bucket.return_value = 'bucket'
+        self.mock_export_config.gcs_export_uri.side_effect = \
+            lambda table_name: f'gs://bucket/{table_name}.csv'
+        self.mock_export_config.gcs_export_shard_uri.side_effect = \
+            lambda table_name, shard, num_shards: \
+            f'gs://bucket/{table_name}-{shard}-of-{num_shards}.csv'
+
+        self.storage_client_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.storage_client')
+        self.mock_blob = self.storage_client_patcher.start().return_value \
+            .bucket.return_value.blob.return_value
+
+        self.shards_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.get_id_range_shards')
+        self.mock_get_shards = self.shards_patcher.start()
+        self.mock_get_shards.return_value = None
+
+    def tearDown(self):
+        self.cloudsql_export_patcher.stop()
+        self.bq_load_patcher.stop()
+        self.export_config_patcher.stop()
+        self.storage_client_patcher.stop()
+        self.shards_patcher.stop()
+
+    def test_load_starts_after_own_export(self):
+        mock_parent = mock.Mock()
+        mock_parent.attach_mock(self.mock_cloudsql_export.export_table,
+                                'export')
+        mock_parent.attach_mock(self.mock_bq_load.start_table_load, 'load')
+
+        pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {})
+
+        self.assertEqual(
+            [c[0] for c in mock_parent.mock_calls],
+            ['export', 'load', 'export', 'load'])
+        mock_parent.assert_has_calls([
+            mock.call.export(self.schema_type, 'person',
+                             'SELECT person_id FROM person',
+                             export_uri='gs://bucket/person.csv'),
+            mock.call.load(self.dataset_ref, 'person', self.schema_type,
+                           source_uris=['gs://bucket/person.csv'],
+                           destination_table_id=None),
+        ])
+
+    def test_sharded_export(self):
+        self.mock_get_shards.side_effect = \
+            lambda schema_type, table, num_shards: \
+            [(None, 10), (10, None)] if num_shards > 1 else None
+
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {'person': 2})
+
+        self.mock_cloudsql_export.export_table.assert_has_calls([
+            mock.call(self.schema_type, 'person',
+                      'SELECT person_id FROM person WHERE person_id < 10',
+                      export_uri='gs://bucket/person-0-of-2.csv'),
+            mock.call(self.schema_type, 'person',
+                      'SELECT person_id FROM person WHERE person_id >= 10',
+                      export_uri='gs://bucket/person-1-of-2.csv'),
+            mock.call(self.schema_type, 'booking',
+                      'SELECT booking_id FROM booking',
+                      export_uri='gs://bucket/booking.csv'),
+        ])
+        self.mock_bq_load.start_table_load.assert_any_call(
+            self.dataset_ref, 'person', self.schema_type,
+            source_uris=['gs://bucket/person-0-of-2.csv',
+                         'gs://bucket/person-1-of-2.csv'],
+            destination_table_id=None)
+        self.assertEqual([stats.num_shards for stats in manifest.tables],
+                         [2, 1])
+
+    def test_manifest(self):
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {})
+
+        self.assertEqual(manifest.schema_type, self.schema_type.value)
+        self.assertEqual([(stats.table_name, stats.num_rows, stats.success)
+                          for stats in manifest.tables],
+                         [('person', 6, True), ('booking', 7, True)])
+        for stats in manifest.tables:
+            self.assertIsNotNone(stats.export_seconds)
+            self.assertIsNotNone(stats.load_seconds)
+
+        self.mock_blob.upload_from_string.assert_called_once()
+        uploaded = json.loads(
+            self.mock_blob.upload_from_string.call_args[0][0])
+        self.assertEqual(uploaded['schema_type'], self.schema_type.value)
+        self.assertEqual(len(uploaded['tables']), 2)
+
+    def test_failed_export_not_loaded(self):
+        self.mock_cloudsql_export.export_table.side_effect = [False, True]
+
+        with self.assertLogs(level='ERROR'):
+            manifest = pipelined_export.export_then_load_all_pipelined(
+                self.schema_type, self.dataset_ref, self.tables,
+                self.export_queries, {})
+
+        self.mock_bq_load.start_table_load.assert_called_once_with(
+            self.dataset_ref, 'booking', self.schema_type,
+            source_uris=['gs://bucket/booking.csv'],
+            destination_table_id=None)
+        self.assertEqual([stats.success for stats in manifest.tables],
+                         [False, True])
+
+    def test_failed_load(self):
+        self.mock_bq_load.wait_for_table_load.return_value = False
+
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {})
+
+        self.assertEqual([(stats.success, stats.num_rows)
+                          for stats in manifest.tables],
+                         [(False, None), (False, None)])
+
+    def test_unknown_table(self):
+        with self.assertLogs(level='ERROR'):
+            manifest = pipelined_export.export_then_load_all_pipelined(
+                self.schema_type, self.dataset_ref, self.tables,
+                {'booking': 'SELECT booking_id FROM booking'}, {})
+
+        self.assertEqual([stats.success for stats in manifest.tables],
+                         [False, True])
+
+    def test_manifest_write_failure_does_not_fail_run(self):
+        self.mock_blob.upload_from_string.side_effect = \
+            exceptions.ServiceUnavailable('!')
+
+        with self.assertLogs(level='ERROR'):
+            manifest = pipelined_export.export_then_load_all_pipelined(
+                self.schema_type, self.dataset_ref, self.tables,
+                self.export_queries, {})
+
+        self.assertTrue(all(stats.success for stats in manifest.tables))
+
+
+class ExportThenLoadAllIncrementalTest(unittest.TestCase):
+    """Tests for export_then_load_all_pipelined in incremental mode."""
+
+    def setUp(self):
+        self.schema_type = SchemaType.JAILS
+        self.dataset_ref = bigquery.dataset.DatasetReference(
+            'fake-recidiviz-project', 'census')
+        self.tables = [schema.Person.__table__,
+                       schema.PersonHistory.__table__,
+                       schema.ScraperSuccess.__table__]
+        self.export_queries = {
+            'person': 'SELECT person_id, region FROM person',
+            'person_history': 'SELECT person_history_id FROM person_history',
+            'scraper_success': 'SELECT scraper_success_id '
+                               'FROM scraper_success',
+        }
+
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        session = SessionFactory.for_schema_base(JailsBase)
+        session.add(schema.Person(person_id=1, region='region',
+                                  jurisdiction_id='12345678'))
+        session.add(schema.PersonHistory(
+            person_history_id=5, person_id=1, region='region',
+            jurisdiction_id='12345678',
+            valid_from=datetime.datetime(2020, 1, 5)))
+        session.commit()
+        session.close()
+        self.now = datetime.datetime(2020, 1, 10, 4)
+        self.freezer = freeze_time(self.now)
+        self.freezer.start()
+        # The previous export ran a day ago, and had already seen snapshots
+        # up to 3 committed by the export before it
+        self.previous_mark = HighWaterMark(
+            max_snapshot_id=4, read_time=self.now - datetime.timedelta(days=1),
+            exported_snapshot_id=3)
+        self.current_mark = HighWaterMark(
+            max_snapshot_id=5, read_time=self.now, exported_snapshot_id=4)
+
+        self.cloudsql_export_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.cloudsql_export')
+        self.mock_cloudsql_export = self.cloudsql_export_patcher.start()
+        self.mock_cloudsql_export.export_table.return_value = True
+
+        self.bq_load_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.bq_load')
+        self.mock_bq_load = self.bq_load_patcher.start()
+        self.mock_bq_load.start_table_load.side_effect = \
+            lambda dataset_ref, table_name, schema_type, source_uris, \
+            destination_table_id: (
+                mock.Mock(output_rows=1),
+                dataset_ref.table(destination_table_id or table_name))
+        self.mock_bq_load.wait_for_table_load.return_value = True
+
+        self.bq_utils_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.bq_utils')
+        self.mock_client = self.bq_utils_patcher.start().client.return_value
+
+        self.export_config_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.export_config')
+        self.mock_export_config = self.export_config_patcher.start()
+        self.mock_export_config.gcs_export_bucket.return_value = 'bucket'
+        self.mock_export_config.gcs_export_uri.side_effect = \
+            lambda table_name: f'gs://bucket/{table_name}.csv'
+        self.mock_export_config.COUNTY_TABLE_EXPORT_SCHEMA = {
+            'person': [{'name': 'person_id'}, {'name': 'region'}],
+            'person_history': [{'name': 'person_history_id'}],
+        }
+
+        self.storage_client_patcher = mock.patch(
+            'recidiviz.calculator.query.pipelined_export.storage_client')
+        self.mock_bucket = self.storage_client_patcher.start().return_value \
+            .bucket.return_value
+        self.blobs = {}
+        self.mock_bucket.blob.side_effect = self._get_blob
+
+    def tearDown(self):
+        self.cloudsql_export_patcher.stop()
+        self.bq_load_patcher.stop()
+        self.bq_utils_patcher.stop()
+        self.export_config_patcher.stop()
+        self.storage_client_patcher.stop()
+        self.freezer.stop()
+
+    def _get_blob(self, path):
+        if path not in self.blobs:
+            self.blobs[path] = mock.Mock()
+            self.blobs[path].download_as_string.side_effect = \
+                exceptions.NotFound('!')
+        return self.blobs[path]
+
+    def _set_high_water_marks(self, marks):
+        blob = self._get_blob(
+            'export_manifests/JAILS/high_water_marks.json')
+        blob.download_as_string.side_effect = None
+        blob.download_as_string.return_value = json.dumps(
+            {table_name: mark.to_json() for table_name, mark in marks.items()})
+
+    def _saved_high_water_marks(self):
+        blob = self.blobs['export_manifests/JAILS/high_water_marks.json']
+        return {table_name: HighWaterMark.from_json(mark_json)
+                for table_name, mark_json in json.loads(
+                    blob.upload_from_string.call_args[0][0]).items()}
+
+    def test_first_run_exports_in_full(self):
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {}, incremental=True)
+
+        self.mock_cloudsql_export.export_table.assert_has_calls([
+            mock.call(self.schema_type, table_name, query,
+                      export_uri=f'gs://bucket/{table_name}.csv')
+            for table_name, query in self.export_queries.items()])
+        self.mock_client.query.assert_not_called()
+        self.assertFalse(any(stats.incremental for stats in manifest.tables))
+        first_mark = HighWaterMark(max_snapshot_id=5, read_time=self.now,
+                                   exported_snapshot_id=None)
+        self.assertEqual(self._saved_high_water_marks(),
+                         {'person': first_mark,
+                          'person_history': first_mark})
+
+    def test_second_run_exports_in_full(self):
+        # The first run may have missed snapshots that were committed after
+        # it, so it doesn't tell which rows were exported
+        first_mark = HighWaterMark(
+            max_snapshot_id=4, read_time=self.now - datetime.timedelta(days=1),
+            exported_snapshot_id=None)
+        self._set_high_water_marks({'person': first_mark,
+                                    'person_history': first_mark})
+
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {}, incremental=True)
+
+        self.assertFalse(any(stats.incremental for stats in manifest.tables))
+        self.assertEqual(self._saved_high_water_marks(),
+                         {'person': self.current_mark,
+                          'person_history': self.current_mark})
+
+    def test_exports_changed_rows_and_merges(self):
+        previous_mark = self.previous_mark
+        self._set_high_water_marks({'person': previous_mark,
+                                    'person_history': previous_mark})
+
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {}, incremental=True)
+
+        changed_people = 'person_id IN (SELECT person_id FROM person_history ' \
+            'WHERE person_history_id > 3)'
+        self.mock_cloudsql_export.export_table.assert_has_calls([
+            mock.call(self.schema_type, 'person',
+                      f'SELECT person_id, region FROM person WHERE '
+                      f'{changed_people}',
+                      export_uri='gs://bucket/person_incremental.csv'),
+            mock.call(self.schema_type, 'person_history',
+                      f'SELECT person_history_id FROM person_history WHERE '
+                      f'{changed_people}',
+                      export_uri='gs://bucket/person_history_incremental.csv'),
+            mock.call(self.schema_type, 'scraper_success',
+                      'SELECT scraper_success_id FROM scraper_success',
+                      export_uri='gs://bucket/scraper_success.csv'),
+        ])
+        self.mock_bq_load.start_table_load.assert_any_call(
+            self.dataset_ref, 'person', self.schema_type,
+            source_uris=['gs://bucket/person_incremental.csv'],
+            destination_table_id='person_incremental')
+        self.mock_client.query.assert_any_call(
+            'MERGE `fake-recidiviz-project.census.person` target '
+            'USING `fake-recidiviz-project.census.person_incremental` staging '
+            'ON target.person_id = staging.person_id '
+            'WHEN MATCHED THEN UPDATE SET region = staging.region '
+            'WHEN NOT MATCHED THEN INSERT (person_id, region) '
+            'VALUES (staging.person_id, staging.region)')
+        self.assertEqual(self.mock_client.query.call_count, 2)
+        self.assertEqual([stats.incremental for stats in manifest.tables],
+                         [True, True, False])
+        self.assertTrue(all(stats.success for stats in manifest.tables))
+        self.assertEqual(self._saved_high_water_marks(),
+                         {'person': self.current_mark,
+                          'person_history': self.current_mark})
+
+    def test_failed_merge_keeps_high_water_mark(self):
+        previous_mark = self.previous_mark
+        self._set_high_water_marks({'person': previous_mark,
+                                    'person_history': previous_mark})
+        self.mock_client.query.return_value.result.side_effect = [
+            exceptions.BadRequest('!'), None]
+
+        with self.assertLogs(level='ERROR'):
+            manifest = pipelined_export.export_then_load_all_pipelined(
+                self.schema_type, self.dataset_ref, self.tables,
+                self.export_queries, {}, incremental=True,
+                max_in_flight_loads=1)
+
+        self.assertEqual([stats.success for stats in manifest.tables],
+                         [False, True, True])
+        self.assertEqual(self._saved_high_water_marks(),
+                         {'person': previous_mark,
+                          'person_history': self.current_mark})
+
+    def test_keeps_high_water_marks_of_other_tables(self):
+        previous_mark = self.previous_mark
+        other_mark = HighWaterMark(
+            max_snapshot_id=7, read_time=self.now - datetime.timedelta(days=1),
+            exported_snapshot_id=6)
+        self._set_high_water_marks({'person': previous_mark,
+                                    'booking': other_mark})
+
+        pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables[:1],
+            self.export_queries, {}, incremental=True)
+
+        self.assertEqual(self._saved_high_water_marks(),
+                         {'person': self.current_mark,
+                          'booking': other_mark})
+
+    def test_full_refresh_ignores_high_water_marks(self):
+        previous_mark = self.previous_mark
+        self._set_high_water_marks({'person': previous_mark,
+                                    'person_history': previous_mark})
+
+        manifest = pipelined_export.export_then_load_all_pipelined(
+            self.schema_type, self.dataset_ref, self.tables,
+            self.export_queries, {})
+
+        self.mock_cloudsql_export.export_table.assert_has_calls([
+            mock.call(self.schema_type, table_name, query,
+                      export_uri=f'gs://bucket/{table_name}.csv')
+            for table_name, query in self.export_queries.items()])
+        self.mock_client.query.assert_not_called()
+        self.assertFalse(any(stats.incremental for stats in manifest.tables))
@@ -17,7 +17,7 @@
 
 """Tests for export_manager.py."""
 
-# pylint: disable=protected-access
+import datetime
 import unittest
 from unittest import mock
 
@@ -39,6 +39,14 @@ class DashboardExportManagerTest(unittest.TestCase):
         self.client_patcher = mock.patch(
             'recidiviz.calculator.query.state.dashboard_export_manager.bq_utils.client')
         self.mock_client = self.client_patcher.start().return_value
+        self.mock_client.get_table.return_value.modified = \
+            datetime.datetime(2020, 1, 1)
+
+        self.storage_client_patcher = mock.patch(
+            'recidiviz.calculator.query.view_export_orchestrator.storage_client')
+        self.mock_blob = self.storage_client_patcher.start().return_value \
+            .bucket.return_value.blob.return_value
+        self.mock_blob.download_as_string.return_value = '{}'
 
         self.mock_view = bqview.BigQueryView(
             view_id='test_view',
@@ -67,6 +75,7 @@ class DashboardExportManagerTest(unittest.TestCase):
 
     def tearDown(self):
         self.client_patcher.stop()
+        self.storage_client_patcher.stop()
         self.dashboard_export_config_patcher.stop()
         self.view_manager_config_patcher.stop()
 
@@ -88,16 +97,35 @@ class DashboardExportManagerTest(unittest.TestCase):
         self.mock_client.query.assert_called()
         self.mock_client.extract_table.assert_called()
 
-    def test_export_views_to_table(self):
-        """Tests that the views are queried."""
-        dashboard_export_manager._export_views_to_tables(
-            self.mock_dataset,
-            self.mock_export_config.VIEWS_TO_EXPORT)
-        self.mock_client.query.assert_called()
+    @mock.patch(
+        'recidiviz.calculator.query.state.dashboard_export_manager.view_config')
+    def test_export_dashboard_data_to_cloud_storage_unchanged_skipsExport(
+            self, _mock_view_config):
+        """Tests that views which have not changed since the last export are
+        not queried or extracted again."""
+        result = dashboard_export_manager.export_dashboard_data_to_cloud_storage(
+            bucket='bucket')
+        self.assertEqual([('US_CA', 'test_view')], result.exported)
+        manifest = self.mock_blob.upload_from_string.call_args[0][0]
+        self.mock_client.reset_mock()
+        self.mock_blob.download_as_string.return_value = manifest
+
+        result = dashboard_export_manager.export_dashboard_data_to_cloud_storage(
+            bucket='bucket')
+
+        self.assertEqual([], result.exported)
+        self.assertEqual([('US_CA', 'test_view')], result.skipped)
+        self.mock_client.query.assert_not_called()
+        self.mock_client.extract_table.assert_not_called()
 
-    def test_export_view_tables_to_cloud_storage(self):
-        """Tests that the tables are extracted."""
-        dashboard_export_manager._export_view_tables_to_cloud_storage(
-            self.mock_dataset, self.mock_export_config.VIEWS_TO_EXPORT,
-            'bucket')
+    @mock.patch(
+        'recidiviz.calculator.query.state.dashboard_export_manager.view_config')
+    def test_export_dashboard_data_to_cloud_storage_notIncremental(
+            self, _mock_view_config):
+        """Tests that all views are exported when incremental is False."""
+        dashboard_export_manager.export_dashboard_data_to_cloud_storage(
+            bucket='bucket', incremental=False)
+
+        self.mock_blob.download_as_string.assert_not_called()
+        self.mock_client.query.assert_called()
         self.mock_client.extract_table.assert_called()
@@ -0,0 +1,124 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for view_deployer.py."""
+import threading
+import unittest
+
+from google.cloud import bigquery
+
+from recidiviz.calculator.query import bqview, view_deployer
+
+_DATASET = 'my_views_dataset'
+
+
+def _view(view_id: str, *referenced_view_ids: str) -> bqview.BigQueryView:
+    query = 'SELECT NULL LIMIT 0' + ''.join(
+        f' UNION ALL SELECT * FROM `fake-project.{_DATASET}.{referenced_id}`'
+        for referenced_id in referenced_view_ids)
+    return bqview.BigQueryView(view_id=view_id, view_query=query)
+
+
+class ViewDeployerTest(unittest.TestCase):
+    """Tests for view_deployer.py."""
+
+    def setUp(self):
+        self.dataset_ref = bigquery.dataset.DatasetReference(
+            'fake-project', _DATASET)
+
+    def test_get_view_dependencies(self):
+        views = [
+            _view('a'),
+            _view('b', 'a'),
+            bqview.BigQueryView(
+                view_id='c',
+                view_query=f'SELECT * FROM `{_DATASET}.b` '
+                           f'JOIN `fake-project.other_dataset.a` USING (x)'),
+        ]
+
+        self.assertEqual({'a': set(), 'b': {'a'}, 'c': {'b'}},
+                         view_deployer.get_view_dependencies(_DATASET, views))
+
+    def test_get_deploy_waves(self):
+        views = [_view('d', 'b', 'c'), _view('b', 'a'), _view('a'),
+                 _view('c', 'a'), _view('e')]
+
+        waves = view_deployer.get_deploy_waves(_DATASET, views)
+
+        self.assertEqual([['a', 'e'], ['b', 'c'], ['d']],
+                         [[view.view_id for view in wave] for wave in waves])
+
+    def test_get_deploy_waves_cycle_raises(self):
+        views = [_view('a', 'c'), _view('b', 'a'), _view('c', 'b'),
+                 _view('d')]
+
+        with self.assertRaisesRegex(view_deployer.ViewDagError,
+                                    r"cycle among views \['a', 'b', 'c'\]"):
+            view_deployer.get_deploy_waves(_DATASET, views)
+
+    def test_get_deploy_waves_missingReference_raises(self):
+        views = [_view('a'), _view('b', 'a', 'not_a_view')]
+
+        with self.assertRaisesRegex(view_deployer.ViewDagError,
+                                    'not_a_view'):
+            view_deployer.get_deploy_waves(_DATASET, views)
+
+    def test_get_deploy_waves_duplicateIds_raises(self):
+        with self.assertRaises(view_deployer.ViewDagError):
+            view_deployer.get_deploy_waves(_DATASET, [_view('a'), _view('a')])
+
+    def test_deploy_views_dependenciesDeployedFirst(self):
+        views = [_view('c', 'b'), _view('b', 'a'), _view('a'), _view('x')]
+        deployed = []
+        lock = threading.Lock()
+
+        def deploy(dataset_ref, view):
+            self.assertEqual(self.dataset_ref, dataset_ref)
+            with lock:
+                for dependency in view_deployer.get_view_dependencies(
+                        _DATASET, views)[view.view_id]:
+                    self.assertIn(dependency, deployed)
+                deployed.append(view.view_id)
+
+        view_deployer.deploy_views(self.dataset_ref, views, deploy,
+                                   max_workers=4)
+
+        self.assertCountEqual(['a', 'b', 'c', 'x'], deployed)
+
+    def test_deploy_views_invalidDag_deploysNothing(self):
+        views = [_view('a'), _view('b', 'missing')]
+        deployed = []
+
+        with self.assertRaises(view_deployer.ViewDagError):
+            view_deployer.deploy_views(
+                self.dataset_ref, views,
+                lambda _, view: deployed.append(view.view_id))
+
+        self.assertEqual([], deployed)
+
+    def test_deploy_views_failure_stopsLaterWaves(self):
+        views = [_view('a'), _view('b', 'a')]
+        deployed = []
+
+        def deploy(_, view):
+            if view.view_id == 'a':
+                raise ValueError('deploy failed')
+            deployed.append(view.view_id)
+
+        with self.assertRaises(ValueError):
+            view_deployer.deploy_views(self.dataset_ref, views, deploy)
+
+        self.assertEqual([], deployed)
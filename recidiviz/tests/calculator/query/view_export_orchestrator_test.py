@@ -0,0 +1,205 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for view_export_orchestrator.py."""
+import datetime
+import threading
+import unittest
+from unittest import mock
+
+from google.cloud import bigquery, exceptions
+
+from recidiviz.calculator.query import bqview, view_export_orchestrator
+
+_PROJECT = 'fake-project'
+_VIEWS_DATASET = 'views_dataset'
+_BUCKET = 'bucket'
+
+_BASE_VIEW = bqview.BigQueryView(
+    view_id='base_view',
+    view_query=f'SELECT * FROM `{_PROJECT}.metrics.metric_table`')
+_DERIVED_VIEW = bqview.BigQueryView(
+    view_id='derived_view',
+    view_query=f'SELECT * FROM `{_PROJECT}.{_VIEWS_DATASET}.base_view` '
+               f'JOIN `{_PROJECT}.reference.ref_table` USING (state_code)')
+_DATED_VIEW = bqview.BigQueryView(
+    view_id='dated_view',
+    view_query=f'SELECT * FROM `{_PROJECT}.metrics.metric_table` '
+               f'WHERE year = EXTRACT(YEAR FROM CURRENT_DATE())')
+_ALL_VIEWS = [_BASE_VIEW, _DERIVED_VIEW, _DATED_VIEW]
+
+
+class ViewExportOrchestratorTest(unittest.TestCase):
+    """Tests for view_export_orchestrator.py."""
+
+    def setUp(self):
+        self.dataset_ref = bigquery.dataset.DatasetReference(
+            _PROJECT, _VIEWS_DATASET)
+        self.last_modified = {
+            'metric_table': datetime.datetime(2020, 1, 1),
+            'ref_table': datetime.datetime(2020, 1, 1),
+        }
+        self.calls = []
+        self.lock = threading.Lock()
+
+        self.bq_utils_patcher = mock.patch(
+            'recidiviz.calculator.query.view_export_orchestrator.bq_utils')
+        self.mock_bq_utils = self.bq_utils_patcher.start()
+        self.mock_bq_utils.get_table_last_modified.side_effect = \
+            lambda _, table_id: self.last_modified.get(table_id)
+        self.mock_bq_utils.create_or_update_table_from_view.side_effect = \
+            self._record_call('materialize')
+        self.mock_bq_utils.export_to_cloud_storage.side_effect = \
+            lambda dataset_ref, bucket, view, state_code: self._record_call(
+                'extract')(dataset_ref, view, state_code)
+
+        self.manifest = None
+        self.storage_client_patcher = mock.patch(
+            'recidiviz.calculator.query.view_export_orchestrator.'
+            'storage_client')
+        mock_blob = self.storage_client_patcher.start().return_value \
+            .bucket.return_value.blob.return_value
+        mock_blob.download_as_string.side_effect = self._download_manifest
+        mock_blob.upload_from_string.side_effect = self._upload_manifest
+
+    def tearDown(self):
+        self.bq_utils_patcher.stop()
+        self.storage_client_patcher.stop()
+
+    def _record_call(self, step):
+        def record(_dataset_ref, view, state_code):
+            with self.lock:
+                self.calls.append((step, state_code, view.view_id))
+        return record
+
+    def _download_manifest(self):
+        if self.manifest is None:
+            raise exceptions.NotFound('!')
+        return self.manifest
+
+    def _upload_manifest(self, data, content_type):
+        self.assertEqual('application/json', content_type)
+        self.manifest = data
+
+    def _export(self, views=None, incremental=True):
+        self.calls = []
+        return view_export_orchestrator.export_views_to_cloud_storage(
+            self.dataset_ref, _BUCKET,
+            views_to_export=views or [_BASE_VIEW, _DERIVED_VIEW],
+            all_views=_ALL_VIEWS,
+            state_codes=['US_MO', 'US_ND'],
+            incremental=incremental)
+
+    def test_export_materializesBeforeExtractingEachView(self):
+        result = self._export()
+
+        self.assertCountEqual(
+            [('US_MO', 'base_view'), ('US_ND', 'base_view'),
+             ('US_MO', 'derived_view'), ('US_ND', 'derived_view')],
+            result.exported)
+        self.assertEqual(8, len(self.calls))
+        for _, state_code, view_id in self.calls:
+            self.assertLess(
+                self.calls.index(('materialize', state_code, view_id)),
+                self.calls.index(('extract', state_code, view_id)))
+
+    def test_export_unchangedInputs_skipsAll(self):
+        self._export()
+
+        result = self._export()
+
+        self.assertEqual([], result.exported)
+        self.assertEqual(4, len(result.skipped))
+        self.assertEqual([], self.calls)
+
+    def test_export_upstreamTableOfUpstreamViewChanged_reexports(self):
+        self._export()
+        self.last_modified['metric_table'] = datetime.datetime(2020, 1, 2)
+
+        result = self._export()
+
+        self.assertCountEqual(
+            [('US_MO', 'base_view'), ('US_ND', 'base_view'),
+             ('US_MO', 'derived_view'), ('US_ND', 'derived_view')],
+            result.exported)
+
+    def test_export_onlyOneViewsInputChanged_reexportsOnlyThatView(self):
+        self._export()
+        self.last_modified['ref_table'] = datetime.datetime(2020, 1, 2)
+
+        result = self._export()
+
+        self.assertCountEqual(
+            [('US_MO', 'derived_view'), ('US_ND', 'derived_view')],
+            result.exported)
+
+    def test_export_queryChanged_reexports(self):
+        self._export(views=[_BASE_VIEW])
+        changed_view = bqview.BigQueryView(
+            view_id='base_view',
+            view_query=_BASE_VIEW.view_query + ' WHERE TRUE')
+
+        result = view_export_orchestrator.export_views_to_cloud_storage(
+            self.dataset_ref, _BUCKET, views_to_export=[changed_view],
+            all_views=[changed_view], state_codes=['US_MO'])
+
+        self.assertEqual([('US_MO', 'base_view')], result.exported)
+
+    def test_export_dateDependentView_reexportedOnNewDay(self):
+        self._export(views=[_DATED_VIEW])
+        self.assertEqual(2, len(self._export(views=[_DATED_VIEW]).skipped))
+
+        with mock.patch(
+                'recidiviz.calculator.query.view_export_orchestrator._today',
+                return_value=datetime.date.today() + datetime.timedelta(
+                    days=1)):
+            result = self._export(views=[_DATED_VIEW])
+
+        self.assertEqual(2, len(result.exported))
+
+    def test_export_missingInputTable_neverSkipped(self):
+        del self.last_modified['ref_table']
+        self._export()
+
+        result = self._export()
+
+        self.assertCountEqual(
+            [('US_MO', 'derived_view'), ('US_ND', 'derived_view')],
+            result.exported)
+
+    def test_export_notIncremental_exportsAll(self):
+        self._export()
+
+        result = self._export(incremental=False)
+
+        self.assertEqual(4, len(result.exported))
+
+    def test_export_failure_recordsSuccessfulExportsAndRaises(self):
+        def fail_derived_view(_dataset_ref, view, _state_code):
+            if view.view_id == 'derived_view':
+                raise ValueError('query failed')
+        self.mock_bq_utils.create_or_update_table_from_view.side_effect = \
+            fail_derived_view
+
+        with self.assertRaises(ValueError):
+            self._export()
+
+        self.mock_bq_utils.create_or_update_table_from_view.side_effect = \
+            self._record_call('materialize')
+        result = self._export()
+        self.assertCountEqual(
+            [('US_MO', 'derived_view'), ('US_ND', 'derived_view')],
+            result.exported)
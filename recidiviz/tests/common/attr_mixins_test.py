@@ -62,6 +62,11 @@ class FakeBuildableAttrDeluxe(BuildableAttr):
     field_forward_ref: Optional['FakeBuildableAttr'] = attr.ib(default=None)
 
 
+@attr.s
+class FakeBuildableAttrDeluxeSubclass(FakeBuildableAttrDeluxe):
+    subclass_date_field: Optional[date] = attr.ib(default=None)
+
+
 class BuildableAttrTests(unittest.TestCase):
     """Tests for BuildableAttr base class."""
 
@@ -171,6 +176,40 @@ class BuildableAttrTests(unittest.TestCase):
             # Build from dictionary
             _ = FakeBuildableAttrDeluxe.build_from_dictionary(subject_dict)
 
+    def testBuildFromDictionary_MissingRequiredArgs_RaisesBuilderException(
+            self):
+        subject_dict = {'required_field': 'value',
+                        'enum_nonnull_field': FakeEnum.A.value}
+
+        # Build twice, so the second build uses the cached field converters
+        for _ in range(2):
+            with self.assertRaises(BuilderException):
+                _ = FakeBuildableAttrDeluxe.build_from_dictionary(subject_dict)
+
+    def testBuildFromDictionary_Subclass(self):
+        subject_dict = {'required_field': 'value',
+                        'another_required_field': 'another_value',
+                        'enum_nonnull_field': FakeEnum.A.value,
+                        'date_field': '2001-01-08',
+                        'subclass_date_field': '2002-02-09'}
+
+        # Build the parent class first, so it has cached field converters
+        parent = FakeBuildableAttrDeluxe.build_from_dictionary(subject_dict)
+        subject = \
+            FakeBuildableAttrDeluxeSubclass.build_from_dictionary(subject_dict)
+
+        self.assertEqual(parent, FakeBuildableAttrDeluxe(
+            required_field='value',
+            another_required_field='another_value',
+            enum_nonnull_field=FakeEnum.A,
+            date_field=date(2001, 1, 8)))
+        self.assertEqual(subject, FakeBuildableAttrDeluxeSubclass(
+            required_field='value',
+            another_required_field='another_value',
+            enum_nonnull_field=FakeEnum.A,
+            date_field=date(2001, 1, 8),
+            subclass_date_field=date(2002, 2, 9)))
+
     def testBuildFromDictionary_EmptyDict(self):
         with self.assertRaises(ValueError):
             _ = FakeBuildableAttr.build_from_dictionary({})
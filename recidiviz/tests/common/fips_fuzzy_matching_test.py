@@ -0,0 +1,84 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for fips_fuzzy_matching.py."""
+import difflib
+import random
+from unittest import TestCase
+
+import us
+
+from recidiviz.common import fips, fips_fuzzy_matching
+from recidiviz.common.errors import FipsMergingError
+
+
+def _difflib_best_match(county_name, known_county_names, cutoff):
+    matches = difflib.get_close_matches(county_name, known_county_names, n=1,
+                                        cutoff=cutoff)
+    return matches[0] if matches else None
+
+
+def _misspell(rand: random.Random, name: str) -> str:
+    chars = list(name)
+    for _ in range(rand.randint(0, 3)):
+        i = rand.randrange(len(chars) + 1)
+        edit = rand.choice(['insert', 'delete', 'replace'])
+        if edit == 'insert' or not chars:
+            chars.insert(i, rand.choice('abcdefghijklmnopqrstuvwxyz .'))
+        elif edit == 'delete':
+            del chars[min(i, len(chars) - 1)]
+        else:
+            chars[min(i, len(chars) - 1)] = \
+                rand.choice('abcdefghijklmnopqrstuvwxyz')
+    return ''.join(chars)
+
+
+class TestFipsFuzzyMatching(TestCase):
+    """Tests for fuzzy matching county names."""
+
+    def test_bestMatch_sameAsDifflib(self):
+        rand = random.Random(0)
+        for state in [us.states.IL, us.states.NY, us.states.GA,
+                      us.states.TX, us.states.PA]:
+            known_county_names = list(fips.get_fips_for(state).index)
+            matcher = fips_fuzzy_matching.get_matcher(known_county_names)
+            for _ in range(200):
+                query = _misspell(rand, rand.choice(known_county_names))
+                for cutoff in [0.0, 0.6, 0.75, 0.9]:
+                    expected = _difflib_best_match(
+                        query, known_county_names, cutoff)
+                    if expected is None:
+                        with self.assertRaises(FipsMergingError):
+                            matcher.best_match(query, cutoff)
+                    else:
+                        self.assertEqual(
+                            expected, matcher.best_match(query, cutoff),
+                            f'{query} at cutoff {cutoff}')
+
+    def test_bestMatch_tiedScores_choosesSameAsDifflib(self):
+        known_county_names = ['ab', 'ac', 'ad']
+
+        self.assertEqual(
+            _difflib_best_match('a', known_county_names, 0.5),
+            fips_fuzzy_matching.best_match('a', known_county_names, 0.5))
+
+    def test_bestMatch_noMatch_raises(self):
+        with self.assertRaises(FipsMergingError):
+            fips_fuzzy_matching.best_match('xyz', ['cook', 'dupage'], 0.75)
+
+    def test_getMatcher_reusedForSameNames(self):
+        self.assertIs(fips_fuzzy_matching.get_matcher(['cook', 'dupage']),
+                      fips_fuzzy_matching.get_matcher(['cook', 'dupage']))
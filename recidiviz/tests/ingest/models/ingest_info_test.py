@@ -235,3 +235,53 @@ class TestIngestInfo(unittest.TestCase):
         ii.sort()
         ii_reversed.sort()
         self.assertEqual(ii, ii_reversed)
+
+    def test_sort_matches_str_order(self):
+        def charge(name, **kwargs):
+            return ingest_info.Charge(name=name, **kwargs)
+
+        bookings = [
+            ingest_info.Booking(admission_date='1/1/2000', charges=[
+                charge('b'), charge('a', bond=ingest_info.Bond(amount='10')),
+                charge('ab'), charge('a')]),
+            ingest_info.Booking(admission_date='1/1/2000', charges=[
+                charge('a', bond=ingest_info.Bond(amount='1')), charge('b')]),
+            ingest_info.Booking(admission_date='1/1/200', charges=[
+                charge('c')], holds=[ingest_info.Hold(hold_id='2'),
+                                     ingest_info.Hold(hold_id='10')]),
+            ingest_info.Booking(booking_id='1', charges=[charge('a')]),
+            ingest_info.Booking(),
+        ]
+        ii = IngestInfo(people=[
+            ingest_info.Person(full_name='SAME', bookings=bookings),
+            ingest_info.Person(full_name='SAME', bookings=bookings[1:3]),
+            ingest_info.Person(full_name='SAM'),
+        ])
+
+        ii.sort()
+
+        def assert_str_ordered(objs):
+            self.assertEqual(objs, sorted(objs, key=str))
+
+        assert_str_ordered(ii.people)
+        for person in ii.people:
+            assert_str_ordered(person.bookings)
+            for booking in person.bookings:
+                assert_str_ordered(booking.charges)
+                assert_str_ordered(booking.holds)
+
+    def test_canonical_key(self):
+        charge = ingest_info.Charge(name='charge',
+                                    bond=ingest_info.Bond(amount='10'))
+        booking = ingest_info.Booking(booking_id='1', charges=[charge])
+        key_cache: ingest_info.KeyCache = {}
+
+        self.assertEqual(booking.canonical_key(key_cache), str(booking))
+        self.assertEqual(booking.canonical_key(), str(booking))
+        self.assertEqual(key_cache[id(charge)], str(charge))
+        self.assertEqual(key_cache[id(charge.bond)], str(charge.bond))
+
+        # Cached keys are reused, even once the object changes
+        charge.name = 'other'
+        self.assertNotEqual(booking.canonical_key(key_cache), str(booking))
+        self.assertEqual(booking.canonical_key({}), str(booking))
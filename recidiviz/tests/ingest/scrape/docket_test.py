@@ -19,6 +19,7 @@
 
 
 import json
+import os
 
 import pytest
 from mock import patch
@@ -206,5 +207,64 @@ class TestDocket:
                                               return_immediately=True)
 
 
+class TestLoadBackgroundTargetList:
+    """Tests for load_background_target_list that don't need the emulator."""
+
+    NAMES_FILE = os.path.join(os.path.dirname(__file__), '..', 'testdata',
+                              'docket', 'names', 'last_only.csv')
+
+    def setup_method(self, _test_method):
+        self.create_patcher = patch(
+            'recidiviz.utils.pubsub_helper.create_topic_and_subscription')
+        self.create_patcher.start()
+        self.topic_patcher = patch(
+            'recidiviz.utils.pubsub_helper.get_topic_path',
+            return_value='topic')
+        self.topic_patcher.start()
+        self.publisher_patcher = patch(
+            'recidiviz.utils.pubsub_helper.get_batch_publisher')
+        self.mock_publisher = self.publisher_patcher.start().return_value
+        self.mock_publisher.publish.return_value.add_done_callback \
+            .side_effect = lambda callback: callback(
+                self.mock_publisher.publish.return_value)
+
+    def teardown_method(self, _test_method):
+        self.create_patcher.stop()
+        self.topic_patcher.stop()
+        self.publisher_patcher.stop()
+
+    def _published_names(self):
+        return [json.loads(call[1]['data'].decode())
+                for call in self.mock_publisher.publish.call_args_list]
+
+    def test_load_background_target_list(self):
+        scrape_key = ScrapeKey(REGIONS[0], constants.ScrapeType.BACKGROUND)
+
+        docket.load_background_target_list(scrape_key, self.NAMES_FILE, None)
+
+        names = self._published_names()
+        assert len(names) == 12
+        assert names[0] == ['SMITH', '']
+        assert names[-1] == ['ANDERSON', '']
+
+    def test_load_background_target_list_with_query(self):
+        scrape_key = ScrapeKey(REGIONS[0], constants.ScrapeType.BACKGROUND)
+
+        docket.load_background_target_list(scrape_key, self.NAMES_FILE,
+                                           ('WILSON', ''))
+
+        assert self._published_names() == [
+            ['WILSON', ''], ['MARTINEZ', ''], ['ANDERSON', '']]
+
+    def test_load_background_target_list_publish_fails(self):
+        self.mock_publisher.publish.return_value.result.side_effect = \
+            ValueError('failed')
+        scrape_key = ScrapeKey(REGIONS[0], constants.ScrapeType.BACKGROUND)
+
+        with pytest.raises(ValueError):
+            docket.load_background_target_list(scrape_key, self.NAMES_FILE,
+                                               None)
+
+
 def get_payload():
     return [{'name': 'Jacoby, Mackenzie'}, {'name': 'Jacoby, Clementine'}]
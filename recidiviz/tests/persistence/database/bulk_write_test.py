@@ -0,0 +1,130 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for bulk_write.py."""
+import datetime
+import itertools
+from unittest import TestCase
+
+from mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.elements import TextClause
+
+from recidiviz.common.constants.bond import BondStatus
+from recidiviz.common.constants.charge import ChargeStatus
+from recidiviz.common.constants.county.booking import CustodyStatus
+from recidiviz.common.constants.county.sentence import SentenceStatus
+from recidiviz.persistence.database import bulk_write
+from recidiviz.persistence.database.base_schema import JailsBase
+from recidiviz.persistence.database.schema.county import schema as county_schema
+from recidiviz.persistence.database.session_factory import SessionFactory
+from recidiviz.tests.utils import fakes
+
+_REGION = 'region'
+_JURISDICTION_ID = '12345678'
+_TIME = datetime.datetime(year=2020, month=1, day=2)
+
+
+class _FakePostgresSession:
+    """Records all executed statements, and allocates increasing primary keys
+    for every primary key allocation query."""
+
+    def __init__(self):
+        self.statements = []
+        self._next_key = itertools.count(100)
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement)
+        result = Mock()
+        if isinstance(statement, TextClause):
+            result.fetchall.return_value = \
+                [(next(self._next_key),) for _ in range(params['count'])]
+        return result
+
+    def compiled_upserts(self):
+        return [str(statement.compile(dialect=postgresql.dialect()))
+                for statement in self.statements
+                if not isinstance(statement, TextClause)]
+
+
+class TestBulkWrite(TestCase):
+    """Tests for writing county record trees with multi-row upserts."""
+
+    def test_supportsBulkUpsert_sqlite_isFalse(self):
+        fakes.use_in_memory_sqlite_database(JailsBase)
+        session = SessionFactory.for_schema_base(JailsBase)
+
+        self.assertFalse(bulk_write.supports_bulk_upsert(session))
+
+    def test_upsertCountyRecordTrees_newTree_assignsAndPropagatesKeys(self):
+        bond = county_schema.Bond(status=BondStatus.POSTED.value)
+        sentence = county_schema.Sentence(status=SentenceStatus.SERVING.value)
+        charge = county_schema.Charge(
+            status=ChargeStatus.PENDING.value, bond=bond, sentence=sentence)
+        booking = county_schema.Booking(
+            custody_status=CustodyStatus.IN_CUSTODY.value,
+            last_seen_time=_TIME, first_seen_time=_TIME, charges=[charge])
+        person = county_schema.Person(
+            region=_REGION, jurisdiction_id=_JURISDICTION_ID,
+            bookings=[booking])
+        session = _FakePostgresSession()
+
+        bulk_write.upsert_county_record_trees(session, [person], [])
+
+        for schema_object in [person, booking, charge, bond, sentence]:
+            self.assertIsNotNone(schema_object.get_primary_key())
+        self.assertEqual(person.person_id, booking.person_id)
+        self.assertEqual(booking.booking_id, charge.booking_id)
+        self.assertEqual(bond.bond_id, charge.bond_id)
+        self.assertEqual(sentence.sentence_id, charge.sentence_id)
+        self.assertEqual(booking.booking_id, bond.booking_id)
+        self.assertEqual(booking.booking_id, sentence.booking_id)
+
+        upserts = session.compiled_upserts()
+        self.assertEqual(5, len(upserts))
+        tables_in_order = [upsert.split()[2] for upsert in upserts]
+        self.assertLess(tables_in_order.index('person'),
+                        tables_in_order.index('booking'))
+        self.assertLess(tables_in_order.index('bond'),
+                        tables_in_order.index('charge'))
+        self.assertLess(tables_in_order.index('sentence'),
+                        tables_in_order.index('charge'))
+        for upsert in upserts:
+            self.assertIn('ON CONFLICT', upsert)
+
+    def test_upsertCountyRecordTrees_manyPeople_batchesRowsPerTable(self):
+        people = [county_schema.Person(region=_REGION,
+                                       jurisdiction_id=_JURISDICTION_ID)
+                  for _ in range(3)]
+        session = _FakePostgresSession()
+
+        bulk_write.upsert_county_record_trees(session, people, [])
+
+        self.assertEqual(1, len(session.compiled_upserts()))
+        self.assertEqual(3, len({person.person_id for person in people}))
+
+    def test_upsertCountyRecordTrees_orphanedEntity_onlyUpdatesSetColumns(
+            self):
+        orphaned_charge = county_schema.Charge(
+            charge_id=5, status=ChargeStatus.REMOVED_WITHOUT_INFO.value)
+        session = _FakePostgresSession()
+
+        bulk_write.upsert_county_record_trees(session, [], [orphaned_charge])
+
+        [upsert] = session.compiled_upserts()
+        self.assertIn('ON CONFLICT (charge_id) DO UPDATE SET status', upsert)
+        self.assertNotIn('booking_id', upsert)
+        self.assertEqual(5, orphaned_charge.charge_id)
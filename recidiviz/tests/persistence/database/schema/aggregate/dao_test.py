@@ -20,6 +20,7 @@
 import datetime
 from unittest import TestCase
 
+from mock import patch
 from more_itertools import one
 import pandas as pd
 from sqlalchemy import func
@@ -38,6 +39,10 @@ from recidiviz.tests.utils import fakes
 DATE_SCRAPED = datetime.date(year=2019, month=1, day=1)
 
 
+class _FakeIntegrityError(Exception):
+    pass
+
+
 class TestDao(TestCase):
     """Test that the methods in dao.py correctly read from the SQL database."""
 
@@ -133,12 +138,14 @@ class TestDao(TestCase):
         })
 
         # Act
-        dao.write_df(FlCountyAggregate, subject)
+        result = dao.write_df(FlCountyAggregate, subject)
 
         # Assert
         query = \
             SessionFactory.for_schema_base(JailsBase).query(FlCountyAggregate)
         self.assertEqual(len(query.all()), 1)
+        self.assertEqual(
+            dao.WriteDfResult(rows_inserted=1, rows_skipped=1), result)
 
     def testWriteDf_OverlappingData_WritesNewAndIgnoresDuplicateRows(self):
         # Arrange
@@ -168,9 +175,11 @@ class TestDao(TestCase):
         })
 
         # Act
-        dao.write_df(FlCountyAggregate, subject)
+        result = dao.write_df(FlCountyAggregate, subject)
 
         # Assert
+        self.assertEqual(
+            dao.WriteDfResult(rows_inserted=1, rows_skipped=2), result)
         query = SessionFactory.for_schema_base(JailsBase).query(
             func.sum(FlCountyAggregate.county_population))
         result = one(one(query.all()))
@@ -179,3 +188,112 @@ class TestDao(TestCase):
         # the subject (eg. county_population = 0 for 'Alachua')
         expected_sum_county_populations = 1001056402
         self.assertEqual(result, expected_sum_county_populations)
+
+
+class TestDaoPostgresCopy(TestCase):
+    """Test that dao.py loads DataFrames into Postgres with a single COPY and
+    a single merge statement."""
+
+    def setUp(self):
+        self.engine_patcher = patch(
+            'recidiviz.persistence.database.schema.aggregate.dao.'
+            'SQLAlchemyEngineManager.get_engine_for_schema_base')
+        self.mock_engine = self.engine_patcher.start().return_value
+        self.mock_engine.dialect.name = 'postgresql'
+        self.mock_engine.dialect.dbapi.IntegrityError = _FakeIntegrityError
+        self.mock_cursor = self.mock_engine.raw_connection.return_value \
+            .cursor.return_value.__enter__.return_value
+        self.mock_cursor.fetchall.return_value = [(True,)]
+
+        self.subject = pd.DataFrame({
+            'county_name': ['Alachua', 'Baker'],
+            'county_population': [257062, None],
+            'fips': ['00000', '00001'],
+            'report_date': 2 * [DATE_SCRAPED],
+            'aggregation_window': 2 * [enum_strings.monthly_granularity],
+            'report_frequency': 2 * [enum_strings.monthly_granularity]
+        })
+
+    def tearDown(self):
+        self.engine_patcher.stop()
+
+    def testWriteDf_postgres_copiesAndSkipsExistingRows(self):
+        # Act
+        result = dao.write_df(FlCountyAggregate, self.subject)
+
+        # Assert
+        self.assertEqual(
+            dao.WriteDfResult(rows_inserted=1, rows_skipped=1), result)
+        copy_statement, buffer = self.mock_cursor.copy_expert.call_args[0]
+        self.assertTrue(copy_statement.startswith(
+            'COPY tmp_fl_county_aggregate'))
+        self.assertEqual(
+            'Alachua,257062,00000,2019-01-01,MONTHLY,MONTHLY\n'
+            'Baker,,00001,2019-01-01,MONTHLY,MONTHLY\n', buffer.getvalue())
+        merge_statement = self.mock_cursor.execute.call_args[0][0]
+        self.assertTrue(merge_statement.startswith(
+            'INSERT INTO fl_county_aggregate'))
+        self.assertTrue(merge_statement.endswith(
+            'ON CONFLICT DO NOTHING RETURNING (xmax = 0)'))
+        self.mock_engine.raw_connection.return_value.commit.assert_called_once()
+
+    def testWriteDf_postgresUpdateExisting_upsertsOnUniqueColumns(self):
+        # Act
+        dao.write_df(FlCountyAggregate, self.subject, update_existing=True)
+
+        # Assert
+        merge_statement = self.mock_cursor.execute.call_args[0][0]
+        self.assertIn(
+            'ON CONFLICT (fips, report_date, aggregation_window) DO UPDATE SET '
+            'county_name = EXCLUDED.county_name', merge_statement)
+        self.assertNotIn('fips = EXCLUDED.fips', merge_statement)
+
+    def testWriteDf_postgresUpdateExisting_countsUpdatedRows(self):
+        # Arrange
+        subject = pd.concat([self.subject, self.subject.iloc[1:]])
+        self.mock_cursor.fetchall.return_value = [(True,), (False,)]
+
+        # Act
+        result = dao.write_df(FlCountyAggregate, subject, update_existing=True)
+
+        # Assert
+        # The duplicate row is skipped
+        self.assertEqual(
+            dao.WriteDfResult(rows_inserted=1, rows_skipped=1, rows_updated=1),
+            result)
+
+    def testWriteDf_postgresConstraintViolation_skipsInvalidRows(self):
+        # Arrange
+        def execute(statement, params=None):
+            if statement.startswith('INSERT INTO') and \
+                    params in (None, ('(0,1)',)):
+                raise _FakeIntegrityError
+        self.mock_cursor.execute.side_effect = execute
+        self.mock_cursor.fetchall.side_effect = [
+            [('(0,1)', 'Alachua'), ('(0,2)', 'Baker')], [(True,)]]
+
+        # Act
+        result = dao.write_df(FlCountyAggregate, self.subject)
+
+        # Assert
+        self.assertEqual(
+            dao.WriteDfResult(rows_inserted=1, rows_skipped=1), result)
+        statements = [call[0][0] for call in
+                      self.mock_cursor.execute.call_args_list]
+        self.assertIn('ROLLBACK TO SAVEPOINT merge_all_rows', statements)
+        self.assertIn('ROLLBACK TO SAVEPOINT merge_row', statements)
+        self.assertIn(
+            'FROM tmp_fl_county_aggregate WHERE ctid = %s::tid '
+            'ON CONFLICT DO NOTHING RETURNING (xmax = 0)', statements[-1])
+        self.mock_engine.raw_connection.return_value.commit.assert_called_once()
+
+    def testWriteDf_postgresFailure_rollsBack(self):
+        self.mock_cursor.copy_expert.side_effect = ValueError
+
+        with self.assertRaises(ValueError):
+            dao.write_df(FlCountyAggregate, self.subject)
+
+        connection = self.mock_engine.raw_connection.return_value
+        connection.rollback.assert_called_once()
+        connection.commit.assert_not_called()
+        connection.close.assert_called_once()
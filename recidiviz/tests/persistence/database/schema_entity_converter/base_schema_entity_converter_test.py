@@ -448,4 +448,28 @@ class TestBaseSchemaEntityConverter(TestCase):
         self.assertEqual(converted_root.parents[0].children[1].favorite_toy,
                          toy)
 
+    def test_conversion_plan_compiledOncePerClass(self):
+        converter = TestSchemaEntityConverter()
+        child = entities.Child.new_with_defaults(full_name='Bart')
+        other_child = entities.Child.new_with_defaults(full_name='Lisa')
+
+        # pylint: disable=protected-access
+        plan = converter._get_conversion_plan(child)
+        self.assertIs(plan, TestSchemaEntityConverter()._get_conversion_plan(
+            other_child))
+        self.assertEqual(schema.Child, plan.dst_cls)
+
+        field_plans = {field_plan.field: field_plan
+                       for field_plan in plan.field_plans}
+        self.assertTrue(field_plans['parents'].is_back_edge)
+        self.assertFalse(field_plans['favorite_toy'].is_back_edge)
+        self.assertFalse(field_plans['full_name'].is_back_edge)
+        self.assertIsNone(field_plans['full_name'].enum_cls)
+
+        root_plan = converter._get_conversion_plan(
+            entities.Root.new_with_defaults(type=RootType.SIMPSONS))
+        self.assertEqual(RootType, {field_plan.field: field_plan
+                                    for field_plan in root_plan.field_plans}[
+                                        'type'].enum_cls)
+
     # TODO(1894): Write more unit tests for bugfixes in #1816
@@ -20,7 +20,8 @@ import pytest
 
 from recidiviz.persistence.database.schema_utils import get_all_table_classes, \
     get_state_database_entity_with_name, _get_all_database_entities_in_module, \
-    get_non_history_state_database_entities
+    get_non_history_state_database_entities, \
+    get_state_person_history_table_classes
 
 from recidiviz.persistence.database.schema.aggregate import (
     schema as aggregate_schema
@@ -253,6 +254,19 @@ def test_get_all_table_classes():
         sorted(_table_classes_to_qualified_names(all_table_classes))
 
 
+def test_get_state_person_history_table_classes():
+    history_table_names = [
+        table.name for table in get_state_person_history_table_classes()]
+
+    assert 'state_person_history' in history_table_names
+    assert 'state_incarceration_period_history' in history_table_names
+    assert 'state_agent_history' not in history_table_names
+    assert 'state_person' not in history_table_names
+    for table in get_state_person_history_table_classes():
+        assert table.name.endswith('_history')
+        assert 'person_id' in table.columns
+
+
 def test_get_state_table_class_with_name():
     class_name = 'StateSupervisionViolation'
 
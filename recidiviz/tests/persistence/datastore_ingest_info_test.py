@@ -16,10 +16,13 @@
 # =============================================================================
 
 """Tests for utils/environment.py."""
+# pylint: disable=protected-access
 import json
 from datetime import datetime
 import unittest
 import pytest
+from google.cloud import datastore
+from mock import Mock, patch
 
 from recidiviz.ingest.models.ingest_info import IngestInfo
 from recidiviz.ingest.scrape.task_params import Task
@@ -178,3 +181,90 @@ class TestDatastoreIngestInfo(unittest.TestCase):
         assert results == [batch_ingest_info_data]
         datastore_ingest_info.batch_delete_ingest_infos_for_region(
             'us_state_county')
+
+
+class TestMockedDatastoreIngestInfo(unittest.TestCase):
+    """Tests for the writes, compression and deletes of the
+    DatastoreIngestInfo module, using a mocked Datastore client."""
+
+    def setUp(self):
+        datastore_ingest_info.clear_ds()
+        self.ds_patcher = patch(
+            'recidiviz.persistence.datastore_ingest_info.ds')
+        self.mock_ds = self.ds_patcher.start().return_value
+
+    def tearDown(self):
+        self.ds_patcher.stop()
+        datastore_ingest_info.clear_ds()
+
+    def test_writeIngestInfo_compressesPayload(self):
+        self.mock_ds.key.return_value = datastore.Key(
+            datastore_ingest_info.INGEST_INFO_KIND, project='test-project')
+
+        batch_ingest_info_data = datastore_ingest_info.write_ingest_info(
+            region='us_state_county', session_start_time=datetime.now(),
+            ingest_info=sample_ingest_info('1'), task_hash=123)
+
+        [entity] = self.mock_ds.put.call_args[0]
+        self.assertIsInstance(entity['batch_ingest_info_data'], bytes)
+        self.assertIn('batch_ingest_info_data', entity.exclude_from_indexes)
+        self.assertEqual(batch_ingest_info_data,
+                         datastore_ingest_info._DatastoreIngestInfo
+                         .get_batch_ingest_info_data(entity))
+
+    def test_writeIngestInfo_failedPut_raises(self):
+        self.mock_ds.key.return_value = datastore.Key(
+            datastore_ingest_info.INGEST_INFO_KIND, project='test-project')
+        self.mock_ds.put.side_effect = Exception('write failed')
+
+        with self.assertRaises(
+                datastore_ingest_info.DatastoreWriteIngestInfoError):
+            datastore_ingest_info.write_ingest_info(
+                region='us_state_county', session_start_time=datetime.now(),
+                ingest_info=sample_ingest_info('1'), task_hash=123)
+
+    def test_writeError_failedPut_raises(self):
+        self.mock_ds.key.return_value = datastore.Key(
+            datastore_ingest_info.INGEST_INFO_KIND, project='test-project')
+        self.mock_ds.put.side_effect = Exception('write failed')
+
+        with self.assertRaises(datastore_ingest_info.DatastoreErrorWriteError):
+            datastore_ingest_info.write_error(
+                region='us_state_county', session_start_time=datetime.now(),
+                error='error string', trace_id='trace', task_hash=123)
+
+    def test_getBatchIngestInfoData_uncompressedEntity(self):
+        entity = datastore.Entity()
+        entity['batch_ingest_info_data'] = \
+            datastore_ingest_info.BatchIngestInfoData(
+                task_hash=123, error='error').to_serializable()
+
+        self.assertEqual(
+            datastore_ingest_info.BatchIngestInfoData(task_hash=123,
+                                                      error='error'),
+            datastore_ingest_info._DatastoreIngestInfo
+            .get_batch_ingest_info_data(entity))
+
+    def test_batchDelete_deletesKeysOnlyInChunks(self):
+        keys = [Mock(key=i) for i in range(1201)]
+        self.mock_ds.query.return_value.fetch.return_value = iter(keys)
+
+        datastore_ingest_info.batch_delete_ingest_infos_for_region(
+            'us_state_county')
+
+        self.mock_ds.query.return_value.keys_only.assert_called_once()
+        deleted_chunks = sorted(
+            (call[0][0] for call in self.mock_ds.delete_multi.call_args_list),
+            key=lambda chunk: chunk[0])
+        self.assertEqual([list(range(0, 500)), list(range(500, 1000)),
+                          list(range(1000, 1201))], deleted_chunks)
+
+    def test_batchDelete_failedDelete_raises(self):
+        self.mock_ds.query.return_value.fetch.return_value = iter(
+            [Mock(key=1)])
+        self.mock_ds.delete_multi.side_effect = Exception('delete failed')
+
+        with self.assertRaises(
+                datastore_ingest_info.DatastoreBatchDeleteError):
+            datastore_ingest_info.batch_delete_ingest_infos_for_region(
+                'us_state_county')
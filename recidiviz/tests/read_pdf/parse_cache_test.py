@@ -0,0 +1,79 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for read_pdf/parse_cache.py."""
+import os
+import tempfile
+import unittest
+
+from recidiviz.read_pdf.parse_cache import ParseCache, parse_cache_key, \
+    file_checksum
+
+
+class TestParseCache(unittest.TestCase):
+    """Tests for the local disk cache of parse results."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parseCacheKey_optionOrderDoesNotMatter(self):
+        self.assertEqual(
+            parse_cache_key('md5:abc', {'pages': [1, 2],
+                                        'pandas_options': {'header': None}}),
+            parse_cache_key('md5:abc', {'pandas_options': {'header': None},
+                                        'pages': [1, 2]}))
+
+    def test_parseCacheKey_differentOptionsOrFiles(self):
+        key = parse_cache_key('md5:abc', {'pages': 1})
+
+        self.assertNotEqual(key, parse_cache_key('md5:abc', {'pages': 2}))
+        self.assertNotEqual(key, parse_cache_key('md5:def', {'pages': 1}))
+
+    def test_fileChecksum(self):
+        path = os.path.join(self.tmp_dir.name, 'report.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'contents')
+
+        self.assertEqual(
+            'd1b2a59fbea7e20077af9f91b27e95e865061b270be03ff539ab3b73587882e8',
+            file_checksum(path))
+
+    def test_getAndPut(self):
+        cache = ParseCache(self.cache_dir)
+
+        self.assertIsNone(cache.get('key'))
+        cache.put('key', b'result')
+
+        self.assertEqual(b'result', cache.get('key'))
+        self.assertEqual(b'result', ParseCache(self.cache_dir).get('key'))
+
+    def test_put_overMaxSize_evictsLeastRecentlyUsed(self):
+        cache = ParseCache(self.cache_dir, max_size_bytes=10)
+        cache.put('old', b'12345')
+        cache.put('used', b'12345')
+        os.utime(os.path.join(self.cache_dir, 'old.cache'), (0, 0))
+        os.utime(os.path.join(self.cache_dir, 'used.cache'), (1, 1))
+        cache.get('used')
+
+        cache.put('new', b'12345')
+
+        self.assertIsNone(cache.get('old'))
+        self.assertEqual(b'12345', cache.get('used'))
+        self.assertEqual(b'12345', cache.get('new'))
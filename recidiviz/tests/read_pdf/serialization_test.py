@@ -0,0 +1,69 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for read_pdf/serialization.py."""
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.util.testing import assert_frame_equal
+
+from recidiviz.read_pdf.serialization import serialize_tabula_output, \
+    deserialize_tabula_output
+
+
+class TestSerialization(unittest.TestCase):
+    """Tests for serializing the output of tabula.read_pdf."""
+
+    def test_roundTrip_dataFrame(self):
+        df = pd.DataFrame({
+            'Facility Name': ['One', None],
+            'Population': [13.0, np.nan],
+            'Count': [1, 2],
+        })
+
+        result = deserialize_tabula_output(serialize_tabula_output(df))
+
+        assert_frame_equal(df, result)
+
+    def test_roundTrip_listOfDataFramesWithUnnamedColumns(self):
+        dfs = [pd.DataFrame([['a', 1], ['b', 2]]),
+               pd.DataFrame([[1, 2, 3]], columns=['x', 'x', 'y']),
+               pd.DataFrame()]
+
+        result = deserialize_tabula_output(serialize_tabula_output(dfs))
+
+        self.assertEqual(3, len(result))
+        for expected, actual in zip(dfs, result):
+            assert_frame_equal(expected, actual, check_index_type=False,
+                               check_column_type=False)
+        self.assertEqual([0, 1], result[0].columns.tolist())
+        self.assertEqual(['x', 'x', 'y'], result[1].columns.tolist())
+
+    def test_roundTrip_none(self):
+        self.assertIsNone(
+            deserialize_tabula_output(serialize_tabula_output(None)))
+
+    def test_serialize_unexpectedType_raises(self):
+        with self.assertRaises(ValueError):
+            serialize_tabula_output('not a DataFrame')
+
+    def test_serialize_multiIndexColumns_raises(self):
+        df = pd.DataFrame([[1, 2]], columns=pd.MultiIndex.from_tuples(
+            [('Population', 'Male'), ('Population', 'Female')]))
+
+        with self.assertRaises(ValueError):
+            serialize_tabula_output([df])
@@ -0,0 +1,105 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for server_blueprints.py."""
+import unittest
+from unittest import mock
+
+from flask import Blueprint
+
+from recidiviz import server_blueprints
+from recidiviz.server_blueprints import BlueprintSpec
+
+scrape_blueprint = Blueprint('test_scrape', __name__)
+status_blueprint = Blueprint('test_status', __name__)
+export_blueprint = Blueprint('test_export', __name__)
+
+
+@scrape_blueprint.route('/start')
+def _start():
+    return 'start'
+
+
+@status_blueprint.route('/status')
+def _status():
+    return 'status'
+
+
+@export_blueprint.route('/export')
+def _export():
+    return 'export'
+
+
+_BLUEPRINTS = {
+    'scrape': BlueprintSpec(__name__, 'scrape_blueprint', '/scraper'),
+    'status': BlueprintSpec(__name__, 'status_blueprint', '/scraper'),
+    'export': BlueprintSpec(__name__, 'export_blueprint', '/export_manager'),
+}
+
+_ROLES = {
+    'all': ['scrape', 'status', 'export'],
+    'scrape': ['scrape'],
+}
+
+
+class CreateAppTest(unittest.TestCase):
+    """Tests for create_app."""
+
+    def test_all_role(self):
+        app = server_blueprints.create_app(
+            'all', blueprints=_BLUEPRINTS, roles=_ROLES)
+        client = app.test_client()
+
+        self.assertEqual(client.get('/scraper/start').data, b'start')
+        self.assertEqual(client.get('/scraper/status').data, b'status')
+        self.assertEqual(client.get('/export_manager/export').data, b'export')
+        self.assertEqual(client.get('/missing').status_code, 404)
+
+    def test_role_loads_other_blueprints_lazily(self):
+        configure_app = mock.Mock()
+        app = server_blueprints.create_app(
+            'scrape', configure_app=configure_app, blueprints=_BLUEPRINTS,
+            roles=_ROLES)
+        client = app.test_client()
+
+        self.assertEqual(
+            {rule.rule for rule in app.url_map.iter_rules()
+             if rule.endpoint != 'static'},
+            {'/scraper/start'})
+        self.assertEqual(configure_app.call_count, 1)
+
+        self.assertEqual(client.get('/scraper/start').data, b'start')
+        self.assertEqual(configure_app.call_count, 1)
+
+        # A lazily loaded blueprint that shares a prefix with a loaded one
+        self.assertEqual(client.get('/scraper/status').data, b'status')
+        self.assertEqual(client.get('/export_manager/export').data, b'export')
+        self.assertEqual(client.get('/export_manager/export').data, b'export')
+        self.assertEqual(configure_app.call_count, 3)
+
+        self.assertEqual(client.get('/scraper/missing').status_code, 404)
+        self.assertEqual(client.get('/missing').status_code, 404)
+        self.assertEqual(configure_app.call_count, 3)
+
+    def test_unknown_role(self):
+        with self.assertRaises(ValueError):
+            server_blueprints.create_app(
+                'unknown', blueprints=_BLUEPRINTS, roles=_ROLES)
+
+    def test_roles_reference_blueprints(self):
+        for role, names in server_blueprints.ROLES.items():
+            for name in names:
+                self.assertIn(name, server_blueprints.BLUEPRINTS, role)
@@ -0,0 +1,104 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Tests for pubsub_helper.BoundedPublisher."""
+import threading
+import unittest
+from concurrent import futures
+
+from mock import patch
+
+from recidiviz.utils import pubsub_helper
+
+
+class FakePublisher:
+    """A publisher whose futures are only resolved when the test chooses."""
+
+    def __init__(self):
+        self.published = []
+        self.pending = []
+
+    def publish(self, topic_path, data):
+        future = futures.Future()
+        self.published.append((topic_path, data))
+        self.pending.append(future)
+        return future
+
+    def resolve_all(self, error=None):
+        pending, self.pending = self.pending, []
+        for future in pending:
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result('message_id')
+
+
+class TestBoundedPublisher(unittest.TestCase):
+    """Tests for BoundedPublisher."""
+
+    def setUp(self):
+        self.fake_publisher = FakePublisher()
+        self.publisher_patcher = patch(
+            'recidiviz.utils.pubsub_helper.get_batch_publisher',
+            return_value=self.fake_publisher)
+        self.publisher_patcher.start()
+
+    def tearDown(self):
+        self.publisher_patcher.stop()
+
+    def test_publish_and_wait(self):
+        publisher = pubsub_helper.BoundedPublisher('topic', max_in_flight=10)
+        for i in range(5):
+            publisher.publish(str(i).encode())
+        self.fake_publisher.resolve_all()
+
+        self.assertEqual(publisher.wait(), 5)
+        self.assertEqual(publisher.num_bytes, 5)
+        self.assertEqual(self.fake_publisher.published,
+                         [('topic', str(i).encode()) for i in range(5)])
+
+    def test_publish_blocks_when_window_is_full(self):
+        publisher = pubsub_helper.BoundedPublisher('topic', max_in_flight=2)
+        publisher.publish(b'1')
+        publisher.publish(b'2')
+
+        third_published = threading.Event()
+
+        def publish_third():
+            publisher.publish(b'3')
+            third_published.set()
+
+        thread = threading.Thread(target=publish_third)
+        thread.start()
+        self.assertFalse(third_published.wait(0.1))
+        self.assertEqual(len(self.fake_publisher.published), 2)
+
+        self.fake_publisher.resolve_all()
+        self.assertTrue(third_published.wait(5))
+        thread.join()
+
+        self.fake_publisher.resolve_all()
+        self.assertEqual(publisher.wait(), 3)
+
+    def test_publish_error_is_raised(self):
+        publisher = pubsub_helper.BoundedPublisher('topic', max_in_flight=10)
+        publisher.publish(b'1')
+        self.fake_publisher.resolve_all(error=ValueError('failed'))
+
+        with self.assertRaises(ValueError):
+            publisher.publish(b'2')
+        with self.assertRaises(ValueError):
+            publisher.wait()
@@ -118,9 +118,11 @@ class TestRegions(TestCase):
 
     def setup_method(self, _test_method):
         regions.REGIONS = {}
+        regions.REGION_REGISTRIES = {}
 
     def teardown_method(self, _test_method):
         regions.REGIONS = {}
+        regions.REGION_REGISTRIES = {}
 
     def test_get_region_manifest(self):
         manifest = with_manifest(regions.get_region_manifest, 'us_ny')
@@ -206,6 +208,63 @@ class TestRegions(TestCase):
             direct = region.get_ingestor()
             assert direct is mock_direct
 
+    def test_get_ingestor_cached(self):
+        mock_package = Mock()
+        mock_package.UsNyScraper.side_effect = Mock
+
+        module_obj = {
+            'recidiviz.ingest.scrape.regions.us_ny.us_ny_scraper': mock_package}
+        region = with_manifest(regions.get_region, 'us_ny')
+        with patch('importlib.import_module', module_obj.get):
+            scraper = region.get_ingestor()
+            assert region.get_ingestor() is scraper
+            assert regions.get_region('us_ny').get_ingestor() is scraper
+        mock_package.UsNyScraper.assert_called_once()
+
+    def test_get_enum_overrides_cached(self):
+        mock_package = Mock()
+        mock_scraper = mock_package.UsNyScraper.return_value
+
+        module_obj = {
+            'recidiviz.ingest.scrape.regions.us_ny.us_ny_scraper': mock_package}
+        region = with_manifest(regions.get_region, 'us_ny')
+        with patch('importlib.import_module', module_obj.get):
+            overrides = region.get_enum_overrides()
+            assert region.get_enum_overrides() is overrides
+        assert overrides is mock_scraper.get_enum_overrides.return_value
+        mock_package.UsNyScraper.assert_called_once()
+        mock_scraper.get_enum_overrides.assert_called_once()
+
+    @patch('pkgutil.iter_modules',
+           return_value=fake_modules('us_ny', 'us_in', 'us_ca'))
+    def test_region_registry(self, _mock_modules):
+        registry = with_manifest(regions.get_region_registry)
+
+        assert registry.region_codes() == {'us_ny', 'us_in', 'us_ca'}
+        assert registry.regions_by_code['us_ny'].agency_name == \
+            'Department of Corrections and Community Supervision'
+        assert registry.region_codes_in_timezone(
+            pytz.timezone('America/Los_Angeles')) == {'us_ca'}
+        assert registry.region_codes_in_environment('production') == \
+            {'us_ny', 'us_in', 'us_ca'}
+        assert registry.region_codes_in_environment('staging') == set()
+        assert registry.region_codes_with_agency_type('prison') == \
+            {'us_ny', 'us_in'}
+        assert registry.region_codes_with_agency_type('jail') == {'us_ca'}
+
+    @patch('pkgutil.iter_modules',
+           return_value=fake_modules('us_ny', 'us_in', 'us_ca'))
+    def test_region_registry_reads_manifests_once(self, _mock_modules):
+        with patch('recidiviz.utils.regions.open',
+                   side_effect=mock_manifest_open) as mock_open_manifest:
+            registry = regions.get_region_registry()
+            assert regions.get_region_registry() is registry
+            regions.get_supported_scrape_regions()
+            regions.get_supported_scrape_region_codes(
+                timezone=pytz.timezone('America/New_York'))
+            regions.get_region('us_ny')
+        assert mock_open_manifest.call_count == 3
+
     def test_create_queue_name(self):
         region = with_manifest(regions.get_region, 'us_ny')
         assert region.get_queue_name() == 'us-ny-scraper-v2'
@@ -0,0 +1,642 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Benchmarks the identifier and calculator layers of the calculation pipelines
+on synthetic StatePerson graphs, without reading from or writing to BigQuery.
+
+Each person is generated with alternating supervision and incarceration
+periods attached to their sentences, supervision violations with responses
+that lead to revocation admissions, assessments and program assignments. The
+identify, metric combination, combine and produce stages of each pipeline are
+then run in-process by calling the same DoFns and CombineFns the pipelines
+apply, and the time, memory allocated and number of outputs of each stage are
+logged. When allocations are traced, they are measured in a second run on the
+same synthetic data, since tracing them slows the stages down.
+
+Like the pipelines, every dimension is included by default. The number of
+metric combinations of each person grows exponentially with the number of
+dimensions, so excluding some of them allows benchmarking many more people.
+
+usage: benchmark_calculation_pipelines.py [-h]
+    [--pipelines {incarceration,program,recidivism,supervision}
+    [{incarceration,program,recidivism,supervision} ...]]
+    [--num_people NUM_PEOPLE] [--num_periods NUM_PERIODS]
+    [--num_sentences NUM_SENTENCES] [--num_violations NUM_VIOLATIONS]
+    [--num_assessments NUM_ASSESSMENTS]
+    [--num_program_assignments NUM_PROGRAM_ASSIGNMENTS]
+    [--calculation_month_limit CALCULATION_MONTH_LIMIT]
+    [--exclude_dimensions {age_bucket,ethnicity,gender,race,release_facility,stay_length_bucket}
+    [{age_bucket,ethnicity,gender,race,release_facility,stay_length_bucket} ...]]
+    [--seed SEED] [--trace_allocations]
+
+Example:
+python -m recidiviz.tools.benchmark_calculation_pipelines
+python -m recidiviz.tools.benchmark_calculation_pipelines --pipelines supervision --num_people 100 \
+    --exclude_dimensions age_bucket ethnicity gender race
+python -m recidiviz.tools.benchmark_calculation_pipelines --pipelines incarceration program --trace_allocations
+"""
+import argparse
+import datetime
+import logging
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import attr
+import apache_beam as beam
+
+from recidiviz.calculator.pipeline.incarceration import pipeline as incarceration_pipeline
+from recidiviz.calculator.pipeline.program import pipeline as program_pipeline
+from recidiviz.calculator.pipeline.recidivism import pipeline as recidivism_pipeline
+from recidiviz.calculator.pipeline.supervision import pipeline as supervision_pipeline
+from recidiviz.calculator.pipeline.supervision.metrics import SupervisionMetricType
+from recidiviz.calculator.pipeline.utils.beam_utils import AverageFn, SumFn
+from recidiviz.calculator.pipeline.utils.execution_utils import calculation_month_limit_arg
+from recidiviz.common.constants.person_characteristics import Gender, Race, Ethnicity
+from recidiviz.common.constants.state.state_assessment import StateAssessmentType, StateAssessmentLevel
+from recidiviz.common.constants.state.state_incarceration import StateIncarcerationType
+from recidiviz.common.constants.state.state_incarceration_period import StateIncarcerationPeriodStatus, \
+    StateIncarcerationPeriodAdmissionReason, StateIncarcerationPeriodReleaseReason
+from recidiviz.common.constants.state.state_program_assignment import StateProgramAssignmentParticipationStatus
+from recidiviz.common.constants.state.state_sentence import StateSentenceStatus
+from recidiviz.common.constants.state.state_supervision import StateSupervisionType
+from recidiviz.common.constants.state.state_supervision_period import StateSupervisionPeriodStatus, \
+    StateSupervisionPeriodAdmissionReason, StateSupervisionPeriodTerminationReason, StateSupervisionLevel
+from recidiviz.common.constants.state.state_supervision_violation import StateSupervisionViolationType
+from recidiviz.common.constants.state.state_supervision_violation_response import \
+    StateSupervisionViolationResponseType, StateSupervisionViolationResponseDecision
+from recidiviz.persistence.entity.state import entities
+
+_STATE_CODE = 'US_ND'
+
+_PIPELINE_OPTIONS = {
+    'runner': 'DirectRunner',
+    'project': 'benchmark-project',
+    'job_name': 'benchmark-calculation-pipelines',
+    'region': 'local',
+    'job_timestamp': '2020-01-01_00_00_00.000000',
+}
+
+# The dimensions of all pipelines, and the dimensions of only the recidivism pipeline
+_DIMENSIONS = ['age_bucket', 'ethnicity', 'gender', 'race']
+_RECIDIVISM_DIMENSIONS = ['release_facility', 'stay_length_bucket']
+
+_NCIC_CODES = ['0999', '1315', '2399', '3599', '4899', '5299']
+
+
+@attr.s
+class _SyntheticData:
+    """The entities of the synthetic people and the rows of the tables the
+    pipelines look up for them."""
+
+    # The entities of each person, keyed by the names the pipelines group them by
+    person_entities: List[Tuple[int, Dict[str, List[Any]]]] = attr.ib(factory=list)
+
+    # Rows of the supervision period to agent association table, by supervision_period_id
+    supervision_period_to_agent_associations: Dict[int, Dict[str, Any]] = attr.ib(factory=dict)
+
+    # Rows of the supervision violation response to agent association table, by supervision_violation_response_id
+    ssvr_agent_associations: Dict[int, Dict[str, Any]] = attr.ib(factory=dict)
+
+    # Rows of the person to county of residence table, by person_id
+    person_id_to_county: Dict[int, Dict[str, Any]] = attr.ib(factory=dict)
+
+
+@attr.s(frozen=True)
+class _PipelineStages:
+    """The DoFns and CombineFns a pipeline applies to the entities of each
+    person."""
+
+    # Identifies the events of a person from their grouped entities
+    identify_fn: beam.DoFn = attr.ib()
+
+    # Returns the side inputs passed to identify_fn.process
+    identify_args_fn: Callable[[_SyntheticData], List[Any]] = attr.ib()
+
+    # Maps a person and their events to metric combinations tagged by metric type
+    combinations_fn: beam.DoFn = attr.ib()
+
+    # The arguments passed to combinations_fn.process
+    combinations_args: Tuple[Any, ...] = attr.ib()
+    combinations_kwargs: Dict[str, Any] = attr.ib()
+
+    # For each metric type tag, the CombineFn that combines the values of each metric key and the DoFn that produces
+    # the metrics from the combined values
+    metric_fns: Dict[str, Tuple[beam.CombineFn, beam.DoFn]] = attr.ib()
+
+
+@attr.s(frozen=True)
+class _StageResult:
+    """The measurements of running one stage of a pipeline."""
+    stage: str = attr.ib()
+    seconds: float = attr.ib()
+    num_outputs: int = attr.ib()
+
+    # Peak and retained size of the memory allocated by the stage, if allocations were traced
+    peak_bytes: Optional[int] = attr.ib(default=None)
+    retained_bytes: Optional[int] = attr.ib(default=None)
+
+
+class _IdGenerator:
+    """Generates ids that are unique across all synthetic entities."""
+
+    def __init__(self):
+        self._next_id = 0
+
+    def next_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+
+def _random_date(rng: random.Random, start: datetime.date, end: datetime.date) -> datetime.date:
+    return start + datetime.timedelta(days=rng.randint(0, max((end - start).days, 0)))
+
+
+def _add_violations(rng: random.Random, ids: _IdGenerator, person: entities.StatePerson,
+                    supervision_period: entities.StateSupervisionPeriod,
+                    period_end: datetime.date) -> List[entities.StateSupervisionViolationResponse]:
+    """Adds a supervision violation during |supervision_period|, returning the responses to it."""
+    violation = entities.StateSupervisionViolation.new_with_defaults(
+        supervision_violation_id=ids.next_id(), external_id=f'sv{ids.next_id()}', state_code=_STATE_CODE,
+        violation_date=_random_date(rng, supervision_period.start_date, period_end), person=person,
+        supervision_periods=[supervision_period])
+    violation_type = rng.choice(list(StateSupervisionViolationType))
+    violation.supervision_violation_types = [entities.StateSupervisionViolationTypeEntry.new_with_defaults(
+        supervision_violation_type_entry_id=ids.next_id(), state_code=_STATE_CODE, violation_type=violation_type,
+        violation_type_raw_text=violation_type.value, person=person, supervision_violation=violation)]
+    supervision_period.supervision_violation_entries.append(violation)
+
+    responses = []
+    response_date = violation.violation_date
+    for response_type in [StateSupervisionViolationResponseType.VIOLATION_REPORT,
+                          StateSupervisionViolationResponseType.PERMANENT_DECISION]:
+        response_date = _random_date(rng, response_date, response_date + datetime.timedelta(days=30))
+        decision = rng.choice([StateSupervisionViolationResponseDecision.CONTINUANCE,
+                               StateSupervisionViolationResponseDecision.REVOCATION])
+        response = entities.StateSupervisionViolationResponse.new_with_defaults(
+            supervision_violation_response_id=ids.next_id(), external_id=f'svr{ids.next_id()}',
+            state_code=_STATE_CODE, response_type=response_type, response_date=response_date, decision=decision,
+            is_draft=False, person=person, supervision_violation=violation)
+        response.supervision_violation_response_decisions = [
+            entities.StateSupervisionViolationResponseDecisionEntry.new_with_defaults(
+                supervision_violation_response_decision_entry_id=ids.next_id(), state_code=_STATE_CODE,
+                decision=decision, decision_raw_text=decision.value, person=person,
+                supervision_violation_response=response)]
+        responses.append(response)
+
+    violation.supervision_violation_responses = responses
+    return responses
+
+
+def _generate_person(rng: random.Random, ids: _IdGenerator, data: _SyntheticData, person_id: int,
+                     num_periods: int, num_sentences: int, num_violations: int, num_assessments: int,
+                     num_program_assignments: int) -> None:
+    """Generates a person with |num_periods| stints of supervision, each followed by a stint of incarceration except
+    for the last, and adds their entities and the rows they look up to |data|."""
+    today = datetime.date.today()
+
+    person = entities.StatePerson.new_with_defaults(
+        person_id=person_id, gender=rng.choice([Gender.MALE, Gender.FEMALE]),
+        birthdate=datetime.date(rng.randint(1950, 2000), rng.randint(1, 12), rng.randint(1, 28)))
+    person.races = [entities.StatePersonRace.new_with_defaults(
+        person_race_id=ids.next_id(), state_code=_STATE_CODE,
+        race=rng.choice([Race.WHITE, Race.BLACK, Race.AMERICAN_INDIAN_ALASKAN_NATIVE, Race.ASIAN]), person=person)]
+    person.ethnicities = [entities.StatePersonEthnicity.new_with_defaults(
+        person_ethnicity_id=ids.next_id(), state_code=_STATE_CODE,
+        ethnicity=rng.choice([Ethnicity.HISPANIC, Ethnicity.NOT_HISPANIC]), person=person)]
+
+    sentence_group = entities.StateSentenceGroup.new_with_defaults(
+        sentence_group_id=ids.next_id(), external_id=f'sg{person_id}', state_code=_STATE_CODE, person=person)
+    person.sentence_groups = [sentence_group]
+
+    supervision_sentences = [
+        entities.StateSupervisionSentence.new_with_defaults(
+            supervision_sentence_id=ids.next_id(), external_id=f'ss{ids.next_id()}', state_code=_STATE_CODE,
+            supervision_type=StateSupervisionType.PROBATION, person=person, sentence_group=sentence_group)
+        for _ in range(num_sentences)]
+    incarceration_sentences = [
+        entities.StateIncarcerationSentence.new_with_defaults(
+            incarceration_sentence_id=ids.next_id(), external_id=f'is{ids.next_id()}', state_code=_STATE_CODE,
+            incarceration_type=StateIncarcerationType.STATE_PRISON, person=person, sentence_group=sentence_group)
+        for _ in range(num_sentences)]
+    sentence_group.supervision_sentences = supervision_sentences
+    sentence_group.incarceration_sentences = incarceration_sentences
+
+    supervision_periods: List[entities.StateSupervisionPeriod] = []
+    incarceration_periods: List[entities.StateIncarcerationPeriod] = []
+    violation_responses: List[entities.StateSupervisionViolationResponse] = []
+
+    # The stints span the last few years, and the last one is usually ongoing
+    period_start = today - datetime.timedelta(days=num_periods * rng.randint(300, 600))
+    for index in range(num_periods):
+        is_probation = index == 0
+        sentence_index = index % num_sentences
+        period_end = period_start + datetime.timedelta(days=rng.randint(60, 720))
+        is_last = index == num_periods - 1 or period_end >= today
+        is_ongoing = is_last and rng.random() < 0.75
+
+        supervision_period = entities.StateSupervisionPeriod.new_with_defaults(
+            supervision_period_id=ids.next_id(), external_id=f'sp{ids.next_id()}', state_code=_STATE_CODE,
+            status=(StateSupervisionPeriodStatus.UNDER_SUPERVISION if is_ongoing
+                    else StateSupervisionPeriodStatus.TERMINATED),
+            supervision_type=StateSupervisionType.PROBATION if is_probation else StateSupervisionType.PAROLE,
+            start_date=period_start,
+            termination_date=None if is_ongoing else min(period_end, today),
+            admission_reason=(StateSupervisionPeriodAdmissionReason.COURT_SENTENCE if is_probation
+                              else StateSupervisionPeriodAdmissionReason.CONDITIONAL_RELEASE),
+            termination_reason=(None if is_ongoing
+                                else StateSupervisionPeriodTerminationReason.DISCHARGE if is_last
+                                else StateSupervisionPeriodTerminationReason.REVOCATION),
+            supervision_level=rng.choice([StateSupervisionLevel.MINIMUM, StateSupervisionLevel.MEDIUM,
+                                          StateSupervisionLevel.HIGH]),
+            county_code=f'US_ND_COUNTY_{rng.randint(1, 20)}', supervision_site=str(rng.randint(1, 10)),
+            person=person)
+        supervision_periods.append(supervision_period)
+        data.supervision_period_to_agent_associations[supervision_period.supervision_period_id] = {
+            'agent_id': rng.randint(1, 500),
+            'agent_external_id': f'OFFICER{rng.randint(1, 500):04}',
+            'district_external_id': supervision_period.supervision_site,
+            'supervision_period_id': supervision_period.supervision_period_id,
+        }
+
+        # Probation is served on a supervision sentence, and parole on the incarceration sentence of the
+        # preceding incarceration
+        sentence = supervision_sentences[sentence_index] if is_probation \
+            else incarceration_sentences[(index - 1) % num_sentences]
+        sentence.supervision_periods.append(supervision_period)
+        if isinstance(sentence, entities.StateSupervisionSentence):
+            supervision_period.supervision_sentences.append(sentence)
+        else:
+            supervision_period.incarceration_sentences.append(sentence)
+
+        period_responses: List[entities.StateSupervisionViolationResponse] = []
+        for _ in range(rng.randint(0, 2 * num_violations // num_periods + 1)):
+            period_responses.extend(_add_violations(rng, ids, person, supervision_period,
+                                                    min(period_end, today)))
+        for response in period_responses:
+            data.ssvr_agent_associations[response.supervision_violation_response_id] = {
+                'agent_id': rng.randint(1, 500),
+                'agent_external_id': f'OFFICER{rng.randint(1, 500):04}',
+                'district_external_id': supervision_period.supervision_site,
+                'supervision_violation_response_id': response.supervision_violation_response_id,
+            }
+        violation_responses.extend(period_responses)
+
+        if is_last:
+            break
+
+        # The supervision ends in a revocation admission to prison, followed by a release to parole
+        admission_date = period_end
+        release_date = admission_date + datetime.timedelta(days=rng.randint(30, 540))
+        is_released = release_date < today
+        revocation_responses = [response for response in period_responses
+                                if response.response_date and response.response_date <= admission_date]
+
+        incarceration_period = entities.StateIncarcerationPeriod.new_with_defaults(
+            incarceration_period_id=ids.next_id(), external_id=f'ip{ids.next_id()}', state_code=_STATE_CODE,
+            status=(StateIncarcerationPeriodStatus.NOT_IN_CUSTODY if is_released
+                    else StateIncarcerationPeriodStatus.IN_CUSTODY),
+            incarceration_type=StateIncarcerationType.STATE_PRISON,
+            admission_date=admission_date,
+            admission_reason=(StateIncarcerationPeriodAdmissionReason.PROBATION_REVOCATION if is_probation
+                              else StateIncarcerationPeriodAdmissionReason.PAROLE_REVOCATION),
+            release_date=release_date if is_released else None,
+            release_reason=StateIncarcerationPeriodReleaseReason.CONDITIONAL_RELEASE if is_released else None,
+            facility=rng.choice(['NDSP', 'JRCC', 'MRCC', 'DWCRC']),
+            source_supervision_violation_response=revocation_responses[-1] if revocation_responses else None,
+            person=person)
+        incarceration_periods.append(incarceration_period)
+
+        incarceration_sentence = incarceration_sentences[sentence_index]
+        incarceration_sentence.incarceration_periods.append(incarceration_period)
+        incarceration_period.incarceration_sentences.append(incarceration_sentence)
+
+        if not is_released:
+            break
+        period_start = release_date
+
+    _set_sentence_dates(rng, supervision_sentences + incarceration_sentences, ids, person)
+
+    timeline_start = supervision_periods[0].start_date
+    assessments = []
+    for _ in range(num_assessments):
+        assessment_score = rng.randint(0, 54)
+        assessments.append(entities.StateAssessment.new_with_defaults(
+            assessment_id=ids.next_id(), external_id=f'a{ids.next_id()}', state_code=_STATE_CODE,
+            assessment_type=StateAssessmentType.LSIR, assessment_date=_random_date(rng, timeline_start, today),
+            assessment_score=assessment_score,
+            assessment_level=(StateAssessmentLevel.LOW if assessment_score < 24
+                              else StateAssessmentLevel.MEDIUM if assessment_score < 31
+                              else StateAssessmentLevel.HIGH),
+            person=person))
+    person.assessments = assessments
+
+    program_assignments = []
+    for _ in range(num_program_assignments):
+        supervision_period = rng.choice(supervision_periods)
+        program_assignments.append(entities.StateProgramAssignment.new_with_defaults(
+            program_assignment_id=ids.next_id(), external_id=f'pa{ids.next_id()}', state_code=_STATE_CODE,
+            program_id=str(rng.randint(1, 20)),
+            participation_status=rng.choice(list(StateProgramAssignmentParticipationStatus)),
+            referral_date=_random_date(rng, supervision_period.start_date,
+                                       supervision_period.termination_date or today),
+            person=person))
+    person.program_assignments = program_assignments
+
+    data.person_id_to_county[person_id] = {
+        'person_id': person_id,
+        'county_of_residence': f'US_ND_COUNTY_{rng.randint(1, 20)}',
+    }
+
+    data.person_entities.append((person_id, {
+        'person': [person],
+        'sentence_groups': [sentence_group],
+        'supervision_sentences': supervision_sentences,
+        'incarceration_sentences': incarceration_sentences,
+        'supervision_periods': supervision_periods,
+        'incarceration_periods': incarceration_periods,
+        'assessments': assessments,
+        'violation_responses': violation_responses,
+        'program_assignments': program_assignments,
+    }))
+
+
+def _set_sentence_dates(rng: random.Random, sentences: List[Any], ids: _IdGenerator,
+                        person: entities.StatePerson) -> None:
+    """Sets the dates and status of each sentence to span the periods served on it, and gives it a charge."""
+    for sentence in sentences:
+        periods = sentence.supervision_periods + sentence.incarceration_periods
+        start_dates = [getattr(period, 'start_date', None) or getattr(period, 'admission_date', None)
+                       for period in periods]
+        end_dates = [getattr(period, 'termination_date', None) or getattr(period, 'release_date', None)
+                     for period in periods]
+
+        if periods:
+            sentence.start_date = min(start_dates)
+            sentence.completion_date = None if None in end_dates else max(end_dates)
+        else:
+            sentence.start_date = datetime.date.today() - datetime.timedelta(days=rng.randint(3650, 7300))
+            sentence.completion_date = sentence.start_date + datetime.timedelta(days=rng.randint(180, 720))
+
+        sentence.date_imposed = sentence.start_date
+        sentence.status = StateSentenceStatus.SERVING if sentence.completion_date is None \
+            else StateSentenceStatus.COMPLETED
+
+        charge = entities.StateCharge.new_with_defaults(
+            charge_id=ids.next_id(), external_id=f'c{ids.next_id()}', state_code=_STATE_CODE,
+            ncic_code=rng.choice(_NCIC_CODES),
+            offense_date=sentence.start_date - datetime.timedelta(days=rng.randint(30, 365)), person=person)
+        if isinstance(sentence, entities.StateSupervisionSentence):
+            charge.supervision_sentences = [sentence]
+            sentence.projected_completion_date = sentence.start_date + datetime.timedelta(days=rng.randint(365, 1460))
+        else:
+            charge.incarceration_sentences = [sentence]
+            sentence.max_length_days = rng.randint(365, 3650)
+        sentence.charges = [charge]
+
+
+def _generate_data(num_people: int, num_periods: int, num_sentences: int, num_violations: int,
+                   num_assessments: int, num_program_assignments: int, seed: int) -> _SyntheticData:
+    rng = random.Random(seed)
+    ids = _IdGenerator()
+    data = _SyntheticData()
+    for person_id in range(1, num_people + 1):
+        _generate_person(rng, ids, data, person_id, num_periods, num_sentences, num_violations, num_assessments,
+                         num_program_assignments)
+    return data
+
+
+def _pipeline_stages(pipeline: str, calculation_month_limit: int, excluded_dimensions: List[str]) -> _PipelineStages:
+    """Returns the stages of |pipeline|, with every metric type and every dimension but |excluded_dimensions|
+    included."""
+    inclusions = {dimension: dimension not in excluded_dimensions for dimension in _DIMENSIONS}
+
+    if pipeline == 'incarceration':
+        produce_fn = incarceration_pipeline.ProduceIncarcerationMetric()
+        return _PipelineStages(
+            identify_fn=incarceration_pipeline.ClassifyIncarcerationEvents(calculation_month_limit),
+            identify_args_fn=lambda data: [data.person_id_to_county],
+            combinations_fn=incarceration_pipeline.CalculateIncarcerationMetricCombinations(),
+            combinations_args=(calculation_month_limit, inclusions),
+            combinations_kwargs={},
+            metric_fns={tag: (SumFn(), produce_fn) for tag in ['admissions', 'populations', 'releases']})
+
+    if pipeline == 'program':
+        return _PipelineStages(
+            identify_fn=program_pipeline.ClassifyProgramAssignments(),
+            identify_args_fn=lambda data: [data.supervision_period_to_agent_associations],
+            combinations_fn=program_pipeline.CalculateProgramMetricCombinations(),
+            combinations_args=(calculation_month_limit, inclusions),
+            combinations_kwargs={},
+            metric_fns={'referrals': (SumFn(), program_pipeline.ProduceProgramMetrics())})
+
+    if pipeline == 'recidivism':
+        rate_produce_fn = recidivism_pipeline.ProduceReincarcerationRecidivismMetric()
+        return _PipelineStages(
+            identify_fn=recidivism_pipeline.ClassifyReleaseEvents(),
+            identify_args_fn=lambda data: [data.person_id_to_county],
+            combinations_fn=recidivism_pipeline.CalculateRecidivismMetricCombinations(),
+            combinations_args=(),
+            combinations_kwargs={**inclusions, **{dimension: dimension not in excluded_dimensions
+                                                  for dimension in _RECIDIVISM_DIMENSIONS}},
+            metric_fns={
+                'counts': (SumFn(), recidivism_pipeline.ProduceReincarcerationRecidivismCountMetric()),
+                'rates': (AverageFn(), rate_produce_fn),
+                'liberties': (AverageFn(), rate_produce_fn),
+            })
+
+    if pipeline == 'supervision':
+        sum_produce_fn = supervision_pipeline.ProduceSupervisionMetricsForSumMetrics()
+        avg_produce_fn = supervision_pipeline.ProduceSupervisionMetricsForAvgMetrics()
+        return _PipelineStages(
+            identify_fn=supervision_pipeline.ClassifySupervisionTimeBuckets(calculation_month_limit),
+            identify_args_fn=lambda data: [data.ssvr_agent_associations,
+                                           data.supervision_period_to_agent_associations],
+            combinations_fn=supervision_pipeline.CalculateSupervisionMetricCombinations(),
+            combinations_args=(calculation_month_limit,
+                               {**inclusions, **{metric_type.value: True for metric_type in SupervisionMetricType}}),
+            combinations_kwargs={},
+            metric_fns={
+                'populations': (SumFn(), sum_produce_fn),
+                'revocations': (SumFn(), sum_produce_fn),
+                'successes': (AverageFn(), avg_produce_fn),
+                'successful_sentence_lengths': (AverageFn(), avg_produce_fn),
+                'assessment_changes': (AverageFn(), avg_produce_fn),
+                'revocation_analyses': (SumFn(), sum_produce_fn),
+                'revocation_violation_type_analyses': (SumFn(), sum_produce_fn),
+            })
+
+    raise ValueError(f"Unexpected pipeline: {pipeline}")
+
+
+def _identify(stages: _PipelineStages, data: _SyntheticData) -> List[Any]:
+    args = stages.identify_args_fn(data)
+    person_events = []
+    for element in data.person_entities:
+        person_events.extend(stages.identify_fn.process(element, *args))
+    return person_events
+
+
+def _calculate_metric_combinations(stages: _PipelineStages, person_events: List[Any]) -> Dict[str, List[Any]]:
+    combinations_by_tag: Dict[str, List[Any]] = defaultdict(list)
+    for element in person_events:
+        for tagged_output in stages.combinations_fn.process(element, *stages.combinations_args,
+                                                             **stages.combinations_kwargs):
+            combinations_by_tag[tagged_output.tag].append(tagged_output.value)
+    return combinations_by_tag
+
+
+def _combine(stages: _PipelineStages, combinations_by_tag: Dict[str, List[Any]]) -> Dict[str, Dict[str, Any]]:
+    """Combines the values of each metric key like CombinePerKey would."""
+    combined_by_tag: Dict[str, Dict[str, Any]] = {}
+    for tag, combinations in combinations_by_tag.items():
+        combine_fn, _ = stages.metric_fns[tag]
+        accumulators: Dict[str, Any] = {}
+        for metric_key, value in combinations:
+            accumulator = accumulators.get(metric_key)
+            if accumulator is None:
+                accumulator = combine_fn.create_accumulator()
+            accumulators[metric_key] = combine_fn.add_input(accumulator, value)
+        combined_by_tag[tag] = {metric_key: combine_fn.extract_output(accumulator)
+                                for metric_key, accumulator in accumulators.items()}
+    return combined_by_tag
+
+
+def _produce(stages: _PipelineStages, combined_by_tag: Dict[str, Dict[str, Any]]) -> List[Any]:
+    metrics = []
+    for tag, combined in combined_by_tag.items():
+        _, produce_fn = stages.metric_fns[tag]
+        for element in combined.items():
+            metrics.extend(produce_fn.process(element, **_PIPELINE_OPTIONS))
+    return metrics
+
+
+def _run_stages(stages: _PipelineStages, data: _SyntheticData,
+                trace_allocations: bool) -> Tuple[List[_StageResult], List[Any]]:
+    """Runs each stage of the pipeline on the output of the previous stage, returning the measurements of each stage
+    and the produced metrics."""
+    results = []
+
+    def _run_stage(stage: str, stage_fn: Callable[[], Any], count_fn: Callable[[Any], int]):
+        if trace_allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        output = stage_fn()
+        seconds = time.perf_counter() - start
+        retained_bytes, peak_bytes = tracemalloc.get_traced_memory() if trace_allocations else (None, None)
+        if trace_allocations:
+            tracemalloc.stop()
+
+        results.append(_StageResult(stage=stage, seconds=seconds, num_outputs=count_fn(output),
+                                    peak_bytes=peak_bytes, retained_bytes=retained_bytes))
+        return output
+
+    person_events = _run_stage('identify', lambda: _identify(stages, data), len)
+    combinations_by_tag = _run_stage(
+        'calculate metric combinations', lambda: _calculate_metric_combinations(stages, person_events),
+        lambda output: sum(len(combinations) for combinations in output.values()))
+    combined_by_tag = _run_stage(
+        'combine', lambda: _combine(stages, combinations_by_tag),
+        lambda output: sum(len(combined) for combined in output.values()))
+    metrics = _run_stage('produce', lambda: _produce(stages, combined_by_tag), len)
+
+    return results, metrics
+
+
+def run_benchmark(pipelines: List[str], num_people: int, num_periods: int, num_sentences: int,
+                  num_violations: int, num_assessments: int, num_program_assignments: int,
+                  calculation_month_limit: int, excluded_dimensions: List[str], seed: int,
+                  trace_allocations: bool) -> None:
+    """Runs the stages of each of |pipelines| on the same synthetic people, logging the measurements of each stage."""
+
+    def _generate():
+        return _generate_data(num_people, num_periods, num_sentences, num_violations, num_assessments,
+                              num_program_assignments, seed)
+
+    start = time.perf_counter()
+    data = _generate()
+    logging.info("Generated [%s] people with [%s] supervision periods, [%s] incarceration periods and [%s] "
+                 "violation responses in [%.2f] seconds", num_people,
+                 sum(len(person_entities['supervision_periods']) for _, person_entities in data.person_entities),
+                 sum(len(person_entities['incarceration_periods']) for _, person_entities in data.person_entities),
+                 sum(len(person_entities['violation_responses']) for _, person_entities in data.person_entities),
+                 time.perf_counter() - start)
+
+    for pipeline in pipelines:
+        # The identifiers set relationships on the entities they are given, so each run gets fresh entities
+        stages = _pipeline_stages(pipeline, calculation_month_limit, excluded_dimensions)
+        results, metrics = _run_stages(stages, _generate(), trace_allocations=False)
+
+        allocation_results: List[Optional[_StageResult]] = [None] * len(results)
+        if trace_allocations:
+            allocation_results, _ = _run_stages(stages, _generate(), trace_allocations=True)
+
+        for result, allocation_result in zip(results, allocation_results):
+            if allocation_result:
+                logging.info("[%s] %s: [%.3f] seconds, [%s] outputs, [%.1f] MiB peak allocated, "
+                             "[%.1f] MiB retained", pipeline, result.stage, result.seconds, result.num_outputs,
+                             allocation_result.peak_bytes / 2 ** 20, allocation_result.retained_bytes / 2 ** 20)
+            else:
+                logging.info("[%s] %s: [%.3f] seconds, [%s] outputs", pipeline, result.stage, result.seconds,
+                             result.num_outputs)
+
+        logging.info("[%s] total: [%.3f] seconds, [%.2f] people per second", pipeline,
+                     sum(result.seconds for result in results),
+                     num_people / sum(result.seconds for result in results))
+        for metric_class, count in sorted(Counter(type(metric).__name__ for metric in metrics).items()):
+            logging.info("[%s] produced [%s] %s", pipeline, count, metric_class)
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the stages of the calculation pipelines on synthetic people.')
+    parser.add_argument('--pipelines', nargs='+', choices=['incarceration', 'program', 'recidivism', 'supervision'],
+                        default=['incarceration', 'program', 'recidivism', 'supervision'],
+                        help='The pipelines to benchmark.')
+    parser.add_argument('--num_people', type=int, default=10,
+                        help='Number of people to generate.')
+    parser.add_argument('--num_periods', type=int, default=2,
+                        help='Maximum number of supervision periods per person. Each supervision period but the last '
+                             'ends in a revocation admission to an incarceration period.')
+    parser.add_argument('--num_sentences', type=int, default=2,
+                        help='Number of supervision and of incarceration sentences per person.')
+    parser.add_argument('--num_violations', type=int, default=3,
+                        help='Average number of supervision violations per person.')
+    parser.add_argument('--num_assessments', type=int, default=3,
+                        help='Number of assessments per person.')
+    parser.add_argument('--num_program_assignments', type=int, default=1,
+                        help='Number of program assignments per person.')
+    parser.add_argument('--calculation_month_limit', type=calculation_month_limit_arg, default=1,
+                        help='The number of months (including this one) to limit the monthly calculation output to. '
+                             'If set to -1, does not limit the calculations.')
+    parser.add_argument('--exclude_dimensions', nargs='+', choices=sorted(_DIMENSIONS + _RECIDIVISM_DIMENSIONS),
+                        default=[], help='The dimensions to exclude from the metrics.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random generation of people.')
+    parser.add_argument('--trace_allocations', action='store_true',
+                        help='When set, runs the stages a second time to measure the memory they allocate.')
+    return parser
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
+    run_benchmark(arguments.pipelines, arguments.num_people, arguments.num_periods, arguments.num_sentences,
+                  arguments.num_violations, arguments.num_assessments, arguments.num_program_assignments,
+                  arguments.calculation_month_limit, arguments.exclude_dimensions, arguments.seed,
+                  arguments.trace_allocations)
@@ -0,0 +1,215 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Benchmarks hydrating the supervision violations of people with many
+supervision violation responses the way BuildRootEntity does, comparing the
+extractor_utils DoFns against building every row with the attr Builder and
+filtering every relationship property group once per root entity.
+
+usage: benchmark_entity_hydration.py [-h] [--num_people NUM_PEOPLE]
+                                     [--num_violations NUM_VIOLATIONS]
+                                     [--num_responses NUM_RESPONSES]
+
+Example:
+python -m recidiviz.tools.benchmark_entity_hydration
+python -m recidiviz.tools.benchmark_entity_hydration --num_violations 1000
+"""
+import argparse
+import datetime
+import logging
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+import attr
+
+from recidiviz.calculator.pipeline.utils import extractor_utils
+from recidiviz.common.attr_utils import is_enum, is_date, get_enum_cls
+from recidiviz.common.constants.state.state_supervision_violation import \
+    StateSupervisionViolationType
+from recidiviz.common.constants.state.state_supervision_violation_response \
+    import StateSupervisionViolationResponseType, \
+    StateSupervisionViolationResponseDecision
+from recidiviz.persistence.database.schema.state import schema
+from recidiviz.persistence.entity.state import entities
+
+_VIOLATION_TABLE = schema.StateSupervisionViolation.__tablename__
+
+
+def _generate_rows(num_people: int, num_violations: int, num_responses: int) \
+        -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Returns BigQuery-like rows for the violations of |num_people| people
+    and the responses to those violations."""
+    violation_rows = []
+    response_rows = []
+    for person_id in range(1, num_people + 1):
+        for _ in range(num_violations):
+            violation_id = len(violation_rows) + 1
+            violation_rows.append({
+                'supervision_violation_id': violation_id,
+                'person_id': person_id,
+                'external_id': str(violation_id),
+                'state_code': 'US_XX',
+                'violation_type': random.choice(
+                    list(StateSupervisionViolationType)).value,
+                'violation_type_raw_text': None,
+                'violation_date': f'2019-{random.randint(1, 12):02}-01',
+                'is_violent': random.choice([True, False, None]),
+                'is_sex_offense': None,
+                'violated_conditions': None,
+            })
+            for _ in range(num_responses):
+                response_id = len(response_rows) + 1
+                response_rows.append({
+                    'supervision_violation_response_id': response_id,
+                    'supervision_violation_id': violation_id,
+                    'person_id': person_id,
+                    'external_id': str(response_id),
+                    'state_code': 'US_XX',
+                    'response_type': random.choice(
+                        list(StateSupervisionViolationResponseType)).value,
+                    'response_type_raw_text': None,
+                    'response_subtype': None,
+                    'response_date':
+                        f'2019-{random.randint(1, 12):02}-'
+                        f'{random.randint(1, 28):02}',
+                    'decision': random.choice(
+                        list(StateSupervisionViolationResponseDecision)).value,
+                    'decision_raw_text': None,
+                    'revocation_type': None,
+                    'revocation_type_raw_text': None,
+                    'is_draft': False,
+                    'deciding_body_type': None,
+                    'deciding_body_type_raw_text': None,
+                })
+    return violation_rows, response_rows
+
+
+def _build_with_builder(entity_class, row: Dict[str, Any]):
+    """Builds an entity the way build_from_dictionary did before it cached the
+    converters of each class, by inspecting every field on every call."""
+    builder = entity_class.builder()
+    for field, attribute in attr.fields_dict(entity_class).items():
+        if field in row:
+            value = row.get(field)
+            if is_enum(attribute):
+                value = get_enum_cls(attribute)(value) if value else None
+            elif is_date(attribute) and value:
+                value = datetime.datetime.strptime(value, '%Y-%m-%d').date()
+            setattr(builder, field, value)
+    return builder.build()
+
+
+def _hydrate_by_filtering(violation_rows, response_rows) \
+        -> List[entities.StateSupervisionViolation]:
+    """Hydrates the responses on the violations the way BuildRootEntity did
+    before it bucketed related entities by root id."""
+    grouped: Dict[int, Dict[str, List[Any]]] = {}
+    for row in violation_rows:
+        grouped.setdefault(row['person_id'], {
+            _VIOLATION_TABLE: [], 'supervision_violation_responses': []})[
+                _VIOLATION_TABLE].append(
+                    _build_with_builder(entities.StateSupervisionViolation,
+                                        row))
+    for row in response_rows:
+        grouped[row['person_id']]['supervision_violation_responses'].append(
+            (row['supervision_violation_id'],
+             _build_with_builder(entities.StateSupervisionViolationResponse,
+                                 row)))
+
+    violations = []
+    for entities_dict in grouped.values():
+        for violation in entities_dict[_VIOLATION_TABLE]:
+            violation.supervision_violation_responses.extend(
+                [response for root_id, response
+                 in entities_dict['supervision_violation_responses']
+                 if root_id == violation.get_id()])
+            violations.append(violation)
+    return violations
+
+
+def _hydrate_with_extractor_utils(violation_rows, response_rows) \
+        -> List[entities.StateSupervisionViolation]:
+    """Hydrates the responses on the violations with the DoFns that
+    BuildRootEntity applies."""
+    grouped: Dict[int, Dict[str, List[Any]]] = {}
+    for row in violation_rows:
+        for person_id, violation in extractor_utils._HydrateRootEntity().process(  # pylint: disable=protected-access
+                row, entity_class=entities.StateSupervisionViolation,
+                unifying_id_field='person_id'):
+            grouped.setdefault(person_id, {
+                _VIOLATION_TABLE: [], 'supervision_violation_responses': []})[
+                    _VIOLATION_TABLE].append(violation)
+    for row in response_rows:
+        for person_id, response_tuple in extractor_utils._HydrateEntity().process(  # pylint: disable=protected-access
+                row, entity_class=entities.StateSupervisionViolationResponse,
+                outer_connection_id_field='person_id',
+                inner_connection_id_field='supervision_violation_id'):
+            grouped[person_id]['supervision_violation_responses'].append(
+                response_tuple)
+
+    hydrate_fn = extractor_utils.\
+        _HydrateRootEntitiesWithRelationshipPropertyEntities()  # pylint: disable=protected-access
+    violations = []
+    for person_id, entities_dict in grouped.items():
+        for _, violation in hydrate_fn.process(
+                (person_id, entities_dict),
+                schema_class=schema.StateSupervisionViolation):
+            violations.append(violation)
+    return violations
+
+
+def run_benchmark(num_people: int, num_violations: int,
+                  num_responses: int) -> None:
+    violation_rows, response_rows = _generate_rows(
+        num_people, num_violations, num_responses)
+
+    start = time.perf_counter()
+    violations_by_filtering = _hydrate_by_filtering(
+        violation_rows, response_rows)
+    filtering_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    violations = _hydrate_with_extractor_utils(violation_rows, response_rows)
+    extractor_utils_seconds = time.perf_counter() - start
+
+    if violations != violations_by_filtering:
+        raise ValueError("Hydrated violations differ")
+
+    logging.info("Hydrated [%s] people with [%s] violations of [%s] responses "
+                 "by filtering in [%.2f] seconds", num_people, num_violations,
+                 num_responses, filtering_seconds)
+    logging.info("Hydrated with extractor_utils in [%.2f] seconds",
+                 extractor_utils_seconds)
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark hydrating entities with many related entities.')
+    parser.add_argument('--num_people', type=int, default=5,
+                        help='Number of people to hydrate.')
+    parser.add_argument('--num_violations', type=int, default=500,
+                        help='Number of supervision violations per person.')
+    parser.add_argument('--num_responses', type=int, default=5,
+                        help='Number of responses per supervision violation.')
+    return parser
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
+    run_benchmark(arguments.num_people, arguments.num_violations,
+                  arguments.num_responses)
@@ -0,0 +1,114 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Benchmarks sorting and pruning IngestInfo objects with many people with
+many bookings, comparing IngestInfo.sort against sorting every list by
+comparing the rendered objects.
+
+usage: benchmark_ingest_info_sort.py [-h] [--num_people NUM_PEOPLE]
+                                     [--num_bookings NUM_BOOKINGS]
+                                     [--num_charges NUM_CHARGES]
+
+Example:
+python -m recidiviz.tools.benchmark_ingest_info_sort
+python -m recidiviz.tools.benchmark_ingest_info_sort --num_bookings 100
+"""
+import argparse
+import copy
+import logging
+import random
+import time
+
+from recidiviz.ingest.models.ingest_info import IngestInfo
+
+
+def _generate_ingest_info(num_people: int, num_bookings: int,
+                          num_charges: int) -> IngestInfo:
+    ii = IngestInfo()
+    for _ in range(num_people):
+        person = ii.create_person(
+            full_name=random.choice(['JOHN DOE', 'JANE DOE']),
+            gender=random.choice(['M', 'F', None]))
+        for _ in range(num_bookings):
+            booking = person.create_booking(
+                admission_date=f'1/{random.randint(1, 28)}/2019')
+            booking.create_arrest()
+            booking.create_hold(hold_id=str(random.randint(1, 3)))
+            for _ in range(num_charges):
+                charge = booking.create_charge(
+                    name=random.choice(['THEFT', 'ASSAULT', None]),
+                    status=random.choice(['PENDING', 'SENTENCED']))
+                charge.create_bond(amount=str(random.randint(1, 1000)))
+                charge.create_sentence()
+    return ii
+
+
+def _sort_by_comparison(ii: IngestInfo) -> None:
+    """Sorts |ii| the way IngestInfo.sort did before it cached the keys of
+    objects, by rendering both objects at every comparison."""
+    for person in ii.people:
+        for booking in person.bookings:
+            booking.charges.sort()
+            booking.holds.sort()
+        person.bookings.sort()
+    ii.people.sort()
+
+
+def run_benchmark(num_people: int, num_bookings: int, num_charges: int) -> None:
+    ii = _generate_ingest_info(num_people, num_bookings, num_charges)
+    ii_by_comparison = copy.deepcopy(ii)
+
+    start = time.perf_counter()
+    _sort_by_comparison(ii_by_comparison)
+    comparison_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ii.sort()
+    sort_seconds = time.perf_counter() - start
+
+    if ii != ii_by_comparison:
+        raise ValueError("IngestInfo.sort order differs from str order")
+
+    start = time.perf_counter()
+    ii.prune()
+    prune_seconds = time.perf_counter() - start
+
+    logging.info("Sorted [%s] people with [%s] bookings of [%s] charges by "
+                 "comparison in [%.2f] seconds", num_people, num_bookings,
+                 num_charges, comparison_seconds)
+    logging.info("Sorted with IngestInfo.sort in [%.2f] seconds",
+                 sort_seconds)
+    logging.info("Pruned with IngestInfo.prune in [%.2f] seconds",
+                 prune_seconds)
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark sorting and pruning IngestInfo objects.')
+    parser.add_argument('--num_people', type=int, default=100,
+                        help='Number of people to sort.')
+    parser.add_argument('--num_bookings', type=int, default=50,
+                        help='Number of bookings per person.')
+    parser.add_argument('--num_charges', type=int, default=10,
+                        help='Number of charges per booking.')
+    return parser
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
+    run_benchmark(arguments.num_people, arguments.num_bookings,
+                  arguments.num_charges)
@@ -0,0 +1,73 @@
+# Recidiviz - a data platform for criminal justice reform
+# Copyright (C) 2020 Recidiviz, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# =============================================================================
+"""Benchmarks conversion of fully populated StatePerson trees from entities to
+schema objects and back.
+
+usage: benchmark_schema_entity_converter.py [-h] [--num_people NUM_PEOPLE]
+                                            [--no_back_edges]
+
+Example:
+python -m recidiviz.tools.benchmark_schema_entity_converter
+python -m recidiviz.tools.benchmark_schema_entity_converter --num_people 1000
+"""
+import argparse
+import logging
+import time
+
+from recidiviz.persistence.database.schema_entity_converter.state.\
+    schema_entity_converter import (
+        StateEntityToSchemaConverter,
+        StateSchemaToEntityConverter,
+    )
+from recidiviz.tests.persistence.entity.state.entities_test_utils import \
+    generate_full_graph_state_person
+
+
+def run_benchmark(num_people: int, populate_back_edges: bool) -> None:
+    people = [generate_full_graph_state_person(
+        set_back_edges=populate_back_edges) for _ in range(num_people)]
+
+    start = time.perf_counter()
+    schema_people = StateEntityToSchemaConverter().convert_all(
+        people, populate_back_edges)
+    to_schema_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    StateSchemaToEntityConverter().convert_all(
+        schema_people, populate_back_edges)
+    to_entity_seconds = time.perf_counter() - start
+
+    logging.info("Converted [%s] people to schema objects in [%.2f] seconds",
+                 num_people, to_schema_seconds)
+    logging.info("Converted [%s] people to entities in [%.2f] seconds",
+                 num_people, to_entity_seconds)
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the state schema / entity converters.')
+    parser.add_argument('--num_people', type=int, default=10000,
+                        help='Number of full graph people to convert.')
+    parser.add_argument('--no_back_edges', action='store_true',
+                        help='Convert without populating back edges.')
+    return parser
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = _create_parser().parse_args()
+    run_benchmark(arguments.num_people, not arguments.no_back_edges)
@@ -47,6 +47,7 @@ function deploy_pipelines {
       state_code="$(cat $file | pipenv run yq -r .pipelines[$i].state_code)"
       calculation_month_limit="$(cat $file | pipenv run yq -r .pipelines[$i].calculation_month_limit)"
       metric_types="$(cat $file | pipenv run yq -r .pipelines[$i].metric_types)"
+      incremental="$(cat $file | pipenv run yq -r .pipelines[$i].incremental)"
 
       base_command="pipenv run ${bash_source_dir}/deploy_pipeline_to_template.sh $project $bucket $pipeline $job_name $input $reference_input $output"
 
@@ -54,6 +55,14 @@ function deploy_pipelines {
       [[ ${calculation_month_limit} == "null" ]] || base_command="$base_command $calculation_month_limit"
       [[ ${metric_types} == "null" ]] || base_command="$base_command $metric_types"
 
+      # The other optional arguments are positional, so whether the job runs incrementally is passed in the
+      # environment
+      if [[ ${incremental} == "true" ]]; then
+          export INCREMENTAL_CALCULATIONS=true
+      else
+          export INCREMENTAL_CALCULATIONS=false
+      fi
+
       run_cmd "${base_command}"
       ((i = i + 1))
   done
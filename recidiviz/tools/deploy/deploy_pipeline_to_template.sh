@@ -67,6 +67,7 @@ command="python -m recidiviz.tools.run_calculation_pipelines
 [[ -z "$state_code" ]]  || command="$command --state_code $state_code"
 [[ -z "$calculation_month_limit" ]]  || command="$command --calculation_month_limit=$calculation_month_limit"
 [[ -z "$metric_types" ]] || command="$command --metric_types $metric_types"
+[[ "$INCREMENTAL_CALCULATIONS" != "true" ]] || command="$command --incremental"
 
 
 run_cmd "${command}"
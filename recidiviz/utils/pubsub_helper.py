@@ -22,7 +22,9 @@
 #   if reused with another scraper the background scrapes might need
 #   more time depending on e.g. # results for query 'John Doe'.
 import logging
+import threading
 import time
+from typing import Optional
 
 from google.api_core import exceptions  # pylint: disable=no-name-in-module
 from google.cloud import pubsub
@@ -34,7 +36,19 @@ from recidiviz.utils import metadata, environment
 ACK_DEADLINE_SECONDS = 300
 NUM_GRPC_RETRIES = 2
 
+# Batch settings of the publisher used to publish many messages at once, e.g.
+# when loading a docket. A batch is sent once it reaches either size, or once
+# its first message has waited for the max latency.
+BATCH_MAX_MESSAGES = 1000
+BATCH_MAX_BYTES = 1024 * 1024
+BATCH_MAX_LATENCY_SECONDS = 0.05
+
+# The maximum number of messages a BoundedPublisher has published that have
+# not yet been sent, after which publishing blocks.
+MAX_IN_FLIGHT_MESSAGES = 10000
+
 _publisher = None
+_batch_publisher = None
 _subscriber = None
 
 
@@ -51,6 +65,23 @@ def clear_publisher():
     _publisher = None
 
 
+def get_batch_publisher():
+    global _batch_publisher
+    if not _batch_publisher:
+        _batch_publisher = pubsub.PublisherClient(
+            batch_settings=pubsub.types.BatchSettings(
+                max_messages=BATCH_MAX_MESSAGES,
+                max_bytes=BATCH_MAX_BYTES,
+                max_latency=BATCH_MAX_LATENCY_SECONDS))
+    return _batch_publisher
+
+
+@environment.test_only
+def clear_batch_publisher():
+    global _batch_publisher
+    _batch_publisher = None
+
+
 def get_subscriber():
     global _subscriber
     if not _subscriber:
@@ -133,3 +164,65 @@ def publish_message_to_topic(message: str, topic: str):
     publisher = get_publisher()
     topic_path = publisher.topic_path(metadata.project_id(), topic)
     publisher.publish(topic_path, data=message.encode('utf-8'))
+
+
+class BoundedPublisher:
+    """Publishes messages to a single topic through the batch publisher,
+    keeping at most |max_in_flight| messages in flight.
+
+    publish() blocks while |max_in_flight| messages are waiting to be sent, so
+    publishing a very large number of messages neither buffers them all in
+    memory nor holds a future for each of them. The first publish error is
+    raised by the next call to publish() or wait().
+    """
+
+    def __init__(self, topic_path: str,
+                 max_in_flight: int = MAX_IN_FLIGHT_MESSAGES):
+        self.topic_path = topic_path
+        self.max_in_flight = max_in_flight
+        self.num_published = 0
+        self.num_bytes = 0
+
+        self._publisher = get_batch_publisher()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._error: Optional[Exception] = None
+
+    def publish(self, data: bytes) -> None:
+        self._raise_if_failed()
+        self._slots.acquire()
+        try:
+            future = self._publisher.publish(self.topic_path, data=data)
+        except Exception:
+            self._slots.release()
+            raise
+        self.num_bytes += len(data)
+        future.add_done_callback(self._on_published)
+
+    def wait(self) -> int:
+        """Waits until all published messages have been sent, and returns the
+        number of messages sent."""
+        for _ in range(self.max_in_flight):
+            self._slots.acquire()
+        for _ in range(self.max_in_flight):
+            self._slots.release()
+        self._raise_if_failed()
+        return self.num_published
+
+    def _on_published(self, future) -> None:
+        try:
+            future.result()
+        except Exception as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+        else:
+            with self._lock:
+                self.num_published += 1
+        finally:
+            self._slots.release()
+
+    def _raise_if_failed(self) -> None:
+        with self._lock:
+            if self._error is not None:
+                raise self._error
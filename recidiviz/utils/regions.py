@@ -23,11 +23,13 @@ criminal justice data and calculate metrics.
 import importlib
 import os
 import pkgutil
+import threading
+from collections import defaultdict
 from datetime import datetime, tzinfo
 from enum import Enum
 from itertools import chain
-from types import ModuleType
-from typing import Any, Dict, Optional, Set, Union
+from types import MappingProxyType, ModuleType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Set, Union
 from typing import List
 
 import attr
@@ -47,6 +49,23 @@ class RemovedFromWebsite(Enum):
 # Cache of the `Region` objects.
 REGIONS: Dict[str, 'Region'] = {}
 
+# Cache of the `RegionRegistry` of scraper regions (False) and direct ingest
+# regions (True).
+REGION_REGISTRIES: Dict[bool, 'RegionRegistry'] = {}
+
+_REGION_REGISTRIES_LOCK = threading.Lock()
+
+# Guards the creation of cached ingestors. Reentrant, since creating an
+# ingestor may look up its region.
+_INGESTOR_CACHE_LOCK = threading.RLock()
+
+_INGESTOR_CACHE_KEY = 'ingestor'
+_ENUM_OVERRIDES_CACHE_KEY = 'enum_overrides'
+
+# The C YAML loader is much faster, but is only available if PyYAML was built
+# against libyaml.
+_YAML_LOADER = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+
 @attr.s(frozen=True)
 class Region:
     """Constructs region entity with attributes and helper functions
@@ -93,6 +112,10 @@ class Region:
     is_stoppable: Optional[bool] = attr.ib(default=False)
     is_direct_ingest: Optional[bool] = attr.ib(default=False)
 
+    # The ingestor and enum overrides of the region, created on first use.
+    _ingestor_cache: Dict[str, Any] = attr.ib(init=False, factory=dict,
+                                              repr=False, eq=False)
+
     def __attrs_post_init__(self):
         if self.queue and self.shared_queue:
             raise ValueError(
@@ -103,9 +126,19 @@ class Region:
     def get_ingestor(self):
         """Retrieve an ingest object for a particular region
 
+        The ingestor is created the first time it is retrieved, and the same
+        instance is returned for every later call.
+
         Returns:
             An instance of the region's ingest class (e.g., UsNyScraper)
         """
+        with _INGESTOR_CACHE_LOCK:
+            if _INGESTOR_CACHE_KEY not in self._ingestor_cache:
+                self._ingestor_cache[_INGESTOR_CACHE_KEY] = \
+                    self._create_ingestor()
+            return self._ingestor_cache[_INGESTOR_CACHE_KEY]
+
+    def _create_ingestor(self):
         ingest_module = 'direct' if self.is_direct_ingest else 'scrape'
         ingest_type_name = 'Controller' if self.is_direct_ingest else 'Scraper'
 
@@ -120,10 +153,13 @@ class Region:
 
     def get_enum_overrides(self):
         """Retrieves the overrides object of a region"""
-        obj = self.get_ingestor()
-        if obj:
-            return obj.get_enum_overrides()
-        return EnumOverrides.empty()
+        with _INGESTOR_CACHE_LOCK:
+            if _ENUM_OVERRIDES_CACHE_KEY not in self._ingestor_cache:
+                obj = self.get_ingestor()
+                self._ingestor_cache[_ENUM_OVERRIDES_CACHE_KEY] = \
+                    obj.get_enum_overrides() if obj \
+                    else EnumOverrides.empty()
+            return self._ingestor_cache[_ENUM_OVERRIDES_CACHE_KEY]
 
     def get_queue_name(self):
         """Returns the name of the queue to be used for the region"""
@@ -141,6 +177,86 @@ class Region:
         return not environment.in_gae_production() \
             or self.environment == environment.get_gae_environment()
 
+
+@attr.s(frozen=True)
+class RegionRegistry:
+    """An immutable index of every region of one ingest type.
+
+    Building the registry reads every region manifest once. Afterwards, regions
+    can be looked up by timezone, environment or agency type without reading
+    any manifests.
+    """
+
+    is_direct_ingest: bool = attr.ib()
+    regions_by_code: Mapping[str, Region] = attr.ib()
+    _codes_by_timezone: Mapping[tzinfo, FrozenSet[str]] = attr.ib()
+    _codes_by_environment: Mapping[Union[str, bool], FrozenSet[str]] = \
+        attr.ib()
+    _codes_by_agency_type: Mapping[str, FrozenSet[str]] = attr.ib()
+
+    @classmethod
+    def build(cls, is_direct_ingest: bool) -> 'RegionRegistry':
+        base_region_module = direct_ingest_regions_module \
+            if is_direct_ingest else scraper_regions_module
+        all_regions = {
+            region_code: get_region(region_code,
+                                    is_direct_ingest=is_direct_ingest)
+            for region_code in _get_region_codes_in_module(base_region_module)}
+
+        codes_by_timezone: Dict[tzinfo, Set[str]] = defaultdict(set)
+        codes_by_environment: Dict[Union[str, bool], Set[str]] = \
+            defaultdict(set)
+        codes_by_agency_type: Dict[str, Set[str]] = defaultdict(set)
+        for region_code, region in all_regions.items():
+            codes_by_timezone[region.timezone].add(region_code)
+            codes_by_environment[region.environment].add(region_code)
+            codes_by_agency_type[region.agency_type].add(region_code)
+
+        return cls(
+            is_direct_ingest=is_direct_ingest,
+            regions_by_code=MappingProxyType(all_regions),
+            codes_by_timezone=_freeze_index(codes_by_timezone),
+            codes_by_environment=_freeze_index(codes_by_environment),
+            codes_by_agency_type=_freeze_index(codes_by_agency_type))
+
+    def region_codes(self) -> FrozenSet[str]:
+        return frozenset(self.regions_by_code)
+
+    def region_codes_in_timezone(self, timezone: tzinfo) -> Set[str]:
+        """Returns the codes of all regions whose timezone currently has the
+        same UTC offset as |timezone|."""
+        dt = datetime.now()
+        offset = timezone.utcoffset(dt)
+        return {region_code
+                for region_timezone, region_codes
+                in self._codes_by_timezone.items()
+                if region_timezone.utcoffset(dt) == offset
+                for region_code in region_codes}
+
+    def region_codes_in_environment(
+            self, region_environment: Union[str, bool]) -> FrozenSet[str]:
+        return self._codes_by_environment.get(region_environment, frozenset())
+
+    def region_codes_with_agency_type(self,
+                                      agency_type: str) -> FrozenSet[str]:
+        return self._codes_by_agency_type.get(agency_type, frozenset())
+
+
+def _freeze_index(index: Dict[Any, Set[str]]) -> Mapping[Any, FrozenSet[str]]:
+    return MappingProxyType({key: frozenset(region_codes)
+                             for key, region_codes in index.items()})
+
+
+def get_region_registry(is_direct_ingest: bool = False) -> RegionRegistry:
+    """Returns the RegionRegistry of scraper or direct ingest regions,
+    building it on first use."""
+    with _REGION_REGISTRIES_LOCK:
+        if is_direct_ingest not in REGION_REGISTRIES:
+            REGION_REGISTRIES[is_direct_ingest] = \
+                RegionRegistry.build(is_direct_ingest)
+        return REGION_REGISTRIES[is_direct_ingest]
+
+
 def get_region(region_code: str, is_direct_ingest: bool = False) -> Region:
     global REGIONS
     if region_code not in REGIONS:
@@ -172,7 +288,7 @@ def get_region_manifest(region_code: str,
     with open(os.path.join(os.path.dirname(region_module.__file__),
                            region_code,
                            MANIFEST_NAME)) as region_manifest:
-        return yaml.full_load(region_manifest)
+        return yaml.load(region_manifest, Loader=_YAML_LOADER)
 
 
 def get_supported_scrape_region_codes(timezone: tzinfo = None) -> Set[str]:
@@ -200,19 +316,17 @@ def _get_supported_region_codes_for_base_region_module(
         base_region_module: ModuleType,
         is_direct_ingest: bool,
         timezone: tzinfo = None):
+    if timezone:
+        return get_region_registry(
+            is_direct_ingest=is_direct_ingest).region_codes_in_timezone(
+                timezone)
+    return _get_region_codes_in_module(base_region_module)
 
+
+def _get_region_codes_in_module(base_region_module: ModuleType) -> Set[str]:
     base_region_path = os.path.dirname(base_region_module.__file__)
-    all_region_codes = {region_module.name for region_module
-                        in pkgutil.iter_modules([base_region_path])}
-    if timezone:
-        dt = datetime.now()
-        return {region_code for region_code in all_region_codes
-                if timezone.utcoffset(dt) == \
-                get_region(
-                    region_code,
-                    is_direct_ingest=is_direct_ingest
-                ).timezone.utcoffset(dt)}
-    return all_region_codes
+    return {region_module.name for region_module
+            in pkgutil.iter_modules([base_region_path])}
 
 
 def get_supported_regions() -> List['Region']:
@@ -221,13 +335,13 @@ def get_supported_regions() -> List['Region']:
 
 
 def get_supported_scrape_regions() -> List['Region']:
-    return [get_region(region_code, is_direct_ingest=False)
-            for region_code in get_supported_scrape_region_codes()]
+    return list(get_region_registry(
+        is_direct_ingest=False).regions_by_code.values())
 
 
 def get_supported_direct_ingest_regions() -> List['Region']:
-    return [get_region(region_code, is_direct_ingest=True)
-            for region_code in get_supported_direct_ingest_region_codes()]
+    return list(get_region_registry(
+        is_direct_ingest=True).regions_by_code.values())
 
 
 def validate_region_code(region_code):